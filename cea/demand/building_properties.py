@@ -2,6 +2,10 @@
 Classes of building properties
 """
 
+import hashlib
+import os
+import pickle
+
 import numpy as np
 import pandas as pd
 from geopandas import GeoDataFrame as Gdf
@@ -29,6 +33,10 @@ H_IS = constants.H_IS
 B_F = constants.B_F
 LAMBDA_AT = constants.LAMBDA_AT
 
+# the columnar data of `BuildingProperties` is cached in one file per scenario (see `read_property_store`)
+PROPERTY_STORE_FILE = 'building_properties.pickle'
+PROPERTY_STORE_VERSION = 1
+
 
 class BuildingProperties(object):
     """
@@ -38,7 +46,7 @@ class BuildingProperties(object):
     G. Happle   BuildingPropsThermalLoads   27.05.2016
     """
 
-    def __init__(self, locator, weather_data, building_names=None):
+    def __init__(self, locator, weather_data, building_names=None, cache=False):
         """
         Read building properties from input shape files and construct a new BuildingProperties object.
 
@@ -47,6 +55,9 @@ class BuildingProperties(object):
 
         :param List[str] building_names: list of buildings to read properties
 
+        :param bool cache: read the properties from the property store of the scenario if none of the inputs changed
+            since it was written, else write the properties to the store (see ``read_property_store``)
+
         :returns: BuildingProperties
         :rtype: BuildingProperties
         """
@@ -55,6 +66,33 @@ class BuildingProperties(object):
             building_names = locator.get_zone_building_names()
 
         self.building_names = building_names
+
+        properties = None
+        if cache:
+            store_key = calc_property_store_key(get_property_input_files(locator, building_names), building_names,
+                                                weather_data)
+            properties = read_property_store(get_property_store_file(locator), store_key)
+            if properties is not None:
+                print("read building properties from %s" % get_property_store_file(locator))
+        if properties is None:
+            properties = self._read_properties(locator, weather_data)
+            if cache:
+                write_property_store(get_property_store_file(locator), store_key, properties)
+
+        # save resulting data
+        for attribute, value in properties.items():
+            setattr(self, attribute, value)
+        self._building_index = {building_name: i for i, building_name in enumerate(self._solar_names)}
+        self._rows = {}
+
+    def _read_properties(self, locator, weather_data):
+        """
+        Read and calculate the properties of all buildings from the input files.
+
+        :returns: the columnar data of the BuildingProperties object (attribute name -> DataFrame / array)
+        :rtype: dict
+        """
+        building_names = self.building_names
         print("read input files")
         prop_geometry = Gdf.from_file(locator.get_zone_geometry())
         prop_geometry['footprint'] = prop_geometry.area
@@ -86,24 +124,31 @@ class BuildingProperties(object):
                                                 prop_geometry, prop_HVAC_result)
 
         # get solar properties
-        solar = get_prop_solar(locator, building_names, prop_rc_model, prop_envelope, weather_data).set_index('Name')
+        solar = get_prop_solar(locator, building_names, prop_rc_model, prop_envelope, weather_data)
+
+        # get building systems properties
+        prop_age = prop_typology[['YEAR']]
+        building_systems = calc_building_systems(prop_geometry.loc[building_names],
+                                                 prop_HVAC_result.loc[building_names],
+                                                 prop_age.loc[building_names])
 
         # df_windows = geometry_reader.create_windows(surface_properties, prop_envelope)
         # TODO: to check if the Win_op and height of window is necessary.
         # TODO: maybe mergin branch i9 with CItyGML could help with this
         print("done")
 
-        # save resulting data
-        self._prop_supply_systems = prop_supply_systems
-        self._prop_geometry = prop_geometry
-        self._prop_envelope = prop_envelope
-        self._prop_typology = prop_typology
-        self._prop_HVAC_result = prop_HVAC_result
-        self._prop_comfort = prop_comfort
-        self._prop_internal_loads = prop_internal_loads
-        self._prop_age = prop_typology[['YEAR']]
-        self._solar = solar
-        self._prop_RC_model = prop_rc_model
+        return {'_prop_supply_systems': prop_supply_systems,
+                '_prop_geometry': prop_geometry,
+                '_prop_envelope': prop_envelope,
+                '_prop_typology': prop_typology,
+                '_prop_HVAC_result': prop_HVAC_result,
+                '_prop_comfort': prop_comfort,
+                '_prop_internal_loads': prop_internal_loads,
+                '_prop_age': prop_age,
+                '_solar_names': list(building_names),
+                '_I_sol': solar,
+                '_prop_RC_model': prop_rc_model,
+                '_building_systems': building_systems}
 
     def calc_bounding_box_geom(self, geometry_shapefile):
         import shapefile
@@ -138,45 +183,58 @@ class BuildingProperties(object):
         """get list of all uses (typology types)"""
         return list(set(self._prop_typology['USE'].values))
 
+    def _get_row(self, table, name_building):
+        """
+        Return the properties of a building in ``table`` as a (new) dict. The rows of all buildings are converted to
+        dicts once, which is a lot faster than looking up each building in the DataFrame.
+        """
+        if table not in self._rows:
+            self._rows[table] = getattr(self, table).to_dict('index')
+        return dict(self._rows[table][name_building])
+
     def get_prop_supply_systems(self, name_building):
         """get geometry of a building by name"""
-        return self._prop_supply_systems.loc[name_building].to_dict()
+        return self._get_row('_prop_supply_systems', name_building)
 
     def get_prop_geometry(self, name_building):
         """get geometry of a building by name"""
-        return self._prop_geometry.loc[name_building].to_dict()
+        return self._get_row('_prop_geometry', name_building)
 
     def get_prop_envelope(self, name_building):
         """get the architecture and thermal properties of a building by name"""
-        return self._prop_envelope.loc[name_building].to_dict()
+        return self._get_row('_prop_envelope', name_building)
 
     def get_prop_typology(self, name_building):
         """get the typology properties of a building by name"""
-        return self._prop_typology.loc[name_building].to_dict()
+        return self._get_row('_prop_typology', name_building)
 
     def get_prop_hvac(self, name_building):
         """get HVAC properties of a building by name"""
-        return self._prop_HVAC_result.loc[name_building].to_dict()
+        return self._get_row('_prop_HVAC_result', name_building)
 
     def get_prop_rc_model(self, name_building):
         """get RC-model properties of a building by name"""
-        return self._prop_RC_model.loc[name_building].to_dict()
+        return self._get_row('_prop_RC_model', name_building)
 
     def get_prop_comfort(self, name_building):
         """get comfort properties of a building by name"""
-        return self._prop_comfort.loc[name_building].to_dict()
+        return self._get_row('_prop_comfort', name_building)
 
     def get_prop_internal_loads(self, name_building):
         """get internal loads properties of a building by name"""
-        return self._prop_internal_loads.loc[name_building].to_dict()
+        return self._get_row('_prop_internal_loads', name_building)
 
     def get_prop_age(self, name_building):
         """get age properties of a building by name"""
-        return self._prop_age.loc[name_building].to_dict()
+        return self._get_row('_prop_age', name_building)
 
     def get_solar(self, name_building):
-        """get solar properties of a building by name"""
-        return self._solar.loc[name_building]
+        """get solar properties of a building by name (I_sol is a view into the array of all buildings)"""
+        return {'I_sol': self._I_sol[self._building_index[name_building]]}
+
+    def get_building_systems(self, name_building):
+        """get the building systems properties of a building by name (see `calc_building_systems`)"""
+        return self._building_systems.loc[name_building]
 
     def calc_prop_rc_model(self, locator, typology, envelope, geometry, hvac_temperatures):
         """
@@ -336,7 +394,8 @@ class BuildingProperties(object):
 
         # call all building geometry files in a loop
         for building_name in self.building_names:
-            geometry_data = pd.read_csv(locator.get_radiation_building(building_name))
+            # the areas are in the first row of the radiation file
+            geometry_data = pd.read_csv(locator.get_radiation_building(building_name), nrows=1)
             envelope.loc[building_name, 'Awall_ag'] = geometry_data['walls_east_m2'][0] + \
                                                       geometry_data['walls_west_m2'][0] + \
                                                       geometry_data['walls_south_m2'][0] + \
@@ -407,7 +466,8 @@ class BuildingProperties(object):
                                      internal_loads=self.get_prop_internal_loads(building_name),
                                      age=self.get_prop_age(building_name),
                                      solar=self.get_solar(building_name),
-                                     supply=self.get_prop_supply_systems(building_name))
+                                     supply=self.get_prop_supply_systems(building_name),
+                                     building_systems=self.get_building_systems(building_name))
 
     def get_overrides_columns(self):
         """Return the list of column names in the `overrides.csv` file or an empty list if no such file
@@ -427,14 +487,81 @@ def calc_useful_areas(df):
     return df
 
 
+def get_property_store_file(locator):
+    """scenario/outputs/data/demand/building_properties.pickle"""
+    return os.path.join(locator.get_demand_results_folder(), PROPERTY_STORE_FILE)
+
+
+def get_property_input_files(locator, building_names):
+    """the input files of the building properties, the property store is invalidated if any of them changes"""
+    zone_geometry = locator.get_zone_geometry()
+    input_files = [zone_geometry] + [os.path.splitext(zone_geometry)[0] + extension for extension in ['.dbf', '.shx']]
+    input_files.extend([locator.get_building_air_conditioning(),
+                        locator.get_building_typology(),
+                        locator.get_building_architecture(),
+                        locator.get_building_comfort(),
+                        locator.get_building_internal(),
+                        locator.get_building_supply(),
+                        locator.get_database_supply_assemblies(),
+                        locator.get_database_air_conditioning_systems(),
+                        locator.get_database_envelope_systems()])
+    input_files.extend(locator.get_radiation_building(building_name) for building_name in building_names)
+    return input_files
+
+
+def calc_property_store_key(input_files, building_names, weather_data):
+    """
+    The key of the property store: the modification times (and sizes) of the input files, the building names and a
+    hash of the weather data.
+    """
+    def file_stamp(path):
+        if not os.path.exists(path):
+            return None
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+
+    weather_hash = hashlib.sha256(pd.util.hash_pandas_object(weather_data, index=True).values.tobytes()).hexdigest()
+    return {'version': PROPERTY_STORE_VERSION,
+            'building_names': list(building_names),
+            'input_files': [(path, file_stamp(path)) for path in input_files],
+            'weather': weather_hash}
+
+
+def read_property_store(path, key):
+    """
+    Read the columnar data of a `BuildingProperties` object from the property store at ``path``.
+
+    :return: the data (see ``BuildingProperties._read_properties``) or None if there is no store or it was written
+        for another key (i.e. an input changed)
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'rb') as f:
+            if pickle.load(f) != key:
+                return None
+            return pickle.load(f)
+    except Exception:
+        # a corrupt or incompatible store is simply rebuilt
+        return None
+
+
+def write_property_store(path, key, properties):
+    """write the key and the columnar data of a `BuildingProperties` object to the property store at ``path``"""
+    with open(path, 'wb') as f:
+        pickle.dump(key, f, protocol=pickle.HIGHEST_PROTOCOL)
+        pickle.dump(properties, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
 class BuildingPropertiesRow(object):
     """Encapsulate the data of a single row in the DataSets of BuildingProperties. This class meant to be
     read-only."""
 
     def __init__(self, name, geometry, envelope, typology, hvac,
-                 rc_model, comfort, internal_loads, age, solar, supply):
+                 rc_model, comfort, internal_loads, age, solar, supply, building_systems=None):
         """Create a new instance of BuildingPropertiesRow - meant to be called by BuildingProperties[building_name].
-        Each of the arguments is a pandas Series object representing a row in the corresponding DataFrame."""
+        Each of the arguments is a pandas Series object representing a row in the corresponding DataFrame.
+        The ``building_systems`` are calculated from the other properties if they are not given."""
 
         self.name = name
         self.geometry = geometry
@@ -449,7 +576,9 @@ class BuildingPropertiesRow(object):
         self.age = age
         self.solar = SolarProperties(solar)
         self.supply = supply
-        self.building_systems = self._get_properties_building_systems()
+        if building_systems is None:
+            building_systems = self._get_properties_building_systems()
+        self.building_systems = building_systems
 
     def _get_properties_building_systems(self):
 
@@ -587,6 +716,64 @@ class BuildingPropertiesRow(object):
         return factor
 
 
+def calc_building_systems(geometry, hvac, age):
+    """
+    Vectorized version of `BuildingPropertiesRow._get_properties_building_systems` for all buildings.
+
+    :param geometry: the geometry of the buildings (``BuildingProperties._prop_geometry``)
+    :type geometry: DataFrame
+    :param hvac: the HVAC properties of the buildings (``BuildingProperties._prop_HVAC_result``)
+    :type hvac: DataFrame
+    :param age: the construction year of the buildings (``BuildingProperties._prop_age``)
+    :type age: DataFrame
+
+    :return: building systems properties indexed by building name, same columns as
+        `BuildingPropertiesRow._get_properties_building_systems`
+    :rtype: DataFrame
+    """
+    Ll = geometry['Blength'].values
+    Lw = geometry['Bwidth'].values
+    nf_ag = geometry['floors_ag'].values
+    nf_bg = geometry['floors_bg'].values
+    floor_height = calc_floor_to_floor_height(geometry['height_ag'].values, nf_ag)
+
+    # linear trasmissivity coefficients of piping W/(m.K)
+    year = age['YEAR'].values
+    phi_pipes = [[0.2, 0.3, 0.3] if y >= 1995 else [0.3, 0.4, 0.4] if 1985 <= y < 1995 else [0.4, 0.4, 0.4]
+                 for y in year]
+
+    # Identification of equivalent lengths
+    fforma = geometry['footprint'].values / (Lw * Ll)  # factor form comparison real surface and rectangular
+    Lv = (2 * Ll + 0.0325 * Ll * Lw + 6) * fforma  # length vertical lines
+    no_circulation = (nf_ag < 2) & (nf_bg < 2)
+    Lcww_dis = np.where(no_circulation, 0.0, 2 * (Ll + 2.5 + nf_ag * floor_height) * fforma)
+    Lvww_c = np.where(no_circulation, 0.0, (2 * Ll + 0.0125 * Ll * Lw) * fforma)
+    Lsww_dis = 0.038 * Ll * Lw * nf_ag * floor_height * fforma
+    Lvww_dis = (Ll + 0.0625 * Ll * Lw) * fforma
+
+    hvac = hvac.loc[geometry.index]
+    return pd.DataFrame({'Lcww_dis': Lcww_dis,
+                         'Lsww_dis': Lsww_dis,
+                         'Lv': Lv,
+                         'Lvww_c': Lvww_c,
+                         'Lvww_dis': Lvww_dis,
+                         'Ths_sup_ahu_0': hvac['Tshs0_ahu_C'].values.astype(float),
+                         'Ths_re_ahu_0': (hvac['Tshs0_ahu_C'] - hvac['dThs0_ahu_C']).values.astype(float),
+                         'Ths_sup_aru_0': hvac['Tshs0_aru_C'].values.astype(float),
+                         'Ths_re_aru_0': (hvac['Tshs0_aru_C'] - hvac['dThs0_aru_C']).values.astype(float),
+                         'Ths_sup_shu_0': hvac['Tshs0_shu_C'].values.astype(float),
+                         'Ths_re_shu_0': (hvac['Tshs0_shu_C'] - hvac['dThs0_shu_C']).values.astype(float),
+                         'Tcs_sup_ahu_0': hvac['Tscs0_ahu_C'].values,
+                         'Tcs_re_ahu_0': (hvac['Tscs0_ahu_C'] + hvac['dTcs0_ahu_C']).values,
+                         'Tcs_sup_aru_0': hvac['Tscs0_aru_C'].values,
+                         'Tcs_re_aru_0': (hvac['Tscs0_aru_C'] + hvac['dTcs0_aru_C']).values,
+                         'Tcs_sup_scu_0': hvac['Tscs0_scu_C'].values,
+                         'Tcs_re_scu_0': (hvac['Tscs0_scu_C'] + hvac['dTcs0_scu_C']).values,
+                         'Tww_sup_0': hvac['Tsww0_C'].values,
+                         'Y': phi_pipes,
+                         'fforma': fforma}, index=geometry.index)
+
+
 def weird_division(n, d):
     return n / d if d else 0.0
 
@@ -908,29 +1095,26 @@ def get_envelope_properties(locator, prop_architecture):
 
 def get_prop_solar(locator, building_names, prop_rc_model, prop_envelope, weather_data):
     """
-    Gets the sensible solar gains from calc_Isol_daysim and stores in a dataframe containing building 'Name' and
-    I_sol (incident solar gains).
+    Gets the sensible solar gains from calc_Isol_daysim and stores them in an array with a row per building (in the
+    order of ``building_names``) of I_sol (incident solar gains).
 
     :param locator: an InputLocator for locating the input files
     :param building_names: List of buildings
     :param prop_rc_model: RC model properties of a building by name.
     :param prop_envelope: dataframe containing the building envelope properties.
-    :return: dataframe containing the sensible solar gains for each building by name called result.
-    :rtype: Dataframe
+    :return: array containing the sensible solar gains for each building called result.
+    :rtype: np.ndarray
     """
 
-    # create result data frame
-    list_Isol = []
+    # create result array
+    result = np.empty((len(building_names), HOURS_IN_YEAR))
 
     # for every building
-    for building_name in building_names:
+    for i, building_name in enumerate(building_names):
         thermal_resistance_surface = dict(zip(['RSE_wall', 'RSE_roof', 'RSE_win'],
                                               get_thermal_resistance_surface(prop_envelope.loc[building_name],
                                                                              weather_data)))
-        I_sol = calc_Isol_daysim(building_name, locator, prop_envelope, prop_rc_model, thermal_resistance_surface)
-        list_Isol.append(I_sol)
-
-    result = pd.DataFrame({'Name': list(building_names), 'I_sol': list_Isol})
+        result[i] = calc_Isol_daysim(building_name, locator, prop_envelope, prop_rc_model, thermal_resistance_surface)
 
     return result
 
@@ -984,9 +1168,9 @@ def calc_Isol_daysim(building_name, locator, prop_envelope, prop_rc_model, therm
                  radiation_data['windows_north_kW'] +
                  radiation_data['windows_south_kW']).values * 1000  # in W
 
-    Fsh_win = np.vectorize(blinds.calc_blinds_activation)(I_sol_win,
-                                                          prop_envelope.loc[building_name, 'G_win'],
-                                                          prop_envelope.loc[building_name, 'rf_sh'])
+    Fsh_win = blinds.calc_blinds_activation_array(I_sol_win,
+                                                  prop_envelope.loc[building_name, 'G_win'],
+                                                  prop_envelope.loc[building_name, 'rf_sh'])
 
     I_sol_win = I_sol_win * \
                 Fsh_win * \
@@ -1005,7 +1189,7 @@ def get_thermal_resistance_surface(prop_envelope, weather_data):
     '''
 
     # define surface thermal resistances according to ISO 6946
-    h_c = np.vectorize(calc_hc)(weather_data['windspd_ms'].values)
+    h_c = calc_hc(weather_data['windspd_ms'].values)
     theta_ss = 0.5 * (
             weather_data['skytemp_C'].values +
             np.array([weather_data['drybulb_C'].values[0]] +
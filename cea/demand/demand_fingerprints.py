@@ -0,0 +1,117 @@
+"""
+Fingerprints of the inputs of the demand calculation of each building, used by the incremental mode of the demand
+(``demand:incremental``) to recompute only the buildings whose inputs changed since the last run.
+
+The fingerprint of a building is a hash of its ``BuildingPropertiesRow``, its schedule file, its radiation file, the
+weather file and the settings of the demand that change the results. The fingerprints are stored next to the demand
+results and the results of unchanged buildings are read back for the district totals (see ``read_cached_summaries``).
+"""
+
+import hashlib
+import json
+import os
+import pickle
+
+import pandas as pd
+
+from cea.demand.demand_writers import read_hourly_demand
+
+FINGERPRINTS_FILE = 'demand_fingerprints.json'
+
+# the parameters of the demand section that change the results of a building
+FINGERPRINT_PARAMETERS = ['use_dynamic_infiltration_calculation', 'resolution_output', 'loads_output',
+                          'massflows_output', 'temperatures_output', 'overheating_warning', 'format']
+
+
+def get_fingerprints_file(locator):
+    """scenario/outputs/data/demand/demand_fingerprints.json"""
+    return os.path.join(locator.get_demand_results_folder(), FINGERPRINTS_FILE)
+
+
+def hash_file(path):
+    """return the sha256 hash of the contents of the file (an empty string if the file doesn't exist)"""
+    if not os.path.exists(path):
+        return ''
+    file_hash = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            file_hash.update(block)
+    return file_hash.hexdigest()
+
+
+def calc_fingerprints(locator, building_properties, config):
+    """
+    Calculate the fingerprints of the inputs of the buildings.
+
+    :param locator: An InputLocator to locate input files
+    :type locator: cea.inputlocator.InputLocator
+    :param building_properties: the properties of the buildings to calculate
+    :type building_properties: dict[str, cea.demand.building_properties.BuildingPropertiesRow]
+    :param config: the configuration, the parameters in ``FINGERPRINT_PARAMETERS`` are part of the fingerprint
+    :type config: cea.config.Configuration
+
+    :returns: the fingerprint of each building
+    :rtype: dict[str, str]
+    """
+    shared_inputs = repr([hash_file(locator.get_weather_file())] +
+                         [getattr(config.demand, parameter) for parameter in FINGERPRINT_PARAMETERS]).encode()
+    fingerprints = {}
+    for building_name, bpr in building_properties.items():
+        fingerprint = hashlib.sha256(shared_inputs)
+        fingerprint.update(pickle.dumps(bpr, protocol=4))
+        fingerprint.update(hash_file(locator.get_schedule_model_file(building_name)).encode())
+        fingerprint.update(hash_file(locator.get_radiation_building(building_name)).encode())
+        fingerprints[building_name] = fingerprint.hexdigest()
+    return fingerprints
+
+
+def read_fingerprints(locator):
+    """read the stored fingerprints (an empty dict if there are none)"""
+    try:
+        with open(get_fingerprints_file(locator), 'r') as f:
+            return json.load(f)
+    except (IOError, ValueError):
+        return {}
+
+
+def write_fingerprints(locator, fingerprints):
+    with open(get_fingerprints_file(locator), 'w') as f:
+        json.dump(fingerprints, f, indent=2, sort_keys=True)
+
+
+def remove_fingerprints(locator):
+    """a full demand calculation invalidates the stored fingerprints"""
+    if os.path.exists(get_fingerprints_file(locator)):
+        os.remove(get_fingerprints_file(locator))
+
+
+def read_cached_summaries(locator, building_names, resolution_output='hourly'):
+    """
+    Read back the results of unchanged buildings in the format of the summaries returned by
+    :py:meth:`cea.demand.demand_writers.DemandWriter.results_to_csv`, using the yearly values of the previous
+    ``Total_demand.csv``. Buildings without (complete) results are not returned and need to be recalculated.
+
+    The summaries hold the hourly values of a building, which are only in the results files with the ``hourly``
+    resolution: with the ``monthly`` resolution no results are read back and all the buildings are recalculated.
+
+    :param str resolution_output: the resolution of the results files (``demand:resolution-output``)
+    :returns: the summary of each building with results
+    :rtype: dict[str, dict]
+    """
+    if (not building_names or resolution_output != 'hourly'
+            or not os.path.exists(locator.get_total_demand('csv'))):
+        return {}
+    total_demand = pd.read_csv(locator.get_total_demand('csv'))
+    yearly_columns = list(total_demand.columns)
+    total_demand = total_demand.set_index('Name', drop=False)
+
+    summaries = {}
+    for building_name in building_names:
+        if building_name not in total_demand.index or not os.path.exists(
+                locator.get_demand_results_file(building_name, 'csv')):
+            continue
+        hourly = read_hourly_demand(locator, building_name).set_index('DATE')
+        summaries[building_name] = {'Name': building_name, 'yearly_columns': yearly_columns,
+                                    'yearly': total_demand.loc[building_name].to_dict(),
+                                    'hourly': hourly.drop(columns=['Name', 'x_int'])}
+    return summaries
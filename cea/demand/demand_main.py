@@ -3,6 +3,7 @@
 Analytical energy demand model algorithm
 """
 
+import datetime
 import os
 import time
 import warnings
@@ -15,8 +16,10 @@ from cea import MissingInputDataException
 from cea.demand import thermal_loads
 from cea.demand.building_properties import BuildingProperties
 from cea.utilities import epwreader
+from cea.utilities import profiler
 from cea.utilities.date import get_date_range_hours_from_year
 from cea.demand import demand_writers
+from cea.demand import demand_fingerprints
 from cea.datamanagement.data_migrator import is_3_22
 
 warnings.filterwarnings("ignore")
@@ -79,7 +82,7 @@ def demand_calculation(locator, config):
     print('Running demand calculation for the following buildings=%s' % building_names)
 
     # CALCULATE OBJECT WITH PROPERTIES OF ALL BUILDINGS
-    building_properties = BuildingProperties(locator, weather_data, building_names)
+    building_properties = BuildingProperties(locator, weather_data, building_names, cache=True)
 
     # add a message i2065 of warning. This needs a more elegant solution
     def calc_buildings_less_100m2(building_properties):
@@ -99,13 +102,61 @@ def demand_calculation(locator, config):
             'Warning! The following list of buildings have less than 100 m2 of gross floor area, CEA might fail: %s' % list_buildings_less_100m2)
 
     # DEMAND CALCULATION
-    n = len(building_names)
-    calc_thermal_loads = cea.utilities.parallel.vectorize(thermal_loads.calc_thermal_loads,
-                                                          config.get_number_of_processes(), on_complete=print_progress)
+    # the district totals are summed up in the main process as the buildings complete
+    demand_totals = demand_writers.DemandTotals()
+    profile_records = []
+    bprs = {building_name: building_properties[building_name] for building_name in building_names}
+    buildings_to_calculate = building_names
+    if config.demand.incremental:
+        # only recalculate the buildings whose inputs changed, the results of the others are read back
+        stored_fingerprints = demand_fingerprints.read_fingerprints(locator)
+        fingerprints = demand_fingerprints.calc_fingerprints(locator, bprs, config)
+        cached_summaries = demand_fingerprints.read_cached_summaries(
+            locator, [b for b in building_names if stored_fingerprints.get(b) == fingerprints[b]], resolution_output)
+        for summary in cached_summaries.values():
+            demand_totals.add(summary)
+        buildings_to_calculate = [b for b in building_names if b not in cached_summaries]
+        print('Incremental demand calculation: %i of %i buildings changed' % (len(buildings_to_calculate),
+                                                                              len(building_names)))
+        # forget the buildings to recalculate until they are done
+        for building_name in buildings_to_calculate:
+            stored_fingerprints.pop(building_name, None)
+        demand_fingerprints.write_fingerprints(locator, stored_fingerprints)
+    else:
+        demand_fingerprints.remove_fingerprints(locator)
+
+    n = len(buildings_to_calculate)
+    number_of_processes = config.get_number_of_processes()
+    buildings_per_batch = max(1, min(config.demand.buildings_per_batch, -(-n // number_of_processes)))
+    if buildings_per_batch > 1:
+        # solve the hourly RC-model of several buildings at once (see cea.demand.hourly_procedure_batch)
+        batches = [buildings_to_calculate[i:i + buildings_per_batch] for i in range(0, n, buildings_per_batch)]
+        n = len(batches)
+
+        def on_complete(i, n, args, summaries):
+            print_batch_progress(i, n, args, summaries)
+            for summary in summaries:
+                profile_records.extend(summary.pop('profile', []))
+                demand_totals.add(summary)
+
+        calc_thermal_loads = cea.utilities.parallel.vectorize(thermal_loads.calc_thermal_loads_batch,
+                                                              number_of_processes, on_complete=on_complete)
+        buildings = batches
+        properties = [[bprs[b] for b in batch] for batch in batches]
+    else:
+        def on_complete(i, n, args, summary):
+            print_progress(i, n, args, summary)
+            profile_records.extend(summary.pop('profile', []))
+            demand_totals.add(summary)
+
+        calc_thermal_loads = cea.utilities.parallel.vectorize(thermal_loads.calc_thermal_loads,
+                                                              number_of_processes, on_complete=on_complete)
+        buildings = buildings_to_calculate
+        properties = [bprs[b] for b in buildings_to_calculate]
 
     calc_thermal_loads(
-        building_names,
-        [building_properties[b] for b in building_names],
+        buildings,
+        properties,
         repeat(weather_data, n),
         repeat(date_range, n),
         repeat(locator, n),
@@ -118,9 +169,23 @@ def demand_calculation(locator, config):
         repeat(debug, n))
 
     # WRITE TOTAL YEARLY VALUES
-    demand_writers.YearlyDemandWriter.write_aggregate_buildings(locator, building_names)
-    demand_writers.YearlyDemandWriter.write_aggregate_hourly(locator, building_names)
+    demand_totals.write_aggregate_buildings(locator, building_names)
+    demand_totals.write_aggregate_hourly(locator)
+    if config.demand.incremental:
+        stored_fingerprints.update(fingerprints)
+        demand_fingerprints.write_fingerprints(locator, stored_fingerprints)
     time_elapsed = time.perf_counter() - t0
+    if config.demand.profile:
+        profile_file = os.path.join(locator.get_demand_results_folder(), 'demand_profile.json')
+        profiler.write_report(profile_file, profile_records,
+                              {'cea_version': cea.__version__,
+                               'date': datetime.datetime.now().isoformat(),
+                               'buildings': len(buildings_to_calculate),
+                               'number_of_processes': number_of_processes,
+                               'buildings_per_batch': buildings_per_batch,
+                               'engine': config.demand.engine,
+                               'wall_time_s': time_elapsed})
+        print('Timing report of the demand calculation written to %s' % profile_file)
     print('done - time elapsed: %d.2 seconds' % time_elapsed)
 
 
@@ -128,6 +193,10 @@ def print_progress(i, n, args, _):
     print("Building No. {i} completed out of {n}: {building}".format(i=i + 1, n=n, building=args[0]))
 
 
+def print_batch_progress(i, n, args, _):
+    print("Batch No. {i} completed out of {n}: {buildings}".format(i=i + 1, n=n, buildings=", ".join(args[0])))
+
+
 def main(config):
     assert os.path.exists(config.scenario), 'Scenario not found: %s' % config.scenario
     locator = cea.inputlocator.InputLocator(scenario=config.scenario)
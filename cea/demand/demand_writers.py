@@ -1,14 +1,21 @@
 """
 A collection of classes that write out the demand results files. The default is `HourlyDemandWriter`. A `MonthlyDemandWriter` is provided
 that sums the values up monthly. See the `cea.analysis.sensitivity.sensitivity_demand` module for an example of using
-the `MonthlyDemandWriter`.
+the `MonthlyDemandWriter`. The `HourlyDemandColumnarWriter` additionally writes the hourly results to a Parquet or
+Feather file (``demand:format``), which is read back by `read_hourly_demand` much faster than the csv file.
 """
 
+import os
+
 import numpy as np
 import pandas as pd
 
 FLOAT_FORMAT = '%.3f'
 
+# binary formats of the hourly demand results (see `demand:format`)
+COLUMNAR_FORMATS = ['parquet', 'feather']
+COLUMNAR_COMPRESSION = 'zstd'
+
 
 class DemandWriter(object):
     """
@@ -42,9 +49,15 @@ class DemandWriter(object):
             key='dataset')
 
     def results_to_csv(self, tsd, bpr, locator, date, building_name):
+        """
+        Write the results of a building.
+
+        :return: summary of the results for the district totals, see `DemandTotals`
+        :rtype: dict
+        """
         # save hourly data
-        columns, hourly_data = self.calc_hourly_dataframe(building_name, date, tsd)
-        self.write_to_csv(building_name, columns, hourly_data, locator)
+        hourly_columns, hourly_data = self.calc_hourly_dataframe(building_name, date, tsd)
+        self.write_to_csv(building_name, hourly_columns, hourly_data, locator)
 
         # save annual values to a temp file for YearlyDemandWriter
         columns, data = self.calc_yearly_dataframe(bpr, building_name, tsd)
@@ -52,6 +65,11 @@ class DemandWriter(object):
             locator.get_temporary_file('%(building_name)sT.csv' % locals()),
             index=False, columns=columns, float_format='%.3f', na_rep='nan')
 
+        # hourly values as they are read back from the csv file (see `YearlyDemandWriter.write_aggregate_hourly`)
+        hourly_columns = [column for column in hourly_columns if column not in ['Name', 'x_int']]
+        return {'Name': building_name, 'yearly_columns': columns, 'yearly': data,
+                'hourly': hourly_data[hourly_columns].round(3)}
+
     def calc_yearly_dataframe(self, bpr, building_name, tsd):
         # if printing total values is necessary
         # treating timeseries data from W to MWh
@@ -102,6 +120,8 @@ class HourlyDemandWriter(DemandWriter):
     def write_to_csv(self, building_name, columns, hourly_data, locator):
         hourly_data.to_csv(locator.get_demand_results_file(building_name, 'csv'), columns=columns,
                            float_format=FLOAT_FORMAT, na_rep='nan')
+        # the columnar files of an earlier run would be read instead of the csv file (see `read_hourly_demand`)
+        remove_columnar_demand_files(locator, building_name)
 
     def write_to_hdf5(self, building_name, columns, hourly_data, locator):
         # fixing columns with strings
@@ -109,6 +129,36 @@ class HourlyDemandWriter(DemandWriter):
         hourly_data.to_hdf(locator.get_demand_results_file(building_name, 'hdf'), key='dataset')
 
 
+class HourlyDemandColumnarWriter(HourlyDemandWriter):
+    """
+    Write out the hourly demand results to a Parquet or Feather file (float32 columns) in addition to the csv file.
+    Use `read_hourly_demand` to read the results.
+    """
+
+    def __init__(self, loads, massflows, temperatures, format):
+        super(HourlyDemandColumnarWriter, self).__init__(loads, massflows, temperatures)
+        if format not in COLUMNAR_FORMATS:
+            raise ValueError('Unknown format of the demand results: {format}, expected one of {formats}'.format(
+                format=format, formats=', '.join(COLUMNAR_FORMATS)))
+        self.format = format
+
+    def write_to_csv(self, building_name, columns, hourly_data, locator):
+        super(HourlyDemandColumnarWriter, self).write_to_csv(building_name, columns, hourly_data, locator)
+        self.write_to_columnar(building_name, columns, hourly_data, locator)
+
+    def write_to_columnar(self, building_name, columns, hourly_data, locator):
+        # same columns as the csv file, with the DATE as it is formatted in the csv file
+        data = hourly_data[columns].astype({column: np.float32 for column in columns if column != 'Name'})
+        data.insert(0, 'DATE', hourly_data.index.astype(str))
+        data = data.reset_index(drop=True)
+
+        results_file = locator.get_demand_results_file(building_name, self.format)
+        if self.format == 'parquet':
+            data.to_parquet(results_file, index=False, compression=COLUMNAR_COMPRESSION)
+        else:
+            data.to_feather(results_file, compression=COLUMNAR_COMPRESSION)
+
+
 class MonthlyDemandWriter(DemandWriter):
     """Write out the monthly demand results"""
 
@@ -122,6 +172,7 @@ class MonthlyDemandWriter(DemandWriter):
         monthly_data_new = self.calc_monthly_dataframe(building_name, hourly_data)
         monthly_data_new.to_csv(locator.get_demand_results_file(building_name, 'csv'), index=False,
                                 float_format=FLOAT_FORMAT, na_rep='nan')
+        remove_columnar_demand_files(locator, building_name)
 
     def write_to_hdf5(self, building_name, columns, hourly_data, locator):
         # get monthly totals and rename to MWhyr
@@ -147,11 +198,49 @@ class MonthlyDemandWriter(DemandWriter):
         return monthly_data_new
 
 
+def remove_columnar_demand_files(locator, building_name):
+    """
+    Remove the Parquet and Feather files of the hourly demand results of a building, e.g. when only the csv file is
+    written.
+    """
+    for format in COLUMNAR_FORMATS:
+        results_file = locator.get_demand_results_file(building_name, format)
+        if os.path.exists(results_file):
+            os.remove(results_file)
+
+
+def read_hourly_demand(locator, building_name, usecols=None):
+    """
+    Read the hourly demand results of a building. Reads the Parquet or Feather file written by
+    `HourlyDemandColumnarWriter` if there is one, else the csv file (the other writers remove the columnar files, so
+    they are never outdated). The values are returned as float64 in both cases, so this can be used in place of
+    ``pd.read_csv(locator.get_demand_results_file(building_name), usecols=usecols)``.
+
+    :param locator: the locator of the scenario
+    :type locator: cea.inputlocator.InputLocator
+    :param building_name: name of the building
+    :type building_name: str
+    :param usecols: columns to read (all columns if None)
+    :type usecols: list[str]
+    :rtype: pd.DataFrame
+    """
+    for format in COLUMNAR_FORMATS:
+        results_file = locator.get_demand_results_file(building_name, format)
+        if os.path.exists(results_file):
+            columns = list(usecols) if usecols is not None else None
+            if format == 'parquet':
+                data = pd.read_parquet(results_file, columns=columns)
+            else:
+                data = pd.read_feather(results_file, columns=columns)
+            return data.astype({column: np.float64 for column, dtype in data.dtypes.items() if dtype == np.float32})
+    return pd.read_csv(locator.get_demand_results_file(building_name, 'csv'), usecols=usecols)
+
+
 def aggregate_results(locator, building_names):
     aggregated_hourly_results_df = pd.DataFrame()
 
     for i, building in enumerate(building_names):
-        hourly_results_per_building = pd.read_csv(locator.get_demand_results_file(building)).set_index('DATE')
+        hourly_results_per_building = read_hourly_demand(locator, building).set_index('DATE')
         if i == 0:
             aggregated_hourly_results_df = hourly_results_per_building
         else:
@@ -160,6 +249,44 @@ def aggregate_results(locator, building_names):
     return aggregated_hourly_results_df
 
 
+class DemandTotals(object):
+    """
+    Accumulate the district totals (``Total_demand.csv`` and ``Total_demand_hourly.csv``) from the summaries returned
+    by `DemandWriter.results_to_csv`, as the buildings are completed. This is the same as the `YearlyDemandWriter`,
+    without reading back the results of each building.
+    """
+
+    def __init__(self):
+        self.yearly = {}  # building name -> (columns, values)
+        self.hourly = None
+
+    def add(self, summary):
+        """
+        Add the results of a building, the (large) hourly values are removed from the ``summary``
+        """
+        self.yearly[summary['Name']] = (summary['yearly_columns'], summary['yearly'])
+        hourly = summary.pop('hourly')
+        if self.hourly is None:
+            self.hourly = hourly
+        else:
+            # summed by position: the DATE of results read back from file (see `read_hourly_demand`) is a string
+            self.hourly += hourly[self.hourly.columns].values
+
+    def write_aggregate_buildings(self, locator, building_names):
+        """write the yearly values of the buildings (in the order of ``building_names``) to Total_demand.csv"""
+        if not building_names:
+            df = pd.DataFrame()
+        else:
+            columns = self.yearly[building_names[0]][0]
+            df = pd.DataFrame([self.yearly[building][1] for building in building_names], columns=columns)
+        df.to_csv(locator.get_total_demand('csv'), index=False, float_format='%.3f', na_rep='nan')
+
+    def write_aggregate_hourly(self, locator):
+        """write the sum of the hourly values to Total_demand_hourly.csv"""
+        hourly = self.hourly if self.hourly is not None else pd.DataFrame()
+        hourly.to_csv(locator.get_total_demand_hourly('csv'), index=True, float_format='%.3f', na_rep='nan')
+
+
 class YearlyDemandWriter:
     """Write out the yearly demand results"""
 
@@ -181,7 +308,7 @@ class YearlyDemandWriter:
         aggregated_hourly_results_df = pd.DataFrame()
 
         for i, building in enumerate(building_names):
-            hourly_results_per_building = pd.read_csv(locator.get_demand_results_file(building)).set_index('DATE')
+            hourly_results_per_building = read_hourly_demand(locator, building).set_index('DATE')
             if i == 0:
                 aggregated_hourly_results_df = hourly_results_per_building
             else:
@@ -0,0 +1,517 @@
+# -*- coding: utf-8 -*-
+"""
+Vectorized hourly procedure of the demand model for a batch of buildings.
+
+The hourly loop in :py:func:`cea.demand.thermal_loads.calc_Qhs_Qcs` steps one building at a time through
+``HOURS_IN_YEAR + HOURS_PRE_CONDITIONING`` time steps and solves the SIA 2044 R-C-model with scalar arithmetic. Since
+the hours of a building depend on each other, but the buildings do not, this module steps a whole batch of buildings
+through the hours together: the time step data of the batch is stacked into ``(hours x buildings)`` arrays and each
+time step of the R-C-model is solved for all buildings at once with NumPy. Buildings starting the simulation at a
+different hour (heating season) are stepped through the year in separate groups.
+
+The control logic of :py:mod:`cea.demand.hourly_procedure_heating_cooling_system_load` is reproduced with masks, so
+that the results are identical to the per-building procedure. Only buildings with radiative (or no) heating and
+cooling systems and static infiltration are supported (see :py:func:`is_batch_compatible`), the air-based systems
+(e.g. ``CENTRAL_AC``) need the iterative air-conditioning model and are still calculated building by building.
+"""
+
+import warnings
+
+import numpy as np
+
+from cea.constants import HOURS_IN_YEAR, HOURS_PRE_CONDITIONING
+from cea.demand import rc_model_SIA, space_emission_systems, ventilation_air_flows_simple, constants
+from cea.demand.constants import TEMPERATURE_ZONE_CONTROL_NIGHT_FLUSHING, DELTA_T_NIGHT_FLUSHING
+from cea.demand.control_heating_cooling_systems import convert_date_to_hour, has_heating_system, has_cooling_system
+from cea.demand.latent_loads import convert_rh_to_moisture_content, RHO_A, DELTA_T
+from cea.demand.sensible_loads import calc_hr
+
+SUPPORTED_HEATING_CLASSES = ['NONE', 'RADIATOR', 'FLOOR_HEATING']
+SUPPORTED_COOLING_CLASSES = ['NONE', 'CEILING_COOLING', 'FLOOR_COOLING']
+
+# time step data read by the hourly procedure
+TSD_KEYS_INPUT = ['T_ext', 'T_sky', 'rh_ext', 'RSE_wall', 'RSE_roof', 'RSE_win', 'El', 'Ea', 'Epro', 'Qs', 'w_int',
+                  'Qcdata_sys', 'Qcre_sys', 'ta_hs_set', 'ta_cs_set', 'm_ve_required', 'm_ve_inf']
+
+# time step data written (and partly read from the previous time step) by the hourly procedure
+TSD_KEYS_STATE = ['I_sol_and_I_rad', 'I_rad', 'I_sol', 'm_ve_mech', 'm_ve_window', 'theta_ve_mech', 'x_ve_inf',
+                  'x_ve_mech', 'g_hu_ld', 'g_dhu_ld', 'x_int', 'T_int', 'theta_m', 'theta_c', 'theta_o',
+                  'Qhs_sen_rc', 'Qhs_sen_shu', 'Qhs_sen_ahu', 'Qhs_sen_aru', 'Qhs_lat_ahu', 'Qhs_lat_aru',
+                  'Qhs_sen_sys', 'Qhs_lat_sys', 'Qhs_em_ls', 'Ehs_lat_aux',
+                  'ma_sup_hs_ahu', 'ta_sup_hs_ahu', 'ta_re_hs_ahu', 'ma_sup_hs_aru', 'ta_sup_hs_aru', 'ta_re_hs_aru',
+                  'Qcs_sen_rc', 'Qcs_sen_scu', 'Qcs_sen_ahu', 'Qcs_sen_aru', 'Qcs_lat_ahu', 'Qcs_lat_aru',
+                  'Qcs_sen_sys', 'Qcs_lat_sys', 'Qcs_em_ls',
+                  'ma_sup_cs_ahu', 'ta_sup_cs_ahu', 'ta_re_cs_ahu', 'ma_sup_cs_aru', 'ta_sup_cs_aru', 'ta_re_cs_aru',
+                  'Q_gain_sen_light', 'Q_gain_sen_app', 'Q_gain_sen_pro', 'Q_gain_sen_data', 'Q_gain_sen_peop',
+                  'Q_gain_sen_wall', 'Q_gain_sen_base', 'Q_gain_sen_roof', 'Q_gain_sen_wind', 'Q_gain_sen_vent']
+
+TSD_KEYS_STATUS = ['sys_status_ahu', 'sys_status_aru', 'sys_status_sen']
+
+# time step data set to the same value in every hour by the radiative systems (and without systems), these are not
+# updated in the hourly loop
+TSD_KEYS_ZERO = ['g_hu_ld', 'g_dhu_ld', 'Qhs_sen_ahu', 'Qhs_sen_aru', 'Qhs_lat_sys', 'Ehs_lat_aux', 'ma_sup_hs_ahu',
+                 'ma_sup_hs_aru', 'Qcs_sen_ahu', 'Qcs_sen_aru', 'Qcs_lat_ahu', 'Qcs_lat_aru', 'Qcs_lat_sys',
+                 'ma_sup_cs_ahu', 'ma_sup_cs_aru']
+TSD_KEYS_NAN = ['ta_sup_hs_ahu', 'ta_re_hs_ahu', 'ta_sup_hs_aru', 'ta_re_hs_aru',
+                'ta_sup_cs_ahu', 'ta_re_cs_ahu', 'ta_sup_cs_aru', 'ta_re_cs_aru']
+
+# the status of the sensible system is stored as index into this list during the hourly loop
+SYSTEM_STATUS_SEN = ['system off', 'On', 'Off']
+
+
+def is_batch_compatible(bpr, use_dynamic_infiltration_calculation):
+    """
+    Check if the hourly procedure of a building can be calculated with :py:func:`calc_Qhs_Qcs_batch`.
+
+    :param bpr: building properties row object
+    :type bpr: cea.demand.building_properties.BuildingPropertiesRow
+    :param use_dynamic_infiltration_calculation: the infiltration is calculated for each hour (not supported)
+    :type use_dynamic_infiltration_calculation: bool
+    :rtype: bool
+    """
+    return (not use_dynamic_infiltration_calculation
+            and bpr.hvac['class_hs'] in SUPPORTED_HEATING_CLASSES
+            and bpr.hvac['class_cs'] in SUPPORTED_COOLING_CLASSES)
+
+
+def calc_Qhs_Qcs_batch(bprs, tsds, config):
+    """
+    Calculate the hourly sensible heating and cooling demand of a batch of buildings. This is the vectorized equivalent
+    of calling :py:func:`cea.demand.thermal_loads.calc_Qhs_Qcs` for each building of the batch. The results agree with
+    the per-building procedure up to floating point round-off.
+
+    :param bprs: building properties of the buildings in the batch, see :py:func:`is_batch_compatible`
+    :type bprs: list[cea.demand.building_properties.BuildingPropertiesRow]
+    :param tsds: time series data of the buildings in the batch (as prepared by ``calc_set_points``), updated in place
+    :type tsds: list[dict]
+    :param config: the configuration (reads ``config.demand.overheating_warning``)
+    :type config: cea.config.Configuration
+    :return: the updated time series data
+    :rtype: list[dict]
+    """
+    # NOTE: local import, `cea.demand.thermal_loads` depends on this module
+    from cea.demand.thermal_loads import get_hours
+
+    for bpr, tsd in zip(bprs, tsds):
+        if not is_batch_compatible(bpr, False):
+            raise ValueError('Building {} (class_hs={}, class_cs={}) can not be calculated in a batch.'.format(
+                bpr.name, bpr.hvac['class_hs'], bpr.hvac['class_cs']))
+        # get ventilation flows
+        ventilation_air_flows_simple.calc_m_ve_required(tsd)
+        ventilation_air_flows_simple.calc_m_ve_leakage_simple(bpr, tsd)
+
+    # the buildings of a group step through the same hours of the year
+    groups = {}
+    for i, bpr in enumerate(bprs):
+        groups.setdefault(next(get_hours(bpr)), []).append(i)
+    for hour_start, group in groups.items():
+        calc_Qhs_Qcs_group([bprs[i] for i in group], [tsds[i] for i in group], hour_start, config)
+    return tsds
+
+
+def calc_Qhs_Qcs_group(bprs, tsds, hour_start, config):
+    """
+    Hourly loop for a group of buildings starting the simulation at the same hour ``hour_start``
+    """
+    props = get_batch_properties(bprs)
+    tsd = stack_timestep_data(tsds)
+    props['m_ve_required_max'] = tsd['m_ve_required'].max(axis=0)
+    t_detailed_balance = np.full(len(bprs), -1)  # last time step with detailed thermal balance
+    status_sen = np.zeros((HOURS_IN_YEAR, len(bprs)), dtype=np.int8)  # see SYSTEM_STATUS_SEN
+
+    # the values not depending on the previous time step are calculated for the whole year
+    tsd['I_sol'][:] = props['I_sol']
+    tsd['x_ve_inf'][:] = convert_rh_to_moisture_content(tsd['rh_ext'], tsd['T_ext'])
+    tsd['x_ve_mech'][:] = tsd['x_ve_inf']
+
+    with np.errstate(all='ignore'):
+        # the masked branches are evaluated for all buildings of the group, only the relevant values are stored
+        for i in range(HOURS_IN_YEAR + HOURS_PRE_CONDITIONING):
+            t = (hour_start + i) % HOURS_IN_YEAR
+            t_1 = t - 1
+
+            # heat flows in [W]
+            calc_Qgain_sen_batch(t, t_1, tsd, props)
+
+            # ventilation air flows [kg/s], ventilation air temperature and humidity
+            calc_ventilation_batch(t, t_1, tsd, props)
+
+            # heating / cooling demand of buildings
+            has_detailed_balance = calc_heating_cooling_loads_batch(t, t_1, tsd, props, status_sen, config)
+            t_detailed_balance[has_detailed_balance] = t
+
+    for i, tsd_building in enumerate(tsds):
+        for key in TSD_KEYS_ZERO:
+            tsd_building[key] = np.zeros(HOURS_IN_YEAR)
+        for key in TSD_KEYS_NAN:
+            tsd_building[key] = np.full(HOURS_IN_YEAR, np.nan)
+        tsd_building['sys_status_sen'] = np.chararray(HOURS_IN_YEAR, itemsize=20)
+        tsd_building['sys_status_sen'][:] = np.array(SYSTEM_STATUS_SEN)[status_sen[:, i]]
+        for key in ['sys_status_ahu', 'sys_status_aru']:
+            tsd_building[key] = np.chararray(HOURS_IN_YEAR, itemsize=20)
+            tsd_building[key][:] = np.where(status_sen[:, i] == 0, 'system off', 'no system')
+        if t_detailed_balance[i] >= 0:
+            # same as `detailed_thermal_balance_to_tsd`, which overwrites the array with the value of the last time step
+            tsd_building['Q_loss_sen_ref'] = -tsd['Qcre_sys'][t_detailed_balance[i], i]
+
+
+def get_batch_properties(bprs):
+    """
+    Collect the building properties used in the hourly procedure into arrays with one value per building.
+
+    :param bprs: building properties of the buildings in the batch
+    :type bprs: list[cea.demand.building_properties.BuildingPropertiesRow]
+    :rtype: dict[str, numpy.ndarray]
+    """
+
+    def collect(get, dtype=float):
+        return np.array([get(bpr) for bpr in bprs], dtype=dtype)
+
+    props = {key: collect(lambda bpr: bpr.rc_model[key])
+             for key in ['Af', 'Aef', 'Atot', 'Am', 'Awin_ag', 'Aroof', 'Awall_ag', 'Aop_bg', 'Cm', 'Htr_op', 'Htr_w',
+                         'U_win', 'U_roof', 'U_wall', 'U_base']}
+    props.update({key: collect(lambda bpr: getattr(bpr.architecture, key)) for key in ['Hs_ag', 'e_win', 'e_roof',
+                                                                                        'e_wall']})
+    props.update({key: collect(lambda bpr: bpr.hvac[key]) for key in ['convection_hs', 'convection_cs', 'Qhsmax_Wm2',
+                                                                      'Qcsmax_Wm2']})
+    props.update({key: collect(lambda bpr: bool(bpr.hvac[key]), bool) for key in ['MECH_VENT', 'WIN_VENT', 'HEAT_REC',
+                                                                                  'NIGHT_FLSH', 'ECONOMIZER']})
+    props['RH_max_pc'] = collect(lambda bpr: bpr.comfort['RH_max_pc'])
+    props['Tcs_set_C'] = collect(lambda bpr: bpr.comfort['Tcs_set_C'])
+    props['floor_height'] = collect(lambda bpr: bpr.geometry['floor_height'])
+    props['Tc_sup_air_max'] = collect(lambda bpr: np.max([bpr.hvac['Tc_sup_air_ahu_C'], bpr.hvac['Tc_sup_air_aru_C']]))
+    props['has_heating_system'] = collect(lambda bpr: has_heating_system(bpr.hvac['class_hs']), bool)
+    props['has_cooling_system'] = collect(lambda bpr: has_cooling_system(bpr.hvac['class_cs']), bool)
+    props['delta_theta_int_inc_heating'] = collect(space_emission_systems.calc_delta_theta_int_inc_heating)
+    props['delta_theta_int_inc_cooling'] = collect(space_emission_systems.calc_delta_theta_int_inc_cooling)
+    props['delta_theta_e_sol'] = collect(space_emission_systems.get_delta_theta_e_sol)
+    props['phi_h_max'] = props['Qhsmax_Wm2'] * props['Af']
+    props['phi_c_max'] = -props['Qcsmax_Wm2'] * props['Af']
+    props['f_internal_gains'] = np.minimum(props['Af'] / props['Aef'], 1.0)  # account for a proportion of internal gains
+    props['I_sol'] = np.column_stack([np.asarray(bpr.solar.I_sol, dtype=float) for bpr in bprs])
+    props['is_heating_season'] = np.column_stack([calc_season_mask(bpr.hvac['has-heating-season'],
+                                                                   bpr.hvac['heat_starts'],
+                                                                   bpr.hvac['heat_ends']) for bpr in bprs])
+    props['is_cooling_season'] = np.column_stack([calc_season_mask(bpr.hvac['has-cooling-season'],
+                                                                   bpr.hvac['cool_starts'],
+                                                                   bpr.hvac['cool_ends']) for bpr in bprs])
+    props['name'] = [bpr.name for bpr in bprs]
+    return props
+
+
+def calc_season_mask(has_season, season_starts, season_ends):
+    """
+    Hours of the year in the heating (or cooling) season, same rules as
+    :py:func:`cea.demand.control_heating_cooling_systems.is_heating_season`.
+
+    :param has_season: the building has a heating (cooling) season
+    :param season_starts: first day of the season in 'DD|MM' format
+    :param season_ends: last day of the season in 'DD|MM' format
+    :return: boolean array with one value for each hour of the year
+    :rtype: numpy.ndarray
+    """
+    hours = np.arange(HOURS_IN_YEAR)
+    if not has_season:
+        return np.zeros(HOURS_IN_YEAR, dtype=bool)
+    season_start = convert_date_to_hour(season_starts)
+    season_end = convert_date_to_hour(season_ends) + 23  # end at the last hour of the day
+    if season_start < season_end:
+        return (season_start <= hours) & (hours <= season_end)
+    elif season_start > season_end:
+        # season over the year end
+        return (season_start <= hours) | (hours <= season_end)
+    return np.zeros(HOURS_IN_YEAR, dtype=bool)
+
+
+def stack_timestep_data(tsds):
+    """
+    Stack the time step data of the buildings into ``(hours x buildings)`` arrays, so that the values of a time step
+    are contiguous. The arrays written by the hourly procedure are shared with the time step data of each building
+    (``tsd[key]`` becomes a column of the stacked array), so the results do not need to be copied back.
+
+    :param tsds: time series data of the buildings in the batch
+    :type tsds: list[dict]
+    :rtype: dict[str, numpy.ndarray]
+    """
+    keys_constant = set(TSD_KEYS_ZERO + TSD_KEYS_NAN)
+    keys_state = [key for key in TSD_KEYS_STATE if key not in keys_constant]
+    tsd = {key: np.column_stack([np.asarray(tsd_building[key], dtype=float) for tsd_building in tsds])
+           for key in TSD_KEYS_INPUT + keys_state}
+    # no humidification or dehumidification (radiative systems)
+    tsd['g_hu_ld'] = np.zeros((HOURS_IN_YEAR, len(tsds)))
+    tsd['g_dhu_ld'] = np.zeros((HOURS_IN_YEAR, len(tsds)))
+
+    for i, tsd_building in enumerate(tsds):
+        for key in keys_state:
+            tsd_building[key] = tsd[key][:, i]
+    return tsd
+
+
+def calc_Qgain_sen_batch(t, t_1, tsd, props):
+    """
+    Net solar radiation, see :py:func:`cea.demand.sensible_loads.calc_I_sol`
+    """
+    temp_s_prev = tsd['theta_c'][t_1]
+    temp_s_prev = np.where(np.isnan(temp_s_prev), tsd['T_ext'][t_1], temp_s_prev)
+
+    # theta_ss is the arithmetic average of the surface temperature and the sky temperature, in °C.
+    theta_ss = 0.5 * (tsd['T_sky'][t] + temp_s_prev)  # [see 11.4.6 in ISO 13790]
+
+    # delta_theta_er is the average difference between outdoor air temperature and sky temperature
+    delta_theta_er = tsd['T_ext'][t] - tsd['T_sky'][t]  # [see 11.3.5 in ISO 13790]
+
+    Fform_wall, Fform_win, Fform_roof = 0.5, 0.5, 1  # 50% re-irradiated by vertical surfaces and 100% by horizontal
+    I_rad_win = tsd['RSE_win'][t] * props['U_win'] * calc_hr(props['e_win'], theta_ss) * props[
+        'Awin_ag'] * delta_theta_er
+    I_rad_roof = tsd['RSE_roof'][t] * props['U_roof'] * calc_hr(props['e_roof'], theta_ss) * props[
+        'Aroof'] * delta_theta_er
+    I_rad_wall = tsd['RSE_wall'][t] * props['U_wall'] * calc_hr(props['e_wall'], theta_ss) * props[
+        'Awall_ag'] * delta_theta_er
+    I_rad = Fform_wall * I_rad_wall + Fform_win * I_rad_win + Fform_roof * I_rad_roof
+
+    I_sol_gross = props['I_sol'][t]
+    tsd['I_sol_and_I_rad'][t] = I_sol_gross - I_rad
+    tsd['I_rad'][t] = I_rad
+
+
+def calc_ventilation_batch(t, t_1, tsd, props):
+    """
+    Ventilation air flows and supply temperature of mechanical ventilation, see
+    :py:mod:`cea.demand.ventilation_air_flows_simple` and :py:mod:`cea.demand.control_ventilation_systems`
+    """
+    T_int_t_1 = tsd['T_int'][t_1]
+    T_ext = tsd['T_ext'][t]
+    m_ve_required = tsd['m_ve_required'][t]
+
+    # control of the ventilation systems
+    is_night_time = not 7 < t % 24 < 21
+    is_night_flushing_active = (props['NIGHT_FLSH'] & is_night_time
+                                & (T_int_t_1 > TEMPERATURE_ZONE_CONTROL_NIGHT_FLUSHING)
+                                & (T_int_t_1 > T_ext + DELTA_T_NIGHT_FLUSHING)
+                                & (tsd['rh_ext'][t] < props['RH_max_pc']))
+    is_economizer_active = props['ECONOMIZER'] & (T_int_t_1 > props['Tcs_set_C']) & (props['Tcs_set_C'] >= T_ext)
+    is_mechanical_ventilation_active = props['MECH_VENT'] & ((m_ve_required > 0) | is_night_flushing_active)
+    is_window_ventilation_active = props['WIN_VENT'] & ~is_mechanical_ventilation_active
+    is_heat_recovery_active = is_mechanical_ventilation_active & props['HEAT_REC'] & np.where(
+        props['is_heating_season'][t],
+        ~(is_night_flushing_active | is_economizer_active),
+        props['is_cooling_season'][t] & (T_int_t_1 < T_ext))
+
+    # ventilation air flows [kg/s]
+    m_ve_min = np.maximum(m_ve_required - tsd['m_ve_inf'][t], 0.0)
+    tsd['m_ve_mech'][t] = np.where(is_mechanical_ventilation_active & ~is_night_flushing_active & ~is_economizer_active,
+                                   m_ve_min,
+                                   np.where(props['MECH_VENT'] & (is_night_flushing_active | is_economizer_active),
+                                            props['m_ve_required_max'], 0.0))
+    tsd['m_ve_window'][t] = np.where(is_window_ventilation_active,
+                                     np.where(is_night_flushing_active, props['m_ve_required_max'], m_ve_min), 0.0)
+
+    # ventilation air temperature and humidity
+    tsd['theta_ve_mech'][t] = np.where(is_heat_recovery_active,
+                                       T_ext + ventilation_air_flows_simple.ETA_REC * (T_int_t_1 - T_ext), T_ext)
+    # the moisture content of the ventilation air (`x_ve_inf`, `x_ve_mech`) is calculated before the hourly loop
+
+
+def calc_heating_cooling_loads_batch(t, t_1, tsd, props, status_sen, config):
+    """
+    Vectorized equivalent of :py:func:`cea.demand.hourly_procedure_heating_cooling_system_load.calc_heating_cooling_loads`
+    for buildings with radiative systems (or without systems).
+
+    :return: mask of the buildings for which the detailed thermal balance (dashboard) was calculated
+    :rtype: numpy.ndarray
+    """
+    is_heating_season = props['is_heating_season'][t]
+    is_cooling_season = props['is_cooling_season'][t]
+    heating = is_heating_season & ~is_cooling_season
+    cooling = is_cooling_season & ~is_heating_season
+    if not (heating | cooling).all():
+        warnings.warn('Timestep %s not in heating season nor cooling season' % t)
+
+    ta_hs_set = tsd['ta_hs_set'][t]
+    ta_cs_set = tsd['ta_cs_set'][t]
+    radiator_heating = heating & props['has_heating_system'] & ~np.isnan(ta_hs_set)
+    radiator_cooling = cooling & props['has_cooling_system'] & ~np.isnan(ta_cs_set) & ~(
+            tsd['T_int'][t_1] <= props['Tc_sup_air_max'])
+    no_loads = ~radiator_heating & ~radiator_cooling
+
+    # (1) The RC-model gives the sensible energy demand for the hour, see `calc_rc_heating_demand`
+    # calculate temperatures with 0 heating / cooling power
+    rc_model_temperatures = calc_rc_model_temperatures_batch(0.0, 0.0, t, t_1, tsd, props, config, True)
+    t_int_0 = rc_model_temperatures['T_int']
+
+    temp_tolerance = 0.001
+    has_heating_demand = radiator_heating & (t_int_0 < ta_hs_set - temp_tolerance)
+    has_cooling_demand = radiator_cooling & (t_int_0 > ta_cs_set + temp_tolerance)
+    has_demand = has_heating_demand | has_cooling_demand
+    phi_hc_act = np.zeros(len(t_int_0))
+    if has_demand.any():
+        f_hc_cv = np.where(has_heating_demand, props['convection_hs'], props['convection_cs'])
+        t_int_set = np.where(has_heating_demand, ta_hs_set, ta_cs_set)
+        phi_hc_max = np.where(has_heating_demand, props['phi_h_max'], props['phi_c_max'])
+
+        # calculate temperatures with 10 W/m2 heating / cooling power
+        phi_hc_10 = 10.0 * props['Af']
+        rc_model_temperatures_10 = calc_rc_model_temperatures_batch(
+            rc_model_SIA.calc_phi_hc_cv(phi_hc_10, f_hc_cv), rc_model_SIA.calc_phi_hc_r(phi_hc_10, f_hc_cv),
+            t, t_1, tsd, props, config, has_demand)
+        t_int_10 = rc_model_temperatures_10['T_int']
+
+        # interpolate heating power
+        # (64) in SIA 2044 / Korrigenda C1 zum Merkblatt SIA 2044:2011 / Korrigenda C2 zum Mekblatt SIA 2044:2011
+        phi_hc_ul = phi_hc_10 * (t_int_set - t_int_0) / (t_int_10 - t_int_0)
+
+        # check if available power is sufficient
+        is_within_capacity = np.where(has_heating_demand, (0.0 < phi_hc_ul) & (phi_hc_ul <= phi_hc_max),
+                                      (0.0 > phi_hc_ul) & (phi_hc_ul >= phi_hc_max))
+        is_above_capacity = np.where(has_heating_demand, (0.0 < phi_hc_ul) & (phi_hc_ul > phi_hc_max),
+                                     (0.0 > phi_hc_ul) & (phi_hc_ul < phi_hc_max))
+        if (has_heating_demand & ~is_within_capacity & ~is_above_capacity).any():
+            raise Exception("Unexpected status in 'calc_rc_heating_demand'")
+        if (has_cooling_demand & ~is_within_capacity & ~is_above_capacity).any():
+            raise Exception("Unexpected status in 'calc_rc_cooling_demand'")
+        phi_hc_act = np.where(has_demand, np.where(is_within_capacity, phi_hc_ul, phi_hc_max), 0.0)
+
+        rc_model_temperatures_act = calc_rc_model_temperatures_batch(
+            rc_model_SIA.calc_phi_hc_cv(phi_hc_act, f_hc_cv), rc_model_SIA.calc_phi_hc_r(phi_hc_act, f_hc_cv),
+            t, t_1, tsd, props, config, has_demand)
+        rc_model_temperatures = {key: np.where(has_demand, rc_model_temperatures_act[key], value)
+                                 for key, value in rc_model_temperatures.items()}
+
+    # (2) A radiative system does not act on humidity
+    calc_moisture_content_in_zone_local_batch(t, t_1, tsd, props)
+
+    # (3) Results are passed to tsd
+    for key in ['T_int', 'theta_m', 'theta_c', 'theta_o']:
+        tsd[key][t] = rc_model_temperatures[key]
+
+    # radiative heating, see `calc_heat_loads_radiator` (the heating loads are 0 for the other buildings)
+    phi_h_act = np.where(radiator_heating, phi_hc_act, 0.0)
+    for key in ['Qhs_sen_rc', 'Qhs_sen_shu', 'Qhs_sen_sys']:
+        tsd[key][t] = phi_h_act
+    for key in ['Qhs_lat_ahu', 'Qhs_lat_aru']:
+        tsd[key][t] = np.where(radiator_heating, tsd[key][t], 0.0)  # not written by `calc_heat_loads_radiator`
+    delta_theta_int_inc = props['delta_theta_int_inc_heating']
+    tsd['Qhs_em_ls'][t] = np.where(radiator_heating, calc_q_em_ls_batch(
+        phi_h_act, delta_theta_int_inc, tsd['T_int'][t] + delta_theta_int_inc, tsd['T_ext'][t],
+        props['phi_h_max']), 0.0)
+
+    # radiative cooling, see `calc_cool_loads_radiator` (the cooling loads are 0 for the other buildings)
+    phi_c_act = np.where(radiator_cooling, phi_hc_act, 0.0)
+    for key in ['Qcs_sen_rc', 'Qcs_sen_scu', 'Qcs_sen_sys']:
+        tsd[key][t] = phi_c_act
+    delta_theta_int_inc = props['delta_theta_int_inc_cooling']
+    tsd['Qcs_em_ls'][t] = np.where(radiator_cooling, calc_q_em_ls_batch(
+        phi_c_act, delta_theta_int_inc, tsd['T_int'][t] + delta_theta_int_inc,
+        tsd['T_ext'][t] + props['delta_theta_e_sol'], props['phi_c_max']), 0.0)
+
+    # 'system off' without loads, otherwise 'On' / 'Off'
+    status_sen[t] = np.where(no_loads, 0, np.where((phi_h_act > 0.0) | (phi_c_act < 0.0), 1, 2))
+
+    # for dashboard
+    has_detailed_balance = heating | cooling
+    if has_detailed_balance.all():
+        detailed_thermal_balance_to_tsd_batch(t, tsd, props, rc_model_temperatures, slice(None))
+    elif has_detailed_balance.any():
+        detailed_thermal_balance_to_tsd_batch(t, tsd, props, rc_model_temperatures, has_detailed_balance)
+    return has_detailed_balance
+
+
+def calc_rc_model_temperatures_batch(phi_hc_cv, phi_hc_r, t, t_1, tsd, props, config, is_checked):
+    """
+    Vectorized :py:func:`cea.demand.rc_model_SIA.calc_rc_model_temperatures`. The temperature bounds are only checked
+    for the buildings in ``is_checked``, the other results are discarded by the caller.
+    """
+    theta_m_t_1 = tsd['theta_m'][t_1]
+    theta_m_t_1 = np.where(np.isnan(theta_m_t_1), tsd['T_ext'][t_1], theta_m_t_1)
+
+    El = tsd['El'][t] * props['f_internal_gains']
+    Ea = tsd['Ea'][t] * props['f_internal_gains']
+    # account for a proportion of solar gains. This is very simplified for now.
+    I_sol = tsd['I_sol_and_I_rad'][t] * np.sqrt(props['Hs_ag'])
+    c_m = props['Cm'] / 3600  # (Wh/K) SIA 2044 unit is Wh/K, ISO unit is J/K
+
+    T_int, theta_c, theta_m, theta_o, theta_ea, theta_ec, theta_em, h_ea, h_ec, h_em, h_op_m \
+        = rc_model_SIA._calc_rc_model_temperatures(Ea, El, tsd['Epro'][t], props['Htr_op'], props['Htr_w'], I_sol,
+                                                   tsd['Qs'][t], tsd['T_ext'][t], props['Am'], props['Atot'],
+                                                   props['Awin_ag'], c_m, tsd['m_ve_inf'][t], tsd['m_ve_mech'][t],
+                                                   tsd['m_ve_window'][t], phi_hc_cv, phi_hc_r, theta_m_t_1,
+                                                   tsd['theta_ve_mech'][t])
+
+    if config.demand.overheating_warning:
+        out_of_bounds = is_checked & ((rc_model_SIA.T_WARNING_LOW > T_int) | (rc_model_SIA.T_WARNING_LOW > theta_c)
+                                      | (rc_model_SIA.T_WARNING_LOW > theta_m) | (T_int > rc_model_SIA.T_WARNING_HIGH)
+                                      | (theta_c > rc_model_SIA.T_WARNING_HIGH)
+                                      | (theta_m > rc_model_SIA.T_WARNING_HIGH))
+        if out_of_bounds.any():
+            i = np.flatnonzero(out_of_bounds)[0]
+            raise rc_model_SIA.temperature_out_of_bounds_error(props['name'][i], t, T_int[i], theta_c[i],
+                                                               theta_m[i], props['Hs_ag'][i])
+
+    return {'theta_m': theta_m, 'theta_c': theta_c, 'T_int': T_int, 'theta_o': theta_o, 'theta_ea': theta_ea,
+            'theta_ec': theta_ec, 'theta_em': theta_em, 'h_ea': h_ea, 'h_ec': h_ec, 'h_em': h_em, 'h_op_m': h_op_m}
+
+
+def calc_moisture_content_in_zone_local_batch(t, t_1, tsd, props):
+    """
+    Vectorized :py:func:`cea.demand.latent_loads.calc_moisture_content_in_zone_local`
+    """
+    # zone volume
+    vol_int_a_ztc = props['Af'] * props['floor_height']
+
+    m_ve_mech = tsd['m_ve_mech'][t]
+    m_ve_inf = tsd['m_ve_inf'][t] + tsd['m_ve_window'][t]
+
+    # sum ventilation moisture + (de)humidification
+    x_int_a_t = (m_ve_mech * tsd['x_ve_mech'][t] + m_ve_inf * tsd['x_ve_inf'][t] +
+                 tsd['g_hu_ld'][t] + tsd['g_dhu_ld'][t] + tsd['w_int'][t] + (
+                     RHO_A * vol_int_a_ztc) / DELTA_T * tsd['x_int'][t_1]) / \
+                ((m_ve_mech + m_ve_inf) + (RHO_A * vol_int_a_ztc) / DELTA_T)
+
+    if (x_int_a_t < 0).any():
+        raise Exception("Bug in moisture balance in zone. Negative moisture content detected.")
+
+    tsd['x_int'][t] = x_int_a_t
+
+
+def calc_q_em_ls_batch(q_em_out, delta_theta_int_inc, theta_int_inc, theta_e_comb, q_em_max):
+    """
+    Vectorized :py:func:`cea.demand.space_emission_systems.calc_q_em_ls`
+    """
+    q_em_ls = q_em_out * (delta_theta_int_inc / (theta_int_inc - theta_e_comb))
+    # cap emission losses at absolute capacity
+    q_em_ls = np.where(np.abs(q_em_ls + q_em_out) > np.abs(q_em_max), q_em_max - q_em_out, q_em_ls)
+    q_em_ls = np.where(np.sign(q_em_ls) == np.sign(q_em_out), q_em_ls, 0.0)  # prevent form negative emission losses
+    return np.where(np.abs(theta_int_inc - theta_e_comb) < 1e-6, 0.0, q_em_ls)  # prevent division by zero
+
+
+def detailed_thermal_balance_to_tsd_batch(t, tsd, props, rc_model_temperatures, mask):
+    """
+    Vectorized :py:func:`cea.demand.hourly_procedure_heating_cooling_system_load.detailed_thermal_balance_to_tsd`
+    for the buildings in ``mask`` (``Q_loss_sen_ref`` is handled by the caller)
+    """
+    # internal gains from lights, appliances, data centres and people
+    tsd['Q_gain_sen_light'][t, mask] = rc_model_SIA.calc_phi_i_l(tsd['El'][t, mask])
+    tsd['Q_gain_sen_app'][t, mask] = (rc_model_SIA.calc_phi_i_a(tsd['Ea'][t, mask], tsd['Epro'][t, mask])
+                                      - 0.9 * tsd['Epro'][t, mask]) / 0.9
+    tsd['Q_gain_sen_pro'][t, mask] = tsd['Epro'][t, mask]
+    tsd['Q_gain_sen_data'][t, mask] = tsd['Qcdata_sys'][t, mask]
+    tsd['Q_gain_sen_peop'][t, mask] = rc_model_SIA.calc_phi_i_p(tsd['Qs'][t, mask])
+
+    h_em = rc_model_temperatures['h_em'][mask]
+    h_op_m = rc_model_temperatures['h_op_m'][mask]
+    delta_theta_m = rc_model_temperatures['theta_em'][mask] - rc_model_temperatures['theta_m'][mask]
+
+    # backwards calculate individual heat transfer coefficient
+    h_wall_em = h_em * props['Awall_ag'][mask] * props['U_wall'][mask] / h_op_m
+    h_base_em = h_em * props['Aop_bg'][mask] * constants.B_F * props['U_base'][mask] / h_op_m
+    h_roof_em = h_em * props['Aroof'][mask] * props['U_roof'][mask] / h_op_m
+
+    # heat fluxes between mass and outside through opaque elements, through windows and through ventilation
+    tsd['Q_gain_sen_wall'][t, mask] = h_wall_em * delta_theta_m
+    tsd['Q_gain_sen_base'][t, mask] = h_base_em * delta_theta_m
+    tsd['Q_gain_sen_roof'][t, mask] = h_roof_em * delta_theta_m
+    tsd['Q_gain_sen_wind'][t, mask] = rc_model_temperatures['h_ec'][mask] * (
+            rc_model_temperatures['theta_ec'][mask] - rc_model_temperatures['theta_c'][mask])
+    tsd['Q_gain_sen_vent'][t, mask] = rc_model_temperatures['h_ea'][mask] * (
+            rc_model_temperatures['theta_ea'][mask] - rc_model_temperatures['T_int'][mask])
+
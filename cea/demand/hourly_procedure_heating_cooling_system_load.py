@@ -6,7 +6,7 @@
 
 import warnings
 import numpy as np
-from cea.demand import airconditioning_model, rc_model_SIA, control_heating_cooling_systems, \
+from cea.demand import airconditioning_model, rc_model_SIA, rc_model_numba, control_heating_cooling_systems, \
     space_emission_systems, latent_loads, constants
 
 
@@ -24,6 +24,16 @@ __status__ = "Production"
 B_F = constants.B_F
 
 
+def get_rc_model(config):
+    """
+    The implementation of the R-C-model selected with ``demand:engine``: :py:mod:`cea.demand.rc_model_SIA` (Python,
+    the reference) or :py:mod:`cea.demand.rc_model_numba` (compiled with Numba).
+    """
+    if config.demand.engine == 'numba':
+        return rc_model_numba
+    return rc_model_SIA
+
+
 def calc_heating_cooling_loads(bpr, tsd, t, config):
     """
 
@@ -281,8 +291,8 @@ def calc_heat_loads_central_ac(bpr, t, tsd, config):
         qh_sen_aru = 0.0  # no additional heating via air recirculation unit
 
         # update rc model temperatures
-        rc_model_temperatures = rc_model_SIA.calc_rc_model_temperatures_heating(qh_sen_central_ac_load, bpr, tsd, t,
-                                                                                config)
+        rc_model_temperatures = get_rc_model(config).calc_rc_model_temperatures_heating(qh_sen_central_ac_load, bpr,
+                                                                                        tsd, t, config)
 
         # ARU values to tsd
         ma_sup_hs_aru = 0.0
@@ -485,7 +495,7 @@ def calc_cool_loads_central_ac(bpr, t, tsd, config):
     # TODO: check if it is smaller, something went wrong in the calculation
     qc_sen_total = qc_sen_ahu + qc_sen_aru
     # update rc model temperatures
-    rc_model_temperatures = rc_model_SIA.calc_rc_model_temperatures_cooling(qc_sen_total, bpr, tsd, t, config)
+    rc_model_temperatures = get_rc_model(config).calc_rc_model_temperatures_cooling(qc_sen_total, bpr, tsd, t, config)
     # ***
     # ZONE MOISTURE
     # ***
@@ -596,7 +606,7 @@ def calc_cool_loads_3for2(bpr, t, tsd, config):
     # TODO: check, if it is smaller something went wrong in the calculation
     qc_sen_total = qc_sen_ahu + qc_sen_aru + qc_sen_scu
     # update rc model temperatures
-    rc_model_temperatures = rc_model_SIA.calc_rc_model_temperatures_cooling(qc_sen_total, bpr, tsd, t, config)
+    rc_model_temperatures = get_rc_model(config).calc_rc_model_temperatures_cooling(qc_sen_total, bpr, tsd, t, config)
     # ***
     # ZONE MOISTURE
     # ***
@@ -804,7 +814,7 @@ def calc_rc_no_loads(bpr, tsd, t, config):
     # STEP 1
     # ******
     # calculate temperatures
-    rc_model_temperatures = rc_model_SIA.calc_rc_model_temperatures_no_heating_cooling(bpr, tsd, t, config)
+    rc_model_temperatures = get_rc_model(config).calc_rc_model_temperatures_no_heating_cooling(bpr, tsd, t, config)
 
     # calculate humidity
     tsd['g_hu_ld'][t] = 0.0  # no humidification or dehumidification
@@ -842,6 +852,10 @@ def calc_rc_heating_demand(bpr, tsd, t, config):
        :return: phi_h_act, rc_model_temperatures
        """
 
+    if config.demand.engine == 'numba':
+        # steps 1 to 4 in a single compiled call
+        return rc_model_numba.calc_rc_heating_demand(bpr, tsd, t, config)
+
     # following the procedure in 2.3.2 in SIA 2044 / Korrigenda C1 zum Merkblatt SIA 2044:2011
     #  / Korrigenda C2 zum Mekblatt SIA 2044:2011
 
@@ -923,6 +937,10 @@ def calc_rc_cooling_demand(bpr, tsd, t, config):
     # following the procedure in 2.3.2 in SIA 2044 / Korrigenda C1 zum Merkblatt SIA 2044:2011
     #  / Korrigenda C2 zum Mekblatt SIA 2044:2011
 
+    if config.demand.engine == 'numba':
+        # steps 1 to 4 in a single compiled call
+        return rc_model_numba.calc_rc_cooling_demand(bpr, tsd, t, config)
+
     # ++++++++++++++++
     # CASE 2 - COOLING
     # ++++++++++++++++
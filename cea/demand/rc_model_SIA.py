@@ -613,15 +613,7 @@ def calc_rc_model_temperatures(phi_hc_cv, phi_hc_r, bpr, tsd, t, config):
     if T_WARNING_LOW > T_int or T_WARNING_LOW > theta_c or T_WARNING_LOW > theta_m \
             or T_int > T_WARNING_HIGH or theta_c > T_WARNING_HIGH or theta_m > T_WARNING_HIGH:
         if config.demand.overheating_warning:
-            raise Exception("Temperature in RC-Model of building {} out of bounds! First occurred at timestep = {}. "
-                            "The results were Tint = {}, theta_c = {}, theta_m = {}.\n"
-                            "If it is an expected behavior, consider turning off over-heating warning in the "
-                            "advanced parameters to continue the simulation.\n"
-                            "If it is not expected, check building geometry and internal loads.\n" 
-                            "Building might be too small in size or architecture parameter Hs_ag = {} might be too "
-                            "small for this geometry. Current bounds of range for RC-model temperatures are "
-                            "between {} and {}.".format(bpr.name, t, round(T_int, 2), round(theta_c, 2),  round(theta_m, 2),
-                                                         bpr.architecture.Hs_ag, T_WARNING_LOW, T_WARNING_HIGH))
+            raise temperature_out_of_bounds_error(bpr.name, t, T_int, theta_c, theta_m, bpr.architecture.Hs_ag)
 
     rc_model_temp = {'theta_m': theta_m, 'theta_c': theta_c, 'T_int': T_int, 'theta_o': theta_o, 'theta_ea': theta_ea,
                      'theta_ec': theta_ec, 'theta_em': theta_em, 'h_ea': h_ea, 'h_ec': h_ec, 'h_em': h_em,
@@ -629,10 +621,26 @@ def calc_rc_model_temperatures(phi_hc_cv, phi_hc_r, bpr, tsd, t, config):
     return rc_model_temp
 
 
+def temperature_out_of_bounds_error(building_name, t, T_int, theta_c, theta_m, Hs_ag):
+    """
+    Create the exception raised when the RC-model node temperatures leave the range between ``T_WARNING_LOW`` and
+    ``T_WARNING_HIGH`` (see ``config.demand.overheating_warning``).
+    """
+    return Exception("Temperature in RC-Model of building {} out of bounds! First occurred at timestep = {}. "
+                     "The results were Tint = {}, theta_c = {}, theta_m = {}.\n"
+                     "If it is an expected behavior, consider turning off over-heating warning in the "
+                     "advanced parameters to continue the simulation.\n"
+                     "If it is not expected, check building geometry and internal loads.\n"
+                     "Building might be too small in size or architecture parameter Hs_ag = {} might be too "
+                     "small for this geometry. Current bounds of range for RC-model temperatures are "
+                     "between {} and {}.".format(building_name, t, round(T_int, 2), round(theta_c, 2),
+                                                 round(theta_m, 2), Hs_ag, T_WARNING_LOW, T_WARNING_HIGH))
+
+
 def _calc_rc_model_temperatures(Eaf, Elf, Epro, Htr_op, Htr_w, I_sol, Qs, T_ext, a_m, a_t, a_w, c_m,
                                 m_ve_inf_simple, m_ve_mech, m_ve_window, phi_hc_cv, phi_hc_r, theta_m_t_1,
                                 theta_ve_mech):
-    # numba_cc compatible calculation
+    # scalar calculation, compiled by `cea.demand.rc_model_numba` for `demand:engine = numba`
     h_ec = calc_h_ec(Htr_w=Htr_w)
     h_ac = calc_h_ac(a_t)
     h_ea = calc_h_ea(m_ve_mech, m_ve_window, m_ve_inf_simple)
@@ -872,13 +880,3 @@ def lookup_f_hc_cv_cooling(bpr):
 
     return f_hc_cv
 
-
-# use the optimized (numba_cc) versions of the functions in this module if available
-try:
-    # import Numba AOT versions of the functions above, overwriting them
-    from .rc_model_sia_cc import (calc_phi_m, calc_phi_c, calc_theta_c, calc_phi_m_tot, calc_phi_a, calc_theta_m,
-                                 calc_h_ea, calc_theta_m_t, calc_theta_ea, calc_h_em, calc_h_3)
-except ImportError:
-    # fall back to using the python version
-    # print('failed to import from rc_model_sia_cc.pyd, falling back to pure python functions')
-    pass
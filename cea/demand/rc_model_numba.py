@@ -0,0 +1,308 @@
+# -*- coding: utf-8 -*-
+"""
+JIT-compiled (Numba) engine for the hourly R-C-model procedure of the demand (``demand:engine = numba``).
+
+The equations of :py:mod:`cea.demand.rc_model_SIA` are compiled as they are and chained into kernels that solve the
+R-C-model temperatures and the sensible heating / cooling demand of a time step (steps 1 to 4 of
+:py:func:`cea.demand.hourly_procedure_heating_cooling_system_load.calc_rc_heating_demand`) in a single call. The
+functions of this module have the same signatures as their counterparts in :py:mod:`cea.demand.rc_model_SIA` and
+:py:mod:`cea.demand.hourly_procedure_heating_cooling_system_load`, the Python implementation remains the reference.
+"""
+
+import numpy as np
+from numba import jit
+
+from cea.demand import rc_model_SIA
+from cea.demand.rc_model_SIA import T_WARNING_LOW, T_WARNING_HIGH
+
+# temperature tolerance of the set point, see `rc_model_SIA.has_sensible_heating_demand`
+TEMP_TOLERANCE = 0.001
+
+# status returned by `_calc_rc_demand`
+STATUS_OK = 0
+STATUS_OUT_OF_BOUNDS = 1
+STATUS_UNEXPECTED = 2
+
+RC_MODEL_TEMPERATURES = ['T_int', 'theta_c', 'theta_m', 'theta_o', 'theta_ea', 'theta_ec', 'theta_em', 'h_ea', 'h_ec',
+                         'h_em', 'h_op_m']
+
+
+def compile_function(function):
+    """
+    Compile a scalar function with IEEE division semantics (division by zero returns ``inf`` / ``nan`` like NumPy
+    instead of raising a ``ZeroDivisionError``)
+    """
+    return jit(nopython=True, error_model='numpy')(function)
+
+
+# equations of the R-C-model
+calc_h_mc = compile_function(rc_model_SIA.calc_h_mc)
+calc_h_ac = compile_function(rc_model_SIA.calc_h_ac)
+calc_h_op_m = compile_function(rc_model_SIA.calc_h_op_m)
+calc_h_em = compile_function(rc_model_SIA.calc_h_em)
+calc_h_ec = compile_function(rc_model_SIA.calc_h_ec)
+calc_h_ea = compile_function(rc_model_SIA.calc_h_ea)
+calc_phi_a = compile_function(rc_model_SIA.calc_phi_a)
+calc_phi_c = compile_function(rc_model_SIA.calc_phi_c)
+calc_phi_i_p = compile_function(rc_model_SIA.calc_phi_i_p)
+calc_phi_i_a = compile_function(rc_model_SIA.calc_phi_i_a)
+calc_phi_i_l = compile_function(rc_model_SIA.calc_phi_i_l)
+calc_phi_m = compile_function(rc_model_SIA.calc_phi_m)
+calc_f_ic = compile_function(rc_model_SIA.calc_f_ic)
+calc_f_sc = compile_function(rc_model_SIA.calc_f_sc)
+calc_f_im = compile_function(rc_model_SIA.calc_f_im)
+calc_f_sm = compile_function(rc_model_SIA.calc_f_sm)
+calc_theta_ea = compile_function(rc_model_SIA.calc_theta_ea)
+calc_theta_ec = compile_function(rc_model_SIA.calc_theta_ec)
+calc_theta_em = compile_function(rc_model_SIA.calc_theta_em)
+calc_theta_m_t = compile_function(rc_model_SIA.calc_theta_m_t)
+calc_h_1 = compile_function(rc_model_SIA.calc_h_1)
+calc_h_2 = compile_function(rc_model_SIA.calc_h_2)
+calc_h_3 = compile_function(rc_model_SIA.calc_h_3)
+calc_phi_m_tot = compile_function(rc_model_SIA.calc_phi_m_tot)
+calc_theta_m = compile_function(rc_model_SIA.calc_theta_m)
+calc_theta_c = compile_function(rc_model_SIA.calc_theta_c)
+calc_T_int = compile_function(rc_model_SIA.calc_T_int)
+calc_theta_o = compile_function(rc_model_SIA.calc_theta_o)
+calc_phi_hc_cv = compile_function(rc_model_SIA.calc_phi_hc_cv)
+calc_phi_hc_r = compile_function(rc_model_SIA.calc_phi_hc_r)
+
+
+@jit(nopython=True, error_model='numpy')
+def _calc_rc_model_temperatures(Eaf, Elf, Epro, Htr_op, Htr_w, I_sol, Qs, T_ext, a_m, a_t, a_w, c_m,
+                                m_ve_inf_simple, m_ve_mech, m_ve_window, phi_hc_cv, phi_hc_r, theta_m_t_1,
+                                theta_ve_mech):
+    """
+    Compiled :py:func:`cea.demand.rc_model_SIA._calc_rc_model_temperatures`
+    """
+    h_ec = calc_h_ec(Htr_w)
+    h_ac = calc_h_ac(a_t)
+    h_ea = calc_h_ea(m_ve_mech, m_ve_window, m_ve_inf_simple)
+    f_sc = calc_f_sc(a_t, a_m, a_w, h_ec)
+    f_ic = calc_f_ic(a_t, a_m, h_ec)
+    h_op_m = calc_h_op_m(Htr_op)
+    h_mc = calc_h_mc(a_m)
+    h_em = calc_h_em(h_op_m, h_mc)
+    f_im = calc_f_im(a_t, a_m)
+    f_sm = calc_f_sm(a_t, a_m, a_w)
+    phi_i_l = calc_phi_i_l(Elf)
+    phi_i_a = calc_phi_i_a(Eaf, Epro)  # include processes
+    phi_i_p = calc_phi_i_p(Qs)
+    h_1 = calc_h_1(h_ea, h_ac)
+    phi_a = calc_phi_a(phi_hc_cv, phi_i_l, phi_i_a, phi_i_p, I_sol)
+    phi_m = calc_phi_m(phi_hc_r, phi_i_l, phi_i_a, phi_i_p, I_sol, f_im, f_sm)
+    phi_c = calc_phi_c(phi_hc_r, phi_i_l, phi_i_a, phi_i_p, I_sol, f_ic, f_sc)
+    theta_ea = calc_theta_ea(m_ve_mech, m_ve_window, m_ve_inf_simple, theta_ve_mech, T_ext)
+    theta_em = calc_theta_em(T_ext)
+    theta_ec = calc_theta_ec(T_ext)
+    h_2 = calc_h_2(h_1, h_ec)
+    h_3 = calc_h_3(h_2, h_mc)
+    phi_m_tot = calc_phi_m_tot(phi_m, phi_a, phi_c, theta_ea, theta_em, theta_ec, h_1, h_2, h_3, h_ec, h_ea, h_em)
+    theta_m_t = calc_theta_m_t(phi_m_tot, theta_m_t_1, h_em, h_3, c_m)
+    theta_m = calc_theta_m(theta_m_t, theta_m_t_1)
+    theta_c = calc_theta_c(phi_a, phi_c, theta_ea, theta_ec, theta_m, h_1, h_mc, h_ec, h_ea)
+    T_int = calc_T_int(phi_a, theta_ea, theta_c, h_ac, h_ea)
+    theta_o = calc_theta_o(T_int, theta_c)
+    return T_int, theta_c, theta_m, theta_o, theta_ea, theta_ec, theta_em, h_ea, h_ec, h_em, h_op_m
+
+
+@jit(nopython=True)
+def _is_out_of_bounds(T_int, theta_c, theta_m):
+    return (T_WARNING_LOW > T_int or T_WARNING_LOW > theta_c or T_WARNING_LOW > theta_m
+            or T_int > T_WARNING_HIGH or theta_c > T_WARNING_HIGH or theta_m > T_WARNING_HIGH)
+
+
+@jit(nopython=True, error_model='numpy')
+def _calc_rc_demand(Eaf, Elf, Epro, Htr_op, Htr_w, I_sol, Qs, T_ext, a_m, a_t, a_w, c_m, m_ve_inf_simple, m_ve_mech,
+                    m_ve_window, theta_m_t_1, theta_ve_mech, f_hc_cv, phi_hc_10, t_int_set, phi_hc_max, is_heating,
+                    check_bounds):
+    """
+    Sensible heating (``is_heating``) or cooling demand of a time step following the procedure in 2.3.2 in SIA 2044,
+    see :py:func:`cea.demand.hourly_procedure_heating_cooling_system_load.calc_rc_heating_demand`.
+
+    :return: status (``STATUS_*``), heating / cooling power and the R-C-model temperatures (of the evaluation out of
+        bounds for ``STATUS_OUT_OF_BOUNDS``)
+    """
+    # STEP 1
+    # calculate temperatures with 0 heating / cooling power
+    temperatures = _calc_rc_model_temperatures(Eaf, Elf, Epro, Htr_op, Htr_w, I_sol, Qs, T_ext, a_m, a_t, a_w, c_m,
+                                               m_ve_inf_simple, m_ve_mech, m_ve_window, 0.0, 0.0, theta_m_t_1,
+                                               theta_ve_mech)
+    if check_bounds and _is_out_of_bounds(temperatures[0], temperatures[1], temperatures[2]):
+        return STATUS_OUT_OF_BOUNDS, 0.0, temperatures
+    t_int_0 = temperatures[0]
+
+    # CHECK FOR DEMAND (no set point = system off)
+    if is_heating:
+        has_demand = not np.isnan(t_int_set) and t_int_0 < t_int_set - TEMP_TOLERANCE
+    else:
+        has_demand = not np.isnan(t_int_set) and t_int_0 > t_int_set + TEMP_TOLERANCE
+    if not has_demand:
+        return STATUS_OK, 0.0, temperatures
+
+    # STEP 2
+    # calculate temperatures with 10 W/m2 heating / cooling power
+    temperatures_10 = _calc_rc_model_temperatures(Eaf, Elf, Epro, Htr_op, Htr_w, I_sol, Qs, T_ext, a_m, a_t, a_w, c_m,
+                                                  m_ve_inf_simple, m_ve_mech, m_ve_window,
+                                                  calc_phi_hc_cv(phi_hc_10, f_hc_cv),
+                                                  calc_phi_hc_r(phi_hc_10, f_hc_cv), theta_m_t_1, theta_ve_mech)
+    if check_bounds and _is_out_of_bounds(temperatures_10[0], temperatures_10[1], temperatures_10[2]):
+        return STATUS_OUT_OF_BOUNDS, 0.0, temperatures_10
+    t_int_10 = temperatures_10[0]
+
+    # interpolate heating power
+    # (64) in SIA 2044 / Korrigenda C1 zum Merkblatt SIA 2044:2011 / Korrigenda C2 zum Mekblatt SIA 2044:2011
+    phi_hc_ul = phi_hc_10 * (t_int_set - t_int_0) / (t_int_10 - t_int_0)
+
+    # STEP 3
+    # check if available power is sufficient
+    if is_heating and 0.0 < phi_hc_ul <= phi_hc_max:
+        phi_hc_act = phi_hc_ul
+    elif is_heating and 0.0 < phi_hc_ul > phi_hc_max:
+        phi_hc_act = phi_hc_max
+    elif not is_heating and 0.0 > phi_hc_ul >= phi_hc_max:
+        phi_hc_act = phi_hc_ul
+    elif not is_heating and 0.0 > phi_hc_ul < phi_hc_max:
+        phi_hc_act = phi_hc_max
+    else:
+        return STATUS_UNEXPECTED, phi_hc_ul, temperatures_10
+
+    # STEP 4
+    temperatures = _calc_rc_model_temperatures(Eaf, Elf, Epro, Htr_op, Htr_w, I_sol, Qs, T_ext, a_m, a_t, a_w, c_m,
+                                               m_ve_inf_simple, m_ve_mech, m_ve_window,
+                                               calc_phi_hc_cv(phi_hc_act, f_hc_cv),
+                                               calc_phi_hc_r(phi_hc_act, f_hc_cv), theta_m_t_1, theta_ve_mech)
+    if check_bounds and _is_out_of_bounds(temperatures[0], temperatures[1], temperatures[2]):
+        return STATUS_OUT_OF_BOUNDS, 0.0, temperatures
+    return STATUS_OK, phi_hc_act, temperatures
+
+
+def get_rc_model_inputs(bpr, tsd, t):
+    """
+    Inputs of the R-C-model for the time step ``t``, in the order of the arguments of
+    :py:func:`_calc_rc_model_temperatures` (without the heating / cooling power), see
+    :py:func:`cea.demand.rc_model_SIA.calc_rc_model_temperatures`
+
+    :rtype: tuple
+    """
+    theta_m_t_1 = tsd['theta_m'][t - 1]
+    if np.isnan(theta_m_t_1):
+        theta_m_t_1 = tsd['T_ext'][t - 1]
+
+    f_internal_gains = min(bpr.rc_model['Af'] / bpr.rc_model['Aef'], 1.0)  # account for a proportion of internal gains
+    El = tsd['El'][t] * f_internal_gains
+    Ea = tsd['Ea'][t] * f_internal_gains
+    # account for a proportion of solar gains. This is very simplified for now.
+    I_sol = tsd['I_sol_and_I_rad'][t] * np.sqrt(bpr.architecture.Hs_ag)
+    c_m = bpr.rc_model['Cm'] / 3600  # (Wh/K) SIA 2044 unit is Wh/K, ISO unit is J/K
+
+    return (Ea, El, tsd['Epro'][t], bpr.rc_model['Htr_op'], bpr.rc_model['Htr_w'], I_sol, tsd['Qs'][t],
+            tsd['T_ext'][t], bpr.rc_model['Am'], bpr.rc_model['Atot'], bpr.rc_model['Awin_ag'], c_m,
+            tsd['m_ve_inf'][t], tsd['m_ve_mech'][t], tsd['m_ve_window'][t], theta_m_t_1, tsd['theta_ve_mech'][t])
+
+
+def to_rc_model_temperatures(bpr, t, temperatures, config):
+    """
+    Check the temperature bounds and convert the result of the compiled R-C-model to the dict returned by
+    :py:func:`cea.demand.rc_model_SIA.calc_rc_model_temperatures`
+    """
+    T_int, theta_c, theta_m = temperatures[:3]
+    if config.demand.overheating_warning and _is_out_of_bounds(T_int, theta_c, theta_m):
+        raise rc_model_SIA.temperature_out_of_bounds_error(bpr.name, t, T_int, theta_c, theta_m,
+                                                           bpr.architecture.Hs_ag)
+    return dict(zip(RC_MODEL_TEMPERATURES, temperatures))
+
+
+def calc_rc_model_temperatures(phi_hc_cv, phi_hc_r, bpr, tsd, t, config):
+    """
+    Compiled :py:func:`cea.demand.rc_model_SIA.calc_rc_model_temperatures`
+    """
+    (Eaf, Elf, Epro, Htr_op, Htr_w, I_sol, Qs, T_ext, a_m, a_t, a_w, c_m, m_ve_inf, m_ve_mech, m_ve_window,
+     theta_m_t_1, theta_ve_mech) = get_rc_model_inputs(bpr, tsd, t)
+    temperatures = _calc_rc_model_temperatures(Eaf, Elf, Epro, Htr_op, Htr_w, I_sol, Qs, T_ext, a_m, a_t, a_w, c_m,
+                                               m_ve_inf, m_ve_mech, m_ve_window, phi_hc_cv, phi_hc_r, theta_m_t_1,
+                                               theta_ve_mech)
+    return to_rc_model_temperatures(bpr, t, temperatures, config)
+
+
+def calc_rc_model_temperatures_no_heating_cooling(bpr, tsd, t, config):
+    """
+    Compiled :py:func:`cea.demand.rc_model_SIA.calc_rc_model_temperatures_no_heating_cooling`
+    """
+    return calc_rc_model_temperatures(0.0, 0.0, bpr, tsd, t, config)
+
+
+def calc_rc_model_temperatures_heating(phi_hc, bpr, tsd, t, config):
+    """
+    Compiled :py:func:`cea.demand.rc_model_SIA.calc_rc_model_temperatures_heating`
+    """
+    f_hc_cv = rc_model_SIA.lookup_f_hc_cv_heating(bpr)
+    return calc_rc_model_temperatures(calc_phi_hc_cv(phi_hc, f_hc_cv), calc_phi_hc_r(phi_hc, f_hc_cv), bpr, tsd, t,
+                                      config)
+
+
+def calc_rc_model_temperatures_cooling(phi_hc, bpr, tsd, t, config):
+    """
+    Compiled :py:func:`cea.demand.rc_model_SIA.calc_rc_model_temperatures_cooling`
+    """
+    f_hc_cv = rc_model_SIA.lookup_f_hc_cv_cooling(bpr)
+    return calc_rc_model_temperatures(calc_phi_hc_cv(phi_hc, f_hc_cv), calc_phi_hc_r(phi_hc, f_hc_cv), bpr, tsd, t,
+                                      config)
+
+
+def has_heating_demand(bpr, tsd, t, config):
+    """
+    Compiled :py:func:`cea.demand.rc_model_SIA.has_heating_demand`
+    """
+    ta_hs_set = tsd['ta_hs_set'][t]
+    if np.isnan(ta_hs_set):
+        # no set point = system off
+        return False
+    rc_model_temp = calc_rc_model_temperatures_no_heating_cooling(bpr, tsd, t, config)
+    return rc_model_temp['T_int'] < ta_hs_set - TEMP_TOLERANCE
+
+
+def has_cooling_demand(bpr, tsd, t, config):
+    """
+    Compiled :py:func:`cea.demand.rc_model_SIA.has_cooling_demand`
+    """
+    ta_cs_set = tsd['ta_cs_set'][t]
+    if np.isnan(ta_cs_set):
+        # no set point = system off
+        return False
+    rc_model_temp = calc_rc_model_temperatures_no_heating_cooling(bpr, tsd, t, config)
+    return rc_model_temp['T_int'] > ta_cs_set + TEMP_TOLERANCE
+
+
+def calc_rc_heating_demand(bpr, tsd, t, config):
+    """
+    Compiled :py:func:`cea.demand.hourly_procedure_heating_cooling_system_load.calc_rc_heating_demand`
+
+    :return: phi_h_act, rc_model_temperatures
+    """
+    phi_h_max = bpr.hvac['Qhsmax_Wm2'] * bpr.rc_model['Af']
+    return calc_rc_demand(bpr, tsd, t, config, rc_model_SIA.lookup_f_hc_cv_heating(bpr), tsd['ta_hs_set'][t],
+                          phi_h_max, True)
+
+
+def calc_rc_cooling_demand(bpr, tsd, t, config):
+    """
+    Compiled :py:func:`cea.demand.hourly_procedure_heating_cooling_system_load.calc_rc_cooling_demand`
+
+    :return: phi_c_act, rc_model_temperatures
+    """
+    phi_c_max = -bpr.hvac['Qcsmax_Wm2'] * bpr.rc_model['Af']
+    return calc_rc_demand(bpr, tsd, t, config, rc_model_SIA.lookup_f_hc_cv_cooling(bpr), tsd['ta_cs_set'][t],
+                          phi_c_max, False)
+
+
+def calc_rc_demand(bpr, tsd, t, config, f_hc_cv, t_int_set, phi_hc_max, is_heating):
+    phi_hc_10 = 10.0 * bpr.rc_model['Af']
+    status, phi_hc_act, temperatures = _calc_rc_demand(*get_rc_model_inputs(bpr, tsd, t), f_hc_cv, phi_hc_10,
+                                                       t_int_set, phi_hc_max, is_heating,
+                                                       config.demand.overheating_warning)
+    if status == STATUS_UNEXPECTED:
+        raise Exception("Unexpected status in '{}'".format(
+            'calc_rc_heating_demand' if is_heating else 'calc_rc_cooling_demand'))
+    # raises the exception for STATUS_OUT_OF_BOUNDS
+    return phi_hc_act, to_rc_model_temperatures(bpr, t, temperatures, config)
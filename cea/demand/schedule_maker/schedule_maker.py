@@ -1,5 +1,5 @@
 import os
-import random
+import zlib
 
 import numpy as np
 import pandas as pd
@@ -33,6 +33,7 @@ def schedule_maker_main(locator, config, building=None):
     # local variables
     buildings = config.schedule_maker.buildings
     schedule_model = config.schedule_maker.schedule_model
+    random_seed = config.schedule_maker.random_seed
 
     if schedule_model == 'deterministic':
         stochastic_schedule = False
@@ -79,7 +80,8 @@ def schedule_maker_main(locator, config, building=None):
                                    [internal_loads.loc[b] for b in buildings],
                                    [indoor_comfort.loc[b] for b in buildings],
                                    [prop_geometry.loc[b] for b in buildings],
-                                   repeat(stochastic_schedule, n))
+                                   repeat(stochastic_schedule, n),
+                                   repeat(random_seed, n))
     return None
 
 
@@ -93,7 +95,8 @@ def calc_schedules(locator,
                    internal_loads_building,
                    indoor_comfort_building,
                    prop_geometry_building,
-                   stochastic_schedule):
+                   stochastic_schedule,
+                   random_seed=None):
     """
     Calculate the profile of occupancy, electricity demand and domestic hot water consumption from the input schedules.
     For variables that depend on the number of people (humidity gains, heat gains and ventilation demand), additional
@@ -115,6 +118,9 @@ def calc_schedules(locator,
     :param indoor_comfort_building: indoor comfort properties for the current building (from case study inputs)
     :param prop_geometry_building: building geometry (from case study inputs)
     :param stochastic_schedule: Boolean that defines whether the stochastic occupancy model should be used
+    :param random_seed: seed of the stochastic occupancy model (combined with the building name, so the schedule of a
+        building does not depend on the other buildings calculated). If None, the schedules are not reproducible.
+    :type random_seed: int
 
     .. [Page, J., et al., 2008] Page, J., et al. A generalised stochastic model for the simulation of occupant presence.
         Energy and Buildings, Vol. 40, No. 2, 2008, pp 83-98.
@@ -134,10 +140,9 @@ def calc_schedules(locator,
         yearly_array = get_yearly_vectors(date_range, days_in_schedule, array, monthly_multiplier)
         number_of_occupants = int(1 / internal_loads_building['Occ_m2p'] * prop_geometry_building['Aocc'])
         if stochastic_schedule:
-            # if the stochastic schedules are used, the stochastic schedule generator is called once for every occupant
-            final_schedule['Occ_m2p'] = np.zeros(HOURS_IN_YEAR)
-            for occupant in range(number_of_occupants):
-                final_schedule['Occ_m2p'] += calc_individual_occupant_schedule(yearly_array)
+            # if the stochastic schedules are used, the presence of all occupants is drawn at once
+            final_schedule['Occ_m2p'] = calc_occupant_schedules(yearly_array, number_of_occupants,
+                                                                get_random_generator(random_seed, building))
         else:
             final_schedule['Occ_m2p'] = np.round(yearly_array * number_of_occupants)
     else:
@@ -313,48 +318,77 @@ def convert_schedule_string_to_temperature(schedule_string, schedule_type, Ths_s
     return schedule_float
 
 
-def calc_individual_occupant_schedule(deterministic_schedule):
+def get_random_generator(random_seed, building):
     """
-    Calculates the stochastic occupancy pattern for an individual based on Page et al. (2008). The so-called parameter
-    of mobility mu is assumed to be a uniformly-distributed random float between 0 and 0.5 based on the range of values
-    presented in the aforementioned paper.
+    Get the random number generator of the stochastic occupancy model of a building.
 
-    :param deterministic_schedule: deterministic schedule of occupancy provided in the user inputs
-    :type deterministic_schedule: array(float)
+    :param random_seed: seed of the stochastic occupancy model (None for a non-reproducible generator)
+    :type random_seed: int
+    :param str building: name of the building
 
-    :return pattern: yearly occupancy pattern for a given occupant in a given occupancy type
-    :rtype pattern: list[int]
+    :rtype: numpy.random.Generator
     """
+    if random_seed is None:
+        return np.random.default_rng()
+    return np.random.default_rng([random_seed, zlib.crc32(building.encode('utf-8'))])
 
-    # get a random mobility parameter mu between 0 and 0.5
-    mu = random.uniform(0, 0.5)
 
-    # assign initial state by comparing a random number to the deterministic schedule's probability of occupant presence at t = 0
-    if random.random() <= deterministic_schedule[0]:
-        state = 1
-    else:
-        state = 0
+def calc_occupant_schedules(deterministic_schedule, number_of_occupants, rng=None):
+    """
+    Calculates the stochastic occupancy pattern of all the occupants of a building based on Page et al. (2008). The
+    occupants are simulated together as a vector of states, i.e. the Markov chain is stepped once per hour for all the
+    occupants instead of once per hour and occupant. The so-called parameter of mobility mu of each occupant is assumed
+    to be a uniformly-distributed random float between 0 and 0.5 based on the range of values presented in the
+    aforementioned paper.
 
-    # start list of occupancy states throughout the year
-    pattern = [state]
+    :param deterministic_schedule: deterministic schedule of occupancy provided in the user inputs
+    :type deterministic_schedule: array(float)
+    :param int number_of_occupants: number of occupants of the building
+    :param rng: random number generator (see ``get_random_generator``)
+    :type rng: numpy.random.Generator
 
-    # calculate probability of presence for each hour of the year
-    for i in range(len(deterministic_schedule[:-1])):
-        # get probability of presence at t and t+1 from archetypal schedule
-        p_0 = deterministic_schedule[i]
-        p_1 = deterministic_schedule[i + 1]
+    :return: number of occupants present at each time step
+    :rtype: array(float)
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    deterministic_schedule = np.asarray(deterministic_schedule, dtype=float)
+    occupants_present = np.zeros(len(deterministic_schedule))
+    if number_of_occupants <= 0:
+        return occupants_present
+
+    # get a random mobility parameter mu between 0 and 0.5 for each occupant
+    mu = rng.uniform(0, 0.5, number_of_occupants)
+
+    # assign initial state by comparing a random number to the deterministic schedule's probability of occupant
+    # presence at t = 0
+    state = rng.random(number_of_occupants) <= deterministic_schedule[0]
+    occupants_present[0] = np.count_nonzero(state)
+
+    for t in range(1, len(deterministic_schedule)):
         # calculate probability of transition from absence to presence (T01) and from presence to presence (T11)
-        T01, T11 = calculate_transition_probabilities(mu, p_0, p_1)
+        # given the probability of presence at t-1 and t from the archetypal schedule
+        T01, T11 = calculate_transition_probabilities(mu, deterministic_schedule[t - 1], deterministic_schedule[t])
+        state = get_random_presence(np.where(state, T11, T01), rng)
+        occupants_present[t] = np.count_nonzero(state)
 
-        if state == 1:
-            next = get_random_presence(T11)
-        else:
-            next = get_random_presence(T01)
+    return occupants_present
 
-        pattern.append(next)
-        state = next
 
-    return np.array(pattern)
+def calc_individual_occupant_schedule(deterministic_schedule, rng=None):
+    """
+    Calculates the stochastic occupancy pattern for an individual based on Page et al. (2008), see
+    ``calc_occupant_schedules``.
+
+    :param deterministic_schedule: deterministic schedule of occupancy provided in the user inputs
+    :type deterministic_schedule: array(float)
+    :param rng: random number generator (see ``get_random_generator``)
+    :type rng: numpy.random.Generator
+
+    :return pattern: yearly occupancy pattern for a given occupant in a given occupancy type
+    :rtype pattern: array(int)
+    """
+    return calc_occupant_schedules(deterministic_schedule, 1, rng).astype(int)
 
 
 def calculate_transition_probabilities(mu, P0, P1):
@@ -363,53 +397,48 @@ def calculate_transition_probabilities(mu, P0, P1):
     probability of arriving (T01) and the probability of staying in (T11) given the parameter of mobility mu, the
     probability of the present state (P0), and the probability of the next state t+1 (P1).
 
-    :param mu: parameter of mobility
-    :type mu: float
+    :param mu: parameter of mobility (of each occupant)
+    :type mu: float or array(float)
     :param P0: probability of presence at the current time step t
     :type P0: float
     :param P1: probability of presence at the next time step t+1
     :type P1: float
 
     :return T01: probability of transition from absence to presence at current time step
-    :rtype T01: float
+    :rtype T01: float or array(float)
     :return T11: probability of transition from presence to presence at current time step
-    :rtype T11: float
+    :rtype T11: float or array(float)
     """
 
     # Calculate mobility factor fraction from Page et al. equation 5
     m = (mu - 1) / (mu + 1)
 
     # Calculate transition probability of arriving and transition probability of staying
-    T01 = (m) * P0 + P1
+    T01 = m * P0 + P1
     if P0 != 0:
-        T11 = ((P0 - 1) / P0) * (m * P0 + P1) + P1 / P0
+        T11 = ((P0 - 1) / P0) * T01 + P1 / P0
     else:
-        T11 = 0
+        T11 = np.zeros_like(T01)
 
-    # For some instances of mu the probabilities are bigger than 1, so the min function is used in the return statement.
-    return min(1, T01), min(1, T11)
+    # For some instances of mu the probabilities are bigger than 1, so the minimum is returned.
+    return np.minimum(1, T01), np.minimum(1, T11)
 
 
-def get_random_presence(p):
+def get_random_presence(p, rng):
     """
-    Get the current occupant state (presence=1 or absence=0) at the current time step given a probability p.
+    Get the occupant states (presence=True or absence=False) at the current time step given the probabilities p.
+    The probabilities are truncated to whole percents (negative probabilities mean absence).
 
-    :param p: A probability (e.g. T01, T11)
-    :type p: float
+    :param p: probabilities of presence (e.g. T01, T11) of each occupant
+    :type p: array(float)
+    :param rng: random number generator
+    :type rng: numpy.random.Generator
 
-    Returns the randomly-chosen state (0 or 1).
+    :return: the randomly-chosen states
+    :rtype: array(bool)
     """
-
-    # Calculate probability of presence
-    P1 = int(p * 100)
-    # Calculate probability of absence
-    P0 = 100 - P1
-
-    # Create population of possible values and choose one value
-    weighted_choices = [(1, P1), (0, P0)]
-    population = [val for val, cnt in weighted_choices for i in range(cnt)]
-
-    return random.choice(population)
+    probability = np.clip(np.trunc(p * 100), 0, 100) / 100
+    return rng.random(len(probability)) < probability
 
 
 def get_yearly_vectors(date_range, days_in_schedule, schedule_array, monthly_multiplier,
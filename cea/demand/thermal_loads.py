@@ -12,11 +12,13 @@ import pandas as pd
 from cea.constants import HOURS_IN_YEAR, HOURS_PRE_CONDITIONING
 from cea.demand import demand_writers
 from cea.demand import hourly_procedure_heating_cooling_system_load, ventilation_air_flows_simple
+from cea.demand import hourly_procedure_batch
 from cea.demand import latent_loads
 from cea.demand import sensible_loads, electrical_loads, hotwater_loads, refrigeration_loads, datacenter_loads
 from cea.demand import ventilation_air_flows_detailed, control_heating_cooling_systems
 from cea.demand.building_properties import get_thermal_resistance_surface
 from cea.demand.latent_loads import convert_rh_to_moisture_content
+from cea.utilities import profiler
 from cea.utilities import reporting
 
 
@@ -68,15 +70,116 @@ def calc_thermal_loads(building_name, bpr, weather_data, date_range, locator,
     :param locator:
     :param use_dynamic_infiltration_calculation:
 
-    :returns: This function does not return anything
-    :rtype: NoneType
+    :returns: summary of the results for the district totals (see :py:class:`cea.demand.demand_writers.DemandTotals`)
+    :rtype: dict
 
 """
-    schedules, tsd = initialize_inputs(bpr, weather_data, locator)
+    profiler.start(config.demand.profile)
+    schedules, tsd = calc_loads_before_space_conditioning(bpr, weather_data, locator)
+
+    # CALCULATE SPACE CONDITIONING DEMANDS
+    if has_conditioned_area(bpr):
+        tsd = initialize_space_conditioning(bpr, tsd, schedules, weather_data, date_range, building_name, config,
+                                            locator)
+        with profiler.stage('calc_Qhs_Qcs', building_name):
+            tsd = calc_Qhs_Qcs(bpr, tsd,
+                               use_dynamic_infiltration_calculation, config)  # end-use demand latent and sensible + ventilation
+        with profiler.stage('calc_space_conditioning_system_loads', building_name):
+            tsd = calc_space_conditioning_system_loads(bpr, tsd)
+    else:
+        tsd = calc_no_conditioned_area(bpr, tsd)
+
+    tsd = calc_loads_after_space_conditioning(bpr, tsd, schedules)
+
+    # WRITE SOLAR RESULTS
+    summary = write_results(bpr, building_name, date_range, loads_output, locator, massflows_output,
+                            resolution_outputs, temperatures_output, tsd, debug, config.demand.format)
+    summary['profile'] = profiler.stop()
+    return summary
+
+
+def calc_thermal_loads_batch(building_names, bprs, weather_data, date_range, locator,
+                             use_dynamic_infiltration_calculation, resolution_outputs, loads_output, massflows_output,
+                             temperatures_output, config, debug):
+    """
+    Calculate thermal loads of a batch of buildings. Same as calling :py:func:`calc_thermal_loads` for each building,
+    but the hourly procedure of the buildings with radiative (or no) heating and cooling systems is solved for the whole
+    batch at once by :py:func:`cea.demand.hourly_procedure_batch.calc_Qhs_Qcs_batch`. The other buildings are
+    calculated one by one.
+
+    :param building_names: names of the buildings in the batch
+    :type building_names: list[str]
+    :param bprs: building properties of the buildings in the batch (same order as ``building_names``)
+    :type bprs: list[BuildingPropertiesRow]
+
+    The other parameters are the same as for :py:func:`calc_thermal_loads`.
+
+    :returns: summaries of the results of the buildings (see :py:class:`cea.demand.demand_writers.DemandTotals`)
+    :rtype: list[dict]
+    """
+    profiler.start(config.demand.profile)
+    schedules = []
+    tsds = []
+    batch = []
+    for building_name, bpr in zip(building_names, bprs):
+        schedules_building, tsd = calc_loads_before_space_conditioning(bpr, weather_data, locator)
+        if has_conditioned_area(bpr):
+            tsd = initialize_space_conditioning(bpr, tsd, schedules_building, weather_data, date_range,
+                                                building_name, config, locator)
+            if hourly_procedure_batch.is_batch_compatible(bpr, use_dynamic_infiltration_calculation):
+                batch.append(len(tsds))
+            else:
+                with profiler.stage('calc_Qhs_Qcs', building_name):
+                    tsd = calc_Qhs_Qcs(bpr, tsd, use_dynamic_infiltration_calculation, config)
+        schedules.append(schedules_building)
+        tsds.append(tsd)
+
+    if batch:
+        # the hourly procedure of the batch is recorded as one stage of all buildings in the batch
+        with profiler.stage('calc_Qhs_Qcs_batch', ' '.join(building_names[i] for i in batch)):
+            hourly_procedure_batch.calc_Qhs_Qcs_batch([bprs[i] for i in batch], [tsds[i] for i in batch], config)
+
+    summaries = []
+    for building_name, bpr, schedules_building, tsd in zip(building_names, bprs, schedules, tsds):
+        if has_conditioned_area(bpr):
+            with profiler.stage('calc_space_conditioning_system_loads', building_name):
+                tsd = calc_space_conditioning_system_loads(bpr, tsd)
+        else:
+            tsd = calc_no_conditioned_area(bpr, tsd)
+        tsd = calc_loads_after_space_conditioning(bpr, tsd, schedules_building)
+        summaries.append(write_results(bpr, building_name, date_range, loads_output, locator, massflows_output,
+                                       resolution_outputs, temperatures_output, tsd, debug, config.demand.format))
+
+    # the records of the whole batch are returned with the first building
+    summaries[0]['profile'] = profiler.stop()
+    return summaries
+
+
+def has_conditioned_area(bpr):
+    return not np.isclose(bpr.rc_model['Af'], 0.0)
+
+
+def calc_loads_before_space_conditioning(bpr, weather_data, locator):
+    """
+    Initialize the time step data and calculate the loads that do not depend on the space conditioning
+    (electricity, refrigeration, process heating / cooling and data centers).
+
+    :returns: one dict of schedules, one dict of time step data
+    """
+    with profiler.stage('initialize_inputs', bpr.name):
+        schedules, tsd = initialize_inputs(bpr, weather_data, locator)
 
     # CALCULATE ELECTRICITY LOADS
-    tsd = electrical_loads.calc_Eal_Epro(tsd, schedules)
+    with profiler.stage('calc_Eal_Epro', bpr.name):
+        tsd = electrical_loads.calc_Eal_Epro(tsd, schedules)
+
+    with profiler.stage('process_refrigeration_data_center_loads', bpr.name):
+        tsd = calc_process_refrigeration_data_center_loads(bpr, tsd, schedules, locator)
+
+    return schedules, tsd
 
+
+def calc_process_refrigeration_data_center_loads(bpr, tsd, schedules, locator):
     # CALCULATE REFRIGERATION LOADS
     if refrigeration_loads.has_refrigeration_load(bpr):
         tsd = refrigeration_loads.calc_Qcre_sys(bpr, tsd, schedules)
@@ -102,40 +205,76 @@ def calc_thermal_loads(building_name, bpr, weather_data, date_range, locator,
         tsd['mcpcdata_sys'] = tsd['Tcdata_sys_re'] = tsd['Tcdata_sys_sup'] = np.zeros(HOURS_IN_YEAR)
         tsd['Edata'] = tsd['E_cdata'] = np.zeros(HOURS_IN_YEAR)
 
-    # CALCULATE SPACE CONDITIONING DEMANDS
-    if np.isclose(bpr.rc_model['Af'], 0.0):  # if building does not have conditioned area
-        tsd['T_int'] = tsd['T_ext']
-        tsd['x_int'] = np.vectorize(convert_rh_to_moisture_content)(tsd['rh_ext'], tsd['T_int'])
-        tsd['E_cs'] = tsd['E_hs'] = np.zeros(HOURS_IN_YEAR)
-        tsd['Eaux_cs'] = tsd['Eaux_hs'] = tsd['Ehs_lat_aux'] = np.zeros(HOURS_IN_YEAR)
-        print(f"building {bpr.name} does not have an air-conditioned area")
-    else:
+    return tsd
+
+
+def initialize_space_conditioning(bpr, tsd, schedules, weather_data, date_range, building_name, config, locator):
+    """
+    Prepare the time step data for the hourly procedure (:py:func:`calc_Qhs_Qcs`)
+    """
+    with profiler.stage('calc_Qgain_lat', building_name):
         # get hourly thermal resistances of external surfaces
         tsd['RSE_wall'], \
         tsd['RSE_roof'], \
         tsd['RSE_win'] = get_thermal_resistance_surface(bpr.architecture, weather_data)
         # calculate heat gains
         tsd = latent_loads.calc_Qgain_lat(tsd, schedules)
+    with profiler.stage('calc_set_points', building_name):
         tsd = calc_set_points(bpr, date_range, tsd, building_name, config, locator,
                               schedules)  # calculate the setpoints for every hour
-        tsd = calc_Qhs_Qcs(bpr, tsd,
-                           use_dynamic_infiltration_calculation, config)  # end-use demand latent and sensible + ventilation
-        tsd = sensible_loads.calc_Qhs_Qcs_loss(bpr, tsd)  # losses
-        tsd = sensible_loads.calc_Qhs_sys_Qcs_sys(tsd)  # system (incl. losses)
-        tsd = sensible_loads.calc_temperatures_emission_systems(bpr, tsd)  # calculate temperatures
-        tsd = electrical_loads.calc_Eve(tsd)  # calc auxiliary loads ventilation
-        tsd = electrical_loads.calc_Eaux_Qhs_Qcs(tsd, bpr)  # calc auxiliary loads heating and cooling
-        tsd = calc_Qcs_sys(bpr, tsd)  # final : including fuels and renewables
-        tsd = calc_Qhs_sys(bpr, tsd)  # final : including fuels and renewables
-
-        # Positive loads
-        tsd['Qcs_lat_sys'] = abs(tsd['Qcs_lat_sys'])
-        tsd['DC_cs'] = abs(tsd['DC_cs'])
-        tsd['Qcs_sys'] = abs(tsd['Qcs_sys'])
-        tsd['Qcre_sys'] = abs(tsd['Qcre_sys'])  # inverting sign of cooling loads for reporting and graphs
-        tsd['Qcdata_sys'] = abs(tsd['Qcdata_sys'])  # inverting sign of cooling loads for reporting and graphs
+    return tsd
+
+
+def calc_space_conditioning_system_loads(bpr, tsd):
+    """
+    Calculate the system and final loads of space heating and cooling from the results of the hourly procedure
+    """
+    tsd = sensible_loads.calc_Qhs_Qcs_loss(bpr, tsd)  # losses
+    tsd = sensible_loads.calc_Qhs_sys_Qcs_sys(tsd)  # system (incl. losses)
+    tsd = sensible_loads.calc_temperatures_emission_systems(bpr, tsd)  # calculate temperatures
+    tsd = electrical_loads.calc_Eve(tsd)  # calc auxiliary loads ventilation
+    tsd = electrical_loads.calc_Eaux_Qhs_Qcs(tsd, bpr)  # calc auxiliary loads heating and cooling
+    tsd = calc_Qcs_sys(bpr, tsd)  # final : including fuels and renewables
+    tsd = calc_Qhs_sys(bpr, tsd)  # final : including fuels and renewables
+
+    # Positive loads
+    tsd['Qcs_lat_sys'] = abs(tsd['Qcs_lat_sys'])
+    tsd['DC_cs'] = abs(tsd['DC_cs'])
+    tsd['Qcs_sys'] = abs(tsd['Qcs_sys'])
+    tsd['Qcre_sys'] = abs(tsd['Qcre_sys'])  # inverting sign of cooling loads for reporting and graphs
+    tsd['Qcdata_sys'] = abs(tsd['Qcdata_sys'])  # inverting sign of cooling loads for reporting and graphs
+    return tsd
+
+
+def calc_no_conditioned_area(bpr, tsd):
+    tsd['T_int'] = tsd['T_ext']
+    tsd['x_int'] = np.vectorize(convert_rh_to_moisture_content)(tsd['rh_ext'], tsd['T_int'])
+    tsd['E_cs'] = tsd['E_hs'] = np.zeros(HOURS_IN_YEAR)
+    tsd['Eaux_cs'] = tsd['Eaux_hs'] = tsd['Ehs_lat_aux'] = np.zeros(HOURS_IN_YEAR)
+    print(f"building {bpr.name} does not have an air-conditioned area")
+    return tsd
 
+
+def calc_loads_after_space_conditioning(bpr, tsd, schedules):
+    """
+    Calculate the hot water loads and the totals of the building
+    """
     # CALCULATE HOT WATER LOADS
+    with profiler.stage('calc_hot_water_loads', bpr.name):
+        tsd = calc_hot_water_loads(bpr, tsd, schedules)
+
+    with profiler.stage('calc_totals', bpr.name):
+        # CALCULATE SUM OF HEATING AND COOLING LOADS
+        tsd = calc_QH_sys_QC_sys(tsd)  # aggregated cooling and heating loads
+
+        # CALCULATE ELECTRICITY LOADS PART 2/2 AUXILIARY LOADS + ENERGY GENERATION
+        tsd = electrical_loads.calc_Eaux(tsd)  # auxiliary totals
+        tsd = electrical_loads.calc_E_sys(tsd)  # system (incl. losses)
+        tsd = electrical_loads.calc_Ef(bpr, tsd)  # final (incl. self. generated)
+    return tsd
+
+
+def calc_hot_water_loads(bpr, tsd, schedules):
     if hotwater_loads.has_hot_water_technical_system(bpr):
         tsd = electrical_loads.calc_Eaux_fw(tsd, bpr, schedules)
         tsd = hotwater_loads.calc_Qww(bpr, tsd, schedules)  # end-use
@@ -149,20 +288,7 @@ def calc_thermal_loads(building_name, bpr, weather_data, date_range, locator,
         tsd['Eaux_ww'] = np.zeros(HOURS_IN_YEAR)
         tsd['NG_ww'] = tsd['COAL_ww'] = tsd['OIL_ww'] = tsd['WOOD_ww'] = np.zeros(HOURS_IN_YEAR)
         tsd['E_ww'] = np.zeros(HOURS_IN_YEAR)
-
-    # CALCULATE SUM OF HEATING AND COOLING LOADS
-    tsd = calc_QH_sys_QC_sys(tsd)  # aggregated cooling and heating loads
-
-    # CALCULATE ELECTRICITY LOADS PART 2/2 AUXILIARY LOADS + ENERGY GENERATION
-    tsd = electrical_loads.calc_Eaux(tsd)  # auxiliary totals
-    tsd = electrical_loads.calc_E_sys(tsd)  # system (incl. losses)
-    tsd = electrical_loads.calc_Ef(bpr, tsd)  # final (incl. self. generated)
-
-    # WRITE SOLAR RESULTS
-    write_results(bpr, building_name, date_range, loads_output, locator, massflows_output,
-                  resolution_outputs, temperatures_output, tsd, debug)
-
-    return
+    return tsd
 
 
 def calc_QH_sys_QC_sys(tsd):
@@ -173,8 +299,11 @@ def calc_QH_sys_QC_sys(tsd):
 
 
 def write_results(bpr, building_name, date, loads_output, locator, massflows_output,
-                  resolution_outputs, temperatures_output, tsd, debug):
-    if resolution_outputs == 'hourly':
+                  resolution_outputs, temperatures_output, tsd, debug, format='csv'):
+    if resolution_outputs == 'hourly' and format in demand_writers.COLUMNAR_FORMATS:
+        writer = demand_writers.HourlyDemandColumnarWriter(loads_output, massflows_output, temperatures_output,
+                                                           format)
+    elif resolution_outputs == 'hourly':
         writer = demand_writers.HourlyDemandWriter(loads_output, massflows_output, temperatures_output)
     elif resolution_outputs == 'monthly':
         writer = demand_writers.MonthlyDemandWriter(loads_output, massflows_output, temperatures_output)
@@ -188,7 +317,8 @@ def write_results(bpr, building_name, date, loads_output, locator, massflows_out
         reporting.quick_visualization_tsd(tsd, locator.get_demand_results_folder(), building_name)
         reporting.full_report_to_xls(tsd, locator.get_demand_results_folder(), building_name)
 
-    writer.results_to_csv(tsd, bpr, locator, date, building_name)
+    with profiler.stage('write_results', building_name):
+        return writer.results_to_csv(tsd, bpr, locator, date, building_name)
 
 
 def calc_Qcs_sys(bpr, tsd):
@@ -718,6 +718,18 @@ class InputLocator(object):
     def get_thermal_network_folder(self):
         return self._ensure_folder(self.scenario, 'outputs', 'data', 'thermal-network')
 
+    def get_thermal_network_results_store_folder(self, network_type, network_name):
+        """scenario/outputs/data/thermal-network/{network_type}_{network_name}_results"""
+        return os.path.join(self.get_thermal_network_folder(), '%s_%s_results' % (network_type, network_name))
+
+    def get_thermal_network_results_store_file(self, quantity, network_type, network_name):
+        """scenario/outputs/data/thermal-network/{network_type}_{network_name}_results/{quantity}.parquet
+        Hourly results of a quantity of a district heating or cooling network, with a column per pipe, node or total
+        (see cea.technologies.thermal_network.results_store)
+        """
+        return os.path.join(self.get_thermal_network_results_store_folder(network_type, network_name),
+                            '%s.parquet' % quantity)
+
     def get_nominal_edge_mass_flow_csv_file(self, network_type, network_name=""):
         """scenario/outputs/data/optimization/network/layout/DH_NodesData.csv or DC_NodesData.csv
         Network layout files for nodes of district heating or cooling networks
@@ -1059,6 +1071,18 @@ class InputLocator(object):
         """scenario/outputs/data/solar-radiation/{building}_geometrgy.csv"""
         return os.path.join(self.get_solar_radiation_folder(), '%s_geometry.csv' % building)
 
+    def get_radiation_sensor_store_folder(self):
+        """scenario/outputs/data/solar-radiation/sensors"""
+        return self._ensure_folder(self.get_solar_radiation_folder(), 'sensors')
+
+    def get_radiation_sensor_store(self, store_name):
+        """scenario/outputs/data/solar-radiation/sensors/{store_name}.npy"""
+        return os.path.join(self.get_radiation_sensor_store_folder(), '%s.npy' % store_name)
+
+    def get_radiation_sensor_store_index(self, store_name):
+        """scenario/outputs/data/solar-radiation/sensors/{store_name}.csv"""
+        return os.path.join(self.get_radiation_sensor_store_folder(), '%s.csv' % store_name)
+
     def get_radiation_materials(self):
         """scenario/outputs/data/solar-radiation/{building}_geometrgy.csv"""
         return os.path.join(self.get_solar_radiation_folder(), 'buidling_materials.csv')
@@ -1130,7 +1154,7 @@ class InputLocator(object):
         return os.path.join(self.get_demand_results_folder(), 'Total_demand_hourly.%(format)s' % locals())
 
     def get_demand_results_file(self, building, format='csv'):
-        """scenario/outputs/data/demand/{building}.csv"""
+        """scenario/outputs/data/demand/{building}.csv (format: csv, parquet, feather or hdf)"""
         return os.path.join(self.get_demand_results_folder(), '%(building)s.%(format)s' % locals())
 
     # EMISSIONS
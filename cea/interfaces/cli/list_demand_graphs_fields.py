@@ -9,6 +9,7 @@ import os
 import pandas as pd
 import cea.config
 import cea.inputlocator
+from cea.demand.demand_writers import read_hourly_demand
 
 
 def demand_graph_fields(scenario):
@@ -18,7 +19,7 @@ def demand_graph_fields(scenario):
     df_total_demand = pd.read_csv(locator.get_total_demand())
     total_fields = set(df_total_demand.columns.tolist())
     first_building = df_total_demand['Name'][0]
-    df_building = pd.read_csv(locator.get_demand_results_file(first_building))
+    df_building = read_hourly_demand(locator, first_building)
     fields = set(df_building.columns.tolist())
     fields.remove('DATE')
     fields.remove('Name')
@@ -7,6 +7,8 @@ Network optimization
 
 import pandas as pd
 
+from cea.technologies.thermal_network.results_store import read_thermal_network_results
+
 __author__ = "Sreepathi Bhargava Krishna"
 __copyright__ = "Copyright 2015, Architecture and Building Systems - ETH Zurich"
 __credits__ = ["Sreepathi Bhargava Krishna", "Tim Vollrath", "Thuy-An Nguyen", "Jimeno A. Fonseca"]
@@ -46,10 +48,11 @@ class NetworkOptimizationFeatures(object):
                 self.pipesCosts_DCN_USD = self.pipe_costs(locator, network_name, "DC")
 
     def mass_flow_rate_plant(self, locator, network_name, network_type):
-        mass_flow_df = pd.read_csv((locator.get_thermal_network_layout_massflow_nodes_file(network_type, network_name)))
         mass_flow_nodes_df = pd.read_csv((locator.get_thermal_network_node_types_csv_file(network_type, network_name)))
         # identify the node with the plant
         node_id = mass_flow_nodes_df.loc[mass_flow_nodes_df['Type'] == "PLANT", 'Name'].item()
+        mass_flow_df = read_thermal_network_results(locator, network_type, network_name, 'node_mass_flows',
+                                                    columns=[node_id])
         return mass_flow_df[node_id].values
 
 
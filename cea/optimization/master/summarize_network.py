@@ -12,6 +12,7 @@ import time
 import numpy as np
 import pandas as pd
 
+from cea.demand.demand_writers import read_hourly_demand
 from cea.optimization.constants import K_DH, ZERO_DEGREES_CELSIUS_IN_KELVIN
 from cea.constants import HEAT_CAPACITY_OF_WATER_JPERKGK
 from cea.constants import HOURS_IN_YEAR
@@ -27,6 +28,9 @@ __maintainer__ = "Daren Thomas"
 __email__ = "thomas@arch.ethz.ch"
 __status__ = "Production"
 
+# the columns of the demand results of the buildings read by this module (see `read_hourly_demand`)
+DATA_CENTRE_DEMAND_COLUMNS = ['Qcdata_sys_kWh', 'mcpcdata_sys_kWperC']
+
 
 def network_main(locator, buildings_in_this_network, ground_temp, num_tot_buildings, network_type, key):
     """
@@ -51,7 +55,7 @@ def network_main(locator, buildings_in_this_network, ground_temp, num_tot_buildi
     # local variables
     t0 = time.perf_counter()
     num_buildings_network = len(buildings_in_this_network)
-    date = pd.read_csv(locator.get_demand_results_file(buildings_in_this_network[0])).DATE.values
+    date = read_hourly_demand(locator, buildings_in_this_network[0], usecols=['DATE']).DATE.values
 
     # CALCULATE RELATIVE LENGTH OF THIS NETWORK
     data_network = pd.read_csv(locator.get_thermal_network_edge_list_file(network_type))
@@ -80,7 +84,7 @@ def network_main(locator, buildings_in_this_network, ground_temp, num_tot_buildi
     if network_type == "DH":
         iteration = 0
         for building_name in buildings_in_this_network:
-            demand_df.append(pd.read_csv(locator.get_demand_results_file(building_name)))
+            demand_df.append(read_hourly_demand(locator, building_name, usecols=DATA_CENTRE_DEMAND_COLUMNS))
             substation_df.append(pd.read_csv(locator.get_optimization_substations_results_file(building_name, network_type, key)))
             mdot_heat_netw_all_kgpers += substation_df[iteration].mdot_DH_result_kgpers.values
 
@@ -143,7 +147,7 @@ def network_main(locator, buildings_in_this_network, ground_temp, num_tot_buildi
         iteration = 0
         for building_name in buildings_in_this_network:
             #get demand and substation file of buildings in this network
-            demand_df = pd.read_csv(locator.get_demand_results_file(building_name))
+            demand_df = read_hourly_demand(locator, building_name, usecols=DATA_CENTRE_DEMAND_COLUMNS)
             substation_df = pd.read_csv(locator.get_optimization_substations_results_file(building_name, network_type, key))
 
             #add to demand of servers
@@ -15,6 +15,7 @@ import pandas as pd
 
 import cea.technologies.solar.photovoltaic as pv
 from cea.constants import HOURS_IN_YEAR
+from cea.demand.demand_writers import read_hourly_demand
 from cea.optimization.master.emissions_model import calc_emissions_Whyr_to_tonCO2yr
 
 __author__ = "Sreepathi Bhargava Krishna"
@@ -26,6 +27,11 @@ __maintainer__ = "Daren Thomas"
 __email__ = "cea@arch.ethz.ch"
 __status__ = "Production"
 
+# the columns of the demand results of the buildings read by this module (see `read_hourly_demand`)
+END_USE_ELECTRICITY_COLUMNS = ['Eal_kWh', 'Edata_kWh', 'Epro_kWh', 'Eaux_kWh']
+SYSTEMS_ELECTRICITY_COLUMNS = ['E_hs_kWh', 'E_ww_kWh', 'E_cs_kWh', 'E_cre_kWh', 'E_cdata_kWh']
+NATURAL_GAS_COLUMNS = ['NG_hs_kWh', 'NG_ww_kWh']
+
 
 def electricity_calculations_of_all_buildings(locator, master_to_slave_vars,
                                               district_heating_generation_dispatch,
@@ -363,7 +369,7 @@ def extract_electricity_demand_buildings(master_to_slave_vars, building_names, l
 
     # for all buildings with electricity demand
     for name in building_names:  # adding the electricity demand of
-        building_demand = pd.read_csv(locator.get_demand_results_file(name))
+        building_demand = read_hourly_demand(locator, name, usecols=END_USE_ELECTRICITY_COLUMNS)
         # end-use electrical demands
         Eal_req_W += (building_demand['Eal_kWh'] * 1000).values
         Edata_req_W += (building_demand['Edata_kWh'] * 1000).values
@@ -373,7 +379,7 @@ def extract_electricity_demand_buildings(master_to_slave_vars, building_names, l
     # when the two networks are present
     if master_to_slave_vars.DHN_exists and master_to_slave_vars.DCN_exists:
         for name in building_names:
-            building_demand = pd.read_csv(locator.get_demand_results_file(name))
+            building_demand = read_hourly_demand(locator, name, usecols=SYSTEMS_ELECTRICITY_COLUMNS)
             if name in buildings_district_scale_to_district_heating and name in buildings_district_scale_to_district_cooling:
                 # if connected to the heating network
                 E_hs_ww_req_W += np.zeros(HOURS_IN_YEAR)
@@ -403,7 +409,7 @@ def extract_electricity_demand_buildings(master_to_slave_vars, building_names, l
     # if only a district heating network exists.
     elif master_to_slave_vars.DHN_exists:
         for name in building_names:
-            building_demand = pd.read_csv(locator.get_demand_results_file(name))
+            building_demand = read_hourly_demand(locator, name, usecols=SYSTEMS_ELECTRICITY_COLUMNS)
             if name in buildings_district_scale_to_district_heating:
                 # if connected to the heating network
                 E_hs_ww_req_W += np.zeros(HOURS_IN_YEAR)  # because it is connected to the heating network
@@ -428,7 +434,7 @@ def extract_electricity_demand_buildings(master_to_slave_vars, building_names, l
     # if only a district cooling network exists.
     elif master_to_slave_vars.DCN_exists:
         for name in building_names:
-            building_demand = pd.read_csv(locator.get_demand_results_file(name))
+            building_demand = read_hourly_demand(locator, name, usecols=SYSTEMS_ELECTRICITY_COLUMNS)
             E_hs_ww_req_W += ((building_demand['E_hs_kWh'] +
                                building_demand['E_ww_kWh']) * 1000).values  # to W
             if name in buildings_district_scale_to_district_cooling:
@@ -471,7 +477,7 @@ def extract_fuels_demand_buildings(master_to_slave_vars, building_names, locator
     # when the two networks are present
     if master_to_slave_vars.DHN_exists and master_to_slave_vars.DCN_exists:
         for name in building_names:
-            building_demand = pd.read_csv(locator.get_demand_results_file(name))
+            building_demand = read_hourly_demand(locator, name, usecols=NATURAL_GAS_COLUMNS)
             if name in buildings_district_scale_to_district_heating and name in buildings_district_scale_to_district_cooling:
                 # if connected to the heating network
                 NG_hs_ww_req_W += 0.0
@@ -507,7 +513,7 @@ def extract_fuels_demand_buildings(master_to_slave_vars, building_names, locator
     # if only a district cooling network exists.
     elif master_to_slave_vars.DCN_exists:
         for name in building_names:
-            building_demand = pd.read_csv(locator.get_demand_results_file(name))
+            building_demand = read_hourly_demand(locator, name, usecols=NATURAL_GAS_COLUMNS)
             # if not then get electric boilers etc form baseline.
             NG_hs_ww_req_W += (building_demand['NG_hs_kWh'] + building_demand['NG_ww_kWh']) * 1000  # to W
 
@@ -11,6 +11,7 @@ import cea.config
 import cea.inputlocator
 import cea.plots
 import cea.plots.cache
+from cea.demand.demand_writers import read_hourly_demand
 from cea.plots.base import PlotBase
 
 """
@@ -128,7 +129,7 @@ class DemandPlotBase(PlotBase):
         return df1
 
     def _calculate_hourly_loads(self):
-        data_demand = functools.reduce(self.add_fields, (pd.read_csv(self.locator.get_demand_results_file(building))
+        data_demand = functools.reduce(self.add_fields, (read_hourly_demand(self.locator, building)
                                                          for building in self.buildings)).set_index('DATE')
         return data_demand
 
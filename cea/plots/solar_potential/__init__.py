@@ -39,7 +39,7 @@ class SolarPotentialPlotBase(PlotBase):
         self.category_path = os.path.join('new_basic', 'solar-potential')
         self.normalization = self.parameters['normalization']
         self.input_files = [(self.locator.get_radiation_metadata, [building]) for building in self.buildings] + \
-                           [(self.locator.get_radiation_building_sensors, [building]) for building in self.buildings]
+                           [(self.locator.get_radiation_building, [building]) for building in self.buildings]
         self.weather = self.locator.get_weather_file()
         self.solar_analysis_fields = ['windows_east_kW',
                                       'windows_west_kW',
@@ -11,8 +11,10 @@ import pandas as pd
 
 import cea.plots.cache
 from cea.constants import HOURS_IN_YEAR
+from cea.demand.demand_writers import read_hourly_demand
 from cea.plots.base import PlotBase
 from cea.plots.variable_naming import get_color_array
+from cea.technologies.thermal_network.results_store import read_thermal_network_results, resolve_results_file
 from cea.utilities.standardize_coordinates import get_geographic_coordinate_system
 
 """
@@ -66,6 +68,23 @@ class ThermalNetworksPlotBase(PlotBase):
                                                                   network_name=self.network_name, name=self.id())
         return self.locator.get_timeseries_plots_file(file_name, self.category_path)
 
+    @property
+    def input_files(self):
+        """
+        The results of the pipes and nodes can be in the results store of the network instead of the csv files, so
+        the files read are checked for the missing input files and the timestamps of the cache.
+        """
+        return [resolve_results_file(self.locator, locator_method, args)
+                for locator_method, args in self._input_files]
+
+    @input_files.setter
+    def input_files(self, input_files):
+        self._input_files = input_files
+
+    def read_network_results(self, quantity, columns=None):
+        """Read the hourly results of the network (see :py:mod:`cea.technologies.thermal_network.results_store`)"""
+        return read_thermal_network_results(self.locator, self.network_type, self.network_name, quantity, columns)
+
     @property
     @cea.plots.cache.cached
     def buildings_hourly(self):
@@ -89,7 +108,7 @@ class ThermalNetworksPlotBase(PlotBase):
     def date(self):
         """Read in the date information from demand results of the first building in the zone"""
         buildings = self.locator.get_zone_building_names()
-        df_date = pd.read_csv(self.locator.get_demand_results_file(buildings[0]))
+        df_date = read_hourly_demand(self.locator, buildings[0], usecols=["DATE"])
         return df_date["DATE"]
 
     @property
@@ -134,41 +153,35 @@ class ThermalNetworksPlotBase(PlotBase):
     @property
     @cea.plots.cache.cached
     def hourly_heat_loss(self):
-        hourly_heat_loss = pd.read_csv(
-            self.locator.get_network_thermal_loss_edges_file(self.network_type, self.network_name))
+        hourly_heat_loss = self.read_network_results('q_loss_supply_edges_kW')
         hourly_heat_loss = abs(hourly_heat_loss).sum(axis=1)  # aggregate heat losses of all edges
         return pd.DataFrame(hourly_heat_loss)
 
     @property
     @cea.plots.cache.cached
     def P_loss_kWh(self):
-        return pd.read_csv(self.locator.get_thermal_network_pressure_losses_edges_file(self.network_type,
-                                                                                       self.network_name))
+        return self.read_network_results('pressure_loss_supply_edge_kW')
 
     @property
     @cea.plots.cache.cached
     def linear_pressure_loss_Paperm(self):
-        return pd.read_csv(self.locator.get_network_linear_pressure_drop_edges(self.network_type,
-                                                                               self.network_name))
+        return self.read_network_results('linear_pressure_loss_supply_Paperm')
 
     @property
     @cea.plots.cache.cached
     def pressure_at_nodes_Pa(self):
-        return pd.read_csv(self.locator.get_network_pressure_at_nodes(self.network_type,
-                                                                      self.network_name))
+        return self.read_network_results('pressure_at_supply_nodes_Pa')
 
     @property
     @cea.plots.cache.cached
     def mass_flow_kgs_pipes(self):
-        return pd.read_csv(self.locator.get_thermal_network_layout_massflow_edges_file(self.network_type,
-                                                                                       self.network_name))
+        return self.read_network_results('edge_mass_flows')
 
     @property
     @cea.plots.cache.cached
     def velocity_mps_pipes(self):
         try:
-            return pd.read_csv(self.locator.get_thermal_network_velocity_edges_file(self.network_type,
-                                                                                       self.network_name))
+            return self.read_network_results('velocities_in_supply_edges_mpers')
         except Exception:
             #backward compatibility with detailed network simulation (which does not produce this data)
             return None
@@ -177,8 +190,7 @@ class ThermalNetworksPlotBase(PlotBase):
     @cea.plots.cache.cached
     def mass_flow_kgs_nodes(self):
         try:
-            return pd.read_csv(self.locator.get_thermal_network_layout_massflow_nodes_file(self.network_type,
-                                                                                       self.network_name))
+            return self.read_network_results('node_mass_flows')
         except Exception:
         # backward compatibility with detailed network simulation (which does not produce this data)
             return None
@@ -186,15 +198,13 @@ class ThermalNetworksPlotBase(PlotBase):
     @property
     @cea.plots.cache.cached
     def thermal_loss_edges_kWh(self):
-        return pd.read_csv(self.locator.get_network_thermal_loss_edges_file(self.network_type,
-                                                                            self.network_name))  # edge loss
+        return self.read_network_results('q_loss_supply_edges_kW')  # edge loss
 
     @property
     @cea.plots.cache.cached
     def thermal_loss_edges_Wperm(self):
         try:
-            return pd.read_csv(self.locator.get_network_linear_thermal_loss_edges_file(self.network_type,
-                                                                                       self.network_name))  # edge loss
+            return self.read_network_results('linear_thermal_loss_supply_edges_Wperm')  # edge loss
         except Exception:
             # backward compatibility with detailed network simulation (which does not produce this data)
             return None
@@ -209,8 +219,7 @@ class ThermalNetworksPlotBase(PlotBase):
     @cea.plots.cache.cached
     def temperature_supply_nodes_C(self):
         """Node supply temperatures"""
-        supply_df = pd.read_csv(
-            self.locator.get_network_temperature_supply_nodes_file(self.network_type, self.network_name))
+        supply_df = self.read_network_results('T_supply_nodes')
         supply_df -= 273.15  # convert from Kelvin to C
         return supply_df
 
@@ -218,8 +227,7 @@ class ThermalNetworksPlotBase(PlotBase):
     @cea.plots.cache.cached
     def temperature_return_nodes_C(self):
         """Node return temperatures"""
-        return_df = pd.read_csv(
-            self.locator.get_network_temperature_return_nodes_file(self.network_type, self.network_name))
+        return_df = self.read_network_results('T_return_nodes')
         return_df -= 273.15  # convert from Kelvin to C
         return return_df
 
@@ -7,6 +7,7 @@ import pandas as pd
 import plotly.graph_objs as go
 from plotly.offline import plot
 import cea.plots.thermal_networks
+from cea.demand.demand_writers import read_hourly_demand
 from cea.plots.variable_naming import LOGO, NAMING, COLOR
 
 __author__ = "Lennart Rogenhofer"
@@ -89,7 +90,7 @@ class SupplyReturnAmbientCurvePlot(cea.plots.thermal_networks.ThermalNetworksPlo
         This assumes that all buildings are relatively close to each other and have the same ambient temperature.
         """
         building_name = self.locator.get_zone_building_names()[0]  # read in first building name
-        demand_file = pd.read_csv(self.locator.get_demand_results_file(building_name))
+        demand_file = read_hourly_demand(self.locator, building_name, usecols=["T_ext_C"])
         ambient_temp = demand_file["T_ext_C"].values  # read in amb temp
         return pd.DataFrame(ambient_temp)
 
@@ -104,10 +105,8 @@ class SupplyReturnAmbientCurvePlot(cea.plots.thermal_networks.ThermalNetworksPlo
 
     @property
     def plant_temperatures(self):
-        supply_df = pd.read_csv(
-            self.locator.get_network_temperature_supply_nodes_file(self.network_type, self.network_name))
-        return_df = pd.read_csv(
-            self.locator.get_network_temperature_return_nodes_file(self.network_type, self.network_name))
+        supply_df = self.read_network_results('T_supply_nodes', columns=[self.plant_node])
+        return_df = self.read_network_results('T_return_nodes', columns=[self.plant_node])
 
         plant_node_supply = supply_df[self.plant_node]
         plant_node_return = return_df[self.plant_node]
@@ -4,6 +4,7 @@ import shutil
 import subprocess
 import sys
 import tempfile
+import time
 from typing import Optional, Tuple, NamedTuple
 
 import numpy as np
@@ -19,14 +20,13 @@ __maintainer__ = "Daren Thomas"
 __email__ = "cea@arch.ethz.ch"
 __status__ = "Production"
 
-from pyarrow import feather
-
-from cea.constants import HOURS_IN_YEAR
 from cea.resources.radiation.geometry_generator import BuildingGeometry
+from cea.resources.radiation.sensor_store import SensorStoreWriter
 
 BUILT_IN_BINARIES_PATH = os.path.join(os.path.dirname(os.path.realpath(__file__)), "bin")
 REQUIRED_BINARIES = {"ds_illum", "epw2wea", "gen_dc", "oconv", "radfiles2daysim", "rtrace_dc"}
 REQUIRED_LIBS = {"rayinit.cal", "isotrop_sky.cal"}
+DAYLIGHT_COEFFICIENTS_FOLDER = 'daylight_coefficients'
 
 
 class GridSize(NamedTuple):
@@ -34,6 +34,11 @@ class GridSize(NamedTuple):
     walls: int
 
 
+def get_daylight_coefficients_folder(locator):
+    """scenario/outputs/data/solar-radiation/daylight_coefficients (see ``DaylightCoefficientsCache``)"""
+    return os.path.join(locator.get_solar_radiation_folder(), DAYLIGHT_COEFFICIENTS_FOLDER)
+
+
 def create_temp_daysim_directory(directory):
     daysim_dir = os.path.join(BUILT_IN_BINARIES_PATH, sys.platform)
 
@@ -279,21 +284,65 @@ def calc_sensors_zone(building_names, locator, grid_size: GridSize, geometry_pic
     return sensors_coords_zone, sensors_dir_zone, sensors_total_number_list, names_zone, sensors_code_zone, sensor_intersection_zone
 
 
+def write_sensors_building(building_name, locator, grid_size: GridSize, geometry_pickle_dir):
+    """
+    Calculate the sensors of a building and save them to disk (``locator.get_radiation_metadata``), so the sensors of
+    all the buildings can be calculated in parallel before the Daysim simulations (see ``read_sensors_zone``).
+
+    :return: the number of sensors of the building
+    """
+    sensors_number_zone = calc_sensors_zone([building_name], locator, grid_size, geometry_pickle_dir)[2]
+    return sensors_number_zone[0]
+
+
+def read_sensors_zone(building_names, locator):
+    """
+    Read the sensors of the buildings saved to disk by ``calc_sensors_zone``.
+
+    :return: the same values as ``calc_sensors_zone``
+    """
+    sensors_coords_zone = []
+    sensors_dir_zone = []
+    sensors_total_number_list = []
+    sensors_code_zone = []
+    sensor_intersection_zone = []
+    for building_name in building_names:
+        # the coordinates are read back exactly as they were calculated
+        sensors = pd.read_csv(locator.get_radiation_metadata(building_name), float_precision='round_trip')
+        sensors_total_number_list.append(len(sensors))
+        sensors_code_zone.append(sensors['SURFACE'].tolist())
+        sensors_coords_zone.extend(zip(*(sensors[c].tolist() for c in ['Xcoor', 'Ycoor', 'Zcoor'])))
+        sensors_dir_zone.extend(zip(*(sensors[c].tolist() for c in ['Xdir', 'Ydir', 'Zdir'])))
+        sensor_intersection_zone.append(sensors['intersection'].tolist())
+
+    return (sensors_coords_zone, sensors_dir_zone, sensors_total_number_list, list(building_names), sensors_code_zone,
+            sensor_intersection_zone)
+
+
 def isolation_daysim(chunk_n, cea_daysim, building_names, locator, radiance_parameters, write_sensor_data,
-                     grid_size: GridSize,
-                     max_global, weatherfile, geometry_pickle_dir):
+                     max_global, weatherfile, dc_cache=None):
+    """
+    Run Daysim for a chunk of buildings, the sensors of which were calculated beforehand (see
+    ``write_sensors_building``).
+
+    :param DaylightCoefficientsCache dc_cache: the daylight coefficients of previous runs (None to always run `gen_dc`)
+
+    :return: the timings of the chunk (see ``cea.resources.radiation.main.print_chunk_timings``) and the key of its
+             daylight coefficients in ``dc_cache``
+    """
+    time_start = time.time()
     # initialize daysim project
     daysim_project = cea_daysim.initialize_daysim_project('chunk_{n}'.format(n=chunk_n))
     print('Creating daysim project in: {daysim_dir}'.format(daysim_dir=daysim_project.project_path))
 
-    # calculate sensors
-    print("Calculating and sending sensor points")
+    # read sensors
+    print("Reading and sending sensor points")
     sensors_coords_zone, \
     sensors_dir_zone, \
     sensors_number_zone, \
     names_zone, \
     sensors_code_zone, \
-    sensor_intersection_zone = calc_sensors_zone(building_names, locator, grid_size, geometry_pickle_dir)
+    sensor_intersection_zone = read_sensors_zone(building_names, locator)
 
     daysim_project.create_sensor_input_file(sensors_coords_zone, sensors_dir_zone)
 
@@ -303,22 +352,23 @@ def isolation_daysim(chunk_n, cea_daysim, building_names, locator, radiance_para
     print('Writing radiance parameters')
     daysim_project.write_radiance_parameters(**radiance_parameters)
 
+    time_daysim = time.time()
     print('Executing hourly solar isolation calculation')
-    daysim_project.execute_gen_dc()
+    dc_key = daysim_project.execute_gen_dc(dc_cache)
     daysim_project.execute_ds_illum()
 
+    time_results = time.time()
     print('Reading results...')
-    solar_res = daysim_project.eval_ill()
+    # the results are read straight into the store of the sensors (the leap day of leap years is removed)
+    if write_sensor_data:
+        sensor_store = SensorStoreWriter(locator, names_zone, sensors_number_zone)
+        solar_res = daysim_project.eval_ill(out=sensor_store.data)
+    else:
+        solar_res = daysim_project.eval_ill()
 
     # check inconsistencies and replace by max value of weather file
     print('Fixing inconsistencies, if any')
-    solar_res = np.clip(solar_res, a_min=0.0, a_max=max_global)
-
-    # Check if leap year and remove extra day
-    if solar_res.shape[1] == HOURS_IN_YEAR + 24:
-        print('Removing leap day')
-        leap_day_hours = range(1416, 1440)
-        solar_res = np.delete(solar_res, leap_day_hours, axis=1)
+    np.clip(solar_res, a_min=0.0, a_max=max_global, out=solar_res)
 
     print("Writing results to disk")
     index = 0
@@ -335,20 +385,19 @@ def isolation_daysim(chunk_n, cea_daysim, building_names, locator, radiance_para
         date = weatherfile["date"]
         write_aggregated_results(building_name, items_sensor_name_and_result, locator, date)
 
-        if write_sensor_data:
-            sensor_data_path = locator.get_radiation_building_sensors(building_name)
-            write_sensor_results(sensor_data_path, items_sensor_name_and_result)
-
         # Increase sensor index
         index = index + sensors_number
 
+    if write_sensor_data:
+        sensor_store.close()
+
     # erase daysim folder to avoid conflicts after every iteration
     print('Removing results folder')
     daysim_project.cleanup_project()
 
-
-def write_sensor_results(sensor_data_path, sensor_values):
-    feather.write_feather(sensor_values.T, sensor_data_path, compression="zstd")
+    return {'chunk': chunk_n, 'buildings': len(names_zone), 'sensors': len(sensors_coords_zone),
+            'sensors_s': time_daysim - time_start, 'daysim_s': time_results - time_daysim,
+            'results_s': time.time() - time_results, 'dc_key': dc_key}
 
 
 def write_aggregated_results(building_name, sensor_values, locator, date):
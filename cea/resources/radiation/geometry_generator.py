@@ -6,12 +6,14 @@ and .tiff (terrain)
 into 3D geometry with windows and roof equivalent to LOD3
 
 """
+import hashlib
 import math
 import os
 import pickle
 import time
 from itertools import repeat
 
+import geopandas as gpd
 import numpy as np
 import pandas as pd
 import py4design.py3dmodel.calculate as calculate
@@ -23,6 +25,7 @@ from OCC.Core.IntCurvesFace import IntCurvesFace_ShapeIntersector
 from OCC.Core.gp import gp_Pnt, gp_Lin, gp_Ax1, gp_Dir
 from osgeo import osr, gdal
 from py4design import urbangeom
+from scipy.spatial import cKDTree
 
 import cea
 import cea.config
@@ -41,6 +44,11 @@ __status__ = "Production"
 from cea.utilities.standardize_coordinates import (get_lat_lon_projected_shapefile, get_projected_coordinate_system,
                                                    crs_to_epsg)
 
+# buildings closer than this distance [m] are tested for intersections with the walls of a building of the zone
+NEIGHBOUR_DISTANCE_M = 100
+# changes the keys of the geometry of all the buildings, so the geometry calculated by older versions is not reused
+GEOMETRY_KEY_VERSION = 1
+
 
 def identify_surfaces_type(occface_list):
     roof_list = []
@@ -169,46 +177,174 @@ def calc_building_geometry_surroundings(name, building_solid, geometry_pickle_di
 
 
 def building_2d_to_3d(zone_df, surroundings_df, architecture_wwr_df, elevation_map, config, geometry_pickle_dir):
+    """
+    Create the geometry of the buildings of the zone and of the surroundings and save it to ``geometry_pickle_dir``
+    (see ``BuildingGeometry``).
+
+    The geometry saved by a previous run is reused for the buildings whose inputs did not change (see
+    ``calc_solid_keys`` and ``calc_zone_geometry_key``), so only the solids of the changed buildings (and of their
+    neighbours) are calculated again.
+
+    :return: the names of the buildings of the zone and of the surroundings
+    """
     # Config variables
     num_processes = config.get_number_of_processes()
     zone_simplification = config.radiation.zone_geometry
     surroundings_simplification = config.radiation.surrounding_geometry
     neglect_adjacent_buildings = config.radiation.neglect_adjacent_buildings
 
-    print('Calculating terrain intersection of building geometries')
     zone_buildings_df = zone_df.set_index('Name')
     zone_building_names = zone_buildings_df.index.values
-    zone_building_solid_list = calc_building_solids(zone_buildings_df, zone_simplification, elevation_map,
-                                                    num_processes)
-
     surroundings_buildings_df = surroundings_df.set_index('Name')
     surroundings_building_names = surroundings_buildings_df.index.values
-    surroundings_building_solid_list = calc_building_solids(surroundings_buildings_df, surroundings_simplification,
-                                                            elevation_map, num_processes)
+    n_zone = len(zone_building_names)
+
+    # the buildings of the zone and of the surroundings (in this order) as they are turned into solids
+    all_buildings_df = pd.concat([zone_buildings_df, surroundings_buildings_df])
+    all_geometries = pd.concat([zone_buildings_df.geometry.simplify(zone_simplification, preserve_topology=True),
+                                surroundings_buildings_df.geometry.simplify(surroundings_simplification,
+                                                                            preserve_topology=True)])
+    solid_keys = calc_solid_keys(all_geometries, all_buildings_df, elevation_map)
+    if not neglect_adjacent_buildings:
+        neighbours = calc_neighbours(all_geometries.iloc[:n_zone], all_geometries)
+    else:
+        neighbours = [np.zeros(0, dtype=int)] * n_zone
+    zone_keys = [calc_zone_geometry_key(solid_keys[i], architecture_wwr_df.loc[name], neglect_adjacent_buildings,
+                                        solid_keys[neighbours[i]])
+                 for i, name in enumerate(zone_building_names)]
+
+    # the buildings whose geometry needs to be calculated again
+    zone_pickles = [os.path.join(geometry_pickle_dir, 'zone', str(name)) for name in zone_building_names]
+    surroundings_pickles = [os.path.join(geometry_pickle_dir, 'surroundings', str(name))
+                            for name in surroundings_building_names]
+    zone_outdated = [i for i in range(n_zone) if read_geometry_key(zone_pickles[i]) != zone_keys[i]]
+    surroundings_outdated = [i for i in range(len(surroundings_building_names))
+                             if read_geometry_key(surroundings_pickles[i]) != solid_keys[n_zone + i]]
+    print('Reusing the geometry of {zone} buildings of the zone and {surroundings} surrounding buildings'.format(
+        zone=n_zone - len(zone_outdated), surroundings=len(surroundings_building_names) - len(surroundings_outdated)))
+    for pickle_location in [zone_pickles[i] for i in zone_outdated] + [surroundings_pickles[i]
+                                                                      for i in surroundings_outdated]:
+        remove_geometry_key(pickle_location)
+
+    # the solids of the outdated buildings and of the neighbours of the outdated buildings of the zone
+    required = set(zone_outdated).union(n_zone + i for i in surroundings_outdated)
+    for i in zone_outdated:
+        required.update(neighbours[i])
+    required_zone = sorted(i for i in required if i < n_zone)
+    required_surroundings = sorted(i - n_zone for i in required if i >= n_zone)
+
+    print('Calculating terrain intersection of building geometries')
+    all_building_solid_list = [None] * len(all_buildings_df)
+    if required_zone:
+        for i, solid in zip(required_zone, calc_building_solids(zone_buildings_df.iloc[required_zone],
+                                                                zone_simplification, elevation_map, num_processes)):
+            all_building_solid_list[i] = solid
+    if required_surroundings:
+        for i, solid in zip(required_surroundings,
+                            calc_building_solids(surroundings_buildings_df.iloc[required_surroundings],
+                                                 surroundings_simplification, elevation_map, num_processes)):
+            all_building_solid_list[n_zone + i] = solid
 
     # calculate geometry for the surroundings
     print('Generating geometry for surrounding buildings')
-    geometry_3D_surroundings = [calc_building_geometry_surroundings(x, y, geometry_pickle_dir) for x, y in
-                                zip(surroundings_building_names, surroundings_building_solid_list)]
+    if surroundings_outdated:
+        n = len(surroundings_outdated)
+        cea.utilities.parallel.vectorize(calc_building_geometry_surroundings, num_processes)(
+            [surroundings_building_names[i] for i in surroundings_outdated],
+            [all_building_solid_list[n_zone + i] for i in surroundings_outdated],
+            repeat(geometry_pickle_dir, n))
+        for i in surroundings_outdated:
+            write_geometry_key(surroundings_pickles[i], solid_keys[n_zone + i])
 
     # calculate geometry for the zone of analysis
     print('Generating geometry for buildings in the zone of analysis')
-    n = len(zone_building_names)
-    calc_zone_geometry_multiprocessing = cea.utilities.parallel.vectorize(calc_building_geometry_zone,
-                                                                          num_processes,
-                                                                          on_complete=print_progress)
+    if zone_outdated:
+        n = len(zone_outdated)
+        calc_zone_geometry_multiprocessing = cea.utilities.parallel.vectorize(calc_building_geometry_zone,
+                                                                              num_processes,
+                                                                              on_complete=print_progress)
+        calc_zone_geometry_multiprocessing([zone_building_names[i] for i in zone_outdated],
+                                           [all_building_solid_list[i] for i in zone_outdated],
+                                           repeat(all_building_solid_list, n),
+                                           repeat(architecture_wwr_df, n),
+                                           repeat(geometry_pickle_dir, n),
+                                           repeat(neglect_adjacent_buildings, n),
+                                           [neighbours[i] for i in zone_outdated])
+        for i in zone_outdated:
+            write_geometry_key(zone_pickles[i], zone_keys[i])
+
+    return list(zone_building_names), list(surroundings_building_names)
+
+
+def calc_neighbours(zone_geometries, all_geometries, distance=NEIGHBOUR_DISTANCE_M):
+    """
+    Find the buildings close to each building of the zone, i.e. the lower left corners of their bounding boxes are at
+    most ``distance`` apart (as in ``are_buildings_close_to_eachother``), with a k-d tree of the corners of all the
+    buildings instead of testing every pair of buildings.
+
+    :param gpd.GeoSeries zone_geometries: the (simplified) footprints of the buildings of the zone
+    :param gpd.GeoSeries all_geometries: the (simplified) footprints of all the buildings
+    :return: the positions in ``all_geometries`` of the neighbours of each building of the zone
+    :rtype: list[np.ndarray]
+    """
+    if len(zone_geometries) == 0:
+        return []
 
-    if not neglect_adjacent_buildings:
-        all_building_solid_list = np.append(zone_building_solid_list, surroundings_building_solid_list)
-    else:
-        all_building_solid_list = []
-    geometry_3D_zone = calc_zone_geometry_multiprocessing(zone_building_names,
-                                                          zone_building_solid_list,
-                                                          repeat(all_building_solid_list, n),
-                                                          repeat(architecture_wwr_df, n),
-                                                          repeat(geometry_pickle_dir, n),
-                                                          repeat(neglect_adjacent_buildings, n))
-    return geometry_3D_zone, geometry_3D_surroundings
+    def lower_left_corners(geometries):
+        return geometries.bounds[['minx', 'miny']].values
+
+    neighbours = cKDTree(lower_left_corners(all_geometries)).query_ball_point(lower_left_corners(zone_geometries),
+                                                                             distance)
+    return [np.array(sorted(positions), dtype=int) for positions in neighbours]
+
+
+def calc_solid_keys(geometries, buildings_df, elevation_map):
+    """
+    The hashes of the inputs of the solids of the buildings (see ``process_geometries``): the simplified footprint, the
+    height, the number of floors and the terrain around the building.
+
+    :rtype: np.ndarray
+    """
+    keys = []
+    for geometry, height, floors in zip(geometries, buildings_df['height_ag'].astype(float),
+                                        buildings_df['floors_ag'].astype(int)):
+        terrain = elevation_map.get_elevation_map_from_geometry(geometry)
+        key = hashlib.sha1(repr((GEOMETRY_KEY_VERSION, height, floors, terrain.nodata)).encode('utf-8'))
+        key.update(geometry.wkb)
+        for array in [terrain.elevation_map, terrain.x_coords, terrain.y_coords]:
+            key.update(np.ascontiguousarray(array).tobytes())
+        keys.append(key.hexdigest())
+    return np.array(keys, dtype=object)
+
+
+def calc_zone_geometry_key(solid_key, architecture, neglect_adjacent_buildings, neighbour_solid_keys):
+    """
+    The hash of the inputs of the geometry of a building of the zone (see ``calc_building_geometry_zone``): its solid,
+    its window to wall ratios and the solids of its neighbours.
+    """
+    wwr = tuple(float(architecture[column]) for column in ['wwr_west', 'wwr_east', 'wwr_north', 'wwr_south'])
+    key = hashlib.sha1(repr((solid_key, wwr, bool(neglect_adjacent_buildings))).encode('utf-8'))
+    for neighbour_solid_key in sorted(neighbour_solid_keys):
+        key.update(neighbour_solid_key.encode('utf-8'))
+    return key.hexdigest()
+
+
+def read_geometry_key(pickle_location):
+    """the key of the geometry saved to ``pickle_location`` (None if there is no geometry)"""
+    if not (os.path.exists(pickle_location) and os.path.exists(pickle_location + '.key')):
+        return None
+    with open(pickle_location + '.key') as f:
+        return f.read()
+
+
+def write_geometry_key(pickle_location, key):
+    with open(pickle_location + '.key', 'w') as f:
+        f.write(key)
+
+
+def remove_geometry_key(pickle_location):
+    if os.path.exists(pickle_location + '.key'):
+        os.remove(pickle_location + '.key')
 
 
 def print_progress(i, n, _, __):
@@ -264,7 +400,14 @@ class BuildingGeometry(object):
 
 
 def calc_building_geometry_zone(name, building_solid, all_building_solid_list, architecture_wwr_df,
-                                geometry_pickle_dir, neglect_adjacent_buildings):
+                                geometry_pickle_dir, neglect_adjacent_buildings, neighbours=None):
+    """
+    Create the geometry of a building of the zone (its walls, windows and roofs) and save it to
+    ``geometry_pickle_dir``.
+
+    :param neighbours: the positions in ``all_building_solid_list`` of the buildings close to the building (see
+                       ``calc_neighbours``), the whole list is searched for them if None
+    """
     # now get all surfaces and create windows only if the buildings are in the area of study
     window_list = []
     wall_list = []
@@ -276,7 +419,9 @@ def calc_building_geometry_zone(name, building_solid, all_building_solid_list, a
 
     # check if buildings are close together and it merits to check the intersection
     potentially_intersecting_solids = []
-    if not neglect_adjacent_buildings:
+    if not neglect_adjacent_buildings and neighbours is not None:
+        potentially_intersecting_solids = [all_building_solid_list[i] for i in neighbours]
+    elif not neglect_adjacent_buildings:
         box = calculate.get_bounding_box(building_solid)
         x, y = box[0], box[1]
         for solid in all_building_solid_list:
@@ -2,11 +2,14 @@
 Radiation engine and geometry handler for CEA
 """
 
+import heapq
+import math
 import os
 import shutil
 import time
 from itertools import repeat
 
+import numpy as np
 import pandas as pd
 import geopandas as gpd
 from osgeo import gdal
@@ -16,7 +19,8 @@ import cea.inputlocator
 from cea.datamanagement.databases_verification import verify_input_geometry_zone, verify_input_geometry_surroundings
 from cea.resources.radiation import daysim, geometry_generator
 from cea.resources.radiation.daysim import GridSize
-from cea.resources.radiation.radiance import CEADaySim
+from cea.resources.radiation.radiance import CEADaySim, DaylightCoefficientsCache
+from cea.resources.radiation.sensor_store import remove_superseded_sensor_stores
 from cea.utilities import epwreader
 from cea.utilities.parallel import vectorize
 
@@ -63,6 +67,49 @@ def read_surface_properties(locator) -> pd.DataFrame:
     return surface_properties.set_index('Name').round(decimals=2)
 
 
+def calc_number_of_chunks(number_of_buildings, n_buildings_in_chunk, num_processes):
+    """
+    The number of chunks of buildings simulated by Daysim: ``n_buildings_in_chunk`` buildings per chunk on average, but
+    at least a chunk per process (if there are enough buildings).
+    """
+    if number_of_buildings == 0:
+        return 0
+    return min(number_of_buildings, max(math.ceil(number_of_buildings / n_buildings_in_chunk), num_processes))
+
+
+def balance_chunks(building_names, sensors_numbers, number_of_chunks):
+    """
+    Split the buildings in chunks with a similar number of sensors, as the time Daysim takes for a chunk depends on its
+    number of sensors. Starting with the building with the most sensors, each building is added to the chunk with the
+    fewest sensors so far.
+
+    :param list[str] building_names: the buildings to simulate
+    :param list[int] sensors_numbers: the number of sensors of each building
+    :param int number_of_chunks: the number of chunks (see ``calc_number_of_chunks``)
+    :return: the buildings of each chunk (in the order of ``building_names``) and the number of sensors of each chunk,
+             from the chunk with the most sensors, so the largest chunks are simulated first
+    :rtype: tuple[list[list[str]], list[int]]
+    """
+    heap = [(0, chunk) for chunk in range(number_of_chunks)]
+    positions = [[] for _ in range(number_of_chunks)]
+    for position in np.argsort(-np.asarray(sensors_numbers), kind='stable'):
+        sensors, chunk = heapq.heappop(heap)
+        positions[chunk].append(position)
+        heapq.heappush(heap, (sensors + sensors_numbers[position], chunk))
+
+    chunk_sensors = dict((chunk, sensors) for sensors, chunk in heap)
+    order = sorted((chunk for chunk in range(number_of_chunks) if positions[chunk]),
+                   key=lambda chunk: -chunk_sensors[chunk])
+    chunks = [[building_names[position] for position in sorted(positions[chunk])] for chunk in order]
+    return chunks, [chunk_sensors[chunk] for chunk in order]
+
+
+def print_chunk_timings(i, n, args, timings):
+    """print the timings of a chunk of buildings simulated by Daysim as soon as it is completed"""
+    print("Chunk {chunk} completed ({i}/{n}): {buildings} buildings, {sensors} sensors, sensors {sensors_s:.1f} s, "
+          "Daysim {daysim_s:.1f} s, results {results_s:.1f} s".format(i=i + 1, n=n, **timings))
+
+
 def run_daysim_simulation(cea_daysim: CEADaySim, zone_building_names, locator, settings, geometry_pickle_dir, num_processes):
     weather_path = locator.get_weather_file()
     # check inconsistencies and replace by max value of weather file
@@ -71,10 +118,7 @@ def run_daysim_simulation(cea_daysim: CEADaySim, zone_building_names, locator, s
 
     list_of_building_names = [building_name for building_name in settings.buildings
                               if building_name in zone_building_names]
-    # get chunks of buildings to iterate
-    chunks = [list_of_building_names[i:i + settings.n_buildings_in_chunk] for i in
-              range(0, len(list_of_building_names),
-                    settings.n_buildings_in_chunk)]
+    num_buildings = len(list_of_building_names)
 
     write_sensor_data = settings.write_sensor_data
     radiance_parameters = {"rad_ab": settings.rad_ab, "rad_ad": settings.rad_ad, "rad_as": settings.rad_as,
@@ -85,26 +129,57 @@ def run_daysim_simulation(cea_daysim: CEADaySim, zone_building_names, locator, s
 
     grid_size = GridSize(walls=settings.walls_grid, roof=settings.roof_grid)
 
+    # the daylight coefficients do not depend on the weather, so they are reused if the geometry did not change
+    dc_cache = None
+    if settings.cache_daylight_coefficients:
+        dc_cache = DaylightCoefficientsCache(daysim.get_daylight_coefficients_folder(locator), cea_daysim)
+
+    # calculate the sensors of all the buildings (a building per call, so all the processes are kept busy), then
+    # get chunks of buildings with a similar number of sensors to iterate
+    print("Calculating sensor points of {n} buildings".format(n=num_buildings))
+    time_sensors = time.time()
+    sensors_numbers = vectorize(daysim.write_sensors_building, num_processes)(
+        list_of_building_names,
+        repeat(locator, num_buildings),
+        repeat(grid_size, num_buildings),
+        repeat(geometry_pickle_dir, num_buildings)
+    )
+    print("Sensor points calculated in %.2f seconds" % (time.time() - time_sensors))
+
+    num_chunks = calc_number_of_chunks(num_buildings, settings.n_buildings_in_chunk, num_processes)
+    chunks, chunks_sensors = balance_chunks(list_of_building_names, sensors_numbers, num_chunks)
     num_chunks = len(chunks)
+    print("Simulating {n} chunks of buildings with {min}-{max} sensors".format(
+        n=num_chunks, min=min(chunks_sensors, default=0), max=max(chunks_sensors, default=0)))
 
     if num_chunks == 1:
-        daysim.isolation_daysim(
-            0, cea_daysim, chunks[0], locator, radiance_parameters, write_sensor_data, grid_size,
-            max_global, weatherfile, geometry_pickle_dir)
+        timings = [daysim.isolation_daysim(
+            0, cea_daysim, chunks[0], locator, radiance_parameters, write_sensor_data, max_global, weatherfile,
+            dc_cache)]
+        print_chunk_timings(0, 1, None, timings[0])
     else:
-        vectorize(daysim.isolation_daysim, num_processes)(
+        timings = vectorize(daysim.isolation_daysim, num_processes, on_complete=print_chunk_timings)(
             range(0, num_chunks),
             repeat(cea_daysim, num_chunks),
             chunks,
             repeat(locator, num_chunks),
             repeat(radiance_parameters, num_chunks),
             repeat(write_sensor_data, num_chunks),
-            repeat(grid_size, num_chunks),
             repeat(max_global, num_chunks),
             repeat(weatherfile, num_chunks),
-            repeat(geometry_pickle_dir, num_chunks)
+            repeat(dc_cache, num_chunks)
         )
 
+    if timings:
+        chunk_times = [t['sensors_s'] + t['daysim_s'] + t['results_s'] for t in timings]
+        print("Chunks simulated in %.2f seconds on average (%.2f seconds at most)" %
+              (sum(chunk_times) / len(chunk_times), max(chunk_times)))
+
+    if dc_cache is not None and timings:
+        dc_cache.prune({t['dc_key'] for t in timings})
+    if write_sensor_data:
+        remove_superseded_sensor_stores(locator)
+
 
 def main(config):
     """
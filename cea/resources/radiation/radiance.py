@@ -1,4 +1,5 @@
 import csv
+import hashlib
 import math
 import os
 import shutil
@@ -9,9 +10,18 @@ from enum import Enum
 
 import numpy as np
 
+from cea.constants import HOURS_IN_YEAR
 from cea.resources.radiation.geometry_generator import BuildingGeometry
 from py4design.py3dmodel.fetch import points_frm_occface
 
+# hours of the leap day (29th of February) in the results of a leap year
+LEAP_DAY_HOURS = range(1416, 1440)
+# number of hours of the results of Daysim parsed at once
+ILL_BLOCK_SIZE = 24
+# keywords of the header file of a Daysim project that do not change the daylight coefficients (paths and names)
+DC_INDEPENDENT_KEYWORDS = {'project_name', 'project_directory', 'bin_directory', 'tmp_directory', 'place',
+                           'wea_data_short_file', 'material_file', 'geometry_file', 'sensor_file', 'ManualControl'}
+
 
 class SensorOutputUnit(Enum):
     w_m2 = 1
@@ -205,6 +215,7 @@ class DaySimProject(object):
         self.daysim_shading_path = daysim_shading_path
 
         self.hea_path = os.path.join(self.project_path, f"{project_name}.hea")
+        self.dc_path = os.path.join(self.project_path, f"{project_name}.dc")
         # Header Properties
         self.site_info = site_info
         self._create_project_header_file()
@@ -405,7 +416,7 @@ class DaySimProject(object):
         with open(self.hea_path, "a") as hea_file:
             hea_file.write(shading_parameters)
 
-    def execute_gen_dc(self):
+    def execute_gen_dc(self, dc_cache=None):
         """
         Calculates daylight coefficient files
 
@@ -414,10 +425,18 @@ class DaySimProject(object):
         -dir    calculates direct daylight coefficients only
         -dif    calculates diffuse daylight coefficients only
         -paste  pastes direct and diffuse daylight coefficient output files into a single complete file
+
+        :param DaylightCoefficientsCache dc_cache: reuse the daylight coefficients of a previous run with the same
+                                                   inputs (and keep the new ones for the next runs)
+        :return: the key of the daylight coefficients in ``dc_cache`` (None without a cache)
         """
         # write the shading header
         self.write_shading_parameters()
 
+        if dc_cache is not None and dc_cache.load(self):
+            print('Reusing the daylight coefficients of a previous run')
+            return dc_cache.calc_key(self)
+
         command1 = f'gen_dc "{self.hea_path}" -dir'
         command2 = f'gen_dc "{self.hea_path}" -dif'
         command3 = f'gen_dc "{self.hea_path}" -paste'
@@ -426,29 +445,153 @@ class DaySimProject(object):
         CEADaySim.run_cmd(command2, self.daysim_bin_directory, self.daysim_lib_directory)
         CEADaySim.run_cmd(command3, self.daysim_bin_directory, self.daysim_lib_directory)
 
+        if dc_cache is not None:
+            return dc_cache.save(self)
+
     def execute_ds_illum(self):
         command1 = f'ds_illum "{self.hea_path}"'
         CEADaySim.run_cmd(command1, self.daysim_bin_directory, self.daysim_lib_directory)
 
-    def eval_ill(self):
+    def eval_ill(self, out=None):
         """
-        This function reads the output file from running `ds_illum`, parses the space separated values
-        and returns the values as a numpy array.
+        This function reads the output file from running `ds_illum` and returns the values as a numpy array.
 
         Values in the file only have 2 decimal places, so we are using float32 to save memory
-        Rows are hours, Columns are sensor. Transpose output to make rows sensors
+        Rows are hours, Columns are sensor. The output is transposed to make rows sensors (see ``read_ill_file``).
 
+        :param out: float32 array of (sensors, hours) to write the results to, e.g. the memory-mapped file of a
+                    ``SensorStoreWriter`` (a new array is created if None)
         :return: Numpy array of hourly irradiance results of sensor points
         """
 
         ill_path = os.path.join(self.project_path, f"{self.project_name}.ill")
         # if self.shading_exists:
         #     ill_path = os.path.join(self.project_path, f"shading_{self.project_name}.ill")
-        with open(ill_path) as f:
-            reader = csv.reader(f, delimiter=' ')
-            data = np.array([np.array(row[4:], dtype=np.float32) for row in reader]).T
+        return read_ill_file(ill_path, out)
+
+
+def calc_file_hash(path, file_hash=None):
+    """update ``file_hash`` (a new sha256 hash if None) with the contents of a file, reading a block at a time"""
+    file_hash = hashlib.sha256() if file_hash is None else file_hash
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            file_hash.update(block)
+    return file_hash
+
+
+class DaylightCoefficientsCache(object):
+    """
+    The daylight coefficients calculated by `gen_dc` (the `.dc` file of a Daysim project), kept between the runs of the
+    radiation script. They only depend on the geometry, the materials, the sensors, the location of the site and the
+    radiance parameters, not on the weather data - so the projects with the same inputs as in a previous run only need
+    to run `ds_illum`.
+
+    The daylight coefficients of a project are stored in ``folder`` as ``<key>.dc``, with the key a hash of these inputs
+    (see ``calc_key``). Those not used by the last run are removed at the end of the run (see ``prune``).
+
+    :param str folder: the folder of the cache
+    :param CEADaySim cea_daysim: the common inputs of the Daysim projects (hashed once for all the projects)
+    """
 
-        return data
+    def __init__(self, folder, cea_daysim):
+        self.folder = folder
+        common_inputs_hash = hashlib.sha256()
+        for path in [cea_daysim.daysim_material_path, cea_daysim.daysim_geometry_path, cea_daysim.daysim_shading_path]:
+            if os.path.exists(path):
+                calc_file_hash(path, common_inputs_hash)
+            common_inputs_hash.update(b'\0')
+        self.common_inputs_hash = common_inputs_hash.hexdigest()
+
+    def calc_key(self, daysim_project):
+        """
+        The hash of the common inputs, the sensors and the header of the project (without the paths and the names of
+        the project, which differ between the runs).
+        """
+        key = hashlib.sha256(self.common_inputs_hash.encode('utf-8'))
+        calc_file_hash(daysim_project.sensor_path, key)
+        with open(daysim_project.hea_path) as hea_file:
+            for line in hea_file:
+                tokens = line.split()
+                if tokens and tokens[0] not in DC_INDEPENDENT_KEYWORDS:
+                    key.update(' '.join(tokens).replace(daysim_project.project_name, '').encode('utf-8') + b'\n')
+        return key.hexdigest()
+
+    def get_path(self, daysim_project):
+        return os.path.join(self.folder, self.calc_key(daysim_project) + '.dc')
+
+    def load(self, daysim_project):
+        """copy the daylight coefficients of the project from the cache, if any - returns True if found"""
+        cache_path = self.get_path(daysim_project)
+        if not os.path.exists(cache_path):
+            return False
+        shutil.copyfile(cache_path, daysim_project.dc_path)
+        return True
+
+    def save(self, daysim_project):
+        """
+        copy the daylight coefficients of the project to the cache (the copy is only visible once complete) - returns
+        the key of the daylight coefficients
+        """
+        os.makedirs(self.folder, exist_ok=True)
+        key = self.calc_key(daysim_project)
+        cache_path = os.path.join(self.folder, key + '.dc')
+        shutil.copyfile(daysim_project.dc_path, cache_path + '.tmp')
+        os.replace(cache_path + '.tmp', cache_path)
+        return key
+
+    def prune(self, keys):
+        """
+        Remove the daylight coefficients not in ``keys`` (the keys used by a run, see ``execute_gen_dc``) and the
+        temporary files of interrupted runs. To be called once all the projects of a radiation run are completed.
+        """
+        if not os.path.isdir(self.folder):
+            return
+        for file_name in os.listdir(self.folder):
+            key, extension = os.path.splitext(file_name)
+            if extension != '.dc' or key not in keys:
+                os.remove(os.path.join(self.folder, file_name))
+
+
+def read_ill_file(ill_path, out=None):
+    """
+    Read the hourly irradiance of the sensors in an `.ill` file of Daysim. The space separated values of the file (the
+    date and time, then the values of each sensor in each row) are parsed a block of hours at a time and written to
+    the (sensors, hours) array, so the memory needed is the size of the result. The leap day of leap years is skipped.
+
+    :param ill_path: path to the `.ill` file
+    :param out: float32 array of (sensors, hours) to write the results to (a new array is created if None)
+    :return: Numpy array of hourly irradiance results of sensor points
+    """
+    with open(ill_path) as f:
+        number_of_rows = sum(1 for line in f if line.strip())
+        f.seek(0)
+        number_of_sensors = len(f.readline().split(' ')) - 4
+        f.seek(0)
+
+        skip_rows = LEAP_DAY_HOURS if number_of_rows == HOURS_IN_YEAR + 24 else range(0)
+        number_of_hours = number_of_rows - len(skip_rows)
+        if skip_rows:
+            print('Removing leap day')
+        if out is None:
+            out = np.empty((number_of_sensors, number_of_hours), dtype=np.float32)
+        elif out.shape != (number_of_sensors, number_of_hours):
+            raise ValueError(f"The results of {ill_path} have the shape {(number_of_sensors, number_of_hours)}, "
+                             f"expected {out.shape}")
+
+        block = np.empty((ILL_BLOCK_SIZE, number_of_sensors), dtype=np.float32)
+        hour = 0
+        rows_in_block = 0
+        for row, line in enumerate(line for line in f if line.strip()):
+            if row in skip_rows:
+                continue
+            block[rows_in_block] = np.fromstring(line.split(' ', 4)[4], dtype=np.float32, sep=' ')
+            rows_in_block += 1
+            if rows_in_block == ILL_BLOCK_SIZE:
+                out[:, hour:hour + rows_in_block] = block.T
+                hour += rows_in_block
+                rows_in_block = 0
+        out[:, hour:hour + rows_in_block] = block[:rows_in_block].T
+    return out
 
 
 class RadSurface(object):
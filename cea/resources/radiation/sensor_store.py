@@ -0,0 +1,196 @@
+"""
+Store of the hourly radiation of the sensors of the buildings [Wh/m2], written by the radiation scripts (Daysim and the
+simplified radiation) and read by the solar technologies.
+
+The radiation of the buildings of a chunk of the radiation script is written to one file (``<name>.npy``, float32,
+sensors x hours, see ``locator.get_radiation_sensor_store``) in the ``sensors`` folder of the solar radiation results,
+next to an index (``<name>.csv``, see ``locator.get_radiation_sensor_store_index``) with the offset and the number of
+sensors of each building. The files are memory-mapped when they are read, so the solar
+technologies only load the sensors of one building (or a subset of them) and the memory does not grow with the size
+of the district.
+
+The radiation of a building is read from the most recent store containing it. The stores whose buildings are all in
+more recent stores are removed at the end of a radiation run (see ``remove_superseded_sensor_stores``). The
+``<building>_insolation_Whm2.feather`` files of older scenarios are read for the buildings that are not in any store.
+"""
+
+import glob
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+from pyarrow import feather
+
+from cea.constants import HOURS_IN_YEAR
+
+SENSOR_STORE_INDEX_COLUMNS = ['building', 'offset', 'sensors']
+
+# number of sensors summed at once when calculating the yearly radiation of a building
+SENSOR_BLOCK_SIZE = 1024
+
+
+def get_sensor_store_name(building_names):
+    """name of the store of a chunk of buildings (the same chunk of buildings overwrites its own store)"""
+    return 'sensors_' + hashlib.sha1('\n'.join(building_names).encode('utf-8')).hexdigest()[:16]
+
+
+def get_sensor_names(sensors_number):
+    """names of the sensors of a building, as in the metadata of the sensors (``locator.get_radiation_metadata``)"""
+    return ['srf' + str(x) for x in range(sensors_number)]
+
+
+class SensorStoreWriter(object):
+    """
+    Write the hourly radiation of the sensors of a chunk of buildings to a store, building by building, or all at once
+    by filling ``data`` (e.g. with :py:func:`cea.resources.radiation.radiance.read_ill_file`). The store is only visible
+    to the readers once it is closed.
+
+    :param locator: the locator of the scenario
+    :param list[str] building_names: the buildings of the store
+    :param list[int] sensors_numbers: the number of sensors of each building
+    """
+
+    def __init__(self, locator, building_names, sensors_numbers, hours=HOURS_IN_YEAR):
+        store_name = get_sensor_store_name(building_names)
+        self.store_file = locator.get_radiation_sensor_store(store_name)
+        self.index_file = locator.get_radiation_sensor_store_index(store_name)
+        self.index = pd.DataFrame({'building': building_names,
+                                   'offset': np.concatenate([[0], np.cumsum(sensors_numbers)[:-1]]).astype(np.int64),
+                                   'sensors': sensors_numbers},
+                                  columns=SENSOR_STORE_INDEX_COLUMNS).set_index('building')
+        self.data = np.lib.format.open_memmap(self.store_file + '.tmp', mode='w+', dtype=np.float32,
+                                              shape=(int(np.sum(sensors_numbers)), hours))
+
+    def write(self, building_name, sensor_values):
+        """
+        :param sensor_values: the hourly radiation of the sensors of the building [Wh/m2] (sensors x hours)
+        """
+        offset, sensors = self.index.loc[building_name, ['offset', 'sensors']]
+        if len(sensor_values) != sensors:
+            raise ValueError('Building %s has %i sensors, got the radiation of %i sensors' %
+                             (building_name, sensors, len(sensor_values)))
+        self.data[offset:offset + sensors] = sensor_values
+
+    def close(self):
+        self.data.flush()
+        del self.data
+        os.replace(self.store_file + '.tmp', self.store_file)
+        self.index.to_csv(self.index_file + '.tmp')
+        os.replace(self.index_file + '.tmp', self.index_file)
+
+
+def read_sensor_store_indexes(locator):
+    """
+    Read the index of each store of the scenario, from the oldest to the most recent store.
+
+    :return: the store file and its index (the offset and the number of sensors of each building)
+    :rtype: list[(str, pd.DataFrame)]
+    """
+    index_files = sorted(glob.glob(locator.get_radiation_sensor_store_index('*')),
+                         key=lambda path: (os.stat(path).st_mtime_ns, path))
+    return [(os.path.splitext(index_file)[0] + '.npy', pd.read_csv(index_file)) for index_file in index_files]
+
+
+def read_sensor_store_index(locator):
+    """
+    Read the indexes of the stores of the scenario.
+
+    :return: the store file, the offset and the number of sensors of each building (from the most recent store)
+    :rtype: pd.DataFrame
+    """
+    indexes = [index.assign(file=store_file) for store_file, index in read_sensor_store_indexes(locator)]
+    if not indexes:
+        return pd.DataFrame(columns=SENSOR_STORE_INDEX_COLUMNS + ['file']).set_index('building')
+    return pd.concat(indexes).drop_duplicates('building', keep='last').set_index('building')
+
+
+def remove_superseded_sensor_stores(locator):
+    """
+    Remove the stores whose buildings are all in more recent stores, and the temporary files of the stores of
+    interrupted runs. To be called once all the stores of a radiation run are closed.
+    """
+    for temporary_file in glob.glob(locator.get_radiation_sensor_store('*') + '.tmp') + glob.glob(
+            locator.get_radiation_sensor_store_index('*') + '.tmp'):
+        os.remove(temporary_file)
+
+    newer_buildings = set()
+    for store_file, index in reversed(read_sensor_store_indexes(locator)):
+        if newer_buildings.issuperset(index['building']):
+            remove_sensor_store(store_file)
+        newer_buildings.update(index['building'])
+
+
+def remove_sensor_stores(locator, building_names):
+    """remove the stores of the scenario containing only the ``building_names``"""
+    for store_file, index in read_sensor_store_indexes(locator):
+        if set(building_names).issuperset(index['building']):
+            remove_sensor_store(store_file)
+
+
+def remove_sensor_store(store_file):
+    """remove a store and its index (the index first, so an incomplete store is never read)"""
+    os.remove(os.path.splitext(store_file)[0] + '.csv')
+    if os.path.exists(store_file):
+        os.remove(store_file)
+
+
+def open_sensor_radiation(locator, building_name):
+    """
+    Open the radiation of the sensors of a building in the store, without reading it.
+
+    :return: the memory-mapped radiation of the sensors [Wh/m2] (sensors x hours) or None if the building is not in
+             any store
+    :rtype: np.memmap
+    """
+    index = read_sensor_store_index(locator)
+    if building_name not in index.index:
+        return None
+    store_file, offset, sensors = index.loc[building_name, ['file', 'offset', 'sensors']]
+    return np.load(store_file, mmap_mode='r')[offset:offset + sensors]
+
+
+def read_sensor_radiation(locator, building_name, sensors=None):
+    """
+    Read the hourly radiation of the sensors of a building.
+
+    :param list[str] sensors: the names of the sensors to read (all the sensors of the building if None)
+    :return: the radiation of the sensors [Wh/m2] (hours x sensors)
+    :rtype: pd.DataFrame
+    """
+    sensor_radiation = open_sensor_radiation(locator, building_name)
+    if sensor_radiation is None:
+        return read_sensor_radiation_feather(locator, building_name, sensors)
+
+    sensor_names = get_sensor_names(len(sensor_radiation))
+    if sensors is None:
+        return pd.DataFrame(np.array(sensor_radiation).T, columns=sensor_names)
+    positions = pd.Index(sensor_names).get_indexer(sensors)
+    if (positions < 0).any():
+        raise ValueError('Unknown sensors of building %s: %s' % (building_name, list(np.array(sensors)[positions < 0])))
+    return pd.DataFrame(sensor_radiation[positions].T, columns=list(sensors))
+
+
+def calc_sensor_totals(locator, building_name):
+    """
+    Calculate the yearly radiation of each sensor of a building, reading a block of sensors at a time.
+
+    :return: the yearly radiation of the sensors [Wh/m2]
+    :rtype: pd.Series
+    """
+    sensor_radiation = open_sensor_radiation(locator, building_name)
+    if sensor_radiation is None:
+        return read_sensor_radiation_feather(locator, building_name).sum(axis=0)
+
+    totals = np.concatenate([sensor_radiation[i:i + SENSOR_BLOCK_SIZE].sum(axis=1)
+                             for i in range(0, len(sensor_radiation), SENSOR_BLOCK_SIZE)] + [np.zeros(0, np.float32)])
+    return pd.Series(totals, index=get_sensor_names(len(sensor_radiation)))
+
+
+def read_sensor_radiation_feather(locator, building_name, sensors=None):
+    """read the radiation of the sensors of a building written by older versions of CEA"""
+    sensor_data_path = locator.get_radiation_building_sensors(building_name)
+    if not os.path.exists(sensor_data_path):
+        raise FileNotFoundError('No radiation results of the sensors of building %s, run the radiation script with '
+                                'radiation:write-sensor-data' % building_name)
+    return feather.read_feather(sensor_data_path, columns=None if sensors is None else list(sensors))
@@ -11,50 +11,14 @@ import cea.config
 import cea.inputlocator
 from cea.datamanagement.databases_verification import verify_input_geometry_zone, verify_input_geometry_surroundings
 from cea.resources.radiation import daysim, geometry_generator
-from cea.resources.radiation.daysim import calc_sensors_zone, GridSize, write_aggregated_results, write_sensor_results
+from cea.resources.radiation.daysim import calc_sensors_zone, GridSize, write_aggregated_results
 from cea.resources.radiation.main import read_surface_properties, run_daysim_simulation
 from cea.resources.radiation.radiance import CEADaySim
+from cea.resources.radiation.sensor_store import (SensorStoreWriter, read_sensor_radiation, remove_sensor_stores,
+                                                  remove_superseded_sensor_stores)
+from cea.resources.radiation.simplified import surrogate
 from cea.utilities import epwreader
-
-
-def generate_sensor_data(sample_values, geometry_data):
-    def map_value(row):
-        surface = f"{row['TYPE']}_{row['orientation']}"
-        value = sample_values[surface]
-        return value
-
-    sensor_data = geometry_data.apply(map_value, axis=1)
-
-    return sensor_data
-
-
-def generate_sample_data(locator, sample_buildings):
-    """
-    returns sample data for each surface in W/m2
-    """
-    surfaces = {'windows_east',
-                'windows_west',
-                'windows_south',
-                'windows_north',
-                'walls_east',
-                'walls_west',
-                'walls_south',
-                'walls_north',
-                'roofs_top'}
-
-    sample_data = {k: [] for k in surfaces}
-
-    for building in sample_buildings:
-        data = pd.read_csv(locator.get_radiation_building(building))
-        for surface in sample_data.keys():
-            # Convert to W/m2
-            sample_data[surface].append(data[f"{surface}_kW"]*1000/data[f"{surface}_m2"])
-
-    # Get mean of samples
-    for k, v in sample_data.items():
-        sample_data[k] = sum(v) / len(v)
-
-    return sample_data
+from cea.utilities.standardize_coordinates import get_lat_lon_projected_shapefile, get_projected_coordinate_system
 
 
 def fetch_simulation_buildings(sample_buildings, zone_df, buffer_m):
@@ -73,6 +37,7 @@ def main(config):
     sample_buildings = config.radiation_simplified.sample_buildings
     buffer_m = config.radiation_simplified.buffer
     config.radiation.buildings = sample_buildings
+    write_sensor_data = config.radiation.write_sensor_data
 
     locator = cea.inputlocator.InputLocator(scenario=config.scenario)
     daysim_bin_path, daysim_lib_path = daysim.check_daysim_bin_directory(config.radiation.daysim_bin_directory,
@@ -157,14 +122,24 @@ def main(config):
     cea_daysim.execute_radfiles2daysim()
 
     time1 = time.time()
-    run_daysim_simulation(cea_daysim, simulation_buildings, locator, config.radiation, geometry_staging_location,
-                          num_processes=config.get_number_of_processes())
+    # the radiation of the sensors of the sample buildings is needed to fit the surrogate model
+    config.radiation.write_sensor_data = True
+    try:
+        run_daysim_simulation(cea_daysim, simulation_buildings, locator, config.radiation,
+                              geometry_staging_location, num_processes=config.get_number_of_processes())
+    finally:
+        config.radiation.write_sensor_data = write_sensor_data
 
     # Remove staging location after everything is successful
     shutil.rmtree(daysim_staging_location)
 
-    # Generate sample values
-    sample_values = generate_sample_data(locator, sample_buildings)
+    # read the sensors of the sample buildings before the sensors of all the buildings are calculated
+    print("Fitting the surrogate model on the sensors of the sample buildings")
+    sample_sensors = surrogate.read_sensors_metadata(locator, sample_buildings)
+    sample_radiation = np.concatenate([read_sensor_radiation(locator, building_name).values.T
+                                       for building_name in sample_buildings])
+    if not write_sensor_data:
+        remove_sensor_stores(locator, sample_buildings)
 
     sensors_coords_zone, \
         sensors_dir_zone, \
@@ -174,14 +149,42 @@ def main(config):
         sensor_intersection_zone = calc_sensors_zone(zone_building_names, locator,
                                                      GridSize(walls=200, roof=200),
                                                      geometry_staging_location)
+    sensors = surrogate.read_sensors_metadata(locator, names_zone)
+
+    # the obstructions of the sensors of the sample buildings are the buildings simulated with Daysim
+    zone_df = zone_df.to_crs(get_projected_coordinate_system(*get_lat_lon_projected_shapefile(zone_df)))
+    obstacles = surrogate.calc_obstacles(zone_df, sensors)
+    simulated_obstacles = obstacles[obstacles['BUILDING'].isin(simulation_buildings)]
+    not_intersecting = sample_sensors['intersection'].values != 1
+    sample_sensors = sample_sensors[not_intersecting]
+    sample_radiation = sample_radiation[not_intersecting]
+    sample_features = surrogate.calc_sensor_features(sample_sensors, simulated_obstacles)
+    sample_labels = surrogate.get_surface_labels(sample_sensors)
+    model = surrogate.fit_surrogate(sample_features, sample_labels, sample_radiation)
+
+    if len(sample_buildings) > 1:
+        error = surrogate.calc_surrogate_error(sample_features, sample_labels, sample_radiation,
+                                               sample_sensors['BUILDING'].values)
+        error.to_csv(surrogate.get_surrogate_error_file(locator))
+        print("Error of the surrogate model for each sample building fitted on the other sample buildings:")
+        print(error.round(2).to_string())
+    else:
+        print("The error of the surrogate model is only estimated with more than one sample building")
+
+    print("Applying the surrogate model to {n} sensors".format(n=len(sensors)))
+    features = surrogate.calc_sensor_features(sensors, obstacles)
+    labels = surrogate.get_surface_labels(sensors)
 
     weatherfile = epwreader.epw_reader(weather_file)
     date = weatherfile["date"]
+    if write_sensor_data:
+        sensor_store = SensorStoreWriter(locator, names_zone, sensors_number_zone)
+    index = 0
     for building_name, sensors_number, sensor_code, sensor_intersection \
             in zip(names_zone, sensors_number_zone, sensors_code_zone, sensor_intersection_zone):
 
-        geometry = pd.read_csv(locator.get_radiation_metadata(building_name)).set_index('SURFACE')
-        sensor_data = generate_sensor_data(sample_values, geometry)
+        sensor_data = surrogate.predict_surrogate(model, features[index:index + sensors_number],
+                                                  labels[index:index + sensors_number])
 
         # set sensors that intersect with buildings to 0
         sensor_data[np.array(sensor_intersection) == 1] = 0
@@ -190,9 +193,14 @@ def main(config):
         # create summary and save to disk
         write_aggregated_results(building_name, items_sensor_name_and_result, locator, date)
 
-        if config.radiation.write_sensor_data:
-            sensor_data_path = locator.get_radiation_building_sensors(building_name)
-            write_sensor_results(sensor_data_path, items_sensor_name_and_result)
+        if write_sensor_data:
+            sensor_store.write(building_name, sensor_data)
+
+        index = index + sensors_number
+
+    if write_sensor_data:
+        sensor_store.close()
+        remove_superseded_sensor_stores(locator)
 
     print("Daysim simulation finished in %.2f mins" % ((time.time() - time1) / 60.0))
 
@@ -0,0 +1,216 @@
+"""
+Surrogate model of the radiation of the sensors for the simplified radiation script.
+
+The hourly radiation of the sensors of the sample buildings (simulated with Daysim) is regressed, per surface type and
+orientation (e.g. ``walls_south``), on the obstruction of the sky of each sensor by the buildings around it: its sky
+view factor and the sine of the elevation of the horizon in front of it. The horizon of a sensor is the highest
+elevation angle of the roof outlines of the other buildings in each sector of azimuth (see ``calc_sensor_features``).
+
+The model is then applied to all the sensors of the zone at once, with a matrix product per surface. Its error is
+estimated by fitting it without each sample building and predicting the radiation of that building (see
+``calc_surrogate_error``).
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import shapely
+from scipy.spatial import cKDTree
+
+SURFACE_LABELS = ['windows_east', 'windows_west', 'windows_south', 'windows_north',
+                  'walls_east', 'walls_west', 'walls_south', 'walls_north', 'roofs_top']
+# the walls and windows of the same orientation receive the same radiation
+FALLBACK_LABELS = {'windows_east': 'walls_east', 'windows_west': 'walls_west', 'windows_south': 'walls_south',
+                   'windows_north': 'walls_north', 'walls_east': 'windows_east', 'walls_west': 'windows_west',
+                   'walls_south': 'windows_south', 'walls_north': 'windows_north'}
+
+# buildings further away than this distance [m] are not considered to obstruct the sky of a sensor
+OBSTRUCTION_RADIUS_M = 100.0
+# maximum distance [m] between the points of the outlines of the roofs
+OBSTACLE_SPACING_M = 5.0
+# number of sectors of azimuth of the horizon of the sensors
+HORIZON_SECTORS = 36
+# number of sensors of which the horizon is calculated at once
+SENSOR_BLOCK_SIZE = 4096
+
+
+def get_surrogate_error_file(locator):
+    """scenario/outputs/data/solar-radiation/radiation_simplified_error.csv"""
+    return os.path.join(locator.get_solar_radiation_folder(), 'radiation_simplified_error.csv')
+
+
+def read_sensors_metadata(locator, building_names):
+    """
+    Read the metadata of the sensors of the buildings (``locator.get_radiation_metadata``) in one table.
+
+    :rtype: pd.DataFrame
+    """
+    return pd.concat([pd.read_csv(locator.get_radiation_metadata(building_name))
+                      for building_name in building_names], ignore_index=True)
+
+
+def calc_obstacles(zone_df, sensors):
+    """
+    The points of the outlines of the roofs of the buildings, every ``OBSTACLE_SPACING_M`` meters.
+
+    :param gpd.GeoDataFrame zone_df: the buildings, in the (projected) coordinate system of the sensors
+    :param pd.DataFrame sensors: the metadata of the sensors of the buildings (the roofs give the height of the outlines)
+    :return: the building, x, y and z [m] of each point
+    :rtype: pd.DataFrame
+    """
+    roof_heights = sensors[sensors['TYPE'] == 'roofs'].groupby('BUILDING')['Zcoor'].max()
+    buildings = zone_df[zone_df['Name'].isin(roof_heights.index)]
+    outlines = shapely.segmentize(buildings.geometry.boundary.values, OBSTACLE_SPACING_M)
+    coordinates, positions = shapely.get_coordinates(outlines, return_index=True)
+    building_names = buildings['Name'].values[positions]
+    return pd.DataFrame({'BUILDING': building_names, 'x': coordinates[:, 0], 'y': coordinates[:, 1],
+                         'z': roof_heights.loc[building_names].values})
+
+
+def calc_horizon(sensors, obstacles):
+    """
+    The elevation angle [rad] of the horizon of the sensors in each sector of azimuth (clockwise from the north), i.e.
+    the highest point of the outlines of the other buildings within ``OBSTRUCTION_RADIUS_M``.
+
+    :rtype: np.ndarray
+    """
+    horizon = np.zeros((len(sensors), HORIZON_SECTORS))
+    if len(sensors) == 0 or len(obstacles) == 0:
+        return horizon
+
+    building_codes = pd.Index(pd.unique(np.concatenate([sensors['BUILDING'].values, obstacles['BUILDING'].values])))
+    sensor_buildings = building_codes.get_indexer(sensors['BUILDING'])
+    obstacle_buildings = building_codes.get_indexer(obstacles['BUILDING'])
+    sensor_points = sensors[['Xcoor', 'Ycoor', 'Zcoor']].values
+    obstacle_points = obstacles[['x', 'y', 'z']].values
+    tree = cKDTree(obstacle_points[:, :2])
+
+    for start in range(0, len(sensors), SENSOR_BLOCK_SIZE):
+        stop = min(start + SENSOR_BLOCK_SIZE, len(sensors))
+        neighbours = tree.query_ball_point(sensor_points[start:stop, :2], OBSTRUCTION_RADIUS_M)
+        counts = np.fromiter((len(n) for n in neighbours), dtype=int, count=stop - start)
+        if counts.sum() == 0:
+            continue
+        sensor_index = np.repeat(np.arange(start, stop), counts)
+        obstacle_index = np.concatenate(neighbours).astype(int)
+
+        delta = obstacle_points[obstacle_index] - sensor_points[sensor_index]
+        distance = np.hypot(delta[:, 0], delta[:, 1])
+        elevation = np.arctan2(delta[:, 2], distance)
+        obstructs = (obstacle_buildings[obstacle_index] != sensor_buildings[sensor_index]) & (distance > 0) & (
+                elevation > 0)
+        azimuth = np.arctan2(delta[:, 0], delta[:, 1]) % (2 * np.pi)
+        sector = np.minimum((azimuth / (2 * np.pi) * HORIZON_SECTORS).astype(int), HORIZON_SECTORS - 1)
+        np.maximum.at(horizon, (sensor_index[obstructs], sector[obstructs]), elevation[obstructs])
+    return horizon
+
+
+def calc_sensor_features(sensors, obstacles):
+    """
+    The variables of the surrogate model of each sensor: a constant, the sky view factor and the sine of the elevation
+    of the horizon in front of the sensor (in all directions for the roofs).
+
+    The sky view factor of a vertical surface facing ``phi = 0`` is ``1/pi * integral of cos(phi) * (pi/4 - h/2 -
+    sin(2h)/4) dphi`` over the sectors in front of it, and of a horizontal surface ``1/pi * integral of cos(h)^2/2 dphi``,
+    with ``h`` the elevation of the horizon (0.5 and 1 without obstructions).
+
+    :param pd.DataFrame sensors: the metadata of the sensors
+    :param pd.DataFrame obstacles: the outlines of the roofs of the buildings (see ``calc_obstacles``)
+    :rtype: np.ndarray
+    """
+    horizon = calc_horizon(sensors, obstacles)
+    sector_width = 2 * np.pi / HORIZON_SECTORS
+    sector_azimuth = (np.arange(HORIZON_SECTORS) + 0.5) * sector_width
+    normal_azimuth = np.arctan2(sensors['Xdir'].values, sensors['Ydir'].values)
+    cos_phi = np.cos(sector_azimuth[np.newaxis, :] - normal_azimuth[:, np.newaxis])
+    roofs = sensors['TYPE'].values == 'roofs'
+
+    sky_view_vertical = (np.clip(cos_phi, 0.0, None) * (np.pi / 4 - horizon / 2 - np.sin(2 * horizon) / 4)).sum(
+        axis=1) * sector_width / np.pi
+    sky_view_horizontal = (np.cos(horizon) ** 2 / 2).sum(axis=1) * sector_width / np.pi
+    in_front = cos_phi > np.cos(np.pi / 4)
+    obstruction_front = (np.sin(horizon) * in_front).sum(axis=1) / np.maximum(in_front.sum(axis=1), 1)
+
+    return np.column_stack([np.ones(len(sensors)),
+                            np.where(roofs, sky_view_horizontal, sky_view_vertical),
+                            np.where(roofs, np.sin(horizon).mean(axis=1), obstruction_front)])
+
+
+def get_surface_labels(sensors):
+    return (sensors['TYPE'] + '_' + sensors['orientation']).values
+
+
+def fit_surrogate(features, labels, radiation):
+    """
+    Fit the coefficients of the features of each surface for each hour (least squares, all the hours at once).
+
+    :param np.ndarray features: the features of the sensors (see ``calc_sensor_features``)
+    :param np.ndarray labels: the surface of the sensors (e.g. ``walls_south``)
+    :param np.ndarray radiation: the hourly radiation of the sensors [W/m2] (sensors x hours)
+    :return: the coefficients of each surface (features x hours)
+    :rtype: dict[str, np.ndarray]
+    """
+    model = {}
+    for label in np.unique(labels):
+        selection = labels == label
+        model[label] = np.linalg.lstsq(features[selection], radiation[selection], rcond=None)[0]
+    return model
+
+
+def get_coefficients(model, label):
+    """the coefficients of a surface, or of the surface with the same orientation (None if there are none)"""
+    if label in model:
+        return model[label]
+    return model.get(FALLBACK_LABELS.get(label))
+
+
+def predict_surrogate(model, features, labels):
+    """
+    :return: the hourly radiation of the sensors [W/m2] (sensors x hours)
+    :rtype: np.ndarray
+    """
+    hours = next(iter(model.values())).shape[1]
+    prediction = np.zeros((len(features), hours), dtype=np.float32)
+    for label in np.unique(labels):
+        coefficients = get_coefficients(model, label)
+        if coefficients is None:
+            raise ValueError('There are no sensors of the surfaces %s in the sample buildings, add sample buildings '
+                             'with these surfaces' % label)
+        selection = labels == label
+        prediction[selection] = features[selection] @ coefficients
+    return np.clip(prediction, 0.0, None, out=prediction)
+
+
+def calc_surrogate_error(features, labels, radiation, buildings):
+    """
+    The error of the surrogate model for each surface, predicting the radiation of each sample building with the model
+    fitted on the other sample buildings.
+
+    :param np.ndarray buildings: the building of each sensor
+    :return: the number of sensors, the RMSE of the hourly radiation [W/m2] and the RMSE and the bias of the yearly
+             radiation [%] of each surface and of all the surfaces
+    :rtype: pd.DataFrame
+    """
+    prediction = np.full(radiation.shape, np.nan)
+    for building in np.unique(buildings):
+        test = buildings == building
+        model = fit_surrogate(features[~test], labels[~test], radiation[~test])
+        predictable = test & np.array([get_coefficients(model, label) is not None for label in labels])
+        if predictable.any():
+            prediction[predictable] = predict_surrogate(model, features[predictable], labels[predictable])
+
+    errors = []
+    for label in SURFACE_LABELS + ['total']:
+        selection = ~np.isnan(prediction[:, 0]) & ((labels == label) if label != 'total' else True)
+        if not selection.any():
+            continue
+        yearly = radiation[selection].sum(axis=1)
+        yearly_prediction = prediction[selection].sum(axis=1)
+        errors.append({'surface': label,
+                       'sensors': int(selection.sum()),
+                       'hourly_RMSE_Wm2': np.sqrt(np.mean((prediction[selection] - radiation[selection]) ** 2)),
+                       'yearly_RMSE_%': np.sqrt(np.mean((yearly_prediction - yearly) ** 2)) / yearly.mean() * 100,
+                       'yearly_bias_%': (yearly_prediction.sum() - yearly.sum()) / yearly.sum() * 100})
+    return pd.DataFrame(errors, columns=['surface', 'sensors', 'hourly_RMSE_Wm2', 'yearly_RMSE_%',
+                                         'yearly_bias_%']).set_index('surface')
@@ -33,6 +33,13 @@ NETWORK_DEPTH = 1  # m
 REDUCED_TIME_STEPS = 50 # number of time steps of maximum demand which are evaluated as an initial guess of the edge diameters
 MAX_INITIAL_DIAMETER_ITERATIONS = 20 #number of initial guess iterations for pipe diameters
 
+# Thermal network
+SPARSE_SOLVER_MIN_EDGES = 100  # networks with at least this number of pipes are solved with sparse matrices
+SPARSE_SOLVER_CACHE_SIZE = 4  # factorizations of the most recently solved networks kept by each process
+MAX_HOURS_IN_BLOCK = 168  # maximum number of contiguous hours solved by a worker process at once (one week)
+MAX_LOOP_ITERATIONS = 80  # maximum number of iterations of the mass flow corrections of looped networks
+SIZING_PEAK_HOURS = 48  # hours of highest total demand sizing the simplified network (plus the peak hour of each pipe)
+
 # Cogeneration (CCGT)
 SPEC_VOLUME_STEAM = 0.0010  # m3/kg
 
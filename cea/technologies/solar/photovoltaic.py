@@ -62,7 +62,8 @@ def projected_lifetime_output(
     lifetime_production = production_values * derate_factors
     return lifetime_production
 
-def calc_PV(locator, config, latitude, longitude, weather_data, datetime_local, building_name):
+def calc_PV(locator, config, latitude, longitude, weather_data, datetime_local, building_name,
+            solar_properties=None):
     """
     This function first determines the surface area with sufficient solar radiation, and then calculates the optimal
     tilt angles of panels at each surface location. The panels are categorized into groups by their surface azimuths,
@@ -76,17 +77,19 @@ def calc_PV(locator, config, latitude, longitude, weather_data, datetime_local,
     :type longitude: float
     :param building_name: list of building names in the case study
     :type building_name: Series
+    :param solar_properties: the sun properties of the scenario (read from the solar potentials folder if None)
+    :type solar_properties: cea.utilities.solar_equations.SunProperties
     :return: Building_PV.csv with PV generation potential of each building, Building_sensors.csv with sensor data of
         each PV panel.
 
     """
 
     t0 = time.perf_counter()
-    radiation_path = locator.get_radiation_building_sensors(building_name)
-    metadata_csv_path = locator.get_radiation_metadata(building_name)
 
     # solar properties
-    solar_properties = solar_equations.calc_sun_properties(latitude, longitude, weather_data, datetime_local, config)
+    if solar_properties is None:
+        solar_properties = solar_equations.get_sun_properties(locator, latitude, longitude, weather_data,
+                                                              datetime_local, config)
     print('calculating solar properties done')
 
     # calculate properties of PV panel
@@ -95,7 +98,7 @@ def calc_PV(locator, config, latitude, longitude, weather_data, datetime_local,
 
     # select sensor point with sufficient solar radiation
     max_annual_radiation, annual_radiation_threshold, sensors_rad_clean, sensors_metadata_clean = \
-        solar_equations.filter_low_potential(radiation_path, metadata_csv_path, config)
+        solar_equations.filter_low_potential(locator, building_name, config)
 
     print('filtering low potential sensor points done')
 
@@ -124,7 +127,7 @@ def calc_PV(locator, config, latitude, longitude, weather_data, datetime_local,
         print('generating groups of sensor points done')
 
         final = calc_pv_generation(sensor_groups, weather_data, datetime_local, solar_properties, latitude,
-                                   panel_properties_PV)
+                                   panel_properties_PV, np.dtype(config.solar.precision))
 
         final.to_csv(locator.PV_results(building=building_name), index=True,
                      float_format='%.2f')  # print PV generation potential
@@ -155,27 +158,23 @@ def calc_PV(locator, config, latitude, longitude, weather_data, datetime_local,
 # PV electricity generation
 # =========================
 
-def calc_pv_generation(sensor_groups, weather_data, date_local, solar_properties, latitude, panel_properties_PV):
+def calc_pv_generation(sensor_groups, weather_data, date_local, solar_properties, latitude, panel_properties_PV,
+                       dtype=np.float64):
     """
-    To calculate the electricity generated from PV panels.
+    To calculate the electricity generated from PV panels. All the groups of sensors are calculated at once, as arrays
+    of shape (groups, hours).
+
+    :param dtype: floating point type of the calculation (``np.float32`` halves the memory of large buildings, at the
+        cost of a lower precision)
     """
 
     # local variables
-    number_groups = sensor_groups['number_groups']  # number of groups of sensor points
     prop_observers = sensor_groups['prop_observers']  # mean values of sensor properties of each group of sensors
     hourly_radiation = sensor_groups['hourlydata_groups']  # mean hourly radiation of sensors in each group [Wh/m2]
-
-    # convert degree to radians
-    lat = radians(latitude)
-    g_rad = np.radians(solar_properties.g)
-    ha_rad = np.radians(solar_properties.ha)
-    Sz_rad = np.radians(solar_properties.Sz)
-    Az_rad = np.radians(solar_properties.Az)
-
-    # empty list to store results
-    list_groups_area = [0 for i in range(number_groups)]
-    total_el_output_PV_kWh = [0 for i in range(number_groups)]
-    total_radiation_kWh = [0 for i in range(number_groups)]
+    groups = prop_observers.index.values
+    # the properties of the panel as python floats, which keep the dtype of the arrays
+    panel_properties_PV = {key: float(value) if isinstance(value, (float, np.floating)) else value
+                           for key, value in panel_properties_PV.items()}
 
     potential = pd.DataFrame(index=range(HOURS_IN_YEAR))
     panel_orientations = ['walls_south', 'walls_north', 'roofs_top', 'walls_east', 'walls_west']
@@ -183,61 +182,44 @@ def calc_pv_generation(sensor_groups, weather_data, date_local, solar_properties
         potential['PV_' + panel_orientation + '_E_kWh'] = 0
         potential['PV_' + panel_orientation + '_m2'] = 0
 
-    eff_nom = panel_properties_PV['PV_n']
-
-    Bref = panel_properties_PV['PV_Bref']
-
-    misc_losses = panel_properties_PV['misc_losses']  # cabling, resistances etc..
-    for group in prop_observers.index.values:
-        # calculate radiation types (direct/diffuse) in group
-        radiation_Wperm2 = solar_equations.cal_radiation_type(group, hourly_radiation, weather_data)
-
-        # read panel properties of each group
-        teta_z_deg = prop_observers.loc[group, 'surface_azimuth_deg']
-        tot_module_area_m2 = prop_observers.loc[group, 'area_installed_module_m2']
-        tilt_angle_deg = prop_observers.loc[group, 'B_deg']  # tilt angle of panels
-        # degree to radians
-        tilt_rad = radians(tilt_angle_deg)  # tilt angle
-        teta_z_deg = radians(teta_z_deg)  # surface azimuth
-
-        # calculate effective incident angles necessary
-        teta_deg = pvlib.irradiance.aoi(tilt_angle_deg, teta_z_deg, solar_properties.Sz, solar_properties.Az)
-        teta_rad = teta_rad = [radians(x) for x in teta_deg]
-        teta_ed_rad, teta_eg_rad = calc_diffuseground_comp(tilt_rad)
-
-        absorbed_radiation_Wperm2 = np.vectorize(calc_absorbed_radiation_PV)(radiation_Wperm2.I_sol,
-                                                                             radiation_Wperm2.I_direct,
-                                                                             radiation_Wperm2.I_diffuse, tilt_rad,
-                                                                             Sz_rad, teta_rad, teta_ed_rad,
-                                                                             teta_eg_rad, panel_properties_PV)
-
-        T_cell_C = np.vectorize(calc_cell_temperature)(absorbed_radiation_Wperm2, weather_data.drybulb_C,
-                                                       panel_properties_PV)
-
-        el_output_PV_kW = np.vectorize(calc_PV_power)(absorbed_radiation_Wperm2, T_cell_C, eff_nom, tot_module_area_m2,
-                                                      Bref, misc_losses)
-
-        # write results from each group
-        panel_orientation = prop_observers.loc[group, 'type_orientation']
-        potential['PV_' + panel_orientation + '_E_kWh'] = potential[
-                                                              'PV_' + panel_orientation + '_E_kWh'] + el_output_PV_kW
-        potential['PV_' + panel_orientation + '_m2'] = potential['PV_' + panel_orientation + '_m2'] + tot_module_area_m2
-
-        # aggregate results from all modules
-        list_groups_area[group] = tot_module_area_m2
-        total_el_output_PV_kWh[group] = el_output_PV_kW
-        total_radiation_kWh[group] = (radiation_Wperm2['I_sol'] * tot_module_area_m2 / 1000)  # kWh
-
-    # check for missing groups and assign 0 as el_output_PV_kW
-    # panel_orientations = ['walls_south', 'walls_north', 'roofs_top', 'walls_east', 'walls_west']
-    # for panel_orientation in panel_orientations:
-    #     if panel_orientation not in prop_observers['type_orientation'].values:
-    #         potential['PV_' + panel_orientation + '_E_kWh'] = 0
-    #         potential['PV_' + panel_orientation + '_m2'] = 0
-
-    potential['E_PV_gen_kWh'] = sum(total_el_output_PV_kWh)
-    potential['radiation_kWh'] = sum(total_radiation_kWh).values
-    potential['Area_PV_m2'] = sum(list_groups_area)
+    # calculate radiation types (direct/diffuse) of each group, the ratio of diffuse radiation is nan at night
+    I_sol = np.nan_to_num(hourly_radiation[groups].values.T.astype(dtype))
+    I_diffuse = weather_data.ratio_diffhout.values.astype(dtype) * I_sol
+    I_direct = np.nan_to_num(I_sol - I_diffuse)
+    I_diffuse = np.nan_to_num(I_diffuse)
+
+    # read panel properties of each group
+    tot_module_area_m2 = prop_observers['area_installed_module_m2'].values.astype(dtype)
+    tilt_angle_deg = prop_observers['B_deg'].values.astype(dtype)  # tilt angle of panels
+    # the surface azimuth is passed to pvlib in radians (as in the previous, per-group calculation)
+    teta_z = np.radians(prop_observers['surface_azimuth_deg'].values.astype(dtype))
+
+    # calculate effective incident angles necessary
+    teta_deg = pvlib.irradiance.aoi(tilt_angle_deg[:, np.newaxis], teta_z[:, np.newaxis],
+                                    solar_properties.Sz.values.astype(dtype), solar_properties.Az.values.astype(dtype))
+    teta_rad = np.radians(teta_deg)
+    tilt_rad = np.radians(tilt_angle_deg)[:, np.newaxis]
+    Sz_rad = np.radians(solar_properties.Sz.values.astype(dtype))
+
+    absorbed_radiation_Wperm2 = calc_absorbed_radiation_PV_array(I_sol, I_direct, I_diffuse, tilt_rad, Sz_rad,
+                                                                 teta_rad, panel_properties_PV)
+    T_cell_C = calc_cell_temperature(absorbed_radiation_Wperm2, weather_data.drybulb_C.values.astype(dtype),
+                                     panel_properties_PV)
+    el_output_PV_kW = calc_PV_power(absorbed_radiation_Wperm2, T_cell_C, panel_properties_PV['PV_n'],
+                                    tot_module_area_m2[:, np.newaxis], panel_properties_PV['PV_Bref'],
+                                    panel_properties_PV['misc_losses'])
+
+    # write results of the groups of each orientation
+    type_orientation = prop_observers['type_orientation'].values
+    for panel_orientation in np.unique(type_orientation):
+        in_orientation = type_orientation == panel_orientation
+        potential['PV_' + panel_orientation + '_E_kWh'] = el_output_PV_kW[in_orientation].sum(axis=0)
+        potential['PV_' + panel_orientation + '_m2'] = tot_module_area_m2[in_orientation].sum()
+
+    # aggregate results from all modules
+    potential['E_PV_gen_kWh'] = el_output_PV_kW.sum(axis=0)
+    potential['radiation_kWh'] = (I_sol * tot_module_area_m2[:, np.newaxis] / 1000).sum(axis=0)  # kWh
+    potential['Area_PV_m2'] = tot_module_area_m2.sum()
     potential['Date'] = date_local
     potential = potential.set_index('Date')
 
@@ -305,7 +287,7 @@ def calc_diffuseground_comp(tilt_radians):
     """
     To calculate reflected radiation and diffuse radiation.
     :param tilt_radians:  surface tilt angle [rad]
-    :type tilt_radians: float
+    :type tilt_radians: float or np.array
     :return teta_ed: effective incidence angle from diffuse radiation [rad]
     :return teta_eg: effective incidence angle from ground-reflected radiation [rad]
     :rtype teta_ed: float
@@ -316,10 +298,10 @@ def calc_diffuseground_comp(tilt_radians):
                  doi: 10.1002/9781118671603.ch5
 
     """
-    tilt = degrees(tilt_radians)
+    tilt = np.degrees(tilt_radians)
     teta_ed = 59.68 - 0.1388 * tilt + 0.001497 * tilt ** 2  # [degrees] (5.4.2)
     teta_eG = 90 - 0.5788 * tilt + 0.002693 * tilt ** 2  # [degrees] (5.4.1)
-    return radians(teta_ed), radians(teta_eG)
+    return np.radians(teta_ed), np.radians(teta_eG)
 
 
 def calc_absorbed_radiation_PV(I_sol, I_direct, I_diffuse, tilt, Sz, teta, tetaed, tetaeg, panel_properties_PV):
@@ -427,6 +409,71 @@ def calc_absorbed_radiation_PV(I_sol, I_direct, I_diffuse, tilt, Sz, teta, tetae
     return absorbed_radiation_Wperm2
 
 
+def calc_absorbed_radiation_PV_array(I_sol, I_direct, I_diffuse, tilt, Sz, teta, panel_properties_PV):
+    """
+    Vectorized version of ``calc_absorbed_radiation_PV`` for arrays of panels and hours: the radiation and the angle
+    of incidence have the shape (groups, hours), the tilt (groups, 1) and the solar zenith angle (hours,). The
+    effective incidence angles of diffuse and ground-reflected radiation are calculated from the tilt.
+
+    :return: absorbed radiation [W/m2] with the shape (groups, hours)
+    :rtype: np.array
+    """
+    # read variables
+    n = constants.n  # refractive index of glass
+    Pg = constants.Pg  # ground reflectance
+    K = constants.K  # glazing extinction coefficient
+    a0 = panel_properties_PV['PV_a0']
+    a1 = panel_properties_PV['PV_a1']
+    a2 = panel_properties_PV['PV_a2']
+    a3 = panel_properties_PV['PV_a3']
+    a4 = panel_properties_PV['PV_a4']
+    L = panel_properties_PV['PV_th']
+
+    # to avoid inconvergence when I_sol = 0
+    lim1 = radians(0)
+    lim2 = radians(90)
+    lim3 = radians(89.999)
+    teta = np.where(teta < lim1, np.minimum(lim3, np.abs(teta)), teta)
+    teta = np.where(teta >= lim2, lim3, teta)
+    Sz = np.where(Sz < lim1, np.minimum(lim3, np.abs(Sz)), Sz)
+    Sz = np.where(Sz >= lim2, lim3, Sz)
+
+    # Rb: ratio of beam radiation of tilted surface to that on horizontal surface, assuming there is no direct
+    # radiation when the sun is close to the horizon.
+    Rb = np.where(Sz <= radians(85), np.cos(teta) / np.cos(Sz), 0)
+
+    # calculate air mass modifier
+    m = 1 / np.cos(Sz)  # air mass
+    M = a0 + a1 * m + a2 * m ** 2 + a3 * m ** 3 + a4 * m ** 4  # air mass modifier
+    M = np.clip(M, 0.001, 1.1)  # De Soto et al., 2006
+
+    # incidence angle modifiers for direct (beam), diffuse and ground-reflected radiation
+    Ta_n = exp(-K * L) * (1 - ((n - 1) / (n + 1)) ** 2)
+    kteta_B = np.where(teta < radians(90), calc_transmittance_glazing(teta, n, K, L) / Ta_n, 0)
+    teta_ed, teta_eg = calc_diffuseground_comp(tilt)
+    kteta_D = calc_transmittance_glazing(teta_ed, n, K, L) / Ta_n
+    kteta_eG = calc_transmittance_glazing(teta_eg, n, K, L) / Ta_n
+
+    # absorbed solar radiation
+    absorbed_radiation_Wperm2 = M * Ta_n * (
+            kteta_B * I_direct * Rb + kteta_D * I_diffuse * (1 + np.cos(tilt)) / 2 + kteta_eG * I_sol * Pg * (
+            1 - np.cos(tilt)) / 2)  # [W/m2] (5.12.1)
+    # when points are 0 and too much losses
+    return np.where(absorbed_radiation_Wperm2 < 0.0, 0.0, absorbed_radiation_Wperm2).astype(I_sol.dtype)
+
+
+def calc_transmittance_glazing(teta, n, K, L):
+    """
+    Transmittance of the glazing for the incidence angle teta [rad] (Duffie and Beckman, 5.3.1 and 5.2.2), with the
+    refractive index n, the extinction coefficient K and the thickness L of the glazing.
+    """
+    teta_r = np.arcsin(np.sin(teta) / n)  # refraction angle in radians (5.1.4)
+    part1 = teta_r + teta
+    part2 = teta_r - teta
+    return np.exp((-K * L) / np.cos(teta_r)) * (
+            1 - 0.5 * ((np.sin(part2) ** 2) / (np.sin(part1) ** 2) + (np.tan(part2) ** 2) / (np.tan(part1) ** 2)))
+
+
 def calc_PV_power(absorbed_radiation_Wperm2, T_cell_C, eff_nom, tot_module_area_m2, Bref_perC, misc_losses):
     """
     To calculate the power production of PV panels.
@@ -838,6 +885,8 @@ def main(config):
     # list_buildings_names =['B026', 'B036', 'B039', 'B043', 'B050'] for missing buildings
     weather_data = epwreader.epw_reader(locator.get_weather_file())
     date_local = solar_equations.calc_datetime_local_from_weather_file(weather_data, latitude, longitude)
+    solar_properties = solar_equations.get_sun_properties(locator, latitude, longitude, weather_data, date_local,
+                                                          config)
 
     num_process = config.get_number_of_processes()
     n = len(building_names)
@@ -847,7 +896,8 @@ def main(config):
                                                            repeat(longitude, n),
                                                            repeat(weather_data, n),
                                                            repeat(date_local, n),
-                                                           building_names)
+                                                           building_names,
+                                                           repeat(solar_properties, n))
 
     # aggregate results from all buildings
     write_aggregate_results(config, locator, building_names)
@@ -21,9 +21,10 @@ from cea.constants import HOURS_IN_YEAR
 from cea.technologies.solar import constants
 from cea.technologies.solar.photovoltaic import (calc_properties_PV_db, calc_PV_power, calc_diffuseground_comp,
                                                  calc_absorbed_radiation_PV, calc_cell_temperature)
-from cea.technologies.solar.solar_collector import (calc_properties_SC_db, calc_IAM_beam_SC, calc_q_rad, calc_q_gain,
-                                                    vectorize_calc_Eaux_SC, calc_optimal_mass_flow,
-                                                    calc_optimal_mass_flow_2, calc_qloss_network)
+from cea.technologies.solar.solar_collector import (calc_properties_SC_db, calc_IAM_beam_SC, calc_q_rad,
+                                                    calc_Tout_multi_segment_C, vectorize_calc_Eaux_SC,
+                                                    calc_optimal_mass_flow, calc_optimal_mass_flow_2,
+                                                    calc_qloss_network)
 from cea.utilities import epwreader
 from cea.utilities import solar_equations
 from cea.utilities.standardize_coordinates import get_lat_lon_projected_shapefile
@@ -39,7 +40,8 @@ __email__ = "cea@arch.ethz.ch"
 __status__ = "Production"
 
 
-def calc_PVT(locator, config, latitude, longitude, weather_data, date_local, building_name):
+def calc_PVT(locator, config, latitude, longitude, weather_data, date_local, building_name,
+             solar_properties=None):
     """
     This function first determines the surface area with sufficient solar radiation, and then calculates the optimal
     tilt angles of panels at each surface location. The panels are categorized into groups by their surface azimuths,
@@ -59,17 +61,19 @@ def calc_PVT(locator, config, latitude, longitude, weather_data, date_local, bui
     :type weather_path: .epw
     :param building_name: list of building names in the case study
     :type building_name: Series
+    :param solar_properties: the sun properties of the scenario (read from the solar potentials folder if None)
+    :type solar_properties: cea.utilities.solar_equations.SunProperties
     :param T_in: inlet temperature to the solar collectors [C]
     :return: Building_PVT.csv with solar collectors heat generation potential of each building, Building_PVT_sensors.csv
              with sensor data of each PVT panel.
     """
     t0 = time.perf_counter()
 
-    radiation_path = locator.get_radiation_building_sensors(building_name)
-    metadata_csv_path = locator.get_radiation_metadata(building_name)
 
     # solar properties
-    solar_properties = solar_equations.calc_sun_properties(latitude, longitude, weather_data, date_local, config)
+    if solar_properties is None:
+        solar_properties = solar_equations.get_sun_properties(locator, latitude, longitude, weather_data,
+                                                              date_local, config)
     print('calculating solar properties done for building %s' % building_name)
 
     # get properties of the panel to evaluate # TODO: find a PVT module reference
@@ -79,7 +83,7 @@ def calc_PVT(locator, config, latitude, longitude, weather_data, date_local, bui
 
     # select sensor point with sufficient solar radiation
     max_annual_radiation, annual_radiation_threshold, sensors_rad_clean, sensors_metadata_clean = \
-        solar_equations.filter_low_potential(radiation_path, metadata_csv_path, config)
+        solar_equations.filter_low_potential(locator, building_name, config)
 
     print('filtering low potential sensor points done for building %s' % building_name)
 
@@ -391,78 +395,28 @@ def calc_PVT_module(config, radiation_Wperm2, panel_properties_SC, panel_propert
 
     # calculate absorbed radiation
     tilt_rad = radians(tilt_angle_deg)
-    q_rad_vector = np.vectorize(calc_q_rad)(n0, IAM_b, IAM_d, radiation_Wperm2.I_direct, radiation_Wperm2.I_diffuse,
-                                            tilt_rad)  # absorbed solar radiation in W/m2 is a mean of the group
-    counter = 0
-    Flag = False
-    Flag2 = False
+    q_rad_vector = calc_q_rad(n0, IAM_b, IAM_d, radiation_Wperm2.I_direct.values, radiation_Wperm2.I_diffuse.values,
+                              tilt_rad)  # absorbed solar radiation in W/m2 is a mean of the group
+    c1_pvt = calc_cl_pvt(Bref, np.asarray(absorbed_radiation_PV_Wperm2), c1, eff_nom)
+    Tamb_vector_C = np.asarray(Tamb_vector_C, dtype=np.float64)
+
     for flow in range(6):
-        Mo_seg = 1  # mode of segmented heat loss calculation. only one mode is implemented.
-        TIME0 = 0
-        DELT = 1  # timestep 1 hour
-        delts = DELT * 3600  # convert time step in seconds
-        Tfl = np.zeros(3)  # create vector to store value at previous [1] and present [2] time-steps
-        DT = np.zeros(3)
-        Tabs = np.zeros(3)
-        STORED = np.zeros(600)
-        TflA = np.zeros(600)
-        TflB = np.zeros(600)
-        TabsB = np.zeros(600)
-        TabsA = np.zeros(600)
-        q_gain_Seg = np.zeros(101)  # maximum Iseg = maximum Nseg + 1 = 101
-
-        for t in range(HOURS_IN_YEAR):
-            # c1_pvt = c1 - eff_nom * Bref * absorbed_radiation_PV_Wperm2[time] #todo: to delete
-            c1_pvt = calc_cl_pvt(Bref, absorbed_radiation_PV_Wperm2, c1, eff_nom, t)
-            Mfl_kgpers = calc_Mfl_kgpers(DELT, Nseg, STORED, TIME0, Tin_C, specific_flows_kgpers[flow], t,
-                                         Cp_fluid_JperkgK, C_eff_Jperm2K, aperture_area_m2)
-
-            # calculate average fluid temperature and average absorber temperature at the beginning of the time-step
-            Tamb_C = Tamb_vector_C[t]
-            q_rad_Wperm2 = q_rad_vector[t]
-            Tout_C = calc_Tout_C(Cp_fluid_JperkgK, DT, Mfl_kgpers, Nseg, STORED, Tabs, Tamb_C, Tfl, Tin_C,
-                                 aperture_area_m2, c1_pvt, q_rad_Wperm2)
-
-            # calculate q_gain with the guess for DT[1]
-            q_gain_Wperm2 = calc_q_gain(Tfl, q_rad_Wperm2, DT, Tin_C, aperture_area_m2, c1_pvt, c2,
-                                        Mfl_kgpers, delts, Cp_fluid_JperkgK, C_eff_Jperm2K, Tamb_C)
-
-            Aseg_m2 = aperture_area_m2 / Nseg  # aperture area per segment
-
-            # multi-segment calculation to avoid temperature jump at times of flow rate changes
-            Tout_Seg_C = do_multi_segment_calculation(Aseg_m2, C_eff_Jperm2K, Cp_fluid_JperkgK, DT, Mfl_kgpers, Mo_seg,
-                                                      Nseg, STORED, Tabs, TabsA, Tamb_C, Tfl, TflA, TflB, Tin_C, Tout_C,
-                                                      c1_pvt, c2, delts, q_gain_Seg, q_gain_Wperm2, q_rad_Wperm2)
-
-            # resulting energy output
-            q_out_kW = Mfl_kgpers * Cp_fluid_JperkgK * (Tout_Seg_C - Tin_C) / 1000  # [kW]
-            Tabs[2] = 0
-            # storage of the mean temperature
-            for Iseg in range(1, Nseg + 1):
-                STORED[200 + Iseg] = TflB[Iseg]
-                STORED[400 + Iseg] = TabsB[Iseg]
-                Tabs[2] = Tabs[2] + TabsB[Iseg] / Nseg
-
-            # outputs
-            temperature_out[flow][t] = Tout_Seg_C
-            temperature_in[flow][t] = Tin_C
-            supply_out_kW[flow][t] = q_out_kW
-            temperature_mean[flow][t] = (Tin_C + Tout_Seg_C) / 2  # Mean absorber temperature at present
-
-            q_gain_Wperm2 = 0
-            TavgB = 0
-            TavgA = 0
-            for Iseg in range(1, Nseg + 1):
-                q_gain_Wperm2 = q_gain_Wperm2 + q_gain_Seg * Aseg_m2  # W
-                TavgA = TavgA + TflA[Iseg] / Nseg
-                TavgB = TavgB + TflB[Iseg] / Nseg
-
-                # # OUT[9] = qgain/Area_a # in W/m2
-                # q_mtherm_Wperm2 = (TavgB - TavgA) * C_eff_Jperm2K * aperture_area_m2 / delts
-                # q_balance_error = q_gain_Wperm2 - q_mtherm_Wperm2 - q_out_kW
-
-                # OUT[11] = q_mtherm
-                # OUT[12] = q_balance_error
+        if flow == 0 or flow > 3:
+            # the flows 0 to 3 are independent and calculated together, the flows 4 and 5 depend on their results
+            flow_cases = range(4) if flow == 0 else [flow]
+            temperature_out_flows_C = calc_Tout_multi_segment_C(
+                np.array([specific_flows_kgpers[flow_case] for flow_case in flow_cases]), q_rad_vector, Tamb_vector_C,
+                c1_pvt, c2, Tin_C, aperture_area_m2, C_eff_Jperm2K, Cp_fluid_JperkgK, Nseg)
+            for i, flow_case in enumerate(flow_cases):
+                # outputs
+                temperature_out[flow_case] = temperature_out_flows_C[i]
+                temperature_in[flow_case][:] = Tin_C
+                # resulting energy output
+                supply_out_kW[flow_case] = specific_flows_kgpers[flow_case] * Cp_fluid_JperkgK * (
+                        temperature_out[flow_case] - Tin_C) / 1000  # [kW]
+                # Mean absorber temperature at present
+                temperature_mean[flow_case] = (Tin_C + temperature_out[flow_case]) / 2
+
         if flow < 4:
             auxiliary_electricity_kW[flow] = vectorize_calc_Eaux_SC(specific_flows_kgpers[flow],
                                                                     specific_pressure_losses_Pa[flow], pipe_lengths,
@@ -492,10 +446,9 @@ def calc_PVT_module(config, radiation_Wperm2, panel_properties_SC, panel_propert
             specific_flows_kgpers[5], specific_pressure_losses_Pa[5] = calc_optimal_mass_flow_2(m5, q5, dp5)
 
         if flow == 5:  # optimal mass flow
-            supply_losses_kW[flow] = np.vectorize(calc_qloss_network)(specific_flows_kgpers[flow],
-                                                                      pipe_lengths['l_ext_mperm2'],
-                                                                      aperture_area_m2, temperature_mean[flow],
-                                                                      Tamb_vector_C, msc_max_kgpers)
+            supply_losses_kW[flow] = calc_qloss_network(specific_flows_kgpers[flow], pipe_lengths['l_ext_mperm2'],
+                                                        aperture_area_m2, temperature_mean[flow], Tamb_vector_C,
+                                                        msc_max_kgpers)
             supply_out_pre = supply_out_kW[flow].copy() + supply_losses_kW[flow].copy()
             auxiliary_electricity_kW[flow] = vectorize_calc_Eaux_SC(specific_flows_kgpers[flow],
                                                                     specific_pressure_losses_Pa[flow], pipe_lengths,
@@ -519,9 +472,8 @@ def calc_PVT_module(config, radiation_Wperm2, panel_properties_SC, panel_propert
     return result
 
 
-@jit(nopython=True)
-def calc_cl_pvt(Bref, absorbed_radiation_PV_Wperm2, c1, eff_nom, time):
-    c1_pvt = max(0, c1 - eff_nom * Bref * absorbed_radiation_PV_Wperm2[time])  # _[J. Allan et al., 2015] eq.(18)
+def calc_cl_pvt(Bref, absorbed_radiation_PV_Wperm2, c1, eff_nom):
+    c1_pvt = np.maximum(0, c1 - eff_nom * Bref * absorbed_radiation_PV_Wperm2)  # _[J. Allan et al., 2015] eq.(18)
     return c1_pvt
 
 
@@ -542,95 +494,6 @@ def turn_off_the_water_circuit_if_total_energy_supply_is_zero(T_module_C, Tcell_
         T_module_C[x] = T_module_mean_C if T_module_mean_C > 0 else Tcell_PV_C[x]
 
 
-@jit(nopython=True)
-def do_multi_segment_calculation(Aseg_m2, C_eff_Jperm2K, Cp_fluid_JperkgK, DT, Mfl_kgpers, Mo_seg, Nseg, STORED, Tabs,
-                                 TabsA, Tamb_C, Tfl, TflA, TflB, Tin_C, Tout_C, c1_pvt, c2, delts, q_gain_Seg,
-                                 q_gain_Wperm2, q_rad_Wperm2):
-    Tout_Seg_C = 0.0  # this value will be overwritten after first iteration
-    for Iseg in range(1, Nseg + 1):
-        # get temperatures of the previous time-step
-        TflA[Iseg] = STORED[100 + Iseg]
-        TabsA[Iseg] = STORED[300 + Iseg]
-        if Iseg > 1:
-            Tin_Seg = Tout_Seg_C
-        else:
-            Tin_Seg = Tin_C
-        if Mfl_kgpers > 0 and Mo_seg == 1:  # same heat gain/ losses for all segments
-            Tout_Seg_C = ((Mfl_kgpers * Cp_fluid_JperkgK * (Tin_Seg + 273.15)) / Aseg_m2 - (
-                    C_eff_Jperm2K * (Tin_Seg + 273.15)) / (2 * delts) + q_gain_Wperm2 +
-                          (C_eff_Jperm2K * (TflA[Iseg] + 273.15) / delts)) / (
-                                 Mfl_kgpers * Cp_fluid_JperkgK / Aseg_m2 + C_eff_Jperm2K / (2 * delts))
-            Tout_Seg_C = Tout_Seg_C - 273.15  # in [C]
-            TflB[Iseg] = (Tin_Seg + Tout_Seg_C) / 2
-        else:  # heat losses based on each segment's inlet and outlet temperatures.
-            Tfl[1] = TflA[Iseg]
-            Tabs[1] = TabsA[Iseg]
-            q_gain_Wperm2 = calc_q_gain(Tfl, q_rad_Wperm2, DT, Tin_Seg, Aseg_m2, c1_pvt, c2,
-                                        Mfl_kgpers, delts, Cp_fluid_JperkgK, C_eff_Jperm2K, Tamb_C)
-            Tout_Seg_C = Tout_C
-            if Mfl_kgpers > 0:
-                TflB[Iseg] = (Tin_Seg + Tout_Seg_C) / 2
-                Tout_Seg_C = TflA[Iseg] + (q_gain_Wperm2 * delts) / C_eff_Jperm2K
-            else:
-                TflB[Iseg] = Tout_Seg_C
-
-            # the following lines do not perform meaningful operation, the iterations on DT are performed in calc_q_gain
-            # these lines are kept here as a reference to the original model in FORTRAN
-            # q_fluid_Wperm2 = (Tout_Seg_C - Tin_Seg) * Mfl_kgpers * Cp_fluid_JperkgK / Aseg_m2
-            # q_mtherm_Wperm2 = (TflB[Iseg] - TflA[Iseg]) * C_eff_Jperm2K / delts
-            # q_balance_error = q_gain_Wperm2 - q_fluid_Wperm2 - q_mtherm_Wperm2
-            # # assert abs(q_balance_error) > 1, "q_balance_error in photovoltaic-thermal calculation"
-        q_gain_Seg[Iseg] = q_gain_Wperm2  # in W/m2
-    return Tout_Seg_C
-
-
-@jit(nopython=True)
-def calc_Tout_C(Cp_fluid_JperkgK, DT, Mfl_kgpers, Nseg, STORED, Tabs, Tamb_C, Tfl, Tin_C, aperture_area_m2, c1_pvt,
-                q_rad_Wperm2):
-    Tfl[1] = 0  # mean fluid temperature
-    Tabs[1] = 0  # mean absorber temperature
-    for Iseg in range(1, Nseg + 1):
-        Tfl[1] = Tfl[1] + STORED[100 + Iseg] / Nseg  # mean fluid temperature
-        Tabs[1] = Tabs[1] + STORED[300 + Iseg] / Nseg  # mean absorber temperature
-    # first guess for Delta T
-    if Mfl_kgpers > 0:
-        Tout_C = Tin_C + (q_rad_Wperm2 - ((c1_pvt) + 0.5) * (Tin_C - Tamb_C)) / (
-                Mfl_kgpers * Cp_fluid_JperkgK / aperture_area_m2)
-        Tfl[2] = (Tin_C + Tout_C) / 2  # mean fluid temperature at present time-step
-    else:
-        # if c1_pvt < 0:
-        #     print('c1_pvt: ', c1_pvt)
-        Tout_C = Tamb_C + q_rad_Wperm2 / (c1_pvt + 0.5)
-        Tfl[2] = Tout_C  # fluid temperature same as output
-        # if Tout_C > T_max_C:
-        #     print('Tout_C: ',Tout_C, 'c1_pvt: ', c1_pvt, 'q_rad', q_rad_Wperm2)
-    DT[1] = Tfl[2] - Tamb_C  # difference between mean absorber temperature and the ambient temperature
-    return Tout_C
-
-
-@jit(nopython=True)
-def calc_Mfl_kgpers(DELT, Nseg, STORED, TIME0, Tin_C, specific_flows_kgpers, time, Cp_fluid_JperkgK, C_eff_Jperm2K,
-                    aperture_area_m2):
-    Mfl_kgpers = specific_flows_kgpers[time]
-    if time < TIME0 + DELT / 2:
-        for Iseg in range(101, 501):  # 400 points with the data
-            STORED[Iseg] = Tin_C
-    else:
-        for Iseg in range(1, Nseg):  # 400 points with the data
-            STORED[100 + Iseg] = STORED[200 + Iseg]
-            STORED[300 + Iseg] = STORED[400 + Iseg]
-
-    # calculate stability criteria
-    if Mfl_kgpers > 0:
-        stability_criteria = Mfl_kgpers * Cp_fluid_JperkgK * Nseg * (DELT * 3600) / (
-                C_eff_Jperm2K * aperture_area_m2)
-        if stability_criteria <= 0.5:
-            print('ERROR: stability criteria', stability_criteria, 'is not reached.',
-                  'aperture_area:', aperture_area_m2, 'mass flow:', Mfl_kgpers)
-
-    return Mfl_kgpers
-
-
 # investment and maintenance costs
 
 def calc_Cinv_PVT(PVT_peak_W, locator, technology=0):
@@ -697,6 +560,8 @@ def main(config):
     # weather hourly_results_per_building
     weather_data = epwreader.epw_reader(locator.get_weather_file())
     date_local = solar_equations.calc_datetime_local_from_weather_file(weather_data, latitude, longitude)
+    solar_properties = solar_equations.get_sun_properties(locator, latitude, longitude, weather_data, date_local,
+                                                          config)
     print('reading weather hourly_results_per_building done.')
 
     n = len(building_names)
@@ -706,7 +571,8 @@ def main(config):
                                                                                  repeat(longitude, n),
                                                                                  repeat(weather_data, n),
                                                                                  repeat(date_local, n),
-                                                                                 building_names)
+                                                                                 building_names,
+                                                                                 repeat(solar_properties, n))
 
     # aggregate results from all buildings
     aggregated_annual_results = {}
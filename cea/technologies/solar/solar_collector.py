@@ -35,7 +35,8 @@ __status__ = "Production"
 
 # SC heat generation
 
-def calc_SC(locator, config, latitude, longitude, weather_data, date_local, building_name):
+def calc_SC(locator, config, latitude, longitude, weather_data, date_local, building_name,
+            solar_properties=None):
     """
     This function first determines the surface area with sufficient solar radiation, and then calculates the optimal
     tilt angles of panels at each surface location. The panels are categorized into groups by their surface azimuths,
@@ -52,6 +53,8 @@ def calc_SC(locator, config, latitude, longitude, weather_data, date_local, buil
     :param date_local: contains the localized (to timezone) dates for each timestep of the year
     :param building_name: list of building names in the case study
     :type building_name: Series
+    :param solar_properties: the sun properties of the scenario (read from the solar potentials folder if None)
+    :type solar_properties: cea.utilities.solar_equations.SunProperties
     :return: Building_SC.csv with solar collectors heat generation potential of each building, Building_SC_sensors.csv
     with sensor data of each SC panel
     """
@@ -60,11 +63,11 @@ def calc_SC(locator, config, latitude, longitude, weather_data, date_local, buil
 
     type_panel = config.solar.type_SCpanel
 
-    radiation_path = locator.get_radiation_building_sensors(building=building_name)
-    metadata_csv = locator.get_radiation_metadata(building=building_name)
 
     # solar properties
-    solar_properties = solar_equations.calc_sun_properties(latitude, longitude, weather_data, date_local, config)
+    if solar_properties is None:
+        solar_properties = solar_equations.get_sun_properties(locator, latitude, longitude, weather_data,
+                                                              date_local, config)
     print('calculating solar properties done for building %s' % building_name)
 
     # get properties of the panel to evaluate
@@ -73,7 +76,7 @@ def calc_SC(locator, config, latitude, longitude, weather_data, date_local, buil
 
     # select sensor point with sufficient solar radiation
     max_annual_radiation, annual_radiation_threshold, sensors_rad_clean, sensors_metadata_clean = \
-        solar_equations.filter_low_potential(radiation_path, metadata_csv, config)
+        solar_equations.filter_low_potential(locator, building_name, config)
 
     print('filtering low potential sensor points done for building %s' % building_name)
 
@@ -372,69 +375,28 @@ def calc_SC_module(config, radiation_Wperm2, panel_properties, Tamb_vector_C, IA
 
     # calculate absorbed radiation
     tilt_rad = radians(tilt_angle_deg)
-    q_rad_vector = np.vectorize(calc_q_rad)(n0, IAM_b, IAM_d, radiation_Wperm2.I_direct, radiation_Wperm2.I_diffuse,
-                                            tilt_rad)  # absorbed solar radiation in W/m2 is a mean of the group
-    for flow in range(6):
-        mode_seg = 1  # mode of segmented heat loss calculation. only one mode is implemented.
-        TIME0 = 0
-        DELT = 1  # timestep 1 hour
-        delts = DELT * 3600  # convert time step in seconds
-        Tfl = np.zeros(3)  # create vector to store value at previous [1] and present [2] time-steps
-        DT = np.zeros(3)
-        Tabs = np.zeros(3)
-        STORED = np.zeros(600)
-        TflA = np.zeros(600)
-        TflB = np.zeros(600)
-        TabsB = np.zeros(600)
-        TabsA = np.zeros(600)
-        q_gain_Seg = np.zeros(101)  # maximum Iseg = maximum Nseg + 1 = 101
-
-        for t in range(HOURS_IN_YEAR):
-            Mfl_kgpers = calc_Mfl_kgpers(C_eff_Jperm2K, Cp_fluid_JperkgK, DELT, Nseg, STORED, TIME0, Tin_C,
-                                         aperture_area_m2, specific_flows_kgpers[flow], t)
-
-            Tamb_C = Tamb_vector_C[t]
-            q_rad_Wperm2 = q_rad_vector[t]
-            Tout_C = calc_Tout_C(Cp_fluid_JperkgK, DT, Nseg, STORED, Tabs, Tamb_C, Tfl, Tin_C, aperture_area_m2, c1,
-                                 q_rad_Wperm2, Mfl_kgpers)
-            # calculate q_gain with the guess for DT[1]
-            q_gain_Wperm2 = calc_q_gain(Tfl, q_rad_Wperm2, DT, Tin_C, aperture_area_m2, c1, c2,
-                                        Mfl_kgpers, delts, Cp_fluid_JperkgK, C_eff_Jperm2K, Tamb_C)
-
-            A_seg_m2 = aperture_area_m2 / Nseg  # aperture area per segment
-
-            # multi-segment calculation to avoid temperature jump at times of flow rate changes.
-            Tout_Seg_C = do_multi_segment_calculation(A_seg_m2, C_eff_Jperm2K, Cp_fluid_JperkgK, DT, Mfl_kgpers, Nseg,
-                                                      STORED, Tabs, TabsA, Tamb_C, Tfl, TflA, TflB, Tin_C, Tout_C, c1,
-                                                      c2, delts, mode_seg, q_gain_Seg, q_gain_Wperm2, q_rad_Wperm2)
-
-            # resulting net energy output
-            q_out_kW = (Mfl_kgpers * Cp_fluid_JperkgK * (Tout_Seg_C - Tin_C)) / 1000  # [kW]
-            Tabs[2] = 0
-            # storage of the mean temperature
-            for Iseg in range(1, Nseg + 1):
-                STORED[200 + Iseg] = TflB[Iseg]
-                STORED[400 + Iseg] = TabsB[Iseg]
-                Tabs[2] = Tabs[2] + TabsB[Iseg] / Nseg
+    q_rad_vector = calc_q_rad(n0, IAM_b, IAM_d, radiation_Wperm2.I_direct.values, radiation_Wperm2.I_diffuse.values,
+                              tilt_rad)  # absorbed solar radiation in W/m2 is a mean of the group
+    c1_vector = np.zeros(HOURS_IN_YEAR) + c1
+    Tamb_vector_C = np.asarray(Tamb_vector_C, dtype=np.float64)
 
-            # outputs
-            temperature_out_C[flow][t] = Tout_Seg_C
-            temperature_in_C[flow][t] = Tin_C
-            supply_out_kW[flow][t] = q_out_kW
-            temperature_mean_C[flow][t] = (Tin_C + Tout_Seg_C) / 2  # Mean absorber temperature at present
+    for flow in range(6):
+        if flow == 0 or flow > 3:
+            # the flows 0 to 3 are independent and calculated together, the flows 4 and 5 depend on their results
+            flow_cases = range(4) if flow == 0 else [flow]
+            temperature_out_flows_C = calc_Tout_multi_segment_C(
+                np.array([specific_flows_kgpers[flow_case] for flow_case in flow_cases]), q_rad_vector, Tamb_vector_C,
+                c1_vector, c2, Tin_C, aperture_area_m2, C_eff_Jperm2K, Cp_fluid_JperkgK, Nseg)
+            for i, flow_case in enumerate(flow_cases):
+                # outputs
+                temperature_out_C[flow_case] = temperature_out_flows_C[i]
+                temperature_in_C[flow_case][:] = Tin_C
+                # resulting net energy output
+                supply_out_kW[flow_case] = (specific_flows_kgpers[flow_case] * Cp_fluid_JperkgK *
+                                            (temperature_out_C[flow_case] - Tin_C)) / 1000  # [kW]
+                # Mean absorber temperature at present
+                temperature_mean_C[flow_case] = (Tin_C + temperature_out_C[flow_case]) / 2
 
-            # the following lines do not perform meaningful operation, the iteration on DT are performed in calc_q_gain
-            # these lines are kept here as a reference to the original model in FORTRAN
-            # q_gain = 0
-            # TavgB = 0
-            # TavgA = 0
-            # for Iseg in range(1, Nseg + 1):
-            #     q_gain = q_gain + q_gain_Seg[Iseg] * A_seg_m2  # [W]
-            #     TavgA = TavgA + TflA[Iseg] / Nseg
-            #     TavgB = TavgB + TflB[Iseg] / Nseg
-            # # OUT[9] = q_gain/Area_a # in W/m2
-            # OUT[11] = q_mtherm
-            # OUT[12] = q_balance_error
         if flow < 4:
             auxiliary_electricity_kW[flow] = vectorize_calc_Eaux_SC(specific_flows_kgpers[flow],
                                                                     specific_pressure_losses_Pa[flow], pipe_lengths,
@@ -467,11 +429,9 @@ def calc_SC_module(config, radiation_Wperm2, panel_properties, Tamb_vector_C, IA
             specific_flows_kgpers[5], specific_pressure_losses_Pa[5] = calc_optimal_mass_flow_2(m5, q5, dp5)
 
         if flow == 5:  # optimal mass flow
-            supply_losses_kW[flow] = np.vectorize(calc_qloss_network)(specific_flows_kgpers[flow],
-                                                                      pipe_lengths['l_ext_mperm2'],
-                                                                      aperture_area_m2,
-                                                                      temperature_mean_C[flow], Tamb_vector_C,
-                                                                      msc_max_kgpers)
+            supply_losses_kW[flow] = calc_qloss_network(specific_flows_kgpers[flow], pipe_lengths['l_ext_mperm2'],
+                                                        aperture_area_m2, temperature_mean_C[flow], Tamb_vector_C,
+                                                        msc_max_kgpers)
             auxiliary_electricity_kW[flow] = vectorize_calc_Eaux_SC(specific_flows_kgpers[flow],
                                                                     specific_pressure_losses_Pa[flow],
                                                                     pipe_lengths, aperture_area_m2)  # in kW
@@ -489,6 +449,83 @@ def calc_SC_module(config, radiation_Wperm2, panel_properties, Tamb_vector_C, IA
     return result
 
 
+@jit(nopython=True)
+def calc_Tout_multi_segment_C(specific_flows_kgpers, q_rad_Wperm2, Tamb_C, c1, c2, Tin_C, aperture_area_m2,
+                              C_eff_Jperm2K, Cp_fluid_JperkgK, Nseg):
+    """
+    Calculate the outlet temperatures of a collector with the multi-segment model (adapted from TRNSYS Type 832, see
+    ``calc_SC_module``) for several flow cases. All the hours of all the flow cases are calculated in this compiled
+    function; the state of the segments is carried over from one hour to the next. The model is shared by the solar
+    collectors and the photovoltaic-thermal panels (which have an hourly heat loss coefficient).
+
+    :param specific_flows_kgpers: mass flows of each flow case [kg/s], shape (flow cases, hours)
+    :param q_rad_Wperm2: absorbed radiation [W/m2]
+    :param Tamb_C: ambient temperatures [C]
+    :param c1: heat loss coefficient at zero temperature difference of each hour [W/m2K]
+    :param c2: temperature difference dependency of the heat loss coefficient [W/m2K2]
+    :param Tin_C: inlet temperature [C]
+    :param aperture_area_m2: aperture area of the module [m2]
+    :param C_eff_Jperm2K: thermal capacitance of the module [J/m2K]
+    :param Cp_fluid_JperkgK: heat capacity of the fluid [J/kgK]
+    :param Nseg: number of segments
+    :return: outlet temperatures [C], shape (flow cases, hours)
+    """
+    number_of_flows, number_of_hours = specific_flows_kgpers.shape
+    temperature_out_C = np.zeros((number_of_flows, number_of_hours))
+    mode_seg = 1  # mode of segmented heat loss calculation. only one mode is implemented.
+    TIME0 = 0
+    DELT = 1  # timestep 1 hour
+    delts = DELT * 3600  # convert time step in seconds
+    A_seg_m2 = aperture_area_m2 / Nseg  # aperture area per segment
+    for flow in range(number_of_flows):
+        Tfl = np.zeros(3)  # create vector to store value at previous [1] and present [2] time-steps
+        DT = np.zeros(3)
+        Tabs = np.zeros(3)
+        STORED = np.zeros(600)
+        TflA = np.zeros(600)
+        TflB = np.zeros(600)
+        TabsB = np.zeros(600)
+        TabsA = np.zeros(600)
+        q_gain_Seg = np.zeros(101)  # maximum Iseg = maximum Nseg + 1 = 101
+
+        for t in range(number_of_hours):
+            Mfl_kgpers = calc_Mfl_kgpers(C_eff_Jperm2K, Cp_fluid_JperkgK, DELT, Nseg, STORED, TIME0, Tin_C,
+                                         aperture_area_m2, specific_flows_kgpers[flow], t)
+            Tout_C = calc_Tout_C(Cp_fluid_JperkgK, DT, Nseg, STORED, Tabs, Tamb_C[t], Tfl, Tin_C, aperture_area_m2,
+                                 c1[t], q_rad_Wperm2[t], Mfl_kgpers)
+            # calculate q_gain with the guess for DT[1]
+            q_gain_Wperm2 = calc_q_gain(Tfl, q_rad_Wperm2[t], DT, Tin_C, aperture_area_m2, c1[t], c2,
+                                        Mfl_kgpers, delts, Cp_fluid_JperkgK, C_eff_Jperm2K, Tamb_C[t])
+
+            # multi-segment calculation to avoid temperature jump at times of flow rate changes.
+            Tout_Seg_C = do_multi_segment_calculation(A_seg_m2, C_eff_Jperm2K, Cp_fluid_JperkgK, DT, Mfl_kgpers, Nseg,
+                                                      STORED, Tabs, TabsA, Tamb_C[t], Tfl, TflA, TflB, Tin_C, Tout_C,
+                                                      c1[t], c2, delts, mode_seg, q_gain_Seg, q_gain_Wperm2,
+                                                      q_rad_Wperm2[t])
+            Tabs[2] = 0
+            # storage of the mean temperature
+            for Iseg in range(1, Nseg + 1):
+                STORED[200 + Iseg] = TflB[Iseg]
+                STORED[400 + Iseg] = TabsB[Iseg]
+                Tabs[2] = Tabs[2] + TabsB[Iseg] / Nseg
+
+            temperature_out_C[flow, t] = Tout_Seg_C
+
+            # the following lines do not perform meaningful operation, the iteration on DT are performed in calc_q_gain
+            # these lines are kept here as a reference to the original model in FORTRAN
+            # q_gain = 0
+            # TavgB = 0
+            # TavgA = 0
+            # for Iseg in range(1, Nseg + 1):
+            #     q_gain = q_gain + q_gain_Seg[Iseg] * A_seg_m2  # [W]
+            #     TavgA = TavgA + TflA[Iseg] / Nseg
+            #     TavgB = TavgB + TflB[Iseg] / Nseg
+            # # OUT[9] = q_gain/Area_a # in W/m2
+            # OUT[11] = q_mtherm
+            # OUT[12] = q_balance_error
+    return temperature_out_C
+
+
 @jit(nopython=True)
 def do_multi_segment_calculation(A_seg_m2, C_eff_Jperm2K, Cp_fluid_JperkgK, DT, Mfl_kgpers, Nseg, STORED,
                                  Tabs, TabsA, Tamb_C, Tfl, TflA, TflB, Tin_C, Tout_C, c1, c2, delts,
@@ -809,7 +846,8 @@ def calc_properties_SC_db(database_path, config):
 def vectorize_calc_Eaux_SC(scpecific_flow_kgpers, dP_collector_Pa, pipe_lengths, Aa_m2):
     Leq_mperm2 = pipe_lengths['Leq_mperm2']
     l_int_mperm2 = pipe_lengths['l_int_mperm2']
-    return np.vectorize(calc_Eaux_SC)(scpecific_flow_kgpers, dP_collector_Pa, Leq_mperm2, l_int_mperm2, Aa_m2)
+    return calc_Eaux_SC(np.asarray(scpecific_flow_kgpers), np.asarray(dP_collector_Pa), Leq_mperm2, l_int_mperm2,
+                        Aa_m2)
 
 
 def calc_Eaux_SC(specific_flow_kgpers, dP_collector_Pa, Leq_mperm2, l_int_mperm2, Aa_m2):
@@ -898,18 +936,14 @@ def calc_optimal_mass_flow(q1, q2, q3, q4, E1, E2, E3, E4, m1, m2, m3, m4, dP1,
     Energy and Buildings, 2016.
     """
 
-    mass_flow_opt = np.empty(HOURS_IN_YEAR)
-    dP_opt = np.empty(HOURS_IN_YEAR)
     const = Area_a / 3600
-    mass_flow_all_kgpers = [m1 * const, m2 * const, m3 * const, m4 * const]  # [kg/s]
-    dP_all_Pa = [dP1 * Area_a, dP2 * Area_a, dP3 * Area_a, dP4 * Area_a]  # [Pa]
-    balances = [abs(q1) - E1 * 2, q2 - E2 * 2, q3 - E3 * 2, q4 - E4 * 2]  # energy generation function eq.(63)
-    for t in range(HOURS_IN_YEAR):
-        balances_time = [balances[0][t], balances[1][t], balances[2][t], balances[3][t]]
-        max_heat_production = np.max(balances_time)
-        ix_max_heat_production = np.where(balances_time == max_heat_production)
-        mass_flow_opt[t] = mass_flow_all_kgpers[ix_max_heat_production[0][0]]
-        dP_opt[t] = dP_all_Pa[ix_max_heat_production[0][0]]
+    mass_flow_all_kgpers = np.array([m1 * const, m2 * const, m3 * const, m4 * const])  # [kg/s]
+    dP_all_Pa = np.array([dP1 * Area_a, dP2 * Area_a, dP3 * Area_a, dP4 * Area_a])  # [Pa]
+    balances = np.array([abs(q1) - E1 * 2, q2 - E2 * 2, q3 - E3 * 2, q4 - E4 * 2])  # energy generation function eq.(63)
+    # the first flow with the maximum balance in each hour
+    ix_max_heat_production = np.argmax(balances, axis=0)
+    mass_flow_opt = mass_flow_all_kgpers[ix_max_heat_production]
+    dP_opt = dP_all_Pa[ix_max_heat_production]
     return mass_flow_opt, dP_opt
 
 
@@ -993,6 +1027,8 @@ def main(config):
     # weather data
     weather_data = epwreader.epw_reader(locator.get_weather_file())
     date_local = solar_equations.calc_datetime_local_from_weather_file(weather_data, latitude, longitude)
+    solar_properties = solar_equations.get_sun_properties(locator, latitude, longitude, weather_data, date_local,
+                                                          config)
     print('reading weather data done')
 
     n = len(building_names)
@@ -1002,7 +1038,8 @@ def main(config):
                                                                                 repeat(longitude, n),
                                                                                 repeat(weather_data, n),
                                                                                 repeat(date_local, n),
-                                                                                building_names)
+                                                                                building_names,
+                                                                                repeat(solar_properties, n))
 
     # aggregate results from all buildings
     aggregated_annual_results = {}
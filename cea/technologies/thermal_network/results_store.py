@@ -0,0 +1,166 @@
+"""
+Store of the hourly results of a thermal network, written by the thermal network scripts (simplified and detailed
+model) and read by the plots of the thermal networks and the optimization.
+
+With ``thermal-network:results-format = parquet``, the results of a network are written to one folder
+(``<network_type>_<network_name>_results`` in the thermal network folder) with a Parquet file per quantity (e.g.
+``edge_mass_flows.parquet``, see ``locator.get_thermal_network_results_store_file``), with a float32 column per pipe,
+node or total and a row per hour, in chunks (row groups) of ``RESULTS_STORE_HOURS_IN_CHUNK`` hours. The pipes, nodes
+and hours of a quantity are read without parsing the rest of the file (see ``read_thermal_network_results``). The csv
+files of the quantities with a column per pipe or node (``ELEMENT_RESULTS``) are not written (and those of earlier runs
+are removed), only the csv files of the totals of the network, the substations and the plants. With the csv format,
+the store of an earlier run is removed.
+
+``read_thermal_network_results`` reads the store of a quantity if there is one, else the csv file, so it can be used in
+place of ``pd.read_csv`` of the csv files for the results of both formats.
+"""
+
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from cea.demand.demand_writers import COLUMNAR_COMPRESSION
+
+# formats of the hourly results of the thermal networks (see `thermal-network:results-format`)
+RESULTS_FORMATS = ['csv', 'parquet']
+
+# number of hours of each chunk of the results of a quantity (one month)
+RESULTS_STORE_HOURS_IN_CHUNK = 730
+
+# the locator method of the csv file of each quantity of the results
+RESULTS_FILES = {
+    'edge_mass_flows': 'get_thermal_network_layout_massflow_edges_file',
+    'node_mass_flows': 'get_thermal_network_layout_massflow_nodes_file',
+    'velocities_in_supply_edges_mpers': 'get_thermal_network_velocity_edges_file',
+    'pressure_at_supply_nodes_Pa': 'get_network_pressure_at_nodes',
+    'linear_pressure_loss_supply_Paperm': 'get_network_linear_pressure_drop_edges',
+    'pressure_loss_supply_edge_kW': 'get_thermal_network_pressure_losses_edges_file',
+    'q_loss_supply_edges_kW': 'get_network_thermal_loss_edges_file',
+    'linear_thermal_loss_supply_edges_Wperm': 'get_network_linear_thermal_loss_edges_file',
+    'T_supply_nodes': 'get_network_temperature_supply_nodes_file',
+    'T_return_nodes': 'get_network_temperature_return_nodes_file',
+    'pressure_loss_substations_kW': 'get_thermal_network_substation_ploss_file',
+    'pressure_loss_system_Pa': 'get_network_total_pressure_drop_file',
+    'pressure_loss_system_kW': 'get_network_energy_pumping_requirements_file',
+    'thermal_losses_system_kW': 'get_network_total_thermal_loss_file',
+    'plant_heat_requirement': 'get_thermal_network_plant_heat_requirement_file',
+    'temperatures_at_plant_K': 'get_network_temperature_plant',
+}
+
+# the quantities with a column per pipe or node, only written to the store with the parquet format
+ELEMENT_RESULTS = ['edge_mass_flows', 'node_mass_flows', 'velocities_in_supply_edges_mpers',
+                   'pressure_at_supply_nodes_Pa', 'linear_pressure_loss_supply_Paperm', 'pressure_loss_supply_edge_kW',
+                   'q_loss_supply_edges_kW', 'linear_thermal_loss_supply_edges_Wperm', 'T_supply_nodes',
+                   'T_return_nodes']
+
+
+def get_results_csv_file(locator, quantity, network_type, network_name):
+    """the csv file of a quantity of the results (e.g. ``locator.get_thermal_network_layout_massflow_edges_file``)"""
+    if quantity not in RESULTS_FILES:
+        raise ValueError('Unknown results of the thermal network: %s, expected one of %s' %
+                         (quantity, ', '.join(RESULTS_FILES)))
+    return getattr(locator, RESULTS_FILES[quantity])(network_type, network_name)
+
+
+def write_thermal_network_results(locator, network_type, network_name, results, format='csv', **csv_kwargs):
+    """
+    Write the hourly results of a thermal network: to the csv files with the csv format, and to the store (plus the
+    csv files of the quantities not in ``ELEMENT_RESULTS``) with the parquet format.
+
+    :param dict[str, pd.DataFrame] results: the results of each quantity (hours x pipes, nodes or totals)
+    :param str format: the format of the results, one of ``RESULTS_FORMATS``
+    :param csv_kwargs: the arguments of ``pd.DataFrame.to_csv`` of the csv files (e.g. ``float_format``)
+    """
+    if format not in RESULTS_FORMATS:
+        raise ValueError('Unknown format of the thermal network results: {format}, expected one of {formats}'.format(
+            format=format, formats=', '.join(RESULTS_FORMATS)))
+
+    store_folder = locator.get_thermal_network_results_store_folder(network_type, network_name)
+    if format == 'csv' and os.path.exists(store_folder):
+        # the results of an earlier run with the parquet format
+        shutil.rmtree(store_folder)
+
+    for quantity, data in results.items():
+        csv_file = get_results_csv_file(locator, quantity, network_type, network_name)
+        if format == 'csv' or quantity not in ELEMENT_RESULTS:
+            data.to_csv(csv_file, index=False, **csv_kwargs)
+        elif os.path.exists(csv_file):
+            # the results of an earlier run with the csv format
+            os.remove(csv_file)
+    if format == 'parquet':
+        os.makedirs(store_folder, exist_ok=True)
+        for quantity, data in results.items():
+            write_results_store_file(
+                locator.get_thermal_network_results_store_file(quantity, network_type, network_name), data)
+
+
+def write_results_store_file(store_file, data):
+    """write the results of a quantity (hours x columns) with float32 values, in chunks of hours"""
+    data = pd.DataFrame(data).astype(np.float32)
+    data.columns = [str(column) for column in data.columns]
+    table = pa.Table.from_pandas(data, preserve_index=False)
+    pq.write_table(table, store_file + '.tmp', row_group_size=RESULTS_STORE_HOURS_IN_CHUNK,
+                   compression=COLUMNAR_COMPRESSION)
+    os.replace(store_file + '.tmp', store_file)
+
+
+def read_thermal_network_results(locator, network_type, network_name, quantity, columns=None, hours=None):
+    """
+    Read the hourly results of a quantity of a thermal network, from the store if there is one, else from the csv
+    file. Only the chunks of the store containing the hours are read.
+
+    :param str quantity: the quantity of the results, one of ``RESULTS_FILES`` (e.g. ``edge_mass_flows``)
+    :param list[str] columns: the pipes, nodes or totals to read (all the columns if None)
+    :param hours: the hours of the year to read (all the hours if None), indexing the rows of the result
+    :type hours: list[int] | range | np.ndarray
+    :return: the results (hours x columns), as float64
+    :rtype: pd.DataFrame
+    """
+    store_file = locator.get_thermal_network_results_store_file(quantity, network_type, network_name)
+    columns = list(columns) if columns is not None else None
+    if not os.path.exists(store_file):
+        data = pd.read_csv(get_results_csv_file(locator, quantity, network_type, network_name), usecols=columns)
+        if columns is not None:
+            data = data[columns]
+        return data if hours is None else data.iloc[np.asarray(hours)]
+
+    parquet_file = pq.ParquetFile(store_file)
+    if hours is None:
+        data = parquet_file.read(columns=columns).to_pandas()
+    else:
+        hours = np.asarray(hours)
+        chunk_offsets = np.cumsum([0] + [parquet_file.metadata.row_group(i).num_rows
+                                         for i in range(parquet_file.num_row_groups)])
+        if len(hours) and (hours.min() < 0 or hours.max() >= chunk_offsets[-1]):
+            raise ValueError('The results of %s have %i hours, got hours %i to %i' %
+                             (quantity, chunk_offsets[-1], hours.min(), hours.max()))
+        chunks = np.unique(np.searchsorted(chunk_offsets, hours, side='right') - 1)
+        data = parquet_file.read_row_groups(chunks, columns=columns).to_pandas()
+        data.index = np.concatenate([np.arange(chunk_offsets[chunk], chunk_offsets[chunk + 1]) for chunk in chunks]
+                                    + [np.zeros(0, dtype=int)])
+        data = data.loc[hours]
+    return data.astype({column: np.float64 for column, dtype in data.dtypes.items() if dtype == np.float32})
+
+
+def resolve_results_file(locator, locator_method, args):
+    """
+    The file read by ``read_thermal_network_results`` in place of the csv file of a locator method, e.g. for the input
+    files of the plots.
+
+    :param locator_method: the locator method of a csv file of the results (e.g.
+        ``locator.get_thermal_network_layout_massflow_edges_file``), or of any other file
+    :param list args: the network type and the network name
+    :return: the locator method and the arguments of the store file of the quantity, if it is the file read, else
+        ``locator_method`` and ``args``
+    :rtype: (callable, list)
+    """
+    for quantity, method_name in RESULTS_FILES.items():
+        if method_name == locator_method.__name__:
+            store_args = [quantity] + list(args)
+            if os.path.exists(locator.get_thermal_network_results_store_file(*store_args)):
+                return locator.get_thermal_network_results_store_file, store_args
+    return locator_method, args
@@ -1,22 +1,27 @@
 import cea.lib
 
 import math
+import tempfile
 import time
 
 import geopandas as gpd
 import numpy as np
 import pandas as pd
+import scipy.sparse
 import wntr
 
 import cea.config
 import cea.inputlocator
 import cea.technologies.substation as substation
+import cea.utilities
 from cea.constants import P_WATER_KGPERM3, FT_WATER_TO_PA, FT_TO_M, M_WATER_TO_PA, HEAT_CAPACITY_OF_WATER_JPERKGK, SHAPEFILE_TOLERANCE
 from cea.optimization.constants import PUMP_ETA
 from cea.optimization.preprocessing.preprocessing_main import get_building_names_with_load
+from cea.technologies.thermal_network.results_store import write_thermal_network_results
+from cea.technologies.thermal_network.sparse_solver import IncidenceMatrixSolver
 from cea.technologies.thermal_network.thermal_network_loss import calc_temperature_out_per_pipe
 from cea.resources import geothermal
-from cea.technologies.constants import NETWORK_DEPTH
+from cea.technologies.constants import NETWORK_DEPTH, SIZING_PEAK_HOURS
 from cea.utilities.epwreader import epw_reader
 
 __author__ = "Jimeno A. Fonseca"
@@ -164,6 +169,124 @@ def calc_thermal_loss_per_pipe(T_in_K, m_kgpers, T_ground_K, k_kWperK):
 
     return Q_loss_kWh
 
+
+def calc_peak_hours(node_df, edge_df, volume_flow_m3pers_building, hours_number=SIZING_PEAK_HOURS):
+    """
+    The hours of the year sizing the pipes of the network: the hour of the highest flow of each pipe and the
+    ``hours_number`` hours with the highest total flow.
+
+    The flows of the pipes of a branched network only depend on the demand of the buildings, so they are solved for
+    all the hours at once with the edge-node matrix of the network (see
+    :py:mod:`cea.technologies.thermal_network.sparse_solver`), as EPANET would. The flows of a looped network also
+    depend on the (not yet sized) pipes, so all the hours of the year are returned.
+
+    :param pd.DataFrame node_df: the nodes of the network (see ``extract_network_from_shapefile``)
+    :param pd.DataFrame edge_df: the pipes of the network (see ``extract_network_from_shapefile``)
+    :param pd.DataFrame volume_flow_m3pers_building: the volume flow of each building [m3/s] (hours x buildings)
+    :return: the sorted hours of the year
+    :rtype: np.ndarray
+    """
+    if len(edge_df) != len(node_df) - 1:
+        # looped network
+        return np.arange(len(volume_flow_m3pers_building))
+
+    edges = np.arange(len(edge_df))
+    start_nodes = node_df.index.get_indexer(edge_df['start node'])
+    end_nodes = node_df.index.get_indexer(edge_df['end node'])
+    edge_node_csr = scipy.sparse.csr_matrix((np.concatenate([-np.ones(len(edges)), np.ones(len(edges))]),
+                                             (np.concatenate([start_nodes, end_nodes]), np.concatenate([edges, edges]))),
+                                            shape=(len(node_df), len(edges)))
+
+    consumers = np.flatnonzero(node_df['Type'].values == "CONSUMER")
+    plant = np.flatnonzero(node_df['Type'].values == "PLANT")[0]
+    volume_flows_m3pers = volume_flow_m3pers_building[node_df['Building'].values[consumers]].values
+    node_flows_m3pers = np.zeros((len(node_df), len(volume_flows_m3pers)))
+    node_flows_m3pers[consumers] = volume_flows_m3pers.T
+    node_flows_m3pers[plant] = -volume_flows_m3pers.sum(axis=1)
+
+    edge_flows_m3pers = IncidenceMatrixSolver.get(edge_node_csr, plant).solve_edge_flows(edge_node_csr,
+                                                                                        node_flows_m3pers)
+    highest_total_flow = np.argsort(node_flows_m3pers[plant])[:hours_number]
+    return np.unique(np.concatenate([np.abs(edge_flows_m3pers).argmax(axis=1), highest_total_flow]))
+
+
+def build_water_network_model(node_df, edge_df, building_base_demand_m3s, design_head_m, coefficient_friction,
+                              fraction_equivalent_length):
+    """
+    Build the water network model of the thermal network, with a demand pattern for each building (named after the
+    building, see ``run_epanet``).
+
+    :param pd.DataFrame node_df: the nodes of the network (see ``extract_network_from_shapefile``)
+    :param pd.DataFrame edge_df: the pipes of the network (see ``extract_network_from_shapefile``)
+    :param pd.Series building_base_demand_m3s: the peak volume flow of each building [m3/s]
+    :param float design_head_m: the design head of the substations [m]
+    :return: the water network model, the consumer nodes and the plant node
+    :rtype: (wntr.network.WaterNetworkModel, list[str], str)
+    """
+    wn = wntr.network.WaterNetworkModel()
+    for building in building_base_demand_m3s.index:
+        wn.add_pattern(building, [1.0])
+
+    consumer_nodes = []
+    name_node_plant = None
+    for node, node_type, building, coordinates in zip(node_df.index.values, node_df['Type'].values,
+                                                       node_df['Building'].values, node_df['coordinates'].values):
+        if node_type == "CONSUMER":
+            consumer_nodes.append(node)
+            wn.add_junction(node, base_demand=building_base_demand_m3s[building], demand_pattern=building,
+                            elevation=design_head_m, coordinates=coordinates)
+        elif node_type == "PLANT":
+            name_node_plant = node
+            wn.add_reservoir(node, base_head=int(design_head_m * 1.2), coordinates=coordinates)
+        else:
+            wn.add_junction(node, elevation=0, coordinates=coordinates)
+
+    for pipe, start_node, end_node, length_m in zip(edge_df.index.values, edge_df['start node'].values,
+                                                    edge_df['end node'].values, edge_df['length_m'].values):
+        wn.add_pipe(pipe, start_node, end_node, length=length_m * (1 + fraction_equivalent_length),
+                    roughness=coefficient_friction, minor_loss=0.0, status='OPEN')
+
+    wn.options.time.hydraulic_timestep = 60 * 60
+    wn.options.time.pattern_timestep = 60 * 60
+    wn.options.solver.accuracy = 0.01
+    wn.options.solver.trials = 100
+    return wn, consumer_nodes, name_node_plant
+
+
+def run_epanet(wn, demand_patterns):
+    """
+    Simulate the hours of the demand patterns with EPANET. The input and binary files of EPANET are written to a
+    temporary folder, deleted once the results are read.
+
+    :param wntr.network.WaterNetworkModel wn: the water network model (see ``build_water_network_model``)
+    :param pd.DataFrame demand_patterns: the demand multiplier of each building (hours x buildings)
+    :rtype: wntr.sim.results.SimulationResults
+    """
+    for building in demand_patterns.columns:
+        wn.get_pattern(building).multipliers = demand_patterns[building].values
+    wn.options.time.duration = (len(demand_patterns) - 1) * 3600
+    with tempfile.TemporaryDirectory() as folder:
+        # the paths of the files are passed to EPANET as ascii, so the (absolute) temporary folder is not in them
+        with cea.utilities.pushd(folder):
+            return wntr.sim.EpanetSimulator(wn).run_sim(file_prefix='temp')
+
+
+def apply_reservoir_head(results, reservoir, head_change_m):
+    """
+    Change the head of the reservoir of the results of a simulation. With a single reservoir and fixed demands, the
+    flows and head losses do not depend on the head of the reservoir, and the head of every node changes by the same
+    amount, so the simulation does not need to be run again.
+
+    :param wntr.sim.results.SimulationResults results: the results of the simulation, changed in place
+    :param str reservoir: the name of the reservoir
+    :param np.ndarray head_change_m: the change of the head of the reservoir at each hour [m]
+    """
+    head_change_m = np.asarray(head_change_m)[:, np.newaxis]
+    junctions = results.node['pressure'].columns != reservoir
+    results.node['head'] = results.node['head'] + head_change_m
+    results.node['pressure'] = results.node['pressure'] + head_change_m * junctions
+
+
 def thermal_network_simplified(locator, config, network_name=''):
     # local variables
     network_type = config.thermal_network.network_type
@@ -228,111 +351,50 @@ def thermal_network_simplified(locator, config, network_name=''):
             Q_demand_kWh_building[building_name] = substation_results[
                                                        "Q_space_cooling_data_center_and_refrigeration_W"] / 1000
 
-    # Prepare the epanet simulation of the thermal network. To do so, as a first step, the epanet-library is loaded
-    #   from within the set of utilities used by cea. In later steps, the contents of the nodes- and edges-shapefiles
-    #   are transformed in a way that they can be properly interpreted by epanet.
-    import cea.utilities
-    with cea.utilities.pushd(locator.get_thermal_network_folder()):
-        # Create a water network model
-        wn = wntr.network.WaterNetworkModel()
-
-        # add loads
-        building_base_demand_m3s = {}
-        for building in volume_flow_m3pers_building.keys():
-            building_base_demand_m3s[building] = volume_flow_m3pers_building[building].max()
-            pattern_demand = (volume_flow_m3pers_building[building].values / building_base_demand_m3s[building]).tolist()
-            wn.add_pattern(building, pattern_demand)
-
-        # add nodes
-        consumer_nodes = []
-        building_nodes_pairs = {}
-        building_nodes_pairs_inversed = {}
-        for node in node_df.iterrows():
-            if node[1]["Type"] == "CONSUMER":
-                demand_pattern = node[1]['Building']
-                base_demand_m3s = building_base_demand_m3s[demand_pattern]
-                consumer_nodes.append(node[0])
-                building_nodes_pairs[node[0]] = demand_pattern
-                building_nodes_pairs_inversed[demand_pattern] = node[0]
-                wn.add_junction(node[0],
-                                base_demand=base_demand_m3s,
-                                demand_pattern=demand_pattern,
-                                elevation=thermal_transfer_unit_design_head_m,
-                                coordinates=node[1]["coordinates"])
-            elif node[1]["Type"] == "PLANT":
-                base_head = int(thermal_transfer_unit_design_head_m*1.2)
-                start_node = node[0]
-                name_node_plant = start_node
-                wn.add_reservoir(start_node,
-                                 base_head=base_head,
-                                 coordinates=node[1]["coordinates"])
-            else:
-                wn.add_junction(node[0],
-                                elevation=0,
-                                coordinates=node[1]["coordinates"])
-
-        # add pipes
-        for edge in edge_df.iterrows():
-            length_m = edge[1]["length_m"]
-            edge_name = edge[0]
-            wn.add_pipe(edge_name, edge[1]["start node"],
-                        edge[1]["end node"],
-                        length=length_m * (1 + fraction_equivalent_length),
-                        roughness=coefficient_friction_hazen_williams,
-                        minor_loss=0.0,
-                        status='OPEN')
-
-        # add options
-        wn.options.time.duration = 8759 * 3600   # this indicates epanet to do one year simulation
-        wn.options.time.hydraulic_timestep = 60 * 60
-        wn.options.time.pattern_timestep = 60 * 60
-        wn.options.solver.accuracy = 0.01
-        wn.options.solver.trials = 100
-
-        # 1st ITERATION GET MASS FLOWS AND CALCULATE DIAMETER
-        sim = wntr.sim.EpanetSimulator(wn)
-        results = sim.run_sim()
-        max_volume_flow_rates_m3s = results.link['flowrate'].abs().max()
-        pipe_names = max_volume_flow_rates_m3s.index.values
-        pipe_catalog = pd.read_excel(locator.get_database_distribution_systems(), sheet_name='THERMAL_GRID')
-        Pipe_DN, D_ext_m, D_int_m, D_ins_m = zip(
-            *[calc_max_diameter(flow, pipe_catalog, velocity_ms=velocity_ms, peak_load_percentage=peak_load_percentage) for
-              flow in max_volume_flow_rates_m3s])
-        pipe_dn = pd.Series(Pipe_DN, pipe_names)
-        diameter_int_m = pd.Series(D_int_m, pipe_names)
-        diameter_ext_m = pd.Series(D_ext_m, pipe_names)
-        diameter_ins_m = pd.Series(D_ins_m, pipe_names)
-
-        # 2nd ITERATION GET PRESSURE POINTS AND MASSFLOWS FOR SIZING PUMPING NEEDS - this could be for all the year
-        # modify diameter and run simulations
-        edge_df['Pipe_DN'] = pipe_dn
-        edge_df['D_int_m'] = D_int_m
-        for edge in edge_df.iterrows():
-            edge_name = edge[0]
-            pipe = wn.get_link(edge_name)
-            pipe.diameter = diameter_int_m[edge_name]
-        sim = wntr.sim.EpanetSimulator(wn)
-        results = sim.run_sim()
-
-        # 3rd ITERATION GET FINAL UTILIZATION OF THE GRID (SUPPLY SIDE)
-        # get accumulated head loss per hour
-        unitary_head_ftperkft = results.link['headloss'].abs()
-        unitary_head_mperm = unitary_head_ftperkft * FT_TO_M / (FT_TO_M * 1000)
-        head_loss_m = unitary_head_mperm.copy()
-        for column in head_loss_m.columns.values:
-            length_m = edge_df.loc[column]['length_m']
-            head_loss_m[column] = head_loss_m[column] * length_m
-        reservoir_head_loss_m = head_loss_m.sum(axis=1) + thermal_transfer_unit_design_head_m*1.2 # fixme: only one thermal_transfer_unit_design_head_m from one substation?
-
-        # apply this pattern to the reservoir and get results
-        base_head = reservoir_head_loss_m.max()
-        pattern_head_m = (reservoir_head_loss_m.values / base_head).tolist()
-        wn.add_pattern('reservoir', pattern_head_m)
-        reservoir = wn.get_node(name_node_plant)
-        reservoir.head_timeseries.base_value = int(base_head)
-        reservoir.head_timeseries._pattern = 'reservoir'
-        sim = wntr.sim.EpanetSimulator(wn)
-        results = sim.run_sim()
+    # Prepare the epanet simulation of the thermal network. The water network model is built once and reused by the
+    #   sizing and the pressure simulations, only changing the hours of the demand patterns and the pipe diameters.
+    demand_patterns = volume_flow_m3pers_building / volume_flow_m3pers_building.max()
+    wn, consumer_nodes, name_node_plant = build_water_network_model(node_df, edge_df,
+                                                                     volume_flow_m3pers_building.max(),
+                                                                     thermal_transfer_unit_design_head_m,
+                                                                     coefficient_friction_hazen_williams,
+                                                                     fraction_equivalent_length)
+    building_nodes_pairs = dict(zip(consumer_nodes, node_df.loc[consumer_nodes, 'Building']))
+    building_nodes_pairs_inversed = {building: node for node, building in building_nodes_pairs.items()}
+
+    # 1st ITERATION GET MASS FLOWS AND CALCULATE DIAMETER (only the peak hours size the pipes of branched networks)
+    peak_hours = calc_peak_hours(node_df, edge_df, volume_flow_m3pers_building)
+    results = run_epanet(wn, demand_patterns.iloc[peak_hours])
+    max_volume_flow_rates_m3s = results.link['flowrate'].abs().max()
+    pipe_names = max_volume_flow_rates_m3s.index.values
+    pipe_catalog = pd.read_excel(locator.get_database_distribution_systems(), sheet_name='THERMAL_GRID')
+    Pipe_DN, D_ext_m, D_int_m, D_ins_m = zip(
+        *[calc_max_diameter(flow, pipe_catalog, velocity_ms=velocity_ms, peak_load_percentage=peak_load_percentage) for
+          flow in max_volume_flow_rates_m3s])
+    pipe_dn = pd.Series(Pipe_DN, pipe_names)
+    diameter_int_m = pd.Series(D_int_m, pipe_names)
+    diameter_ext_m = pd.Series(D_ext_m, pipe_names)
+    diameter_ins_m = pd.Series(D_ins_m, pipe_names)
+
+    # 2nd ITERATION GET PRESSURE POINTS AND MASSFLOWS FOR SIZING PUMPING NEEDS - this could be for all the year
+    # modify diameter and run simulations
+    edge_df['Pipe_DN'] = pipe_dn
+    edge_df['D_int_m'] = D_int_m
+    for pipe_name, diameter_m in diameter_int_m.items():
+        wn.get_link(pipe_name).diameter = diameter_m
+    results = run_epanet(wn, demand_patterns)
+
+    # 3rd ITERATION GET FINAL UTILIZATION OF THE GRID (SUPPLY SIDE)
+    # get accumulated head loss per hour
+    unitary_head_ftperkft = results.link['headloss'].abs()
+    unitary_head_mperm = unitary_head_ftperkft * FT_TO_M / (FT_TO_M * 1000)
+    head_loss_m = unitary_head_mperm * edge_df.loc[unitary_head_mperm.columns, 'length_m'].values
+    reservoir_head_loss_m = head_loss_m.sum(axis=1) + thermal_transfer_unit_design_head_m*1.2 # fixme: only one thermal_transfer_unit_design_head_m from one substation?
+
+    # apply this pattern to the reservoir and get results
+    base_head = reservoir_head_loss_m.max()
+    reservoir_head_m = int(base_head) * reservoir_head_loss_m.values / base_head
+    apply_reservoir_head(results, name_node_plant, reservoir_head_m - wn.get_node(name_node_plant).base_head)
 
     # POSTPROCESSING
 
@@ -340,10 +402,8 @@ def thermal_network_simplified(locator, config, network_name=''):
     # at the pipes
     unitary_head_loss_supply_network_ftperkft = results.link['headloss'].abs()
     linear_pressure_loss_Paperm = unitary_head_loss_supply_network_ftperkft * FT_WATER_TO_PA / (FT_TO_M * 1000)
-    head_loss_supply_network_Pa = linear_pressure_loss_Paperm.copy()
-    for column in head_loss_supply_network_Pa.columns.values:
-        length_m = edge_df.loc[column]['length_m']
-        head_loss_supply_network_Pa[column] = head_loss_supply_network_Pa[column] * length_m
+    head_loss_supply_network_Pa = linear_pressure_loss_Paperm * edge_df.loc[linear_pressure_loss_Paperm.columns,
+                                                                            'length_m'].values
 
     head_loss_return_network_Pa = head_loss_supply_network_Pa.copy(0)
     # at the substations
@@ -399,34 +459,31 @@ def thermal_network_simplified(locator, config, network_name=''):
                                                                      temperature_of_the_ground_K,
                                                                      k_kWperK,
                                                                      )
-    # WRITE TO DISK
+    # WRITE TO DISK (the hourly results are collected and written at the end, see results_store)
+    results_hourly = {}
 
     # LINEAR PRESSURE LOSSES (EDGES)
-    linear_pressure_loss_Paperm.to_csv(locator.get_network_linear_pressure_drop_edges(network_type, network_name),
-                                       index=False)
+    results_hourly['linear_pressure_loss_supply_Paperm'] = linear_pressure_loss_Paperm
 
     # MASS_FLOW_RATE (EDGES)
     flow_rate_supply_m3s = results.link['flowrate'].abs()
     massflow_supply_kgs = flow_rate_supply_m3s * P_WATER_KGPERM3
-    massflow_supply_kgs.to_csv(locator.get_thermal_network_layout_massflow_edges_file(network_type, network_name),
-                               index=False)
+    results_hourly['edge_mass_flows'] = massflow_supply_kgs
 
     # VELOCITY (EDGES)
     velocity_edges_ms = results.link['velocity'].abs()
-    velocity_edges_ms.to_csv(locator.get_thermal_network_velocity_edges_file(network_type, network_name),
-                             index=False)
+    results_hourly['velocities_in_supply_edges_mpers'] = velocity_edges_ms
 
     # PRESSURE LOSSES (NODES)
     pressure_at_nodes_ft = results.node['pressure'].abs()
     pressure_at_nodes_Pa = pressure_at_nodes_ft * FT_TO_M * M_WATER_TO_PA
-    pressure_at_nodes_Pa.to_csv(locator.get_network_pressure_at_nodes(network_type, network_name), index=False)
+    results_hourly['pressure_at_supply_nodes_Pa'] = pressure_at_nodes_Pa
 
     # MASS_FLOW_RATE (NODES)
     # $ POSTPROCESSING - MASSFLOWRATES PER NODE PER HOUR OF THE YEAR
     flow_rate_supply_nodes_m3s = results.node['demand'].abs()
     massflow_supply_nodes_kgs = flow_rate_supply_nodes_m3s * P_WATER_KGPERM3
-    massflow_supply_nodes_kgs.to_csv(locator.get_thermal_network_layout_massflow_nodes_file(network_type, network_name),
-                                     index=False)
+    results_hourly['node_mass_flows'] = massflow_supply_nodes_kgs
 
     # thermal demand per building (no losses in the network or substations)
     Q_demand_Wh_building = Q_demand_kWh_building * 1000
@@ -450,42 +507,35 @@ def thermal_network_simplified(locator, config, network_name=''):
                                         "pressure_loss_return_Pa": accumulated_head_loss_return_Pa,
                                         "pressure_loss_substations_Pa": accumulated_head_loss_substations_Pa,
                                         "pressure_loss_total_Pa": accumulated_head_loss_total_Pa})
-    head_loss_system_Pa.to_csv(locator.get_network_total_pressure_drop_file(network_type, network_name),
-                               index=False)
+    results_hourly['pressure_loss_system_Pa'] = head_loss_system_Pa
 
     # $ POSTPROCESSING - PLANT HEAT REQUIREMENT
     plant_load_kWh = thermal_losses_supply_kWh.sum(axis=1) * 2 + Q_demand_kWh_building.sum(
         axis=1) - accumulated_head_loss_total_kW.values
-    plant_load_kWh.to_csv(locator.get_thermal_network_plant_heat_requirement_file(network_type, network_name),
-                          header=['thermal_load_kW'], index=False)
+    results_hourly['plant_heat_requirement'] = plant_load_kWh.to_frame('thermal_load_kW')
 
     # pressure losses per piping system
-    pressure_loss_supply_edge_kW.to_csv(
-        locator.get_thermal_network_pressure_losses_edges_file(network_type, network_name), index=False)
+    results_hourly['pressure_loss_supply_edge_kW'] = pressure_loss_supply_edge_kW
 
     # pressure losses per substation
     head_loss_substations_kW = head_loss_substations_kW.rename(columns=building_nodes_pairs)
-    head_loss_substations_kW.to_csv(locator.get_thermal_network_substation_ploss_file(network_type, network_name),
-                                    index=False)
+    results_hourly['pressure_loss_substations_kW'] = head_loss_substations_kW
 
     # pumping needs losses total
     pumping_energy_system_kWh = pd.DataFrame({"pressure_loss_supply_kW": accumulated_head_loss_supply_kW,
                                               "pressure_loss_return_kW": accumulated_head_loss_return_kW,
                                               "pressure_loss_substations_kW": accumulated_head_loss_substations_kW,
                                               "pressure_loss_total_kW": accumulated_head_loss_total_kW})
-    pumping_energy_system_kWh.to_csv(
-        locator.get_network_energy_pumping_requirements_file(network_type, network_name), index=False)
+    results_hourly['pressure_loss_system_kW'] = pumping_energy_system_kWh
 
     # pumping needs losses total
     temperatures_plant_C = pd.DataFrame({"temperature_supply_K": average_temperature_supply_K,
                                          "temperature_return_K": average_temperature_return_K})
-    temperatures_plant_C.to_csv(locator.get_network_temperature_plant(network_type, network_name), index=False)
+    results_hourly['temperatures_at_plant_K'] = temperatures_plant_C
 
     # thermal losses
-    thermal_losses_supply_kWh.to_csv(locator.get_network_thermal_loss_edges_file(network_type, network_name),
-                                     index=False)
-    thermal_losses_supply_Wperm.to_csv(locator.get_network_linear_thermal_loss_edges_file(network_type, network_name),
-                                       index=False)
+    results_hourly['q_loss_supply_edges_kW'] = thermal_losses_supply_kWh
+    results_hourly['linear_thermal_loss_supply_edges_Wperm'] = thermal_losses_supply_Wperm
 
     # thermal losses total
     accumulated_thermal_losses_supply_kWh = thermal_losses_supply_kWh.sum(axis=1)
@@ -494,24 +544,24 @@ def thermal_network_simplified(locator, config, network_name=''):
     thermal_losses_total_kWh = pd.DataFrame({"thermal_loss_supply_kW": accumulated_thermal_losses_supply_kWh,
                                              "thermal_loss_return_kW": accumulated_thermal_losses_return_kWh,
                                              "thermal_loss_total_kW": accumulated_thermal_loss_total_kWh})
-    thermal_losses_total_kWh.to_csv(locator.get_network_total_thermal_loss_file(network_type, network_name),
-                                    index=False)
+    results_hourly['thermal_losses_system_kW'] = thermal_losses_total_kWh
 
     # return average temperature of supply at the substations
     T_sup_K_nodes = T_sup_K_building.rename(columns=building_nodes_pairs_inversed)
     average_year = T_sup_K_nodes.mean(axis=1)
     for node in node_df.index.values:
         T_sup_K_nodes[node] = average_year
-    T_sup_K_nodes.to_csv(locator.get_network_temperature_supply_nodes_file(network_type, network_name),
-                         index=False)
+    results_hourly['T_supply_nodes'] = T_sup_K_nodes
 
     # return average temperature of return at the substations
     T_return_K_nodes = T_re_K_building.rename(columns=building_nodes_pairs_inversed)
     average_year = T_return_K_nodes.mean(axis=1)
     for node in node_df.index.values:
         T_return_K_nodes[node] = average_year
-    T_return_K_nodes.to_csv(locator.get_network_temperature_return_nodes_file(network_type, network_name),
-                         index=False)
+    results_hourly['T_return_nodes'] = T_return_K_nodes
+
+    write_thermal_network_results(locator, network_type, network_name, results_hourly,
+                                  config.thermal_network.results_format)
 
     # summary of edges used for the calculation
     fields_edges = ['length_m', 'Pipe_DN', 'Type_mat', 'D_int_m']
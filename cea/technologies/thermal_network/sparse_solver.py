@@ -0,0 +1,100 @@
+"""
+Sparse solver of the linear systems of the edge-node (incidence) matrix of a thermal network, used by
+:py:mod:`cea.technologies.thermal_network.thermal_network` for the networks with at least
+``SPARSE_SOLVER_MIN_EDGES`` pipes.
+
+The mass flows of the edges ``m`` (``A m = b``, with ``A`` the edge-node matrix without the equation of one node) and
+the pressures of the nodes ``p`` (least squares of ``A.T p = -dp``) are both solved with the reduced Laplacian of the
+network ``L = A A.T`` (n-1 x n-1): ``m = A.T L^-1 b`` is the solution of a branched network and the solution with the
+smallest norm of a looped network (as ``np.linalg.lstsq``), and ``p`` is the solution of ``L p = -A dp`` with the
+pressure of the removed node set to 0.
+
+``L`` does not depend on the direction of the flows in the edges (flipping a column of ``A`` does not change
+``A A.T``), so its LU factorization is calculated once per network and node removed, and reused for every time step
+and every update of the flow directions. The factorizations of the ``SPARSE_SOLVER_CACHE_SIZE`` most recently used
+networks are kept.
+"""
+
+import collections
+import hashlib
+
+import numpy as np
+import scipy.sparse
+import scipy.sparse.linalg
+
+from cea.technologies.constants import SPARSE_SOLVER_CACHE_SIZE
+
+
+def to_csr(edge_node):
+    """
+    :param edge_node: the edge-node matrix (n x e), as a DataFrame or array
+    :rtype: scipy.sparse.csr_matrix
+    """
+    return scipy.sparse.csr_matrix(np.asarray(edge_node, dtype=float))
+
+
+def calc_topology_key(edge_node_csr, removed_node):
+    """the key of the factorization of a network: its nodes, edges and connections (not their direction)"""
+    key = hashlib.sha1(np.array(edge_node_csr.shape + (removed_node,), dtype=np.int64).tobytes())
+    key.update(edge_node_csr.indptr.astype(np.int64).tobytes())
+    key.update(edge_node_csr.indices.astype(np.int64).tobytes())
+    return key.hexdigest()
+
+
+class IncidenceMatrixSolver(object):
+    """
+    The factorization of the reduced Laplacian of an edge-node matrix, without the equation of ``removed_node``.
+    Use :py:meth:`IncidenceMatrixSolver.get` to reuse the factorizations of the networks already solved.
+
+    :param scipy.sparse.csr_matrix edge_node_csr: the edge-node matrix (n x e)
+    :param int removed_node: the index of the node of which the equation is removed (e.g. the plant)
+    """
+    # {calc_topology_key(edge_node_csr, removed_node): IncidenceMatrixSolver}, from the least to the most recently used
+    cache = collections.OrderedDict()
+
+    def __init__(self, edge_node_csr, removed_node):
+        self.nodes, self.edges = edge_node_csr.shape
+        self.removed_node = removed_node
+        self.kept_nodes = np.delete(np.arange(self.nodes), removed_node)
+        reduced = edge_node_csr[self.kept_nodes]
+        self.laplacian = scipy.sparse.csc_matrix(reduced @ reduced.T)
+        self.lu = scipy.sparse.linalg.splu(self.laplacian, permc_spec='MMD_AT_PLUS_A')
+
+    @classmethod
+    def get(cls, edge_node_csr, removed_node):
+        key = calc_topology_key(edge_node_csr, removed_node)
+        if key in cls.cache:
+            cls.cache.move_to_end(key)
+        else:
+            cls.cache[key] = cls(edge_node_csr, removed_node)
+            while len(cls.cache) > SPARSE_SOLVER_CACHE_SIZE:
+                cls.cache.popitem(last=False)
+        return cls.cache[key]
+
+    def solve_edge_flows(self, edge_node_csr, node_flows):
+        """
+        Solve the mass flows of the edges for the mass flows of the nodes.
+
+        :param scipy.sparse.csr_matrix edge_node_csr: the edge-node matrix (n x e), with the current flow directions
+        :param np.ndarray node_flows: the mass flow of each node (n), positive for the consumers, or of each node at
+                                      each time step (n x t)
+        :return: the mass flow of each edge (e), or of each edge at each time step (e x t)
+        :rtype: np.ndarray
+        """
+        node_flows = np.asarray(node_flows, dtype=float)
+        return edge_node_csr[self.kept_nodes].T @ self.lu.solve(node_flows[self.kept_nodes])
+
+    def solve_node_potentials(self, edge_node_csr, edge_differences):
+        """
+        Solve the pressures of the nodes for the pressure losses of the edges (least squares of
+        ``edge_node.T @ potentials = edge_differences``, with the smallest norm, as ``np.linalg.lstsq``).
+
+        :param scipy.sparse.csr_matrix edge_node_csr: the edge-node matrix (n x e), with the current flow directions
+        :param np.ndarray edge_differences: the difference between the potential of the end and start node of each edge
+        :return: the potential of each node (n)
+        :rtype: np.ndarray
+        """
+        edge_differences = np.asarray(edge_differences, dtype=float).ravel()
+        potentials = np.zeros(self.nodes)
+        potentials[self.kept_nodes] = self.lu.solve((edge_node_csr @ edge_differences)[self.kept_nodes])
+        return potentials - potentials.mean()
@@ -3,6 +3,7 @@ Hydraulic - thermal network
 """
 
 import collections
+import hashlib
 import math
 import os
 import random
@@ -15,11 +16,14 @@ import networkx as nx
 import numpy as np
 import pandas as pd
 import re
+import scipy.sparse
 
 import cea.config
 import cea.inputlocator
 import cea.technologies.thermal_network.substation_matrix as substation_matrix
+from cea.technologies.thermal_network import sparse_solver
 from cea.technologies.thermal_network.thermal_network_loss import calc_temperature_out_per_pipe
+from cea.technologies.thermal_network.results_store import write_thermal_network_results
 import cea.utilities.parallel
 import cea.utilities.workerstream
 from cea.constants import HEAT_CAPACITY_OF_WATER_JPERKGK, P_WATER_KGPERM3, HOURS_IN_YEAR
@@ -28,7 +32,7 @@ from cea.optimization.constants import PUMP_ETA
 from cea.resources import geothermal
 from cea.technologies.thermal_network.simplified_thermal_network import thermal_network_simplified
 from cea.technologies.constants import ROUGHNESS, NETWORK_DEPTH, REDUCED_TIME_STEPS, MAX_INITIAL_DIAMETER_ITERATIONS, \
-    MAX_NODE_FLOW
+    MAX_NODE_FLOW, SPARSE_SOLVER_MIN_EDGES, MAX_HOURS_IN_BLOCK, MAX_LOOP_ITERATIONS
 from cea.utilities import epwreader
 from cea.utilities.standardize_coordinates import get_lat_lon_projected_shapefile, get_projected_coordinate_system
 
@@ -58,7 +62,7 @@ class ThermalNetwork(object):
                                   and, if it is a consumer or plant, the name of the corresponding building (2 x n)
     :ivar DataFrame edge_df:
     """
-    loops_cache = {}  # {edge_nodes_df.to_string(): find_loops(edge_nodes_df)
+    loops_cache = {}  # {hash of edge_nodes_df.values: find_loops(edge_nodes_df)}
 
     def __init__(self, locator, network_name, thermal_network_section=None):
         self.locator = locator
@@ -81,6 +85,7 @@ class ThermalNetwork(object):
         self.temperature_control = "VT"  # the control strategy of supply temperatures at plants (constant temperature "CT" or variable temperature "VT")
         self.plant_supply_temperature = 80
         self.equivalent_length_factor = 0.2
+        self.results_format = "csv"  # the format of the hourly results (see results_store.RESULTS_FORMATS)
 
         # replace default values with those in the config file section
         self.copy_config_section(thermal_network_section)
@@ -128,7 +133,8 @@ class ThermalNetwork(object):
                                           "use_representative_week_per_month", "minimum_mass_flow_iteration_limit",
                                           "minimum_edge_mass_flow", "diameter_iteration_limit",
                                           "substation_cooling_systems", "substation_heating_systems",
-                                          "temperature_control", "plant_supply_temperature", "equivalent_length_factor"]
+                                          "temperature_control", "plant_supply_temperature", "equivalent_length_factor",
+                                          "results_format"]
         for field in thermal_network_section_fields:
             if hasattr(thermal_network_section, field):
                 setattr(self, field, getattr(thermal_network_section, field))
@@ -313,28 +319,25 @@ class ThermalNetwork(object):
         if edge_node_df is None:
             edge_node_df = self.edge_node_df
 
-        # check to see if we've already computed the loops
-        edge_node_str = edge_node_df.to_string()
-        if edge_node_str in ThermalNetwork.loops_cache:
-            return ThermalNetwork.loops_cache[edge_node_str]
+        # check to see if we've already computed the loops (the loops only depend on the values of the matrix)
+        edge_node = np.ascontiguousarray(edge_node_df.values, dtype=float)
+        edge_node_key = hashlib.sha1(np.array(edge_node.shape).tobytes() + edge_node.tobytes()).hexdigest()
+        if edge_node_key in ThermalNetwork.loops_cache:
+            return ThermalNetwork.loops_cache[edge_node_key]
 
-        edge_node_df_t = np.transpose(edge_node_df)  # transpose matrix to more intuitively setup graph
+        # the node each edge points to and the node it leaves (node 0 if there is none)
+        end_nodes = np.argmax(edge_node == 1, axis=0)
+        start_nodes = np.argmax(edge_node == -1, axis=0)
 
         graph = nx.Graph()  # set up networkx type graph
 
-        for i in range(edge_node_df_t.shape[0]):
-            new_edge = [0, 0]
-            for j in range(0, edge_node_df_t.shape[1]):
-                if edge_node_df_t.iloc[i][edge_node_df_t.columns[j]] == 1:
-                    new_edge[0] = j
-                elif edge_node_df_t.iloc[i][edge_node_df_t.columns[j]] == -1:
-                    new_edge[1] = j
-            graph.add_edge(new_edge[0], new_edge[1], edge_number=i)  # add edges to graph
+        for i in range(edge_node.shape[1]):
+            graph.add_edge(int(end_nodes[i]), int(start_nodes[i]), edge_number=i)  # add edges to graph
             # edge number necessary to later identify which edges are in loop since graph is a dictionary
 
         loops = nx.cycle_basis(graph, 0)  # identifies all linear independent loops
 
-        ThermalNetwork.loops_cache[edge_node_str] = (loops, graph)
+        ThermalNetwork.loops_cache[edge_node_key] = (loops, graph)
         return loops, graph
 
 
@@ -507,12 +510,8 @@ def thermal_network_main(locator, thermal_network, processes=1):
     thermal_network.pressure_loss_coeff = [a_p, b_p, c_p, d_p, e_p]
 
     print('Solving hydraulic and thermal network')
-    ## Start solving hydraulic and thermal equations at each time-step
-    nhours = (thermal_network.stop_t - thermal_network.start_t)
-
-    hourly_thermal_results = cea.utilities.parallel.vectorize(hourly_thermal_calculation, processes)(
-        range(thermal_network.start_t, thermal_network.stop_t),
-        repeat(thermal_network, nhours))
+    ## Start solving hydraulic and thermal equations at each time-step, in blocks of contiguous hours
+    hourly_thermal_results = calc_thermal_results(thermal_network, processes)
 
     # save results of hourly values over full year, write to csv
     # edge flow rates (flow direction corresponding to edge_node_df)
@@ -627,291 +626,46 @@ def prepare_inputs_of_representative_weeks(thermal_network):
 
 
 def save_all_results_to_csv(csv_outputs, thermal_network):
-    if thermal_network.use_representative_week_per_month:
-        # we need to extrapolate 8760 data points from 2016 points from our representative weeks.
-        # To do this, the initial dataset is repeated 4 times, the remaining values are filled with the average values of all above.
-        edge_mass_flows_for_csv = extrapolate_datapoints_for_representative_weeks(csv_outputs['edge_mass_flows'])
-        node_mass_flows_for_csv = extrapolate_datapoints_for_representative_weeks(csv_outputs['node_mass_flows'])
-        velocities_in_supply_edges_mpers_for_csv = extrapolate_datapoints_for_representative_weeks(
-            csv_outputs['velocities_in_supply_edges_mpers'])
-        T_supply_nodes_for_csv = extrapolate_datapoints_for_representative_weeks(csv_outputs['T_supply_nodes'])
-        T_return_nodes_for_csv = extrapolate_datapoints_for_representative_weeks(csv_outputs['T_return_nodes'])
-        temperatures_at_plants_K_for_csv = extrapolate_datapoints_for_representative_weeks(
-            csv_outputs['temperatures_at_plant_K'])
-        q_loss_supply_edges_kW_for_csv = extrapolate_datapoints_for_representative_weeks(
-            csv_outputs['q_loss_supply_edges_kW'])
-        linear_thermal_loss_supply_edges_Wperm_for_csv = extrapolate_datapoints_for_representative_weeks(
-            csv_outputs['linear_thermal_loss_supply_edges_Wperm'])
-        thermal_losses_system_kW_for_csv = extrapolate_datapoints_for_representative_weeks(
-            csv_outputs['thermal_losses_system_kW'])
-        plant_heat_requirement_for_csv = extrapolate_datapoints_for_representative_weeks(
-            csv_outputs['plant_heat_requirement'])
-        pressure_at_supply_nodes_Pa_for_csv = extrapolate_datapoints_for_representative_weeks(
-            csv_outputs['pressure_at_supply_nodes_Pa'])
-        pressure_loss_system_kW_for_csv = extrapolate_datapoints_for_representative_weeks(
-            csv_outputs['pressure_loss_system_kW'])
-        pressure_loss_system_Pa_for_csv = extrapolate_datapoints_for_representative_weeks(
-            csv_outputs['pressure_loss_system_Pa'])
-        pressure_loss_substations_kW_for_csv = extrapolate_datapoints_for_representative_weeks(
-            csv_outputs['pressure_loss_substations_kW'])
-        linear_pressure_loss_supply_Paperm_for_csv = extrapolate_datapoints_for_representative_weeks(
-            csv_outputs['linear_pressure_loss_supply_Paperm'])
-        pressure_loss_supply_edge_for_csv = extrapolate_datapoints_for_representative_weeks(
-            csv_outputs['pressure_loss_supply_edge_kW'])
-
-        # Output values
-        # Edge Mass Flows
-        edge_mass_flows_for_csv.columns = thermal_network.edge_node_df.columns
-        edge_mass_flows_for_csv.to_csv(
-            thermal_network.locator.get_thermal_network_layout_massflow_edges_file(thermal_network.network_type,
-                                                                                   thermal_network.network_name),
-            na_rep='NaN', index=False, float_format='%.3f')
-
-        # Node Mass Flows
-        node_mass_flows_for_csv.columns = thermal_network.edge_node_df.index
-        node_mass_flows_for_csv.to_csv(
-            thermal_network.locator.get_thermal_network_layout_massflow_nodes_file(thermal_network.network_type,
-                                                                                   thermal_network.network_name),
-            na_rep='NaN', index=False, float_format='%.3f')
-
-        # velocities in supply edges
-        velocities_in_supply_edges_mpers_for_csv.columns = thermal_network.edge_node_df.columns
-        velocities_in_supply_edges_mpers_for_csv.to_csv(
-            thermal_network.locator.get_thermal_network_velocity_edges_file(thermal_network.network_type,
-                                                                            thermal_network.network_name),
-            na_rep='NaN', index=False, float_format='%.3f')
-
-        # pressure at nodes in the supply pipes
-        pressure_at_supply_nodes_Pa_for_csv.columns = thermal_network.edge_node_df.index
-        pressure_at_supply_nodes_Pa_for_csv.to_csv(
-            thermal_network.locator.get_network_pressure_at_nodes(thermal_network.network_type,
-                                                                  thermal_network.network_name),
-            index=False, float_format='%.3f')
-
-        # pressure losses over entire network in kW
-        pressure_loss_system_kW_for_csv.columns = ['pressure_loss_supply_kW', 'pressure_loss_return_kW',
-                                                   'pressure_loss_substations_kW',
-                                                   'pressure_loss_total_kW']
-        pressure_loss_system_kW_for_csv.to_csv(
-            thermal_network.locator.get_network_energy_pumping_requirements_file(thermal_network.network_type,
-                                                                                 thermal_network.network_name),
-            index=False, float_format='%.3f')
-
-        # pressure losses over substations of network
-        pressure_loss_substations_kW_for_csv.columns = thermal_network.building_names
-        pressure_loss_substations_kW_for_csv.to_csv(
-            thermal_network.locator.get_thermal_network_substation_ploss_file(thermal_network.network_type,
-                                                                              thermal_network.network_name),
-            index=False,
-            float_format='%.3f')
-
-        # pressure losses over entire network in Pa
-        pressure_loss_system_Pa_for_csv.columns = ['pressure_loss_supply_Pa', 'pressure_loss_return_Pa',
-                                                   'pressure_loss_substations_Pa', 'pressure_loss_total_Pa']
-        pressure_loss_system_Pa_for_csv.to_csv(
-            thermal_network.locator.get_network_total_pressure_drop_file(thermal_network.network_type,
-                                                                         thermal_network.network_name),
-            index=False,
-            float_format='%.3f')
-
-        # linear pressure drop in the supply pipes in Pa/m
-        linear_pressure_loss_supply_Paperm_for_csv.columns = thermal_network.edge_node_df.columns
-        linear_pressure_loss_supply_Paperm_for_csv.to_csv(
-            thermal_network.locator.get_network_linear_pressure_drop_edges(thermal_network.network_type,
-                                                                           thermal_network.network_name),
-            index=False,
-            float_format='%.3f')
-
-        # heat losses over entire network
-        thermal_losses_system_kW_for_csv.columns = ['thermal_loss_supply_kW', 'thermal_loss_return_kW',
-                                                    'thermal_loss_total_kW']
-        pd.DataFrame(thermal_losses_system_kW_for_csv).to_csv(
-            thermal_network.locator.get_network_total_thermal_loss_file(thermal_network.network_type,
-                                                                        thermal_network.network_name),
-            index=False,
-            float_format='%.3f')
-
-        # heat losses per edges in supply pipes
-        q_loss_supply_edges_kW_for_csv.columns = thermal_network.edge_node_df.columns
-        pd.DataFrame(q_loss_supply_edges_kW_for_csv).to_csv(
-            thermal_network.locator.get_network_thermal_loss_edges_file(thermal_network.network_type,
-                                                                        thermal_network.network_name),
-            index=False,
-            float_format='%.3f')
-
-        # linear heat losses per edges in supply pipes
-        linear_thermal_loss_supply_edges_Wperm_for_csv.columns = thermal_network.edge_node_df.columns
-        pd.DataFrame(linear_thermal_loss_supply_edges_Wperm_for_csv).to_csv(
-            thermal_network.locator.get_network_linear_thermal_loss_edges_file(thermal_network.network_type,
-                                                                               thermal_network.network_name),
-            index=False,
-            float_format='%.3f')
-
-        # pressure losses over entire network
-        pressure_loss_supply_edge_for_csv.columns = thermal_network.edge_node_df.columns
-        pd.DataFrame(pressure_loss_supply_edge_for_csv).to_csv(
-            thermal_network.locator.get_thermal_network_pressure_losses_edges_file(thermal_network.network_type,
-                                                                                   thermal_network.network_name),
-            index=False,
-            float_format='%.3f')
-
-        # plant heat requirements
-        plant_heat_requirement_for_csv.columns = filter(None, thermal_network.all_nodes_df[
-            thermal_network.all_nodes_df.Type == 'PLANT'].Building.values)
-        plant_heat_requirement_for_csv.to_csv(
-            thermal_network.locator.get_thermal_network_plant_heat_requirement_file(
-                thermal_network.network_type,
-                thermal_network.network_name), index=False,
-            float_format='%.3f')
-
-        # node temperatures
-        T_supply_nodes_for_csv.columns = thermal_network.edge_node_df.index
-        T_supply_nodes_for_csv.to_csv(
-            thermal_network.locator.get_network_temperature_supply_nodes_file(
-                thermal_network.network_type,
-                thermal_network.network_name),
-            na_rep='NaN', index=False, float_format='%.3f')
-
-        T_return_nodes_for_csv.columns = thermal_network.edge_node_df.index
-        T_return_nodes_for_csv.to_csv(
-            thermal_network.locator.get_network_temperature_return_nodes_file(
-                thermal_network.network_type,
-                thermal_network.network_name),
-            na_rep='NaN', index=False, float_format='%.3f')
-
-        # plant supply and return temperatures
-        temperatures_at_plants_K_for_csv.columns = ['temperature_supply_K', 'temperature_return_K']
-        temperatures_at_plants_K_for_csv.to_csv(
-            thermal_network.locator.get_network_temperature_plant(
-                thermal_network.network_type, thermal_network.network_name), index=False, float_format='%.3f')
-
-    else:
-        representative_week = False
-
-        # Edge Mass Flows
-        pd.DataFrame(csv_outputs['edge_mass_flows'], columns=thermal_network.edge_node_df.columns).to_csv(
-            thermal_network.locator.get_thermal_network_layout_massflow_edges_file(thermal_network.network_type,
-                                                                                   thermal_network.network_name,
-                                                                                   representative_week),
-            na_rep='NaN', index=False, float_format='%.3f')
-
-        # Node Mass Flows
-        pd.DataFrame(csv_outputs['node_mass_flows'], columns=thermal_network.edge_node_df.index).to_csv(
-            thermal_network.locator.get_thermal_network_layout_massflow_nodes_file(thermal_network.network_type,
-                                                                                   thermal_network.network_name,
-                                                                                   representative_week),
-            na_rep='NaN', index=False, float_format='%.3f')
-
-        # velocities in supply edges
-        pd.DataFrame(csv_outputs['velocities_in_supply_edges_mpers'],
-                     columns=thermal_network.edge_node_df.columns).to_csv(
-            thermal_network.locator.get_thermal_network_velocity_edges_file(thermal_network.network_type,
-                                                                            thermal_network.network_name),
-            na_rep='NaN', index=False, float_format='%.3f')
-
-        # pressure at nodes in the supply pipes
-        pd.DataFrame(csv_outputs['pressure_at_supply_nodes_Pa'], columns=thermal_network.edge_node_df.index).to_csv(
-            thermal_network.locator.get_network_pressure_at_nodes(thermal_network.network_type,
-                                                                  thermal_network.network_name),
-            index=False, float_format='%.3f')
-
-        # pressure losses over entire network in Pa
-        pd.DataFrame(csv_outputs['pressure_loss_system_Pa'],
-                     columns=['pressure_loss_supply_Pa', 'pressure_loss_return_Pa',
-                              'pressure_loss_substations_Pa', 'pressure_loss_total_Pa']).to_csv(
-            thermal_network.locator.get_network_total_pressure_drop_file(thermal_network.network_type,
-                                                                         thermal_network.network_name,
-                                                                         representative_week),
-            index=False,
-            float_format='%.3f')
-
-        # pressure losses over entire network in kW
-        pd.DataFrame(csv_outputs['pressure_loss_system_kW'],
-                     columns=['pressure_loss_supply_kW', 'pressure_loss_return_kW',
-                              'pressure_loss_substations_kW', 'pressure_loss_total_kW']).to_csv(
-            thermal_network.locator.get_network_energy_pumping_requirements_file(thermal_network.network_type,
-                                                                                 thermal_network.network_name,
-                                                                                 representative_week),
-            index=False,
-            float_format='%.3f')
-
-        # pressure losses over substations of network
-        pd.DataFrame(csv_outputs['pressure_loss_substations_kW'], columns=thermal_network.building_names).to_csv(
-            thermal_network.locator.get_thermal_network_substation_ploss_file(thermal_network.network_type,
-                                                                              thermal_network.network_name,
-                                                                              representative_week),
-            index=False,
-            float_format='%.3f')
-
-        # heat losses over entire network
-        pd.DataFrame(csv_outputs['thermal_losses_system_kW'],
-                     columns=['thermal_loss_supply_kW', 'thermal_loss_return_kW',
-                              'thermal_loss_total_kW']).to_csv(
-            thermal_network.locator.get_network_total_thermal_loss_file(thermal_network.network_type,
-                                                                        thermal_network.network_name),
-            index=False,
-            float_format='%.3f')
+    """
+    Write the hourly results of the network, to the csv files or to the results store of the network
+    (``thermal-network:results-format``, see :py:mod:`cea.technologies.thermal_network.results_store`).
+    """
+    edges = thermal_network.edge_node_df.columns
+    nodes = thermal_network.edge_node_df.index
+    plants = list(filter(None, thermal_network.all_nodes_df[thermal_network.all_nodes_df.Type == 'PLANT'].Building.values))
+    results_columns = {
+        'edge_mass_flows': edges,
+        'node_mass_flows': nodes,
+        'velocities_in_supply_edges_mpers': edges,
+        'pressure_at_supply_nodes_Pa': nodes,
+        'pressure_loss_system_Pa': ['pressure_loss_supply_Pa', 'pressure_loss_return_Pa',
+                                    'pressure_loss_substations_Pa', 'pressure_loss_total_Pa'],
+        'pressure_loss_system_kW': ['pressure_loss_supply_kW', 'pressure_loss_return_kW',
+                                    'pressure_loss_substations_kW', 'pressure_loss_total_kW'],
+        'pressure_loss_substations_kW': thermal_network.building_names,
+        'thermal_losses_system_kW': ['thermal_loss_supply_kW', 'thermal_loss_return_kW', 'thermal_loss_total_kW'],
+        'q_loss_supply_edges_kW': edges,
+        'linear_thermal_loss_supply_edges_Wperm': edges,
+        'pressure_loss_supply_edge_kW': edges,
+        'linear_pressure_loss_supply_Paperm': edges,
+        'plant_heat_requirement': plants if thermal_network.use_representative_week_per_month else ['thermal_load_kW'],
+        'T_supply_nodes': nodes,
+        'T_return_nodes': nodes,
+        'temperatures_at_plant_K': ['temperature_supply_K', 'temperature_return_K'],
+    }
+
+    results = {}
+    for quantity, columns in results_columns.items():
+        if thermal_network.use_representative_week_per_month:
+            # we need to extrapolate 8760 data points from 2016 points from our representative weeks.
+            # To do this, the initial dataset is repeated 4 times, the remaining values are filled with the average values of all above.
+            results[quantity] = extrapolate_datapoints_for_representative_weeks(csv_outputs[quantity])
+            results[quantity].columns = columns
+        else:
+            results[quantity] = pd.DataFrame(csv_outputs[quantity], columns=columns)
 
-        # heat losses per edges in supply pipes
-        pd.DataFrame(csv_outputs['q_loss_supply_edges_kW'],
-                     columns=thermal_network.edge_node_df.columns).to_csv(
-            thermal_network.locator.get_network_thermal_loss_edges_file(thermal_network.network_type,
-                                                                        thermal_network.network_name),
-            index=False,
-            float_format='%.3f')
-
-        # linear heat losses per edges in supply pipes
-        pd.DataFrame(csv_outputs['linear_thermal_loss_supply_edges_Wperm'],
-                     columns=thermal_network.edge_node_df.columns).to_csv(
-            thermal_network.locator.get_network_linear_thermal_loss_edges_file(thermal_network.network_type,
-                                                                               thermal_network.network_name),
-            index=False,
-            float_format='%.3f')
-
-        # pressure losses over entire network per edge
-        pd.DataFrame(csv_outputs['pressure_loss_supply_edge_kW'], columns=thermal_network.edge_node_df.columns).to_csv(
-            thermal_network.locator.get_thermal_network_pressure_losses_edges_file(
-                thermal_network.network_type,
-                thermal_network.network_name, representative_week),
-            index=False,
-            float_format='%.3f')
-
-        # linear pressure drop in the supply pipes in Pa/m
-        pd.DataFrame(csv_outputs['linear_pressure_loss_supply_Paperm'],
-                     columns=thermal_network.edge_node_df.columns).to_csv(
-            thermal_network.locator.get_network_linear_pressure_drop_edges(thermal_network.network_type,
-                                                                           thermal_network.network_name),
-            index=False,
-            float_format='%.3f')
-
-        # plant heat requirements
-        pd.DataFrame(csv_outputs['plant_heat_requirement'],
-                     columns=list(filter(None, thermal_network.all_nodes_df[
-                         thermal_network.all_nodes_df.Type == 'PLANT'].Building.values))).to_csv(
-            thermal_network.locator.get_thermal_network_plant_heat_requirement_file(
-                thermal_network.network_type,
-                thermal_network.network_name, representative_week),
-            index=False,
-            header=['thermal_load_kW'],
-            float_format='%.3f')
-
-        # node temperatures
-        pd.DataFrame(csv_outputs['T_supply_nodes'], columns=thermal_network.edge_node_df.index).to_csv(
-            thermal_network.locator.get_network_temperature_supply_nodes_file(
-                thermal_network.network_type,
-                thermal_network.network_name, representative_week),
-            na_rep='NaN', index=False, float_format='%.3f')
-        pd.DataFrame(csv_outputs['T_return_nodes'], columns=thermal_network.edge_node_df.index).to_csv(
-            thermal_network.locator.get_network_temperature_return_nodes_file(
-                thermal_network.network_type,
-                thermal_network.network_name, representative_week),
-            na_rep='NaN', index=False, float_format='%.3f')
-
-        # plant supply and return temperatures
-        pd.DataFrame(csv_outputs['temperatures_at_plant_K'],
-                     columns=['temperature_supply_K', 'temperature_return_K']).to_csv(
-            thermal_network.locator.get_network_temperature_plant(
-                thermal_network.network_type, thermal_network.network_name), index=False, float_format='%.3f')
+    write_thermal_network_results(thermal_network.locator, thermal_network.network_type, thermal_network.network_name,
+                                  results, thermal_network.results_format, na_rep='NaN', float_format='%.3f')
 
 
 def extrapolate_datapoints_for_representative_weeks(representative_week_data):
@@ -989,12 +743,84 @@ def hourly_thermal_calculation(t, thermal_network):
     return hourly_thermal_results
 
 
+def calc_thermal_results(thermal_network, processes=1):
+    """
+    Run ``hourly_thermal_calculation`` for each timestep of the network, in blocks of contiguous hours (see
+    ``calc_hour_blocks``).
+
+    :param ThermalNetwork thermal_network: object holding all the information about the thermal network
+    :param int processes: number of processes to run the blocks in
+    :rtype: list[HourlyThermalResults]
+    """
+    hour_blocks = calc_hour_blocks(thermal_network.start_t, thermal_network.stop_t, processes)
+    block_thermal_results = cea.utilities.parallel.vectorize(block_thermal_calculation, processes)(
+        [start_t for start_t, _ in hour_blocks],
+        [stop_t for _, stop_t in hour_blocks],
+        repeat(thermal_network, len(hour_blocks)))
+    return list(chain.from_iterable(block_thermal_results))
+
+
+def block_thermal_calculation(start_t, stop_t, thermal_network):
+    """
+    Run ``hourly_thermal_calculation`` for a block of contiguous hours, so the hours of the block are sent to a worker
+    process as one task.
+
+    Each hour starts from the state the network had before the block (see ``clear_hourly_state``), so the results
+    don't depend on how the hours are split into blocks or on how many processes run them.
+
+    :param int start_t: first timestep of the block
+    :param int stop_t: timestep after the last timestep of the block
+    :rtype: list[HourlyThermalResults]
+    """
+    temperature_control = thermal_network.temperature_control
+    hourly_thermal_results = []
+    for t in range(start_t, stop_t):
+        try:
+            hourly_thermal_results.append(hourly_thermal_calculation(t, thermal_network))
+        finally:
+            clear_hourly_state(thermal_network, [t], temperature_control)
+    return hourly_thermal_results
+
+
+def clear_hourly_state(thermal_network, time_steps, temperature_control):
+    """
+    Undo the changes the hourly calculations make to ``thermal_network``: restore the control strategy of the supply
+    temperatures (``solve_network_temperatures`` switches it to constant temperature "CT" when the plant can't meet
+    the demand) and drop the minimum mass flow variables of the hours in ``time_steps``.
+
+    :param ThermalNetwork thermal_network: object holding all the information about the thermal network
+    :param time_steps: the timesteps whose variables are dropped
+    :param str temperature_control: the control strategy to restore ("CT" or "VT")
+    """
+    thermal_network.temperature_control = temperature_control
+    for t in time_steps:
+        thermal_network.delta_cap_mass_flow.pop(t, None)
+        thermal_network.nodes.pop(t, None)
+        for variable in (thermal_network.cc_old, thermal_network.ch_old, thermal_network.cc_value,
+                         thermal_network.ch_value):
+            for values in variable.values():
+                values.pop(t, None)
+
+
+def calc_hour_blocks(start_t, stop_t, processes=1):
+    """
+    Split the hours from ``start_t`` to ``stop_t`` into blocks of contiguous hours (at most ``MAX_HOURS_IN_BLOCK``),
+    with at least one block per process.
+
+    :return: the first timestep and the timestep after the last timestep of each block
+    :rtype: list[tuple[int, int]]
+    """
+    nhours = stop_t - start_t
+    block_size = max(1, min(MAX_HOURS_IN_BLOCK, int(ceil(nhours / float(max(processes, 1))))))
+    return [(t, min(t + block_size, stop_t)) for t in range(start_t, stop_t, block_size)]
+
+
 # ===========================
 # Hydraulic calculation
 # ===========================
 
 def calc_mass_flow_edges(edge_node_df, mass_flow_substation_df, all_nodes_df, pipe_diameter_m, pipe_length_m,
-                         T_edge_K, find_loops):
+                         T_edge_K, find_loops, convergence_log=None):
     """
     This function carries out the steady-state mass flow rate calculation for a predefined network with predefined mass
     flow rates at each substation based on the method from Todini et al. (1987), Ikonen et al. (2016), Oppelt et al.
@@ -1013,6 +839,8 @@ def calc_mass_flow_edges(edge_node_df, mass_flow_substation_df, all_nodes_df, pi
     :param T_edge_K: matrix containing the temperature of the water in each edge e at time t             (t x e)
 
     :param find_loops: function that returns the loops in a thermal network
+    :param convergence_log: optional list to which the maximum change of the edge mass flows [kg/s] and the maximum
+                            pressure loss around a loop [Pa] of each iteration of the loop corrections are appended
 
     :type all_nodes_df: DataFrame(t x n)
     :type edge_node_df: DataFrame
@@ -1024,6 +852,12 @@ def calc_mass_flow_edges(edge_node_df, mass_flow_substation_df, all_nodes_df, pi
     :return mass_flow_edge: matrix specifying the mass flow rate at each edge e at the given time step t
     :rtype mass_flow_edge: numpy.ndarray
 
+    The linear systems of networks with at least ``SPARSE_SOLVER_MIN_EDGES`` edges are solved with sparse matrices,
+    reusing the factorization of the network for all time steps (see
+    :py:mod:`cea.technologies.thermal_network.sparse_solver`). The loop corrections (Hardy Cross) of all the loops
+    are calculated at once with the loop-edge matrix (see ``calc_loop_matrix``), for at most ``MAX_LOOP_ITERATIONS``
+    iterations.
+
     .. [Todini & Pilati, 1987] Todini & Pilati. "A gradient method for the analysis of pipe networks," in Computer
        Applications in Water Supply Volume 1 - Systems Analysis and Simulation, 1987.
 
@@ -1035,19 +869,31 @@ def calc_mass_flow_edges(edge_node_df, mass_flow_substation_df, all_nodes_df, pi
     """
     edge_node_df = edge_node_df.copy()
     loops, graph = find_loops(edge_node_df)  # identifies all linear independent loops
+    plant_index = np.where(all_nodes_df['Type'] == 'PLANT')[0][0]  # find index of the first plant node
+    use_sparse_solver = edge_node_df.shape[1] >= SPARSE_SOLVER_MIN_EDGES
+    if use_sparse_solver:
+        edge_node_csr = sparse_solver.to_csr(edge_node_df)
+        node_mass_flow = np.nan_to_num(np.asarray(mass_flow_substation_df, dtype=float)).ravel()
     if loops:
         # print('Fundamental loops in the network:', loops)  # returns nodes that define loop, useful for visiual
         # verification in testing phase,
 
-        sum_delta_m_num = np.zeros((1, len(loops)))[0]
+        # loop-edge matrix: the edges of each loop, with their direction relative to the direction of the loop
+        loop_matrix = calc_loop_matrix(loops, graph, edge_node_df.values)
+        sum_delta_m_num = np.zeros(len(loops))
 
         # if loops exist:
         # 1. calculate initial guess solution of matrix A
         # delete first plant on an edge of matrix and solution space b as these are redundant
-        A = edge_node_df.drop(edge_node_df.index[0], 0)  # solution matrix A without loop equations (kirchhoff 2)
-        b_init = np.nan_to_num(mass_flow_substation_df.drop(mass_flow_substation_df.columns[0], 1).transpose())
         # solution vector b of node demands
-        mass_flow_edge = np.linalg.lstsq(A, b_init, rcond=-1)[0].transpose()[0]  # solve system
+        if use_sparse_solver:
+            mass_flow_edge = sparse_solver.IncidenceMatrixSolver.get(edge_node_csr, 0).solve_edge_flows(
+                edge_node_csr, node_mass_flow)
+        else:
+            A = edge_node_df.drop(edge_node_df.index[0], axis=0)  # solution matrix A without loop equations (kirchhoff 2)
+            b_init = np.nan_to_num(
+                mass_flow_substation_df.drop(mass_flow_substation_df.columns[0], axis=1).transpose())
+            mass_flow_edge = np.linalg.lstsq(A, b_init, rcond=-1)[0].transpose()[0]  # solve system
 
         # setup iterations for implicit matrix solver
         tolerance = 0.01  # tolerance for mass flow convergence
@@ -1060,62 +906,31 @@ def calc_mass_flow_edges(edge_node_df, mass_flow_substation_df, all_nodes_df, pi
 
             # calculate value similar to Hardy Cross correction factor
             # uses Hardy Cross method but a different variation for calculating the mass flow
-            delta_m_num = calc_pressure_loss_pipe(pipe_diameter_m, pipe_length_m, m_old, T_edge_K,
-                                                  2) * np.sign(m_old)  # calculate pressure losses
-            delta_m_den = abs(calc_pressure_loss_pipe(pipe_diameter_m, pipe_length_m, m_old, T_edge_K,
-                                                      1))  # calculate derivatives of pressure losses
-            delta_m_num = delta_m_num.transpose()
-
-            sum_delta_m_num = np.zeros((1, len(loops)))[0]
-            sum_delta_m_den = np.zeros((1, len(loops)))[0]
-
-            for i in range(len(loops)):
-                # calculate the mass flow correction for each loop
-                # iterate over loops
-                # save the edge number connecting the nodes of the loops into the variable index
-                for j in range(len(loops[i])):
-                    if j == len(loops[i]) - 1:
-                        value = loops[i][0]
-                    else:
-                        value = loops[i][j + 1]
-                    index = graph.get_edge_data(loops[i][j], value)
-                    # check if nodes  defined in clockwise loop, to keep sign convention for Hardy Cross Method
-                    if not (edge_node_df.iloc[loops[i][j]][index['edge_number']] == 1) & \
-                           (edge_node_df.iloc[value][index['edge_number']] == -1):
-                        clockwise = -1
-                    else:
-                        clockwise = 1
-                    sum_delta_m_num[i] = sum_delta_m_num[i] + delta_m_num[index["edge_number"]] * clockwise
-                    sum_delta_m_den[i] = sum_delta_m_den[i] + delta_m_den[index["edge_number"]]
-                # calculate flow correction for each loop
-                if np.isclose(sum_delta_m_den[i], 0):
-                    delta_m = 0
-                else:
-                    delta_m = -sum_delta_m_num[i] / sum_delta_m_den[i]
-
-                # apply mass flow correction to all edges of each loop
-                for j in range(len(loops[i])):
-                    if j == len(loops[i]) - 1:
-                        value = loops[i][0]
-                    else:
-                        value = loops[i][j + 1]
-                    index = graph.get_edge_data(loops[i][j], value)
-                    # check if nodes  defined in clockwise loop
-                    if not (edge_node_df.iloc[loops[i][j]][index['edge_number']] == 1) & \
-                           (edge_node_df.iloc[value][index['edge_number']] == -1):
-                        clockwise = -1
-                    else:
-                        clockwise = 1
-                    # apply loop correction
-                    mass_flow_edge[index["edge_number"]] = mass_flow_edge[index["edge_number"]] + delta_m * clockwise
+            # derivatives of pressure losses, the pressure losses are m/2 times the derivatives (Darcy-Weisbach)
+            delta_m_den = abs(calc_pressure_loss_pipe(pipe_diameter_m, pipe_length_m, m_old, T_edge_K, 1)).ravel()
+            delta_m_num = delta_m_den * m_old / 2  # pressure losses in the direction of the flow
+
+            # calculate the mass flow correction of all loops at once
+            sum_delta_m_num = loop_matrix @ delta_m_num
+            sum_delta_m_den = abs(loop_matrix) @ delta_m_den
+            delta_m = np.zeros(len(loops))
+            solvable = ~np.isclose(sum_delta_m_den, 0)
+            delta_m[solvable] = -sum_delta_m_num[solvable] / sum_delta_m_den[solvable]
+
+            # apply mass flow correction to all edges of each loop
+            mass_flow_edge = mass_flow_edge + loop_matrix.T @ delta_m
             iterations = iterations + 1
+            if convergence_log is not None:
+                convergence_log.append({'iteration': iterations,
+                                        'max_mass_flow_change_kgs': max(abs(mass_flow_edge - m_old)),
+                                        'max_loop_pressure_loss_Pa': max(abs(sum_delta_m_num))})
 
             # adapt tolerance to reduce total amount of iterations
             if iterations < 20:
                 tolerance = 0.01
             elif iterations < 40:
                 tolerance = 0.02
-            elif iterations < 80:
+            elif iterations < MAX_LOOP_ITERATIONS:
                 tolerance = 0.04
             else:
                 print('No convergence of looped massflows after ', iterations, ' iterations with a remaining '
@@ -1124,18 +939,23 @@ def calc_mass_flow_edges(edge_node_df, mass_flow_substation_df, all_nodes_df, pi
                 break
         # print('Looped massflows converged after ', iterations, ' iterations.')
 
+    elif use_sparse_solver:  # no loops
+        # remove one equation (at plant node) to build a well-determined matrix, A.
+        mass_flow_edge = sparse_solver.IncidenceMatrixSolver.get(edge_node_csr, plant_index).solve_edge_flows(
+            edge_node_csr, node_mass_flow)
     else:  # no loops
         # remove one equation (at plant node) to build a well-determined matrix, A.
-        plant_index = np.where(all_nodes_df['Type'] == 'PLANT')[0][0]  # find index of the first plant node
         A = edge_node_df.drop(edge_node_df.index[plant_index])
         b = np.nan_to_num(mass_flow_substation_df.T)
         b = np.delete(b, plant_index)
         mass_flow_edge = np.linalg.solve(A.values, b)
 
     # verify calculated solution
-    plant_index = np.where(all_nodes_df['Type'] == 'PLANT')[0][0]  # find index of the first plant node
-    A = edge_node_df.drop(edge_node_df.index[plant_index])
-    b_verification = A.dot(mass_flow_edge)
+    if use_sparse_solver:
+        b_verification = np.delete(edge_node_csr @ mass_flow_edge, plant_index)
+    else:
+        A = edge_node_df.drop(edge_node_df.index[plant_index])
+        b_verification = A.dot(mass_flow_edge)
     b_original = np.nan_to_num(mass_flow_substation_df.T)
     b_original = np.delete(b_original, plant_index)
     if max(abs(b_original - b_verification)) > 0.01:
@@ -1150,6 +970,56 @@ def calc_mass_flow_edges(edge_node_df, mass_flow_substation_df, all_nodes_df, pi
     return mass_flow_edge
 
 
+def calc_loop_matrix(loops, graph, edge_node):
+    """
+    The loop-edge matrix of the fundamental loops of a network: 1 if the edge is part of the loop and points in the
+    direction of the loop (from the next node of the loop to the node), -1 if it points in the opposite direction and
+    0 if it is not part of the loop. It is the sign convention of the Hardy Cross method in ``calc_mass_flow_edges``.
+
+    :param list loops: the fundamental loops of the network, as lists of node indexes (see ``ThermalNetwork.find_loops``)
+    :param graph: networkx graph of the network, with the index of the edge between the nodes as ``edge_number``
+    :param ndarray edge_node: the edge-node matrix (n x e)
+    :return: loop-edge matrix (loops x e)
+    :rtype: scipy.sparse.csr_matrix
+    """
+    rows, columns, values = [], [], []
+    for i, loop in enumerate(loops):
+        for j, node in enumerate(loop):
+            next_node = loop[(j + 1) % len(loop)]
+            edge = graph.get_edge_data(node, next_node)['edge_number']
+            clockwise = 1 if edge_node[node, edge] == 1 and edge_node[next_node, edge] == -1 else -1
+            rows.append(i)
+            columns.append(edge)
+            values.append(clockwise)
+    return scipy.sparse.csr_matrix((values, (rows, columns)), shape=(len(loops), edge_node.shape[1]))
+
+
+def calc_mass_flow_edges_branched(edge_node_df, mass_flow_nodes, all_nodes_df):
+    """
+    Solve the mass flow rates of the edges of a network without loops for many time steps at once, as
+    ``calc_mass_flow_edges`` for each time step: the edge-node matrix without the first plant node is solved (or
+    factorized, see :py:mod:`cea.technologies.thermal_network.sparse_solver`) once for the mass flows of all the time
+    steps.
+
+    :param DataFrame edge_node_df: edge-node matrix of the network (n x e)
+    :param ndarray mass_flow_nodes: the mass flow rate required at each node n at each time step t  (t x n)
+    :param DataFrame all_nodes_df: DataFrame containing all nodes and whether a node n is a consumer or plant node
+
+    :return: the mass flow rate of each edge e at each time step t  (t x e)
+    :rtype: ndarray
+    """
+    mass_flow_nodes = np.nan_to_num(np.asarray(mass_flow_nodes, dtype=float))
+    plant_index = np.where(all_nodes_df['Type'] == 'PLANT')[0][0]  # find index of the first plant node
+    if edge_node_df.shape[1] >= SPARSE_SOLVER_MIN_EDGES:
+        edge_node_csr = sparse_solver.to_csr(edge_node_df)
+        solver = sparse_solver.IncidenceMatrixSolver.get(edge_node_csr, plant_index)
+        mass_flow_edges = solver.solve_edge_flows(edge_node_csr, mass_flow_nodes.T).T
+    else:
+        A = np.delete(np.asarray(edge_node_df, dtype=float), plant_index, axis=0)
+        mass_flow_edges = np.linalg.solve(A, np.delete(mass_flow_nodes, plant_index, axis=1).T).T
+    return np.round(mass_flow_edges, decimals=5)
+
+
 def calc_assign_diameter(max_flow, pipe_catalog):
     if max_flow < pipe_catalog['mdot_min_kgs'].min():
         return 'DN20'  # the smallest pipe
@@ -1313,16 +1183,23 @@ def calc_pressure_nodes(t_supply_node__k, t_return_node__k, thermal_network, t):
     # A12 * H + F(Q) = -A10 * H0 = 0
     # edge_node_transpose * pressure_nodes = - (pressure_loss_pipe) (Ax = b)
     # ToDo: does not apply for looped networks
-    edge_node_transpose = np.transpose(edge_node_df.values)
-    pressure_nodes_supply__pa = np.round(
-        np.transpose(
-            np.linalg.lstsq(edge_node_transpose, np.transpose(pressure_loss_pipe_supply__pa) * (-1), rcond=-1)[0]),
-        decimals=5)
-    pressure_nodes_return__pa = np.round(
-        np.transpose(
-            np.linalg.lstsq(-edge_node_transpose, np.transpose(pressure_loss_pipe_return__pa) * (-1), rcond=-1)[0]),
-        decimals=5)
-    return pressure_nodes_supply__pa[0], linear_pressure_loss_supply_Paperm[0], linear_pressure_loss_return_Paperm[0], \
+    if edge_node_df.shape[1] >= SPARSE_SOLVER_MIN_EDGES:
+        edge_node_csr = sparse_solver.to_csr(edge_node_df)
+        plant_index = np.where(thermal_network.all_nodes_df['Type'] == 'PLANT')[0][0]
+        solver = sparse_solver.IncidenceMatrixSolver.get(edge_node_csr, plant_index)
+        pressure_nodes_supply__pa = np.round(
+            solver.solve_node_potentials(edge_node_csr, pressure_loss_pipe_supply__pa * (-1)), decimals=5)
+    else:
+        edge_node_transpose = np.transpose(edge_node_df.values)
+        pressure_nodes_supply__pa = np.round(
+            np.transpose(
+                np.linalg.lstsq(edge_node_transpose, np.transpose(pressure_loss_pipe_supply__pa) * (-1), rcond=-1)[0]),
+            decimals=5)[0]
+        pressure_nodes_return__pa = np.round(
+            np.transpose(
+                np.linalg.lstsq(-edge_node_transpose, np.transpose(pressure_loss_pipe_return__pa) * (-1), rcond=-1)[0]),
+            decimals=5)
+    return pressure_nodes_supply__pa, linear_pressure_loss_supply_Paperm[0], linear_pressure_loss_return_Paperm[0], \
            pressure_loss_system__pa, pressure_loss_total_kw, pressure_loss_pipe_supply_kW[
                0], pressure_loss_substations_kW
 
@@ -1560,24 +1437,22 @@ def calc_darcy(pipe_diameter_m, reynolds, pipe_roughness_m):
        Fundamentals of Heat and Mass Transfer. https://doi.org/10.1016/j.applthermaleng.2011.03.022
     """
 
-    darcy = np.zeros(reynolds.size)
     # necessary to make sure pipe_diameter is 1D vector as input formats can vary
     if hasattr(pipe_diameter_m[0], '__len__'):
         pipe_diameter_m = pipe_diameter_m[0]
-    for rey in range(reynolds.size):
-        if reynolds[rey] <= 1:
-            darcy[rey] = 0
-        elif reynolds[rey] <= 2300:
-            # calculate the Darcy-Weisbach friction factor for laminar flow
-            darcy[rey] = 64 / reynolds[rey]
-        elif reynolds[rey] <= 5000:
-            # calculate the Darcy-Weisbach friction factor for transient flow (for pipe roughness of e/D=0.0002,
-            # @low reynolds numbers lines for smooth pipe nearl identical in Moody Diagram) so smooth pipe approximation used
-            darcy[rey] = 0.316 * reynolds[rey] ** -0.25
-        else:
-            # calculate the Darcy-Weisbach friction factor using the Swamee-Jain equation, applicable for Reynolds= 5000 - 10E8; pipe_roughness=10E-6 - 0.05
-            darcy[rey] = 1.325 * np.log(
-                pipe_roughness_m / (3.7 * pipe_diameter_m[rey]) + 5.74 / reynolds[rey] ** 0.9) ** (-2)
+    pipe_diameter_m = np.asarray(pipe_diameter_m, dtype=float)
+    reynolds = np.asarray(reynolds, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        # Darcy-Weisbach friction factor for laminar flow
+        darcy_laminar = 64 / reynolds
+        # Darcy-Weisbach friction factor for transient flow (for pipe roughness of e/D=0.0002, @low reynolds numbers
+        # lines for smooth pipe nearl identical in Moody Diagram) so smooth pipe approximation used
+        darcy_transient = 0.316 * reynolds ** -0.25
+        # Darcy-Weisbach friction factor using the Swamee-Jain equation, applicable for Reynolds= 5000 - 10E8;
+        # pipe_roughness=10E-6 - 0.05
+        darcy_turbulent = 1.325 * np.log(pipe_roughness_m / (3.7 * pipe_diameter_m) + 5.74 / reynolds ** 0.9) ** (-2)
+    darcy = np.select([reynolds <= 1, reynolds <= 2300, reynolds <= 5000],
+                      [0.0, darcy_laminar, darcy_transient], darcy_turbulent)
 
     return darcy
 
@@ -1708,14 +1583,16 @@ def calc_max_edge_flowrate(thermal_network, processes=1):
         print('\n Diameter iteration number ', iterations)
         diameter_guess_old = diameter_guess
 
-        # hourly_mass_flow_calculation
+        # hourly_mass_flow_calculation, in blocks of contiguous hours
         time_step_slice = range(thermal_network.start_t, thermal_network.stop_t)
-        nhours = thermal_network.stop_t - thermal_network.start_t
+        hour_blocks = calc_hour_blocks(thermal_network.start_t, thermal_network.stop_t, processes)
 
-        mass_flows = cea.utilities.parallel.vectorize(hourly_mass_flow_calculation, processes)(
-            time_step_slice,
-            repeat(diameter_guess, nhours),
-            repeat(thermal_network, nhours))
+        block_mass_flows = cea.utilities.parallel.vectorize(block_mass_flow_calculation, processes)(
+            [start_t for start_t, _ in hour_blocks],
+            [stop_t for _, stop_t in hour_blocks],
+            repeat(diameter_guess, len(hour_blocks)),
+            repeat(thermal_network, len(hour_blocks)))
+        mass_flows = list(chain.from_iterable(block_mass_flows))
 
         # write mass flows to the dataframes
         thermal_network.edge_mass_flow_df.iloc[time_step_slice] = [mfe[0] for mfe in mass_flows]
@@ -1834,21 +1711,7 @@ def hourly_mass_flow_calculation(t, diameter_guess, thermal_network):
 
     print('calculating mass flows in edges... time step', t)
 
-    if thermal_network.network_type == 'DH':
-        # set to the highest value in the network and assume no loss within the network
-        T_substation_supply_K = np.array(
-            [float(thermal_network.t_target_supply_C.iloc[t].max()) + 273.15] * len(
-                thermal_network.buildings_demands.keys())).reshape(
-            1, len(thermal_network.buildings_demands.keys()))  # in [K]
-    else:
-        # set to the highest value in the network and assume no loss within the network
-        T_substation_supply_K = np.array(
-            [float(thermal_network.t_target_supply_C.iloc[t].min()) + 273.15] * len(
-                thermal_network.buildings_demands.keys())).reshape(
-            1, len(thermal_network.buildings_demands.keys()))  # in [K]
-
-    T_substation_supply_K = pd.DataFrame(T_substation_supply_K,
-                                         columns=thermal_network.buildings_demands.keys(), index=['T_supply'])
+    T_substation_supply_K = calc_substation_supply_temperature(t, thermal_network)
 
     min_edge_flow_flag = False
     if t not in thermal_network.delta_cap_mass_flow.keys():
@@ -1858,24 +1721,8 @@ def hourly_mass_flow_calculation(t, diameter_guess, thermal_network):
     while min_edge_flow_flag is False:  # too low edge mass flows
         reset_min_mass_flow_variables(thermal_network, t)  # reset storage variables
         # calculate substation flow rates and return temperatures
-        if thermal_network.network_type == 'DH' or (
-                thermal_network.network_type == 'DC' and math.isnan(T_substation_supply_K.values[0][0]) is False):
-            _, mdot_all, thermal_demand_for_t = substation_matrix.substation_return_model_main(thermal_network,
-                                                                                               T_substation_supply_K, t,
-                                                                                               thermal_network.building_names)
-        else:
-            mdot_all = pd.DataFrame(data=np.zeros(len(thermal_network.buildings_demands.keys())),
-                                    index=thermal_network.buildings_demands.keys()).T
-            for key in thermal_network.substation_heating_systems:
-                key = 'hs_' + key
-                thermal_network.ch_value[key][t] = 0
-            for key in thermal_network.substation_cooling_systems:
-                key = 'cs_' + key
-                thermal_network.cc_value[key][t] = 0
-            thermal_demand_for_t = np.zeros(len(thermal_network.building_names))
-        # write consumer substation required flow rate to nodes
-        required_flow_rate_df = write_substation_values_to_nodes_df(thermal_network.all_nodes_df, mdot_all)
-        # (1 x n)
+        required_flow_rate_df, thermal_demand_for_t = calc_required_flow_rate(t, T_substation_supply_K,
+                                                                              thermal_network)
 
         # initial guess temperature
         T_edge_K_initial = np.array([T_substation_supply_K.values[0][0]] * thermal_network.edge_node_df.shape[1])
@@ -1898,6 +1745,130 @@ def hourly_mass_flow_calculation(t, diameter_guess, thermal_network):
     return mass_flow_edges_for_t, mass_flow_nodes_for_t, thermal_demand_for_t
 
 
+def block_mass_flow_calculation(start_t, stop_t, diameter_guess, thermal_network):
+    """
+    This function calculates the edge mass flows and node mass flows of a block of contiguous hours, as
+    ``hourly_mass_flow_calculation`` for each hour. The edge mass flows of a branched network are solved for all the
+    hours of the block at once (one linear system with a column per hour), also in the minimum mass flow iterations
+    (the hours that need another iteration are solved together). The state the hours leave on ``thermal_network`` is
+    cleared at the end of the block (see ``clear_hourly_state``).
+
+    :param int start_t: first timestep of the block
+    :param int stop_t: timestep after the last timestep of the block
+    :param diameter_guess: Pipe diameter values
+    :param ThermalNetwork thermal_network: object holding all the information about the thermal network
+    :return: the edge mass flows, node mass flows and thermal demand of each hour of the block
+    :rtype: list[tuple]
+    """
+    time_steps = range(start_t, stop_t)
+    temperature_control = thermal_network.temperature_control
+    try:
+        loops, _ = thermal_network.find_loops()
+        if loops:
+            # the mass flows of looped networks are iterated hour by hour (see calc_mass_flow_edges)
+            return [hourly_mass_flow_calculation(t, diameter_guess, thermal_network) for t in time_steps]
+        return branched_block_mass_flow_calculation(start_t, stop_t, thermal_network)
+    finally:
+        clear_hourly_state(thermal_network, time_steps, temperature_control)
+
+
+def branched_block_mass_flow_calculation(start_t, stop_t, thermal_network):
+    """
+    The edge mass flows, node mass flows and thermal demand of a block of contiguous hours of a branched network (see
+    ``block_mass_flow_calculation``).
+
+    :rtype: list[tuple]
+    """
+    time_steps = range(start_t, stop_t)
+    print('calculating mass flows in edges... time steps', start_t, 'to', stop_t - 1)
+    T_substation_supply_K = {}
+    iterations = {}
+    for t in time_steps:
+        T_substation_supply_K[t] = calc_substation_supply_temperature(t, thermal_network)
+        iterations[t] = 0
+        if t not in thermal_network.delta_cap_mass_flow.keys():
+            thermal_network.delta_cap_mass_flow[t] = 0
+        reset_min_mass_flow_variables(thermal_network, t)
+
+    results = {}
+    remaining_time_steps = list(time_steps)
+    while remaining_time_steps:  # hours with too low edge mass flows
+        required_flow_rates = {}
+        for t in remaining_time_steps:
+            reset_min_mass_flow_variables(thermal_network, t)  # reset storage variables
+            required_flow_rates[t] = calc_required_flow_rate(t, T_substation_supply_K[t], thermal_network)
+
+        # solve mass flow rates on edges for all the hours at once
+        mass_flow_nodes = np.array([required_flow_rates[t][0].values[0] for t in remaining_time_steps], dtype=float)
+        mass_flow_edges = calc_mass_flow_edges_branched(thermal_network.edge_node_df, mass_flow_nodes,
+                                                        thermal_network.all_nodes_df)
+
+        next_time_steps = []
+        for t, mass_flow_edges_for_t, mass_flow_nodes_for_t in zip(remaining_time_steps, mass_flow_edges,
+                                                                   mass_flow_nodes):
+            iterations[t], min_edge_flow_flag = edge_mass_flow_iteration(thermal_network, mass_flow_edges_for_t,
+                                                                         iterations[t], t)
+            if min_edge_flow_flag:
+                thermal_demand_for_t = required_flow_rates[t][1].reshape((len(thermal_network.building_names),))
+                results[t] = mass_flow_edges_for_t, mass_flow_nodes_for_t, thermal_demand_for_t
+            else:
+                next_time_steps.append(t)
+        remaining_time_steps = next_time_steps
+    return [results[t] for t in time_steps]
+
+
+def calc_substation_supply_temperature(t, thermal_network):
+    """
+    The supply temperature of the substations used to calculate the mass flows for the pipe sizing: the highest (DH)
+    or lowest (DC) target supply temperature of the network, assuming no losses in the network.
+
+    :return: the supply temperature of each substation [K] (1 x buildings)
+    :rtype: DataFrame
+    """
+    if thermal_network.network_type == 'DH':
+        # set to the highest value in the network and assume no loss within the network
+        T_substation_supply_K = np.array(
+            [float(thermal_network.t_target_supply_C.iloc[t].max()) + 273.15] * len(
+                thermal_network.buildings_demands.keys())).reshape(
+            1, len(thermal_network.buildings_demands.keys()))  # in [K]
+    else:
+        # set to the highest value in the network and assume no loss within the network
+        T_substation_supply_K = np.array(
+            [float(thermal_network.t_target_supply_C.iloc[t].min()) + 273.15] * len(
+                thermal_network.buildings_demands.keys())).reshape(
+            1, len(thermal_network.buildings_demands.keys()))  # in [K]
+
+    return pd.DataFrame(T_substation_supply_K, columns=thermal_network.buildings_demands.keys(), index=['T_supply'])
+
+
+def calc_required_flow_rate(t, T_substation_supply_K, thermal_network):
+    """
+    Calculate the flow rates required by the substations and write them to the nodes.
+
+    :return: the required flow rate of each node (1 x n) and the thermal demand of each building
+    :rtype: tuple[DataFrame, ndarray]
+    """
+    if thermal_network.network_type == 'DH' or (
+            thermal_network.network_type == 'DC' and math.isnan(T_substation_supply_K.values[0][0]) is False):
+        _, mdot_all, thermal_demand_for_t = substation_matrix.substation_return_model_main(thermal_network,
+                                                                                           T_substation_supply_K, t,
+                                                                                           thermal_network.building_names)
+    else:
+        mdot_all = pd.DataFrame(data=np.zeros(len(thermal_network.buildings_demands.keys())),
+                                index=thermal_network.buildings_demands.keys()).T
+        for key in thermal_network.substation_heating_systems:
+            key = 'hs_' + key
+            thermal_network.ch_value[key][t] = 0
+        for key in thermal_network.substation_cooling_systems:
+            key = 'cs_' + key
+            thermal_network.cc_value[key][t] = 0
+        thermal_demand_for_t = np.zeros(len(thermal_network.building_names))
+    # write consumer substation required flow rate to nodes
+    required_flow_rate_df = write_substation_values_to_nodes_df(thermal_network.all_nodes_df, mdot_all)
+    # (1 x n)
+    return required_flow_rate_df, thermal_demand_for_t
+
+
 def edge_mass_flow_iteration(thermal_network, edge_mass_flow_df, iteration_counter, t):
     """
 
@@ -2556,8 +2527,7 @@ def calc_supply_temperatures(t, edge_node_df, mass_flow_df, k, thermal_network):
     z_pipe_out = z.clip(min=0)  # pipe outlet matrix
     z_pipe_in = z.clip(max=0)  # pipe inlet matrix
 
-    m_d = np.zeros((z.shape[1], z.shape[1]))  # (exe) pipe mass flow rate matrix
-    np.fill_diagonal(m_d, mass_flow_df)
+    m_d = np.array(mass_flow_df, dtype=float).ravel()  # (e) pipe mass flow rates
 
     # matrices to store results
     t_e_out = z_pipe_out.copy()
@@ -2609,7 +2579,7 @@ def calc_supply_temperatures(t, edge_node_df, mass_flow_df, k, thermal_network):
             # Identify all nodes with no in or outflows and delete those values from the z matrixes
             # This is necessary to avoid getting stuck in a loop network with no mass flows inside the loop
             for i in range(z_note.shape[0]):
-                if np.isclose(sum(np.dot(m_d, z_pipe_out[i])), 0.0) and np.isclose(sum(np.dot(m_d, z_pipe_in[i])), 0.0):
+                if np.isclose(sum(m_d * z_pipe_out[i]), 0.0) and np.isclose(sum(m_d * z_pipe_in[i]), 0.0):
                     t_node[i] = np.nan
                     # no in our outflows, clear in and outflows at this node
                     # and clear node incoming flows from the corresponding edges
@@ -2751,9 +2721,9 @@ def calc_supply_temperatures(t, edge_node_df, mass_flow_df, k, thermal_network):
     # calculate pipe heat losses
     q_loss_edges_kw = np.zeros(z_note.shape[1])
     for edge in range(z_note.shape[1]):
-        if m_d[edge, edge] > 0:
+        if m_d[edge] > 0:
             dT_edge = np.nanmax(t_e_in[:, edge]) - np.nanmax(t_e_out[:, edge])
-            q_loss_edges_kw[edge] = m_d[edge, edge] * HEAT_CAPACITY_OF_WATER_JPERKGK / 1000 * dT_edge  # kW
+            q_loss_edges_kw[edge] = m_d[edge] * HEAT_CAPACITY_OF_WATER_JPERKGK / 1000 * dT_edge  # kW
 
     return t_node.T, plant_node, q_loss_edges_kw, switch_control
 
@@ -2765,7 +2735,7 @@ def calculate_outflow_temp(z, z_note, m_d, t_e_out, z_pipe_out, t_node, t_e_in,
 
     :param z: copy of edge-node matrix (n x e)
     :param z_note: copy of z matrix (n x e)
-    :param m_d: pipe mass flow rate matrix (e x e)
+    :param m_d: pipe mass flow rates (e)
     :param t_e_out: storage for outflow temperatures (n x e)
     :param z_pipe_out: matrix storing only outflow index (n x e)
     :param t_node: node temperature vector (n x 1)
@@ -2776,7 +2746,7 @@ def calculate_outflow_temp(z, z_note, m_d, t_e_out, z_pipe_out, t_node, t_e_in,
 
     :type z: dataframe (n x e)
     :type z_note: dataframe(n x e)
-    :type m_d: dataframe(e x e)
+    :type m_d: ndarray (e)
     :type t_e_out: dataframe (n x e)
     :type z_pipe_out: dataframe (n x e)
     :type t_node: ndarray (n x 1)
@@ -2787,7 +2757,7 @@ def calculate_outflow_temp(z, z_note, m_d, t_e_out, z_pipe_out, t_node, t_e_in,
 
     :return z: copy of edge-node matrix (n x e)
     :return z_note: copy of z matrix (n x e)
-    :return m_d: pipe mass flow rate matrix (e x e)
+    :return m_d: pipe mass flow rates (e)
     :return t_e_out: storage for outflow temperatures (n x e)
     :return z_pipe_out: matrix storing only outflow index (n x e)
     :return t_node: node temperature vector (n x 1)
@@ -2797,7 +2767,7 @@ def calculate_outflow_temp(z, z_note, m_d, t_e_out, z_pipe_out, t_node, t_e_in,
 
     :rtype z: dataframe (n x e)
     :rtype z_note: dataframe(n x e)
-    :rtype m_d: dataframe(e x e)
+    :rtype m_d: ndarray (e)
     :rtype t_e_out: dataframe (n x e)
     :rtype z_pipe_out: dataframe (n x e)
     :rtype t_node: ndarray (n x 1)
@@ -2810,8 +2780,8 @@ def calculate_outflow_temp(z, z_note, m_d, t_e_out, z_pipe_out, t_node, t_e_in,
         # check if all inlet flow info towards node j are known (only -1 left in row Z_note[j])
         if np.count_nonzero(z_note[j] == 1) == 0 and np.count_nonzero(z_note[j] == 0) != z.shape[1]:
             # calculate node temperature with merging flows from pipes
-            part1 = np.dot(m_d, np.nan_to_num(t_e_out[j])).sum()  # sum of massflows entering node * Entry Temperature
-            part2 = np.dot(m_d, z_pipe_out[j]).sum()  # total massflow leaving node
+            part1 = (m_d * np.nan_to_num(t_e_out[j])).sum()  # sum of massflows entering node * Entry Temperature
+            part2 = (m_d * z_pipe_out[j]).sum()  # total massflow leaving node
             t_node[j] = part1 / part2
             if np.isnan(t_node[j]):
                 raise ValueError('There are no flow entering/existing node', j,
@@ -2867,11 +2837,7 @@ def calc_return_temperatures(t_ground, edge_node_df, mass_flow_df, mass_flow_sub
     z_pipe_out = z.clip(min=0)  # pipe outlet matrix
     z_pipe_in = z.clip(max=0)  # pipe inlet matrix
 
-    m_sub = np.zeros((z.shape[0], z.shape[0]))  # (nxn) substation flow rate matrix
-    np.fill_diagonal(m_sub, mass_flow_substation_df)
-
-    m_d = np.zeros((z.shape[1], z.shape[1]))  # (exe) pipe mass flow rate matrix
-    np.fill_diagonal(m_d, mass_flow_df)
+    m_d = np.array(mass_flow_df, dtype=float).ravel()  # (e) pipe mass flow rates
 
     # matrices to store results
     t_e_out = z_pipe_out.copy()
@@ -2894,13 +2860,13 @@ def calc_return_temperatures(t_ground, edge_node_df, mass_flow_df, mass_flow_sub
         t_e_out = z_pipe_out.copy()
         t_e_in = z_pipe_in.copy().dot(-1)
         t_node = np.zeros(z.shape[0])
-        m_sub = np.zeros((z.shape[0], z.shape[0]))  # (nxn) substation flow rate matrix
-        np.fill_diagonal(m_sub, mass_flow_substation_df)
+        # (n) substation flow rates flowing into the return line (not the plants)
+        m_sub = np.array(mass_flow_substation_df, dtype=float).ravel().clip(min=0)
 
         # Identify all nodes with no in or outflows and delete those values from the z matrixes
         # This is necessary to avoid getting stuck in a loop network with no mass flows inside the loop
         for i in range(z_note.shape[0]):
-            if np.isclose(sum(np.dot(m_d, z_pipe_out[i])), 0) and np.isclose(sum(np.dot(m_d, z_pipe_in[i])), 0):
+            if np.isclose(sum(m_d * z_pipe_out[i]), 0) and np.isclose(sum(m_d * z_pipe_in[i]), 0):
                 t_node[i] = np.nan
                 # no in our outflows, clear in and outflows at this node
                 # and clear node incoming flows from the corresponding edges
@@ -2985,9 +2951,9 @@ def calc_return_temperatures(t_ground, edge_node_df, mass_flow_df, mass_flow_sub
         # calculate pipe heat losses
         q_loss_edges_kW = np.zeros(z_note.shape[1])
         for edge in range(z_note.shape[1]):
-            if m_d[edge, edge] > 0:
+            if m_d[edge] > 0:
                 dT_edge = np.nanmax(t_e_in[:, edge]) - np.nanmax(t_e_out[:, edge])
-                q_loss_edges_kW[edge] = m_d[edge, edge] * HEAT_CAPACITY_OF_WATER_JPERKGK / 1000 * dT_edge  # kW
+                q_loss_edges_kW[edge] = m_d[edge] * HEAT_CAPACITY_OF_WATER_JPERKGK / 1000 * dT_edge  # kW
 
         delta_temp_0 = np.max(abs(t_e_out_old - t_e_out))
         temp_iter = temp_iter + 1
@@ -3000,31 +2966,30 @@ def calc_return_node_temperature(index, m_d, t_e_out, t_return, z_pipe_out, m_su
     The function calculates the node temperature with merging flows from pipes in the return line.
 
     :param index: node index
-    :param m_d: pipe mass flow matrix (exe)
+    :param m_d: pipe mass flow rates (e)
     :param t_e_out: pipe outlet temperatures in edge node matrix (nxe)
     :param t_return: list of substation return temperatures
     :param z_pipe_out: pipe outlet matrix (nxe)
-    :param m_sub: DataFrame substation flow rate
+    :param m_sub: substation flow rates (n)
 
     :type index: floatT_return_all_2
-    :type m_d: DataFrame
+    :type m_d: ndarray
     :type t_e_out: DataFrame
     :type t_return: list
     :type z_pipe_out: DataFrame
-    :type m_sub: DataFrame
+    :type m_sub: ndarray
 
     :returns t_node: node temperature with merging flows in the return line
     :rtype t_node: float
 
     """
-    total_mass_flow_to_node = np.dot(m_d, z_pipe_out[index]).sum() + m_sub[index].max()
+    total_mass_flow_to_node = (m_d * z_pipe_out[index]).sum() + m_sub[index]
     if np.isclose(total_mass_flow_to_node, 0):
         # set node temperature to nan if no flow to node
         t_node = np.nan
     else:
-        total_mcp_from_edges = np.dot(m_d, np.nan_to_num(t_e_out[index])).sum()
-        total_mcp_from_substations = 0 if np.isclose(m_sub[index].max(), 0) else np.dot(m_sub[index].max(),
-                                                                                        t_return.values[0, index])
+        total_mcp_from_edges = (m_d * np.nan_to_num(t_e_out[index])).sum()
+        total_mcp_from_substations = 0 if np.isclose(m_sub[index], 0) else m_sub[index] * t_return.values[0, index]
         t_node = (total_mcp_from_edges + total_mcp_from_substations) / total_mass_flow_to_node
     return t_node
 
@@ -3036,8 +3001,8 @@ def calc_t_out(node, edge, k_old, m_d, z, t_e_in, t_e_out, t_ground, z_note, the
 
     :param node: node index
     :param edge: edge indices
-    :param k_old: DataFrame of aggregated heat conduction coefficient for each pipe (exe)
-    :param m_d: DataFrame of pipe flow rate (exe)
+    :param k_old: aggregated heat conduction coefficient of each pipe (e)
+    :param m_d: pipe flow rates (e)
     :param z: DataFrame of  edge_node_matrix (nxe)
     :param t_e_in: DataFrame of pipe inlet temperatures [K] in edge_node_matrix (nxe)
     :param t_e_out: DataFrame of  pipe outlet temperatures [K] in edge_node_matrix (nxe)
@@ -3047,7 +3012,7 @@ def calc_t_out(node, edge, k_old, m_d, z, t_e_in, t_e_out, t_ground, z_note, the
     :type node: float
     :type edge: np array
     :type k_old: [kW/K]
-    :type m_d: DataFrame
+    :type m_d: ndarray
     :type z: DataFrame
     :type t_e_in: DataFrame
     :type t_e_out: DataFrame
@@ -3063,12 +3028,10 @@ def calc_t_out(node, edge, k_old, m_d, z, t_e_in, t_e_out, t_ground, z_note, the
     if isinstance(edge, np.ndarray) is False:
         edge = np.array([edge])
 
-    m_d = np.round(m_d, decimals=5)  # round to avoid errors at very very low massflows
-
     for i in range(edge.size):
         e = edge[i]
-        k = k_old[e, e]
-        m = m_d[e, e]
+        k = k_old[e]
+        m = np.round(m_d[e], decimals=5)  # round to avoid errors at very very low massflows
         out_node_index = np.where(z[:, e] == 1)[0].max()
         if np.isclose(abs(m), 0) and np.isclose(z_note[node, e], -1):
             # set outlet temperature to nan if no flow is going out from node to connected edges
@@ -3124,7 +3087,7 @@ def calc_aggregated_heat_conduction_coefficient(mass_flow, edge_df, pipe_propert
     :type pipe_properties_df: DataFrame
     :type edge_df: DataFrame
 
-    :return k_all: DataFrame of aggregated heat conduction coefficients (1 x e) for all edges
+    :return k_all: array of aggregated heat conduction coefficients (1 x e) for all edges
 
     ..[Wang et al, 2016] Wang J., Zhou, Z., Zhao, J. (2016). A method for the steady-state thermal simulation of
       district heating systems and model parameters calibration. Eenergy Conversion and Management, 120, 294-305.
@@ -3179,7 +3142,7 @@ def calc_aggregated_heat_conduction_coefficient(mass_flow, edge_df, pipe_propert
         # calculate the aggregated heat conduction coefficient, equation (4) in Wang et al., 2016
         k = L_pipe[pipe] * (1 + extra_heat_transfer_coef) / (R_pipe + R_insulation + R_ground + R_conv) / 1000  # [kW/K]
         k_all.append(k)
-    k_all = abs(np.diag(k_all))
+    k_all = np.abs(k_all)
     return k_all
 
 
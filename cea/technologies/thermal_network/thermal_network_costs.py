@@ -13,6 +13,7 @@ import cea.technologies.pumps as pumps
 import cea.technologies.chiller_vapor_compression as VCCModel
 import cea.technologies.cooling_tower as CTModel
 from cea.constants import HOURS_IN_YEAR
+from cea.demand.demand_writers import read_hourly_demand
 from cea.technologies.heat_exchangers import calc_Cinv_HEX_hisaka
 from cea.utilities import epwreader
 from cea.technologies.supply_systems_database import SupplySystemsDatabase
@@ -162,8 +163,7 @@ def calc_Ctot_cooling_plants(network_info):
         # Read in building demand
         building_demand = {}
         for building in network_info.building_names:
-            building_demand[building] = pd.read_csv(
-                network_info.locator.get_demand_results_file(building))
+            building_demand[building] = read_hourly_demand(network_info.locator, building)
 
         Capex_a_chiller_USD = 0.0
         Opex_fixed_chiller = 0.0
@@ -254,7 +254,7 @@ def calc_Ctot_cs_building_scale_loads(network_info):
                 if building_index not in network_info.disconnected_buildings_index:
                     # if this building is disconnected it will be calculated separately
                     # Read in building demand
-                    building_demand = pd.read_csv(network_info.locator.get_demand_results_file(building))
+                    building_demand = read_hourly_demand(network_info.locator, building)
                     if not system_string:
                         # this means there are no disconnected loads. Shouldn't happen but is a fail-safe
                         peak_demand_kW = 0.0
@@ -388,7 +388,7 @@ def calc_Ctot_cs_building_scale_buildings(network_info):
             Opex_var_system = 0.0
             if building_index in network_info.disconnected_buildings_index:  # disconnected building
                 # Read in demand of building
-                building_demand = pd.read_csv(network_info.locator.get_demand_results_file(building))
+                building_demand = read_hourly_demand(network_info.locator, building)
                 # sum up demand of all loads
                 demand_hourly_kWh = building_demand['Qcs_sys_scu_kWh'].abs() + \
                                     building_demand['Qcs_sys_ahu_kWh'].abs() + \
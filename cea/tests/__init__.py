@@ -33,6 +33,10 @@ def main(config):
     elif test_type == "integration":
         TestWorkflows()._test_workflows()
 
+    elif test_type == "benchmark":
+        import cea.tests.benchmark_demand
+        cea.tests.benchmark_demand.main(config)
+
     else:
         raise Exception(f"Test type '{test_type}' not supported")
 
@@ -0,0 +1,298 @@
+"""
+Benchmark of the demand pipeline on synthetic districts (``cea test --type benchmark``).
+
+The synthetic districts are created from the reference case (``cea/examples/reference-case-open.zip``): the buildings
+of the reference case are drawn at random (with a fixed seed) and copied to a grid next to each other, with their
+building properties and radiation results. For each district size the stages of ``test:benchmark-stages`` (by default
+the ``BuildingProperties``, the ``schedule-maker`` and the ``demand``; the ``solar-collector`` and the
+``photovoltaic-thermal`` potentials can be added) are run in a separate process to record the throughput (buildings
+per second) and the peak resident set size of each stage.
+
+The results are written to a json file, which can be used as the baseline of a later run (e.g. of another CEA
+release or with another ``demand:engine``): the speedup of each stage compared to the baseline is printed and the run
+fails if the throughput drops, the peak memory grows by more than the tolerance, or the district totals of the demand
+change.
+
+This benchmark runs offline, but only on Linux (it uses ``fork`` and ``resource.getrusage``).
+"""
+
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+import geopandas as gpd
+import libpysal.io
+import numpy as np
+import pandas as pd
+from shapely import affinity
+
+import cea
+import cea.config
+import cea.inputlocator
+import cea.utilities.parallel
+from cea.resources.radiation import sensor_store
+from cea.utilities.dbf import dbf_to_dataframe, dataframe_to_dbf
+
+BENCHMARK_STAGES = ['building-properties', 'schedule-maker', 'demand', 'solar-collector', 'photovoltaic-thermal']
+
+# relative tolerance of the district totals of the demand when comparing to the baseline (the results are rounded)
+TOTALS_RTOL = 1e-4
+
+
+def create_synthetic_scenario(reference_locator, scenario, number_of_buildings, seed):
+    """
+    Create a scenario with ``number_of_buildings`` buildings drawn from the reference case.
+
+    :param reference_locator: the locator of the reference case (with building properties and radiation results)
+    :type reference_locator: cea.inputlocator.InputLocator
+    :param str scenario: the folder of the synthetic scenario (it is overwritten)
+    :param int number_of_buildings: number of buildings of the synthetic scenario
+    :param int seed: seed of the random selection of the buildings
+
+    :returns: the locator of the synthetic scenario
+    :rtype: cea.inputlocator.InputLocator
+    """
+    if os.path.exists(scenario):
+        shutil.rmtree(scenario)
+    shutil.copytree(os.path.join(reference_locator.scenario, 'inputs'), os.path.join(scenario, 'inputs'))
+    locator = cea.inputlocator.InputLocator(scenario)
+
+    zone = gpd.read_file(reference_locator.get_zone_geometry())
+    rng = np.random.default_rng(seed)
+    sources = rng.choice(len(zone), size=number_of_buildings)
+    names = ['B%05d' % i for i in range(number_of_buildings)]
+    source_names = list(zone['Name'].values[sources])
+
+    # place the copies of the buildings on a grid of copies of the reference case
+    minx, miny, maxx, maxy = zone.total_bounds
+    columns = int(np.ceil(np.sqrt(number_of_buildings / float(len(zone)))))
+    synthetic_zone = zone.iloc[sources].copy()
+    synthetic_zone['geometry'] = [
+        affinity.translate(geometry, xoff=(i // len(zone) % columns) * (maxx - minx) * 1.1,
+                           yoff=(i // len(zone) // columns) * (maxy - miny) * 1.1)
+        for i, geometry in enumerate(synthetic_zone.geometry)]
+    synthetic_zone['Name'] = names
+    synthetic_zone.to_file(locator.get_zone_geometry())
+
+    for dbf_path in [locator.get_building_typology(), locator.get_building_architecture(),
+                     locator.get_building_air_conditioning(), locator.get_building_comfort(),
+                     locator.get_building_internal(), locator.get_building_supply()]:
+        dbf = libpysal.io.open(dbf_path)
+        specs = dbf.field_spec
+        dbf.close()
+        reference = dbf_to_dataframe(dbf_path)
+        properties = reference.set_index('Name').loc[source_names].reset_index()[reference.columns]
+        properties['Name'] = names
+        dataframe_to_dbf(properties, dbf_path, specs=specs)
+
+    # the radiation results are read-only, link them instead of copying them where possible
+    for name, source_name in zip(names, source_names):
+        if not os.path.exists(reference_locator.get_radiation_building(source_name)):
+            raise Exception('The reference case has no radiation results for building %s' % source_name)
+        for get_radiation_file in [locator.get_radiation_building, locator.get_radiation_metadata]:
+            source = getattr(reference_locator, get_radiation_file.__name__)(source_name)
+            if not os.path.exists(source):
+                continue
+            try:
+                os.link(source, get_radiation_file(name))
+            except OSError:
+                shutil.copyfile(source, get_radiation_file(name))
+
+    # the radiation of the sensors is only used by the solar technologies
+    try:
+        sensor_radiation = {source_name: sensor_store.read_sensor_radiation(reference_locator, source_name).values.T
+                            for source_name in set(source_names)}
+    except FileNotFoundError:
+        return locator
+    writer = sensor_store.SensorStoreWriter(locator, names, [len(sensor_radiation[s]) for s in source_names])
+    for name, source_name in zip(names, source_names):
+        writer.write(name, sensor_radiation[source_name])
+    writer.close()
+    return locator
+
+
+def run_stage(stage, config, seed):
+    """run a stage of the benchmark on ``config.scenario`` - this is called in a separate process"""
+    np.random.seed(seed)
+    locator = cea.inputlocator.InputLocator(config.scenario)
+    if stage == 'building-properties':
+        from cea.demand.building_properties import BuildingProperties
+        from cea.utilities import epwreader
+        BuildingProperties(locator, epwreader.epw_reader(locator.get_weather_file()))
+    elif stage == 'schedule-maker':
+        from cea.demand.schedule_maker.schedule_maker import schedule_maker_main
+        schedule_maker_main(locator, config)
+    elif stage == 'demand':
+        from cea.demand.demand_main import demand_calculation
+        demand_calculation(locator, config)
+    elif stage == 'solar-collector':
+        from cea.technologies.solar.solar_collector import main as solar_collector
+        solar_collector(config)
+    elif stage == 'photovoltaic-thermal':
+        from cea.technologies.solar.photovoltaic_thermal import main as photovoltaic_thermal
+        photovoltaic_thermal(config)
+    else:
+        raise ValueError('Unknown benchmark stage: %s' % stage)
+
+
+def __measure_stage(stage, config, seed, queue):
+    time_start = time.perf_counter()
+    run_stage(stage, config, seed)
+    wall_time = time.perf_counter() - time_start
+    # the worker processes of the stage are kept alive for later calls (see cea.utilities.parallel.get_pool): they
+    # are only counted by RUSAGE_CHILDREN once they are reaped. The process of the Manager relaying their output is
+    # not counted
+    cea.utilities.parallel.shutdown_pool()
+    # ru_maxrss is in kilobytes on Linux
+    peak_rss = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                   resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss) / 1024.0
+    queue.put((wall_time, peak_rss))
+
+
+def measure_stage(stage, config, seed):
+    """
+    Run a stage of the benchmark in a new process.
+
+    :returns: wall time [s] and peak resident set size [MB] of the stage
+    """
+    context = multiprocessing.get_context('fork')
+    queue = context.Queue()
+    process = context.Process(target=__measure_stage, args=(stage, config, seed, queue))
+    process.start()
+    process.join()
+    if process.exitcode != 0:
+        raise Exception('Benchmark stage %s failed for scenario %s' % (stage, config.scenario))
+    return queue.get()
+
+
+def calc_district_totals(locator):
+    """sum of the yearly values of all buildings in Total_demand.csv"""
+    total_demand = pd.read_csv(locator.get_total_demand())
+    return {column: float(value) for column, value in total_demand.select_dtypes('number').sum().items()}
+
+
+def run_benchmark(config, sizes, stages, seed, folder):
+    """
+    Run the benchmark for each district size.
+
+    :returns: the benchmark results (see module documentation)
+    :rtype: dict
+    """
+    from cea.datamanagement.archetypes_mapper import archetypes_mapper
+    from cea.datamanagement.data_initializer import main as data_initializer
+
+    reference_locator = cea.inputlocator.ReferenceCaseOpenLocator()
+    config.scenario = reference_locator.scenario
+    config.data_initializer.databases_path = "CH"
+    config.data_initializer.databases = ["archetypes", "assemblies", "components"]
+    data_initializer(config)
+    archetypes_mapper(reference_locator, True, True, True, True, True, True,
+                      reference_locator.get_zone_building_names())
+
+    results = {'cea_version': cea.__version__,
+               'python': sys.version.split()[0],
+               'platform': platform.platform(),
+               'cpu_count': multiprocessing.cpu_count(),
+               'number_of_processes': config.get_number_of_processes(),
+               'engine': config.demand.engine,
+               'seed': seed,
+               'stages': [],
+               'totals': {}}
+    for size in sizes:
+        scenario = os.path.join(folder, 'benchmark-%i' % size)
+        locator = create_synthetic_scenario(reference_locator, scenario, size, seed)
+        config.scenario = scenario
+        config.demand.buildings = []
+        config.schedule_maker.buildings = []
+        config.schedule_maker.random_seed = seed
+        config.solar.buildings = []
+        for stage in stages:
+            wall_time, peak_rss = measure_stage(stage, config, seed)
+            print('Benchmark with {size} buildings - {stage}: {throughput:.2f} buildings/s, peak RSS {rss:.0f} MB'.format(
+                size=size, stage=stage, throughput=size / wall_time, rss=peak_rss))
+            results['stages'].append({'buildings': size, 'stage': stage, 'wall_time_s': wall_time,
+                                      'buildings_per_s': size / wall_time, 'peak_rss_MB': peak_rss})
+        if 'demand' in stages:
+            results['totals'][str(size)] = calc_district_totals(locator)
+        shutil.rmtree(scenario)
+    return results
+
+
+def compare_to_baseline(results, baseline, tolerance):
+    """
+    Compare the benchmark results to a baseline.
+
+    :param float tolerance: relative tolerance of the throughput and the peak memory
+    :returns: the regressions found (an empty list if there are none)
+    :rtype: list[str]
+    """
+    regressions = []
+    baseline_stages = {(s['buildings'], s['stage']): s for s in baseline['stages']}
+    for stage in results['stages']:
+        expected = baseline_stages.get((stage['buildings'], stage['stage']))
+        if expected is None:
+            continue
+        if stage['buildings_per_s'] < expected['buildings_per_s'] * (1 - tolerance):
+            regressions.append('{stage} with {buildings} buildings: {result:.2f} buildings/s (baseline {expected:.2f})'.format(
+                result=stage['buildings_per_s'], expected=expected['buildings_per_s'], **stage))
+        if stage['peak_rss_MB'] > expected['peak_rss_MB'] * (1 + tolerance):
+            regressions.append('{stage} with {buildings} buildings: peak RSS {result:.0f} MB (baseline {expected:.0f})'.format(
+                result=stage['peak_rss_MB'], expected=expected['peak_rss_MB'], **stage))
+    for size, totals in results['totals'].items():
+        for column, expected in baseline['totals'].get(size, {}).items():
+            if column not in totals or not np.isclose(totals[column], expected, rtol=TOTALS_RTOL):
+                regressions.append('demand with {size} buildings: total {column} = {result} (baseline {expected})'.format(
+                    size=size, column=column, result=totals.get(column), expected=expected))
+    return regressions
+
+
+def calc_speedups(results, baseline):
+    """
+    Speedup of each stage compared to the baseline (the ratio of the throughputs).
+
+    :returns: the speedups by number of buildings and stage (only for the stages of the baseline)
+    :rtype: dict[(int, str), float]
+    """
+    baseline_stages = {(s['buildings'], s['stage']): s for s in baseline['stages']}
+    return {(stage['buildings'], stage['stage']):
+            stage['buildings_per_s'] / baseline_stages[(stage['buildings'], stage['stage'])]['buildings_per_s']
+            for stage in results['stages'] if (stage['buildings'], stage['stage']) in baseline_stages}
+
+
+def main(config):
+    if not sys.platform.startswith('linux'):
+        raise Exception('The demand benchmark only runs on Linux')
+    sizes = [int(size) for size in config.test.benchmark_sizes]
+    stages = [stage for stage in BENCHMARK_STAGES if stage in config.test.benchmark_stages]
+    results_file = config.test.benchmark_results or os.path.join(tempfile.gettempdir(), 'cea-benchmark-demand.json')
+
+    folder = tempfile.mkdtemp(prefix='cea-benchmark-')
+    try:
+        results = run_benchmark(config, sizes, stages, config.test.benchmark_seed, folder)
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+    with open(results_file, 'w') as f:
+        json.dump(results, f, indent=2)
+    print('Benchmark results written to %s' % results_file)
+
+    if config.test.benchmark_baseline:
+        with open(config.test.benchmark_baseline) as f:
+            baseline = json.load(f)
+        for (size, stage), speedup in sorted(calc_speedups(results, baseline).items()):
+            print('Speedup of {stage} with {size} buildings compared to the baseline: {speedup:.2f}x'.format(
+                stage=stage, size=size, speedup=speedup))
+        regressions = compare_to_baseline(results, baseline, config.test.benchmark_tolerance)
+        for regression in regressions:
+            print('Regression: %s' % regression)
+        if regressions:
+            raise AssertionError('The benchmark regressed compared to %s' % config.test.benchmark_baseline)
+
+
+if __name__ == '__main__':
+    main(cea.config.Configuration())
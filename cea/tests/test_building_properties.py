@@ -0,0 +1,129 @@
+"""
+Test the columnar data of :py:class:`cea.demand.building_properties.BuildingProperties`: the vectorized building
+systems properties and the property store, which is invalidated when an input file changes.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from cea.constants import HOURS_IN_YEAR
+from cea.demand.building_properties import BuildingProperties, BuildingPropertiesRow, calc_building_systems
+
+HVAC_COLUMNS = ['Tshs0_ahu_C', 'dThs0_ahu_C', 'Tshs0_aru_C', 'dThs0_aru_C', 'Tshs0_shu_C', 'dThs0_shu_C',
+                'Tscs0_ahu_C', 'dTcs0_ahu_C', 'Tscs0_aru_C', 'dTcs0_aru_C', 'Tscs0_scu_C', 'dTcs0_scu_C', 'Tsww0_C']
+ENVELOPE_COLUMNS = ['Awin_ag', 'Awall_ag', 'a_roof', 'n50', 'a_wall', 'rf_sh', 'e_wall', 'e_roof', 'G_win', 'e_win',
+                    'U_roof', 'Hs_ag', 'Hs_bg', 'Ns', 'Es', 'Cm_Af', 'U_wall', 'U_base', 'U_win']
+
+
+def synthetic_properties(building_names):
+    rng = np.random.default_rng(42)
+    n = len(building_names)
+    geometry = pd.DataFrame({'Blength': rng.uniform(5, 50, n), 'Bwidth': rng.uniform(5, 30, n),
+                             'floors_ag': rng.integers(1, 8, n), 'floors_bg': rng.integers(0, 3, n),
+                             'height_ag': rng.uniform(3, 30, n), 'footprint': rng.uniform(20, 500, n)},
+                            index=building_names)
+    hvac = pd.DataFrame({column: rng.uniform(5, 90, n) for column in HVAC_COLUMNS}, index=building_names)
+    hvac['class_hs'] = 'RADIATOR'
+    age = pd.DataFrame({'YEAR': rng.integers(1900, 2020, n)}, index=building_names)
+    envelope = pd.DataFrame({column: rng.uniform(0.1, 1.0, n) for column in ENVELOPE_COLUMNS}, index=building_names)
+    envelope['type_shade'] = 'SHADING_AS1'
+    other = pd.DataFrame({'value': rng.uniform(0, 1, n), 'code': 'X'}, index=building_names)
+    return {'_prop_supply_systems': other, '_prop_geometry': geometry, '_prop_envelope': envelope,
+            '_prop_typology': other, '_prop_HVAC_result': hvac, '_prop_comfort': other,
+            '_prop_internal_loads': other, '_prop_age': age, '_solar_names': list(building_names),
+            '_I_sol': rng.uniform(0, 1000, (n, HOURS_IN_YEAR)), '_prop_RC_model': other,
+            '_building_systems': calc_building_systems(geometry, hvac, age)}
+
+
+class SyntheticBuildingProperties(BuildingProperties):
+    """BuildingProperties with synthetic data instead of the input files"""
+    reads = 0
+
+    def _read_properties(self, locator, weather_data):
+        SyntheticBuildingProperties.reads += 1
+        return synthetic_properties(self.building_names)
+
+
+class ScenarioLocator(object):
+    def __init__(self, folder):
+        self.folder = folder
+
+    def __getattr__(self, name):
+        # all the input files of the building properties (get_zone_geometry, get_building_typology, ...)
+        if name.startswith('get_') and name != 'get_radiation_building':
+            return lambda: os.path.join(self.folder, name[len('get_'):] + '.dbf')
+        raise AttributeError(name)
+
+    def get_radiation_building(self, building):
+        return os.path.join(self.folder, '%s_radiation.csv' % building)
+
+    def get_demand_results_folder(self):
+        return self.folder
+
+
+class TestBuildingProperties(unittest.TestCase):
+    def setUp(self):
+        self.locator = ScenarioLocator(tempfile.mkdtemp())
+        self.building_names = ['B%03d' % i for i in range(20)]
+        self.weather_data = pd.DataFrame({'drybulb_C': np.linspace(-5, 30, HOURS_IN_YEAR)})
+        for building_name in self.building_names:
+            with open(self.locator.get_radiation_building(building_name), 'w') as f:
+                f.write(building_name)
+        SyntheticBuildingProperties.reads = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.locator.folder)
+
+    def test_calc_building_systems_matches_building_rows(self):
+        properties = synthetic_properties(self.building_names)
+        for building_name in self.building_names:
+            row = BuildingPropertiesRow.__new__(BuildingPropertiesRow)
+            row.geometry = properties['_prop_geometry'].loc[building_name].to_dict()
+            row.geometry['floor_height'] = row.geometry['height_ag'] / row.geometry['floors_ag']
+            row.hvac = properties['_prop_HVAC_result'].loc[building_name].to_dict()
+            row.age = properties['_prop_age'].loc[building_name].to_dict()
+            expected = row._get_properties_building_systems()
+            result = properties['_building_systems'].loc[building_name]
+            self.assertEqual(list(result.index), list(expected.index))
+            for key in expected.index:
+                self.assertEqual(result[key], expected[key], '%s of building %s' % (key, building_name))
+
+    def test_property_store(self):
+        building_properties = SyntheticBuildingProperties(self.locator, self.weather_data, self.building_names,
+                                                          cache=True)
+        cached = SyntheticBuildingProperties(self.locator, self.weather_data, self.building_names, cache=True)
+        self.assertEqual(SyntheticBuildingProperties.reads, 1)
+
+        for building_name in self.building_names:
+            expected = building_properties[building_name]
+            result = cached[building_name]
+            self.assertEqual(result.geometry, expected.geometry)
+            self.assertEqual(result.hvac, expected.hvac)
+            self.assertEqual(result.hvac, building_properties._prop_HVAC_result.loc[building_name].to_dict())
+            np.testing.assert_array_equal(result.solar.I_sol, expected.solar.I_sol)
+            pd.testing.assert_series_equal(result.building_systems, expected.building_systems)
+
+        # the rows are independent of each other and of the store
+        cached['B001'].geometry['height_ag'] = -1.0
+        self.assertEqual(cached['B001'].geometry, building_properties['B001'].geometry)
+
+        # changing an input file (or the list of buildings or the weather data) invalidates the store
+        stat = os.stat(self.locator.get_radiation_building('B005'))
+        os.utime(self.locator.get_radiation_building('B005'), ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        SyntheticBuildingProperties(self.locator, self.weather_data, self.building_names, cache=True)
+        self.assertEqual(SyntheticBuildingProperties.reads, 2)
+        SyntheticBuildingProperties(self.locator, self.weather_data, self.building_names[:10], cache=True)
+        self.assertEqual(SyntheticBuildingProperties.reads, 3)
+        SyntheticBuildingProperties(self.locator, self.weather_data + 1.0, self.building_names[:10], cache=True)
+        self.assertEqual(SyntheticBuildingProperties.reads, 4)
+        SyntheticBuildingProperties(self.locator, self.weather_data + 1.0, self.building_names[:10], cache=False)
+        self.assertEqual(SyntheticBuildingProperties.reads, 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -68,7 +68,8 @@ class TestCalcThermalLoads(unittest.TestCase):
                                     self.use_dynamic_infiltration_calculation, self.resolution_output,
                                     self.loads_output, self.massflows_output, self.temperatures_output,
                                     self.config, self.debug)
-        self.assertIsNone(result)
+        self.assertEqual(result['Name'], 'B1011')
+        self.assertEqual(len(result['hourly']), len(self.date_range))
         self.assertTrue(os.path.exists(self.locator.get_demand_results_file('B1011')),
                         'Building csv not produced')
         self.assertTrue(os.path.exists(self.locator.get_temporary_file('B1011T.csv')),
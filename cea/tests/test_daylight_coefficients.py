@@ -0,0 +1,94 @@
+"""
+Test the cache of the daylight coefficients of the Daysim projects
+(:py:class:`cea.resources.radiation.radiance.DaylightCoefficientsCache`).
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from cea.resources.radiation.radiance import DaylightCoefficientsCache
+
+
+class CommonInputs(object):
+    def __init__(self, folder):
+        self.daysim_material_path = os.path.join(folder, 'daysim_material.rad')
+        self.daysim_geometry_path = os.path.join(folder, 'daysim_geometry.rad')
+        self.daysim_shading_path = os.path.join(folder, 'daysim_shading.rad')
+
+
+class Project(object):
+    def __init__(self, folder, project_name, sensors, latitude='47.38', rad_ab=4):
+        self.project_name = project_name
+        self.project_path = os.path.join(folder, project_name)
+        os.makedirs(self.project_path)
+        self.sensor_path = os.path.join(self.project_path, 'sensors.pts')
+        self.hea_path = os.path.join(self.project_path, project_name + '.hea')
+        self.dc_path = os.path.join(self.project_path, project_name + '.dc')
+        with open(self.sensor_path, 'w') as f:
+            f.write(sensors)
+        with open(self.hea_path, 'w') as f:
+            f.write('project_name %s\nproject_directory %s\nplace Zurich\nlatitude %s\n'
+                    'wea_data_short_file ../weather.wea\nab %i\nshading 1 static_system %s.dc %s.ill\n'
+                    % (project_name, self.project_path, latitude, rad_ab, project_name, project_name))
+
+
+class TestDaylightCoefficientsCache(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.inputs = CommonInputs(self.folder)
+        for path in [self.inputs.daysim_material_path, self.inputs.daysim_geometry_path]:
+            with open(path, 'w') as f:
+                f.write('void plastic wall\n')
+        self.cache_folder = os.path.join(self.folder, 'daylight_coefficients')
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_reuse_daylight_coefficients(self):
+        cache = DaylightCoefficientsCache(self.cache_folder, self.inputs)
+        project = Project(self.folder, 'chunk_0', '0 0 1 0 0 1\n')
+        self.assertFalse(cache.load(project))
+        with open(project.dc_path, 'w') as f:
+            f.write('dc of chunk_0')
+        cache.save(project)
+
+        # the same inputs in another run (and another project) reuse the daylight coefficients
+        same_project = Project(os.path.join(self.folder, 'run_2'), 'chunk_3', '0 0 1 0 0 1\n')
+        self.assertTrue(DaylightCoefficientsCache(self.cache_folder, self.inputs).load(same_project))
+        with open(same_project.dc_path) as f:
+            self.assertEqual(f.read(), 'dc of chunk_0')
+
+    def test_prune_daylight_coefficients(self):
+        cache = DaylightCoefficientsCache(self.cache_folder, self.inputs)
+        keys = []
+        for name, sensors in [('chunk_0', '0 0 1 0 0 1\n'), ('chunk_1', '0 0 2 0 0 1\n')]:
+            project = Project(self.folder, name, sensors)
+            with open(project.dc_path, 'w') as f:
+                f.write('dc of ' + name)
+            keys.append(cache.save(project))
+        with open(os.path.join(self.cache_folder, keys[0] + '.dc.tmp'), 'w') as f:
+            f.write('interrupted run')
+
+        # only the daylight coefficients of the last run are kept
+        cache.prune({keys[1]})
+        self.assertEqual(os.listdir(self.cache_folder), [keys[1] + '.dc'])
+
+    def test_inputs_of_daylight_coefficients(self):
+        key = DaylightCoefficientsCache(self.cache_folder, self.inputs).calc_key(
+            Project(self.folder, 'chunk_0', '0 0 1 0 0 1\n'))
+        keys = [DaylightCoefficientsCache(self.cache_folder, self.inputs).calc_key(
+            Project(self.folder, name, sensors, latitude, rad_ab))
+            for name, sensors, latitude, rad_ab in [('sensors', '0 0 2 0 0 1\n', '47.38', 4),
+                                                    ('location', '0 0 1 0 0 1\n', '46.2', 4),
+                                                    ('parameters', '0 0 1 0 0 1\n', '47.38', 6)]]
+        with open(self.inputs.daysim_shading_path, 'w') as f:
+            f.write('void glass tree_material_0\n')
+        keys.append(DaylightCoefficientsCache(self.cache_folder, self.inputs).calc_key(
+            Project(self.folder, 'shading', '0 0 1 0 0 1\n')))
+        self.assertEqual(len(set(keys + [key])), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+"""
+Test the vectorized hourly procedure of the demand (:py:mod:`cea.demand.hourly_procedure_batch`) against the hourly
+procedure for single buildings (:py:func:`cea.demand.thermal_loads.calc_Qhs_Qcs`) using synthetic buildings.
+"""
+
+import copy
+import unittest
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+from cea.constants import HOURS_IN_YEAR
+from cea.demand import hourly_procedure_batch
+from cea.demand.thermal_loads import calc_Qhs_Qcs, calc_set_points, initialize_timestep_data
+
+
+def synthetic_weather():
+    hours = np.arange(HOURS_IN_YEAR)
+    drybulb_C = 9.0 - 11.0 * np.cos(2 * np.pi * hours / HOURS_IN_YEAR) - 5.0 * np.cos(2 * np.pi * hours / 24)
+    return pd.DataFrame({'drybulb_C': drybulb_C,
+                         'wetbulb_C': drybulb_C - 2.0,
+                         'relhum_percent': 70.0 + 20.0 * np.sin(2 * np.pi * hours / 71),
+                         'skytemp_C': drybulb_C - 12.0,
+                         'windspd_ms': np.full(HOURS_IN_YEAR, 3.0)})
+
+
+def synthetic_building(name, class_hs, class_cs, Af, heat_season=('16|09', '14|05'), cool_season=('15|05', '15|09'),
+                       **hvac):
+    hours = np.arange(HOURS_IN_YEAR)
+    rc_model = {'Af': Af, 'Aef': Af * 0.9, 'Atot': 4.5 * Af, 'Am': 2.5 * Af, 'Awin_ag': 0.15 * Af, 'Aroof': 0.3 * Af,
+                'Awall_ag': 0.6 * Af, 'Aop_bg': 0.3 * Af, 'Cm': 165000.0 * Af, 'Htr_op': 0.3 * Af,
+                'Htr_w': 0.18 * Af, 'U_win': 1.2, 'U_roof': 0.2, 'U_wall': 0.3, 'U_base': 0.3}
+    hvac_properties = {'class_hs': class_hs, 'class_cs': class_cs, 'convection_hs': 0.5, 'convection_cs': 0.3,
+                       'Qhsmax_Wm2': 60.0, 'Qcsmax_Wm2': 40.0, 'MECH_VENT': False, 'WIN_VENT': True,
+                       'HEAT_REC': False, 'NIGHT_FLSH': False, 'ECONOMIZER': False, 'Tc_sup_air_ahu_C': 16.0,
+                       'Tc_sup_air_aru_C': 16.0, 'dT_Qhs': 1.2, 'dThs_C': 0.0, 'dT_Qcs': -0.8, 'dTcs_C': 0.0,
+                       'type_ctrl': 'T1', 'has-heating-season': heat_season is not None,
+                       'heat_starts': (heat_season or ('00|00', '00|00'))[0],
+                       'heat_ends': (heat_season or ('00|00', '00|00'))[1],
+                       'has-cooling-season': cool_season is not None,
+                       'cool_starts': (cool_season or ('00|00', '00|00'))[0],
+                       'cool_ends': (cool_season or ('00|00', '00|00'))[1]}
+    hvac_properties.update(hvac)
+    return SimpleNamespace(
+        name=name, rc_model=rc_model, hvac=hvac_properties,
+        architecture=SimpleNamespace(Hs_ag=0.8, e_win=0.89, e_roof=0.9, e_wall=0.9, n50=3.0, win_wall=0.3),
+        comfort={'RH_max_pc': 70.0, 'Tcs_set_C': 26.0},
+        geometry={'floor_height': 3.0},
+        solar=SimpleNamespace(I_sol=np.clip(25.0 * Af * np.sin(2 * np.pi * (hours - 6) / 24), 0.0, None)))
+
+
+def synthetic_timestep_data(bpr, weather_data):
+    hours = np.arange(HOURS_IN_YEAR)
+    is_occupied = (hours % 24 >= 7) & (hours % 24 < 19)
+    Af = bpr.rc_model['Af']
+    tsd = initialize_timestep_data(bpr, weather_data)
+    tsd['El'] = np.where(is_occupied, 8.0, 1.0) * Af
+    tsd['Ea'] = np.where(is_occupied, 6.0, 2.0) * Af
+    tsd['Epro'] = np.zeros(HOURS_IN_YEAR)
+    tsd['Qs'] = np.where(is_occupied, 5.0, 0.5) * Af
+    tsd['w_int'] = np.where(is_occupied, 2e-6, 0.0) * Af
+    tsd['ve_lps'] = np.where(is_occupied, 0.5, 0.0) * Af
+    tsd['Qcdata_sys'] = np.zeros(HOURS_IN_YEAR)
+    tsd['Qcre_sys'] = np.full(HOURS_IN_YEAR, 0.5 * Af)
+    tsd['RSE_wall'] = tsd['RSE_roof'] = tsd['RSE_win'] = np.full(HOURS_IN_YEAR, 0.04)
+    schedules = {'Ths_set_C': np.where(is_occupied, 21.0, 18.0), 'Tcs_set_C': np.where(is_occupied, 26.0, np.nan)}
+    return calc_set_points(bpr, None, tsd, bpr.name, None, None, schedules)
+
+
+class TestCalcQhsQcsBatch(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        weather_data = synthetic_weather()
+        cls.config = SimpleNamespace(demand=SimpleNamespace(overheating_warning=True, engine='python'))
+        cls.bprs = [
+            synthetic_building('B01', 'RADIATOR', 'CEILING_COOLING', 1000.0),
+            synthetic_building('B02', 'FLOOR_HEATING', 'NONE', 250.0, cool_season=None, MECH_VENT=True,
+                               WIN_VENT=False, HEAT_REC=True, NIGHT_FLSH=True, ECONOMIZER=True),
+            synthetic_building('B03', 'NONE', 'FLOOR_COOLING', 4000.0, heat_season=None, Qcsmax_Wm2=5.0),
+            synthetic_building('B04', 'RADIATOR', 'NONE', 600.0, heat_season=('01|05', '30|09'),
+                               cool_season=('01|11', '28|02'), Qhsmax_Wm2=15.0),
+            synthetic_building('B05', 'NONE', 'NONE', 80.0, heat_season=None, cool_season=None)]
+        cls.tsds = [synthetic_timestep_data(bpr, weather_data) for bpr in cls.bprs]
+
+    def test_is_batch_compatible(self):
+        self.assertTrue(hourly_procedure_batch.is_batch_compatible(self.bprs[0], False))
+        self.assertFalse(hourly_procedure_batch.is_batch_compatible(self.bprs[0], True))
+        central_ac = synthetic_building('B06', 'CENTRAL_AC', 'NONE', 100.0)
+        self.assertFalse(hourly_procedure_batch.is_batch_compatible(central_ac, False))
+
+    def test_calc_Qhs_Qcs_batch_matches_single_buildings(self):
+        expected = [calc_Qhs_Qcs(bpr, copy.deepcopy(tsd), False, self.config) for bpr, tsd in zip(self.bprs, self.tsds)]
+        result = hourly_procedure_batch.calc_Qhs_Qcs_batch(self.bprs, copy.deepcopy(self.tsds), self.config)
+
+        for bpr, tsd_expected, tsd_result in zip(self.bprs, expected, result):
+            for key in hourly_procedure_batch.TSD_KEYS_STATE + ['m_ve_required', 'm_ve_inf', 'Q_loss_sen_ref']:
+                np.testing.assert_allclose(tsd_result[key], tsd_expected[key], rtol=1e-12, atol=1e-9,
+                                           err_msg='%s of building %s' % (key, bpr.name))
+            for key in hourly_procedure_batch.TSD_KEYS_STATUS:
+                np.testing.assert_array_equal(tsd_result[key], tsd_expected[key],
+                                              err_msg='%s of building %s' % (key, bpr.name))
+
+    def test_calc_Qhs_Qcs_batch_overheating_warning(self):
+        bpr = synthetic_building('B07', 'NONE', 'NONE', 100.0)
+        bpr.solar.I_sol = bpr.solar.I_sol * 50
+        tsd = synthetic_timestep_data(bpr, synthetic_weather())
+        with self.assertRaises(Exception) as single:
+            calc_Qhs_Qcs(bpr, copy.deepcopy(tsd), False, self.config)
+        with self.assertRaises(Exception) as batch:
+            hourly_procedure_batch.calc_Qhs_Qcs_batch([self.bprs[0], bpr], [copy.deepcopy(self.tsds[0]), tsd],
+                                                      self.config)
+        self.assertEqual(str(single.exception), str(batch.exception))
+
+
+if __name__ == '__main__':
+    unittest.main()
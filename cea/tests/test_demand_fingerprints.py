@@ -0,0 +1,121 @@
+"""
+Test the incremental mode of the demand (:py:mod:`cea.demand.demand_fingerprints`): the fingerprints only change
+for the buildings whose inputs changed and the district totals are rebuilt correctly from cached and fresh results.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+from cea.demand import demand_fingerprints, demand_writers
+from cea.tests.test_demand_writers import DemandResultsLocator
+
+
+class ScenarioLocator(DemandResultsLocator):
+    def get_demand_results_folder(self):
+        return self.folder
+
+    def get_weather_file(self):
+        return os.path.join(self.folder, 'weather.epw')
+
+    def get_schedule_model_file(self, building):
+        return os.path.join(self.folder, '%s_schedule.csv' % building)
+
+    def get_radiation_building(self, building):
+        return os.path.join(self.folder, '%s_radiation.csv' % building)
+
+
+def summary(building_name, i):
+    date = pd.date_range('2005-01-01', periods=24, freq='h', tz='Europe/Zurich')
+    hourly_data = pd.DataFrame({'DATE': date, 'Name': building_name, 'people': np.arange(24) * (i + 1.0),
+                                'x_int': np.full(24, 7.5),
+                                'QH_sys_kWh': 1.23456 * i + np.arange(24) / 3.0}).set_index('DATE')
+    return hourly_data, {'Name': building_name, 'yearly_columns': ['Name', 'GFA_m2', 'QH_sys_MWhyr'],
+                         'yearly': {'Name': building_name, 'GFA_m2': 100.0 * (i + 1), 'QH_sys_MWhyr': 1.5 * i},
+                         'hourly': hourly_data[['people', 'QH_sys_kWh']].round(3)}
+
+
+class TestDemandFingerprints(unittest.TestCase):
+    def setUp(self):
+        self.locator = ScenarioLocator(tempfile.mkdtemp())
+        self.building_names = ['B1001', 'B1002', 'B1003']
+        for path in [self.locator.get_weather_file()] + [
+                f(b) for b in self.building_names
+                for f in [self.locator.get_schedule_model_file, self.locator.get_radiation_building]]:
+            with open(path, 'w') as f:
+                f.write(os.path.basename(path))
+        self.config = SimpleNamespace(demand=SimpleNamespace(
+            use_dynamic_infiltration_calculation=False, resolution_output='hourly', loads_output=[],
+            massflows_output=[], temperatures_output=[], overheating_warning=True, format='csv'))
+        self.bprs = {b: SimpleNamespace(name=b, rc_model={'Af': 100.0}) for b in self.building_names}
+
+    def tearDown(self):
+        shutil.rmtree(self.locator.folder)
+
+    def test_fingerprints_change_with_inputs(self):
+        fingerprints = demand_fingerprints.calc_fingerprints(self.locator, self.bprs, self.config)
+        self.assertEqual(fingerprints, demand_fingerprints.calc_fingerprints(self.locator, self.bprs, self.config))
+
+        with open(self.locator.get_schedule_model_file('B1002'), 'a') as f:
+            f.write('changed')
+        self.bprs['B1003'].rc_model['Af'] = 120.0
+        changed = demand_fingerprints.calc_fingerprints(self.locator, self.bprs, self.config)
+        self.assertEqual([b for b in self.building_names if changed[b] != fingerprints[b]], ['B1002', 'B1003'])
+
+        self.config.demand.format = 'parquet'
+        changed = demand_fingerprints.calc_fingerprints(self.locator, self.bprs, self.config)
+        self.assertTrue(all(changed[b] != fingerprints[b] for b in self.building_names))
+
+        demand_fingerprints.write_fingerprints(self.locator, fingerprints)
+        self.assertEqual(demand_fingerprints.read_fingerprints(self.locator), fingerprints)
+        demand_fingerprints.remove_fingerprints(self.locator)
+        self.assertEqual(demand_fingerprints.read_fingerprints(self.locator), {})
+
+    def test_totals_from_cached_and_fresh_results(self):
+        demand_totals = demand_writers.DemandTotals()
+        for i, building_name in enumerate(self.building_names):
+            hourly_data, building_summary = summary(building_name, i)
+            demand_writers.HourlyDemandWriter([], [], []).write_to_csv(
+                building_name, ['Name', 'people', 'x_int', 'QH_sys_kWh'], hourly_data, self.locator)
+            demand_totals.add(building_summary)
+        demand_totals.write_aggregate_buildings(self.locator, self.building_names)
+        demand_totals.write_aggregate_hourly(self.locator)
+        expected_buildings = pd.read_csv(self.locator.get_total_demand())
+        expected_hourly = pd.read_csv(self.locator.get_total_demand_hourly())
+
+        # B1002 is recalculated, the others are read back
+        os.remove(self.locator.get_demand_results_file('B1003'))
+        cached_summaries = demand_fingerprints.read_cached_summaries(self.locator, ['B1001', 'B1003'])
+        self.assertEqual(list(cached_summaries.keys()), ['B1001'])
+        demand_totals = demand_writers.DemandTotals()
+        demand_totals.add(cached_summaries['B1001'])
+        for i, building_name in [(1, 'B1002'), (2, 'B1003')]:
+            demand_totals.add(summary(building_name, i)[1])
+        demand_totals.write_aggregate_buildings(self.locator, self.building_names)
+        demand_totals.write_aggregate_hourly(self.locator)
+
+        pd.testing.assert_frame_equal(pd.read_csv(self.locator.get_total_demand()), expected_buildings)
+        pd.testing.assert_frame_equal(pd.read_csv(self.locator.get_total_demand_hourly()), expected_hourly)
+
+    def test_no_cached_results_with_monthly_resolution(self):
+        # the monthly results files have no hourly values to add to the hourly totals of the district
+        for i, building_name in enumerate(self.building_names):
+            hourly_data, building_summary = summary(building_name, i)
+            demand_writers.HourlyDemandWriter([], [], []).write_to_csv(
+                building_name, ['Name', 'people', 'x_int', 'QH_sys_kWh'], hourly_data, self.locator)
+        demand_totals = demand_writers.DemandTotals()
+        demand_totals.add(summary('B1001', 0)[1])
+        demand_totals.write_aggregate_buildings(self.locator, ['B1001'])
+
+        self.assertEqual(list(demand_fingerprints.read_cached_summaries(self.locator, ['B1001'], 'hourly')),
+                         ['B1001'])
+        self.assertEqual(demand_fingerprints.read_cached_summaries(self.locator, ['B1001'], 'monthly'), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+"""
+Test the columnar (Parquet / Feather) demand results written by
+:py:class:`cea.demand.demand_writers.HourlyDemandColumnarWriter` against the csv files and the district totals
+accumulated by :py:class:`cea.demand.demand_writers.DemandTotals` against the :py:class:`YearlyDemandWriter`.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from cea.demand import demand_writers
+
+
+class DemandResultsLocator(object):
+    def __init__(self, folder):
+        self.folder = folder
+
+    def get_demand_results_file(self, building, format='csv'):
+        return os.path.join(self.folder, '%(building)s.%(format)s' % locals())
+
+    def get_temporary_file(self, filename):
+        return os.path.join(self.folder, filename)
+
+    def get_total_demand(self, format='csv'):
+        return os.path.join(self.folder, 'Total_demand.%(format)s' % locals())
+
+    def get_total_demand_hourly(self, format='csv'):
+        return os.path.join(self.folder, 'Total_demand_hourly.%(format)s' % locals())
+
+
+class TestHourlyDemandColumnarWriter(unittest.TestCase):
+    def setUp(self):
+        self.locator = DemandResultsLocator(tempfile.mkdtemp())
+        self.date = pd.date_range('2005-01-01', periods=48, freq='h', tz='Europe/Zurich')
+        hours = np.arange(48)
+        self.hourly_data = pd.DataFrame({'DATE': self.date, 'Name': 'B1001', 'people': hours % 7 * 1.5,
+                                         'x_int': np.full(48, 7.123456), 'QH_sys_kWh': 1234.567 + hours,
+                                         'T_int_C': 20.0 + hours * 0.01}).set_index('DATE')
+        self.columns = ['Name', 'people', 'x_int', 'QH_sys_kWh', 'T_int_C']
+
+    def tearDown(self):
+        shutil.rmtree(self.locator.folder)
+
+    def test_read_hourly_demand_matches_csv(self):
+        for format in demand_writers.COLUMNAR_FORMATS:
+            writer = demand_writers.HourlyDemandColumnarWriter([], [], [], format)
+            writer.write_to_csv('B1001', self.columns, self.hourly_data, self.locator)
+            self.assertTrue(os.path.exists(self.locator.get_demand_results_file('B1001', format)))
+
+            expected = pd.read_csv(self.locator.get_demand_results_file('B1001'))
+            result = demand_writers.read_hourly_demand(self.locator, 'B1001')
+            self.assertEqual(list(result.columns), list(expected.columns))
+            self.assertEqual(list(result.DATE), list(expected.DATE))
+            self.assertEqual(list(result.Name), list(expected.Name))
+            for column in self.columns[1:]:
+                self.assertEqual(result[column].dtype, np.float64)
+                np.testing.assert_allclose(result[column], expected[column], rtol=1e-6, atol=1e-3)
+
+            result = demand_writers.read_hourly_demand(self.locator, 'B1001', usecols=['QH_sys_kWh'])
+            self.assertEqual(list(result.columns), ['QH_sys_kWh'])
+            os.remove(self.locator.get_demand_results_file('B1001', format))
+
+    def test_csv_writer_removes_outdated_file(self):
+        writer = demand_writers.HourlyDemandColumnarWriter([], [], [], 'parquet')
+        writer.write_to_csv('B1001', self.columns, self.hourly_data, self.locator)
+        self.hourly_data['QH_sys_kWh'] = 0.0
+        demand_writers.HourlyDemandWriter([], [], []).write_to_csv('B1001', self.columns, self.hourly_data,
+                                                                   self.locator)
+        self.assertFalse(os.path.exists(self.locator.get_demand_results_file('B1001', 'parquet')))
+
+        result = demand_writers.read_hourly_demand(self.locator, 'B1001')
+        self.assertTrue((result.QH_sys_kWh == 0.0).all())
+
+    def test_unknown_format(self):
+        self.assertRaises(ValueError, demand_writers.HourlyDemandColumnarWriter, [], [], [], 'xlsx')
+
+
+class TestDemandTotals(unittest.TestCase):
+    def setUp(self):
+        self.locator = DemandResultsLocator(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.locator.folder)
+
+    def test_demand_totals_match_yearly_demand_writer(self):
+        date = pd.date_range('2005-01-01', periods=48, freq='h', tz='Europe/Zurich')
+        hours = np.arange(48)
+        columns = ['Name', 'people', 'x_int', 'QH_sys_kWh']
+        yearly_columns = ['Name', 'GFA_m2', 'QH_sys_MWhyr']
+        building_names = ['B1001', 'B1002', 'B1003']
+        demand_totals = demand_writers.DemandTotals()
+        for i, building_name in reversed(list(enumerate(building_names))):
+            hourly_data = pd.DataFrame({'DATE': date, 'Name': building_name, 'people': hours % 7 * (i + 1.0),
+                                        'x_int': np.full(48, 7.123456),
+                                        'QH_sys_kWh': 1.23456 * i + hours / 3.0}).set_index('DATE')
+            yearly_data = {'Name': building_name, 'GFA_m2': 100.0 * (i + 1), 'QH_sys_MWhyr': 1.5 * i}
+            demand_writers.HourlyDemandWriter([], [], []).write_to_csv(building_name, columns, hourly_data,
+                                                                       self.locator)
+            pd.DataFrame(yearly_data, index=[0]).to_csv(self.locator.get_temporary_file(building_name + 'T.csv'),
+                                                        index=False, columns=yearly_columns)
+            summary = {'Name': building_name, 'yearly_columns': yearly_columns, 'yearly': yearly_data,
+                       'hourly': hourly_data[['people', 'QH_sys_kWh']].round(3)}
+            demand_totals.add(summary)
+            self.assertNotIn('hourly', summary)
+
+        demand_writers.YearlyDemandWriter.write_aggregate_buildings(self.locator, building_names)
+        demand_writers.YearlyDemandWriter.write_aggregate_hourly(self.locator, building_names)
+        expected_buildings = pd.read_csv(self.locator.get_total_demand())
+        expected_hourly = pd.read_csv(self.locator.get_total_demand_hourly())
+
+        demand_totals.write_aggregate_buildings(self.locator, building_names)
+        demand_totals.write_aggregate_hourly(self.locator)
+        pd.testing.assert_frame_equal(pd.read_csv(self.locator.get_total_demand()), expected_buildings)
+        pd.testing.assert_frame_equal(pd.read_csv(self.locator.get_total_demand_hourly()), expected_hourly)
+
+    def test_demand_totals_without_buildings(self):
+        demand_totals = demand_writers.DemandTotals()
+        demand_totals.write_aggregate_buildings(self.locator, [])
+        demand_totals.write_aggregate_hourly(self.locator)
+        self.assertTrue(os.path.exists(self.locator.get_total_demand()))
+        self.assertTrue(os.path.exists(self.locator.get_total_demand_hourly()))
+
+
+if __name__ == '__main__':
+    unittest.main()
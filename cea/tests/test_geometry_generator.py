@@ -0,0 +1,81 @@
+"""
+Test the neighbours and the keys of the geometry of the buildings reused between the runs of the radiation script
+(:py:mod:`cea.resources.radiation.geometry_generator`).
+"""
+
+import math
+import os
+import shutil
+import tempfile
+import unittest
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+from shapely.geometry import box
+
+from cea.resources.radiation.geometry_generator import (ElevationMap, calc_neighbours, calc_solid_keys,
+                                                        calc_zone_geometry_key, read_geometry_key,
+                                                        remove_geometry_key, write_geometry_key)
+
+
+class TestBuildingGeometryCache(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        self.corners = rng.uniform(10, 990, (300, 2))
+        self.geometries = gpd.GeoSeries([box(x, y, x + 8, y + 12) for x, y in self.corners])
+        self.buildings_df = pd.DataFrame({'height_ag': 9.0, 'floors_ag': 3}, index=range(300))
+        x_coords = np.arange(0, 1000, 5.0) + 2.5
+        self.elevation_map = ElevationMap(np.zeros((200, 200)), x_coords, x_coords[::-1], 5.0, -5.0)
+
+    def test_neighbours(self):
+        neighbours = calc_neighbours(self.geometries.iloc[:50], self.geometries)
+        for i in range(50):
+            distances = [math.hypot(*(self.corners[j] - self.corners[i])) for j in range(300)]
+            self.assertEqual(list(neighbours[i]), [j for j, distance in enumerate(distances) if distance <= 100])
+        self.assertEqual(calc_neighbours(self.geometries.iloc[:0], self.geometries), [])
+
+    def test_neighbours_at_distance(self):
+        # the corners of B and C are exactly 100 m from the corner of A, the corner of D just beyond
+        geometries = gpd.GeoSeries([box(0, 0, 10, 10), box(60, 80, 200, 90), box(-100, 0, -90, 300),
+                                    box(0, 100.001, 10, 110)])
+        neighbours = calc_neighbours(geometries.iloc[:2], geometries)
+        self.assertEqual([list(positions) for positions in neighbours], [[0, 1, 2], [0, 1, 3]])
+        self.assertEqual(neighbours[0].dtype, int)
+
+    def test_keys(self):
+        keys = calc_solid_keys(self.geometries, self.buildings_df, self.elevation_map)
+        self.assertEqual(len(set(keys)), 300)
+        np.testing.assert_array_equal(keys, calc_solid_keys(self.geometries, self.buildings_df, self.elevation_map))
+
+        # a higher building or a change of the terrain around it
+        higher_df = self.buildings_df.copy()
+        higher_df.loc[0, 'height_ag'] = 12.0
+        self.elevation_map.elevation_map[(1000 - int(self.corners[1, 1])) // 5, int(self.corners[1, 0]) // 5] = 3.0
+        changed_keys = calc_solid_keys(self.geometries, higher_df, self.elevation_map)
+        self.assertEqual(list(keys != changed_keys).index(False), 2)
+        self.assertTrue(all(keys[:2] != changed_keys[:2]))
+
+        architecture = pd.Series({'wwr_west': 0.4, 'wwr_east': 0.4, 'wwr_north': 0.3, 'wwr_south': 0.5})
+        key = calc_zone_geometry_key(keys[0], architecture, False, keys[[2, 1]])
+        self.assertEqual(key, calc_zone_geometry_key(keys[0], architecture, False, keys[[1, 2]]))
+        self.assertNotEqual(key, calc_zone_geometry_key(keys[0], architecture, False, changed_keys[[1, 2]]))
+        self.assertNotEqual(key, calc_zone_geometry_key(keys[0], architecture.replace(0.3, 0.6), False, keys[[1, 2]]))
+
+    def test_saved_keys(self):
+        folder = tempfile.mkdtemp()
+        try:
+            pickle_location = os.path.join(folder, 'B1001')
+            write_geometry_key(pickle_location, 'abc')
+            # the key is only valid together with the geometry
+            self.assertIsNone(read_geometry_key(pickle_location))
+            open(pickle_location, 'wb').close()
+            self.assertEqual(read_geometry_key(pickle_location), 'abc')
+            remove_geometry_key(pickle_location)
+            self.assertIsNone(read_geometry_key(pickle_location))
+        finally:
+            shutil.rmtree(folder)
+
+
+if __name__ == '__main__':
+    unittest.main()
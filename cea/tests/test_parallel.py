@@ -0,0 +1,69 @@
+"""
+Test :py:func:`cea.utilities.parallel.vectorize` with a pool of processes: the results are returned in order,
+``on_complete`` is called in the parent process and the arguments that are the same for every call are sent through
+shared memory.
+"""
+
+import multiprocessing
+import types
+import unittest
+from itertools import repeat
+
+import numpy as np
+
+from cea.utilities import parallel
+
+
+def weighted_sum(a, weights, offset):
+    return a * float(weights.sum()) + offset
+
+
+def change_state(a, state):
+    """a call changing its (shared) argument, which should not be seen by the other calls"""
+    seen = (state.mode, len(state.seen))
+    state.mode = 'CT'
+    state.seen.append(a)
+    return seen
+
+
+class TestVectorize(unittest.TestCase):
+    def test_multiprocess_matches_single_process(self):
+        weights = np.ones(8760)
+        completed = []
+
+        def on_complete(i, n, args, result):
+            completed.append((i, n, args[0], result))
+
+        for processes in [1, 3]:
+            del completed[:]
+            result = parallel.vectorize(weighted_sum, processes, on_complete=on_complete)(
+                range(50), repeat(weights, 50), [0.5] * 25 + [1.5] * 25)
+            self.assertEqual(result, [a * 8760.0 + (0.5 if a < 25 else 1.5) for a in range(50)])
+            self.assertEqual([c[0] for c in completed], list(range(50)))
+            self.assertEqual(sorted(c[2] for c in completed), list(range(50)))
+            self.assertTrue(all(result[a] == r for _, n, a, r in completed))
+
+        # the pool is reused by later calls
+        pool, _ = parallel.get_pool(3)
+        parallel.vectorize(weighted_sum, 3)([1], [weights], [0.0])
+        self.assertIs(parallel.get_pool(3)[0], pool)
+
+    def test_calls_get_their_own_shared_arguments(self):
+        # as if the arguments were pickled with each call, whatever the worker running it
+        state = types.SimpleNamespace(mode='VT', seen=[])
+        result = parallel.vectorize(change_state, 2)(range(16), repeat(state, 16))
+        self.assertEqual(result, [('VT', 0)] * 16)
+        self.assertEqual((state.mode, state.seen), ('VT', []))
+
+    def test_shutdown_pool(self):
+        parallel.get_pool(2)
+        parallel.shutdown_pool()
+        # the process of the manager of the queue is stopped with the pool
+        self.assertEqual([p for p in multiprocessing.active_children() if p.is_alive()], [])
+
+    def tearDown(self):
+        parallel.shutdown_pool()
+
+
+if __name__ == '__main__':
+    unittest.main()
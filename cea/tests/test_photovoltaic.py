@@ -0,0 +1,77 @@
+"""
+Test the vectorized PV generation (:py:func:`cea.technologies.solar.photovoltaic.calc_pv_generation`) against the
+calculation of the absorbed radiation, cell temperature and power for single panels and hours.
+"""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from cea.constants import HOURS_IN_YEAR
+from cea.technologies.solar import photovoltaic
+
+PANEL_PROPERTIES_PV = {'PV_noct': 45.0, 'PV_a0': 0.935823, 'PV_a1': 0.054289, 'PV_a2': -0.008677, 'PV_a3': 0.000527,
+                       'PV_a4': -0.000011, 'PV_th': 0.002, 'PV_n': 0.16, 'PV_Bref': 0.0035, 'misc_losses': 0.1,
+                       'code': 'PV1'}
+
+
+class TestPVGeneration(unittest.TestCase):
+    def test_absorbed_radiation_matches_single_panels(self):
+        rng = np.random.default_rng(42)
+        groups, hours = 6, 200
+        I_sol = np.clip(rng.normal(200, 300, (groups, hours)), 0, None)
+        I_diffuse = rng.uniform(0, 1, hours) * I_sol
+        I_direct = I_sol - I_diffuse
+        tilt = np.radians(rng.uniform(0, 90, groups))
+        # include angles beyond the horizon to test the limits
+        Sz = np.radians(rng.uniform(0, 120, hours))
+        teta = np.radians(rng.uniform(0.5, 150, (groups, hours)))
+
+        result = photovoltaic.calc_absorbed_radiation_PV_array(I_sol, I_direct, I_diffuse, tilt[:, np.newaxis], Sz,
+                                                               teta, PANEL_PROPERTIES_PV)
+        self.assertEqual(result.shape, (groups, hours))
+        for group in range(groups):
+            teta_ed, teta_eg = photovoltaic.calc_diffuseground_comp(tilt[group])
+            for hour in range(hours):
+                expected = photovoltaic.calc_absorbed_radiation_PV(I_sol[group, hour], I_direct[group, hour],
+                                                                   I_diffuse[group, hour], tilt[group], Sz[hour],
+                                                                   teta[group, hour], teta_ed, teta_eg,
+                                                                   PANEL_PROPERTIES_PV)
+                self.assertAlmostEqual(result[group, hour], expected, places=9)
+
+    def test_float32(self):
+        rng = np.random.default_rng(42)
+        groups, hours = 6, 200
+        I_sol = np.clip(rng.normal(200, 300, (groups, hours)), 0, None)
+        arguments = (I_sol, 0.7 * I_sol, 0.3 * I_sol, np.radians(rng.uniform(0, 90, (groups, 1))),
+                     np.radians(rng.uniform(0, 90, hours)), np.radians(rng.uniform(0.5, 90, (groups, hours))))
+        expected = photovoltaic.calc_absorbed_radiation_PV_array(*arguments, PANEL_PROPERTIES_PV)
+        result = photovoltaic.calc_absorbed_radiation_PV_array(
+            *[argument.astype(np.float32) for argument in arguments], PANEL_PROPERTIES_PV)
+        self.assertEqual(result.dtype, np.float32)
+        np.testing.assert_allclose(result, expected, rtol=1e-4, atol=1e-3)
+
+    def test_pv_generation_at_night(self):
+        # no global horizontal radiation at night: the ratio of diffuse radiation of the weather file is nan
+        hours = np.arange(HOURS_IN_YEAR)
+        daylight = (hours % 24 >= 6) & (hours % 24 < 18)
+        weather_data = pd.DataFrame({'ratio_diffhout': np.where(daylight, 0.3, np.nan), 'drybulb_C': 15.0})
+        solar_properties = pd.DataFrame({'Sz': np.where(daylight, 40.0, 100.0), 'Az': 180.0})
+        prop_observers = pd.DataFrame({'area_installed_module_m2': [10.0, 5.0], 'B_deg': [30.0, 90.0],
+                                       'surface_azimuth_deg': [180.0, 90.0],
+                                       'type_orientation': ['roofs_top', 'walls_east']}, index=[0, 1])
+        hourly_radiation = pd.DataFrame({0: np.where(daylight, 500.0, 0.0), 1: np.where(daylight, 200.0, 0.0)})
+        sensor_groups = {'prop_observers': prop_observers, 'hourlydata_groups': hourly_radiation}
+
+        potential = photovoltaic.calc_pv_generation(sensor_groups, weather_data, hours, solar_properties, 47.0,
+                                                    PANEL_PROPERTIES_PV)
+        self.assertFalse(potential.isna().any().any())
+        self.assertTrue((potential['E_PV_gen_kWh'].values[~daylight] == 0).all())
+        self.assertTrue((potential['E_PV_gen_kWh'].values[daylight] > 0).all())
+        np.testing.assert_allclose(potential['E_PV_gen_kWh'],
+                                   potential['PV_roofs_top_E_kWh'] + potential['PV_walls_east_E_kWh'])
+
+
+if __name__ == '__main__':
+    unittest.main()
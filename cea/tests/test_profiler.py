@@ -0,0 +1,59 @@
+"""
+Test the opt-in stage profiler (:py:mod:`cea.utilities.profiler`) used by ``demand:profile``.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from cea.utilities import profiler
+
+
+class TestProfiler(unittest.TestCase):
+    def test_disabled_profiler_records_nothing(self):
+        profiler.start(False)
+        with profiler.stage('calc_set_points', 'B1001'):
+            np.zeros(1000)
+        self.assertFalse(profiler.is_enabled())
+        self.assertEqual(profiler.stop(), [])
+
+    def test_stages_and_report(self):
+        profiler.start(True)
+        for building in ['B1001', 'B1002']:
+            with profiler.stage('calc_Qhs_Qcs', building):
+                data = np.ones((100, 8760))
+            with profiler.stage('write_results', building):
+                del data
+                data = np.ones((50, 8760))
+        records = profiler.stop()
+        self.assertFalse(profiler.is_enabled())
+
+        self.assertEqual([(r['building'], r['stage']) for r in records],
+                         [('B1001', 'calc_Qhs_Qcs'), ('B1001', 'write_results'),
+                          ('B1002', 'calc_Qhs_Qcs'), ('B1002', 'write_results')])
+        self.assertAlmostEqual(records[0]['allocated_peak_MB'], 100 * 8760 * 8 / profiler.MB, delta=0.5)
+        # the peak of each stage is only the memory allocated in the stage
+        self.assertAlmostEqual(records[1]['allocated_peak_MB'], 50 * 8760 * 8 / profiler.MB, delta=0.5)
+        self.assertAlmostEqual(records[1]['allocated_net_MB'], 50 * 8760 * 8 / profiler.MB, delta=0.5)
+        self.assertTrue(all(r['wall_time_s'] >= 0.0 for r in records))
+
+        folder = tempfile.mkdtemp()
+        try:
+            profile_file = os.path.join(folder, 'demand_profile.json')
+            profiler.write_report(profile_file, records, {'cea_version': 'test'})
+            with open(profile_file) as f:
+                report = json.load(f)
+        finally:
+            shutil.rmtree(folder)
+        self.assertEqual(report['cea_version'], 'test')
+        self.assertEqual(report['stages']['calc_Qhs_Qcs']['count'], 2)
+        self.assertEqual(report['buildings']['B1002']['count'], 2)
+        self.assertEqual(len(report['records']), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,33 @@
+"""
+Test the chunks of buildings simulated by Daysim (:py:func:`cea.resources.radiation.main.balance_chunks`).
+"""
+
+import unittest
+
+from cea.resources.radiation.main import balance_chunks, calc_number_of_chunks
+
+
+class TestRadiationChunks(unittest.TestCase):
+    def test_number_of_chunks(self):
+        self.assertEqual(calc_number_of_chunks(250, 100, 1), 3)
+        self.assertEqual(calc_number_of_chunks(250, 100, 8), 8)
+        self.assertEqual(calc_number_of_chunks(5, 100, 8), 5)
+        self.assertEqual(calc_number_of_chunks(0, 100, 8), 0)
+
+    def test_balance_chunks(self):
+        building_names = ['B%i' % i for i in range(8)]
+        sensors_numbers = [100, 5, 60, 40, 10, 50, 0, 35]
+        chunks, chunks_sensors = balance_chunks(building_names, sensors_numbers, 3)
+
+        self.assertEqual(chunks, [['B0', 'B6'], ['B1', 'B2', 'B7'], ['B3', 'B4', 'B5']])
+        self.assertEqual(chunks_sensors, [100, 100, 100])
+        self.assertEqual(sorted(sum(chunks, [])), building_names)
+
+        # the chunks are sorted from the largest and empty chunks are dropped
+        chunks, chunks_sensors = balance_chunks(['B0', 'B1'], [10, 30], 3)
+        self.assertEqual(chunks, [['B1'], ['B0']])
+        self.assertEqual(chunks_sensors, [30, 10])
+
+
+if __name__ == '__main__':
+    unittest.main()
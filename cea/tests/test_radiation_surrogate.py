@@ -0,0 +1,78 @@
+"""
+Test the surrogate model of the radiation of the sensors of the simplified radiation script
+(:py:mod:`cea.resources.radiation.simplified.surrogate`).
+"""
+
+import unittest
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+from shapely.geometry import box
+
+from cea.resources.radiation.simplified import surrogate
+
+
+def sensors_of_buildings(corners, height):
+    """a roof sensor and a sensor on the middle of each wall of square buildings of 10 m"""
+    sensors = []
+    for name, (x, y) in corners.items():
+        sensors.append((name, 'roofs', 'top', x + 5, y + 5, height, 0.0, 0.0, 1.0))
+        for orientation, (dx, dy) in {'north': (0, 1), 'south': (0, -1), 'east': (1, 0), 'west': (-1, 0)}.items():
+            sensors.append((name, 'walls', orientation, x + 5 + 5.01 * dx, y + 5 + 5.01 * dy, 3.0, dx, dy, 0.0))
+    sensors = pd.DataFrame(sensors, columns=['BUILDING', 'TYPE', 'orientation', 'Xcoor', 'Ycoor', 'Zcoor', 'Xdir',
+                                             'Ydir', 'Zdir'])
+    sensors['intersection'] = 0
+    return sensors
+
+
+class TestRadiationSurrogate(unittest.TestCase):
+    def setUp(self):
+        self.corners = {'B1001': (0, 0), 'B1002': (0, 20), 'B1003': (200, 0), 'B1004': (30, 0), 'B1005': (60, 0)}
+        self.zone_df = gpd.GeoDataFrame({'Name': list(self.corners)},
+                                        geometry=[box(x, y, x + 10, y + 10) for x, y in self.corners.values()])
+        self.sensors = sensors_of_buildings(self.corners, 12.0)
+        self.obstacles = surrogate.calc_obstacles(self.zone_df, self.sensors)
+
+    def test_sky_view_factor(self):
+        features = surrogate.calc_sensor_features(self.sensors, self.obstacles)
+        sensors = self.sensors.assign(sky_view=features[:, 1], obstruction=features[:, 2]).set_index(
+            ['BUILDING', 'orientation'])
+
+        # a building alone sees the whole sky
+        self.assertAlmostEqual(sensors.loc[('B1003', 'top'), 'sky_view'], 1.0)
+        np.testing.assert_allclose(sensors.loc['B1003', 'sky_view'].drop('top'), 0.5, rtol=1e-2)
+        self.assertEqual(sensors.loc['B1003', 'obstruction'].max(), 0.0)
+        # the walls facing another building at 10 m see less sky than the walls facing the open space
+        self.assertLess(sensors.loc[('B1001', 'north'), 'sky_view'], 0.4)
+        self.assertGreater(sensors.loc[('B1001', 'north'), 'obstruction'], 0.3)
+        self.assertAlmostEqual(sensors.loc[('B1001', 'west'), 'sky_view'], 0.5, delta=0.05)
+        # the roofs are as high as the other buildings
+        self.assertAlmostEqual(sensors.loc[('B1001', 'top'), 'sky_view'], 1.0)
+
+    def test_fit_predict_and_error(self):
+        features = surrogate.calc_sensor_features(self.sensors, self.obstacles)
+        labels = surrogate.get_surface_labels(self.sensors)
+        hours = np.arange(48)
+        sun = np.clip(np.sin((hours % 24 - 6) / 12.0 * np.pi), 0, None)
+        radiation = (features[:, [1]] * 800.0 * sun - features[:, [2]] * 200.0 * sun).clip(0).astype(np.float32)
+        buildings = self.sensors['BUILDING'].values
+
+        model = surrogate.fit_surrogate(features, labels, radiation)
+        self.assertEqual(set(model), {'roofs_top', 'walls_north', 'walls_south', 'walls_east', 'walls_west'})
+        np.testing.assert_allclose(surrogate.predict_surrogate(model, features, labels), radiation, atol=0.5)
+        # the windows have the radiation of the walls with the same orientation
+        prediction = surrogate.predict_surrogate(model, features[[1]], np.array(['windows_north']))
+        np.testing.assert_allclose(prediction, radiation[[1]], atol=0.5)
+
+        error = surrogate.calc_surrogate_error(features, labels, radiation, buildings)
+        self.assertEqual(error.loc['total', 'sensors'], 25)
+        self.assertEqual(error.loc['roofs_top', 'sensors'], 5)
+        self.assertTrue(np.isfinite(error.values).all())
+
+        del model['walls_north']
+        self.assertRaises(ValueError, surrogate.predict_surrogate, model, features[[1]], np.array(['windows_north']))
+
+
+if __name__ == '__main__':
+    unittest.main()
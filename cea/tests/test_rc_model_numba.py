@@ -0,0 +1,58 @@
+"""
+Test the compiled R-C-model (``demand:engine = numba``, :py:mod:`cea.demand.rc_model_numba`) against the Python
+reference implementation (:py:mod:`cea.demand.rc_model_SIA`) using the synthetic buildings of
+:py:mod:`cea.tests.test_demand_batch`.
+"""
+
+import copy
+import unittest
+from types import SimpleNamespace
+
+import numpy as np
+
+from cea.demand import hourly_procedure_batch
+from cea.demand.thermal_loads import calc_Qhs_Qcs
+from cea.tests.test_demand_batch import synthetic_building, synthetic_timestep_data, synthetic_weather
+
+
+class TestRcModelNumba(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        weather_data = synthetic_weather()
+        cls.bprs = [
+            synthetic_building('B01', 'RADIATOR', 'CEILING_COOLING', 1000.0),
+            synthetic_building('B02', 'FLOOR_HEATING', 'NONE', 250.0, cool_season=None, MECH_VENT=True,
+                               WIN_VENT=False, HEAT_REC=True, NIGHT_FLSH=True, ECONOMIZER=True),
+            synthetic_building('B03', 'NONE', 'FLOOR_COOLING', 4000.0, heat_season=None, Qcsmax_Wm2=5.0),
+            synthetic_building('B04', 'RADIATOR', 'NONE', 600.0, heat_season=('01|05', '30|09'),
+                               cool_season=('01|11', '28|02'), Qhsmax_Wm2=15.0)]
+        cls.tsds = [synthetic_timestep_data(bpr, weather_data) for bpr in cls.bprs]
+
+    @staticmethod
+    def config(engine):
+        return SimpleNamespace(demand=SimpleNamespace(overheating_warning=True, engine=engine))
+
+    def test_numba_engine_matches_python_engine(self):
+        for bpr, tsd in zip(self.bprs, self.tsds):
+            expected = calc_Qhs_Qcs(bpr, copy.deepcopy(tsd), False, self.config('python'))
+            result = calc_Qhs_Qcs(bpr, copy.deepcopy(tsd), False, self.config('numba'))
+            for key in hourly_procedure_batch.TSD_KEYS_STATE + ['Q_loss_sen_ref']:
+                np.testing.assert_allclose(result[key], expected[key], rtol=1e-12, atol=1e-9,
+                                           err_msg='%s of building %s' % (key, bpr.name))
+            for key in hourly_procedure_batch.TSD_KEYS_STATUS:
+                np.testing.assert_array_equal(result[key], expected[key],
+                                              err_msg='%s of building %s' % (key, bpr.name))
+
+    def test_numba_engine_overheating_warning(self):
+        bpr = synthetic_building('B07', 'RADIATOR', 'CEILING_COOLING', 100.0)
+        bpr.solar.I_sol = bpr.solar.I_sol * 50
+        tsd = synthetic_timestep_data(bpr, synthetic_weather())
+        with self.assertRaises(Exception) as python_engine:
+            calc_Qhs_Qcs(bpr, copy.deepcopy(tsd), False, self.config('python'))
+        with self.assertRaises(Exception) as numba_engine:
+            calc_Qhs_Qcs(bpr, copy.deepcopy(tsd), False, self.config('numba'))
+        self.assertEqual(str(python_engine.exception), str(numba_engine.exception))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -9,12 +9,14 @@ import json
 import os
 import unittest
 
+import numpy as np
 import pandas as pd
 
 import cea.config
 from cea.datamanagement.archetypes_mapper import calculate_average_multiuse
 from cea.demand.building_properties import BuildingProperties
-from cea.demand.schedule_maker.schedule_maker import schedule_maker_main
+from cea.demand.schedule_maker.schedule_maker import schedule_maker_main, calc_occupant_schedules, \
+    get_random_generator
 from cea.inputlocator import ReferenceCaseOpenLocator
 from cea.utilities import epwreader
 
@@ -82,6 +84,34 @@ class TestScheduleCreation(unittest.TestCase):
                                                                                        reference_results[schedule]))
 
 
+class TestStochasticOccupancy(unittest.TestCase):
+    def setUp(self):
+        daily_schedule = [0.0] * 6 + [0.1, 0.3, 0.7, 0.9, 0.9, 0.6, 0.5, 0.8, 0.9, 0.9, 0.7, 0.4, 0.2, 0.1] + [0.0] * 4
+        self.deterministic_schedule = np.tile(daily_schedule, 365)
+
+    def test_seeded_schedules_are_reproducible(self):
+        schedule = calc_occupant_schedules(self.deterministic_schedule, 100, get_random_generator(42, 'B1001'))
+        np.testing.assert_array_equal(
+            schedule, calc_occupant_schedules(self.deterministic_schedule, 100, get_random_generator(42, 'B1001')))
+        self.assertFalse(np.array_equal(
+            schedule, calc_occupant_schedules(self.deterministic_schedule, 100, get_random_generator(42, 'B1002'))))
+
+    def test_occupancy_follows_deterministic_schedule(self):
+        number_of_occupants = 2000
+        schedule = calc_occupant_schedules(self.deterministic_schedule, number_of_occupants,
+                                           np.random.default_rng(42))
+        self.assertEqual(schedule.shape, self.deterministic_schedule.shape)
+        self.assertTrue(np.all((schedule >= 0) & (schedule <= number_of_occupants)))
+        # nobody arrives when the probability of presence is zero
+        self.assertTrue(np.all(schedule.reshape(365, 24)[:, :6] == 0))
+        # the average presence follows the probability of presence (the truncation of the transition probabilities
+        # lowers the peaks slightly)
+        np.testing.assert_allclose(schedule.reshape(365, 24).mean(axis=0)[6:20] / number_of_occupants,
+                                   self.deterministic_schedule[6:20], atol=0.1)
+        np.testing.assert_array_equal(calc_occupant_schedules(self.deterministic_schedule, 0),
+                                      np.zeros(len(self.deterministic_schedule)))
+
+
 def get_test_config_path():
     """return the path to the test data configuration file (``cea/tests/test_schedules.config``)"""
     return os.path.join(os.path.dirname(__file__), 'test_schedules.config')
@@ -0,0 +1,118 @@
+"""
+Test the store of the radiation of the sensors (:py:mod:`cea.resources.radiation.sensor_store`) written by the
+radiation scripts and read by the solar technologies, and the parser of the results of Daysim.
+"""
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import numpy as np
+import pandas as pd
+from pyarrow import feather
+
+import cea.inputlocator
+from cea.constants import HOURS_IN_YEAR
+from cea.resources.radiation import sensor_store
+from cea.resources.radiation.radiance import LEAP_DAY_HOURS, read_ill_file
+
+
+def sensor_radiation(sensors, seed):
+    return np.random.default_rng(seed).uniform(0, 800, (sensors, 24)).round(2).astype(np.float32)
+
+
+class TestSensorStore(unittest.TestCase):
+    def setUp(self):
+        self.locator = cea.inputlocator.InputLocator(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.locator.scenario)
+
+    def write_store(self, building_names, sensors_numbers, seed):
+        writer = sensor_store.SensorStoreWriter(self.locator, building_names, sensors_numbers, hours=24)
+        for i, (building_name, sensors) in enumerate(zip(building_names, sensors_numbers)):
+            writer.write(building_name, sensor_radiation(sensors, seed + i))
+        writer.close()
+
+    def test_read_buildings_of_chunks(self):
+        self.write_store(['B1001', 'B1002'], [5, 3], seed=0)
+        self.write_store(['B1003'], [4], seed=10)
+
+        result = sensor_store.read_sensor_radiation(self.locator, 'B1002')
+        self.assertEqual(list(result.columns), ['srf0', 'srf1', 'srf2'])
+        np.testing.assert_array_equal(result.values, sensor_radiation(3, 1).T)
+        np.testing.assert_array_equal(sensor_store.read_sensor_radiation(self.locator, 'B1003').values,
+                                      sensor_radiation(4, 10).T)
+
+        subset = sensor_store.read_sensor_radiation(self.locator, 'B1001', ['srf4', 'srf1'])
+        self.assertEqual(list(subset.columns), ['srf4', 'srf1'])
+        np.testing.assert_array_equal(subset.values, sensor_radiation(5, 0)[[4, 1]].T)
+
+        # the same yearly radiation as summing the columns of the hourly radiation
+        pd.testing.assert_series_equal(sensor_store.calc_sensor_totals(self.locator, 'B1001'),
+                                       sensor_store.read_sensor_radiation(self.locator, 'B1001').sum(axis=0))
+
+    def test_most_recent_store_and_feather_files(self):
+        self.write_store(['B1001', 'B1002'], [5, 3], seed=0)
+        time.sleep(0.01)
+        self.write_store(['B1002'], [3], seed=20)
+        np.testing.assert_array_equal(sensor_store.read_sensor_radiation(self.locator, 'B1002').values,
+                                      sensor_radiation(3, 20).T)
+        np.testing.assert_array_equal(sensor_store.read_sensor_radiation(self.locator, 'B1001').values,
+                                      sensor_radiation(5, 0).T)
+
+        # results of older versions of CEA
+        expected = pd.DataFrame(sensor_radiation(2, 30).T, columns=['srf0', 'srf1'])
+        feather.write_feather(expected, self.locator.get_radiation_building_sensors('B1003'))
+        pd.testing.assert_frame_equal(sensor_store.read_sensor_radiation(self.locator, 'B1003'), expected)
+        self.assertRaises(FileNotFoundError, sensor_store.read_sensor_radiation, self.locator, 'B1004')
+
+    def test_remove_superseded_stores(self):
+        self.write_store(['B1001', 'B1002'], [5, 3], seed=0)
+        time.sleep(0.01)
+        self.write_store(['B1003'], [4], seed=10)
+        time.sleep(0.01)
+        self.write_store(['B1002', 'B1001'], [3, 5], seed=20)
+        # the files of an interrupted run
+        interrupted = sensor_store.SensorStoreWriter(self.locator, ['B1004'], [2], hours=24)
+        del interrupted
+        open(self.locator.get_radiation_sensor_store_index('sensors_0123456789abcdef') + '.tmp', 'w').close()
+        self.assertEqual(len(os.listdir(self.locator.get_radiation_sensor_store_folder())), 8)
+
+        sensor_store.remove_superseded_sensor_stores(self.locator)
+        self.assertEqual(sorted(os.listdir(self.locator.get_radiation_sensor_store_folder())),
+                         sorted(os.path.basename(f) for f in [
+                             self.locator.get_radiation_sensor_store(sensor_store.get_sensor_store_name(names))
+                             for names in [['B1003'], ['B1002', 'B1001']]] + [
+                             self.locator.get_radiation_sensor_store_index(sensor_store.get_sensor_store_name(names))
+                             for names in [['B1003'], ['B1002', 'B1001']]]))
+        np.testing.assert_array_equal(sensor_store.read_sensor_radiation(self.locator, 'B1002').values,
+                                      sensor_radiation(3, 20).T)
+
+        sensor_store.remove_sensor_stores(self.locator, ['B1001', 'B1002', 'B1004'])
+        self.assertEqual(list(sensor_store.read_sensor_store_index(self.locator).index), ['B1003'])
+
+    def test_read_ill_file_into_store(self):
+        # the results of Daysim of a leap year, with a row per hour: month, day, hour and the value of each sensor
+        radiation = np.random.default_rng(42).uniform(0, 1000, (HOURS_IN_YEAR + 24, 7)).round(2)
+        radiation[radiation < 200] = 0
+        ill_path = os.path.join(self.locator.scenario, 'chunk_0.ill')
+        with open(ill_path, 'w') as f:
+            for hour, values in enumerate(radiation):
+                f.write('1 1 %.3f  %s\n' % (hour % 24 + 0.5, ' '.join('%g' % value for value in values)))
+        expected = np.delete(radiation.astype(np.float32), LEAP_DAY_HOURS, axis=0).T
+
+        np.testing.assert_array_equal(read_ill_file(ill_path), expected)
+
+        writer = sensor_store.SensorStoreWriter(self.locator, ['B1001', 'B1002'], [4, 3])
+        read_ill_file(ill_path, out=writer.data)
+        writer.close()
+        np.testing.assert_array_equal(sensor_store.read_sensor_radiation(self.locator, 'B1002').values,
+                                      expected[4:].T)
+        self.assertRaises(ValueError, read_ill_file, ill_path, np.empty((7, 24), dtype=np.float32))
+
+
+if __name__ == '__main__':
+    unittest.main()
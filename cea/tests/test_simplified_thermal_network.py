@@ -0,0 +1,56 @@
+"""
+Test the hours sizing the pipes of the simplified thermal network and the change of the head of the reservoir applied
+to the results of EPANET (:py:mod:`cea.technologies.thermal_network.simplified_thermal_network`).
+"""
+
+import types
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import cea.technologies.thermal_network.simplified_thermal_network as simplified_thermal_network
+
+
+class TestSimplifiedThermalNetwork(unittest.TestCase):
+    def test_calc_peak_hours(self):
+        # a plant (NODE0) supplying B1 and B2 through NODE1, and B3 directly
+        node_df = pd.DataFrame({'Type': ['PLANT', 'NONE', 'CONSUMER', 'CONSUMER', 'CONSUMER'],
+                                'Building': ['NONE', 'NONE', 'B1', 'B2', 'B3']},
+                               index=['NODE0', 'NODE1', 'NODE2', 'NODE3', 'NODE4'])
+        edge_df = pd.DataFrame({'start node': ['NODE0', 'NODE1', 'NODE1', 'NODE0'],
+                                'end node': ['NODE1', 'NODE2', 'NODE3', 'NODE4']},
+                               index=['PIPE0', 'PIPE1', 'PIPE2', 'PIPE3'])
+        volume_flow_m3pers_building = pd.DataFrame(
+            np.random.default_rng(0).uniform(0.0, 0.01, (500, 3)), columns=['B1', 'B2', 'B3'])
+
+        peak_hours = simplified_thermal_network.calc_peak_hours(node_df, edge_df, volume_flow_m3pers_building,
+                                                                hours_number=2)
+        volume_flows_m3pers = volume_flow_m3pers_building.values
+        pipe_flows_m3pers = np.column_stack([volume_flows_m3pers[:, 0] + volume_flows_m3pers[:, 1],
+                                             volume_flows_m3pers[:, 0], volume_flows_m3pers[:, 1],
+                                             volume_flows_m3pers[:, 2]])
+        self.assertTrue(set(pipe_flows_m3pers.argmax(axis=0)) <= set(peak_hours))
+        self.assertTrue(set(np.argsort(volume_flows_m3pers.sum(axis=1))[-2:]) <= set(peak_hours))
+        self.assertLessEqual(len(peak_hours), 6)
+        np.testing.assert_array_equal(pipe_flows_m3pers[peak_hours].max(axis=0), pipe_flows_m3pers.max(axis=0))
+
+        # with a loop (NODE3 to NODE4), the flows depend on the pipes: all the hours are simulated
+        looped_edge_df = pd.concat([edge_df, pd.DataFrame({'start node': ['NODE3'], 'end node': ['NODE4']},
+                                                          index=['PIPE4'])])
+        peak_hours = simplified_thermal_network.calc_peak_hours(node_df, looped_edge_df, volume_flow_m3pers_building,
+                                                                hours_number=2)
+        np.testing.assert_array_equal(peak_hours, np.arange(500))
+
+    def test_apply_reservoir_head(self):
+        head_m = pd.DataFrame({'NODE0': [12.0, 12.0, 12.0], 'NODE1': [10.0, 9.5, 9.0]})
+        pressure_m = pd.DataFrame({'NODE0': [0.0, 0.0, 0.0], 'NODE1': [5.0, 4.5, 4.0]})
+        results = types.SimpleNamespace(node={'head': head_m, 'pressure': pressure_m})
+
+        simplified_thermal_network.apply_reservoir_head(results, 'NODE0', np.array([1.0, 2.0, 3.0]))
+        np.testing.assert_allclose(results.node['head'].values, [[13.0, 11.0], [14.0, 11.5], [15.0, 12.0]])
+        np.testing.assert_allclose(results.node['pressure'].values, [[0.0, 6.0], [0.0, 6.5], [0.0, 7.0]])
+
+
+if __name__ == '__main__':
+    unittest.main()
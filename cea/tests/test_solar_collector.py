@@ -0,0 +1,61 @@
+"""
+Test the multi-segment collector model (:py:func:`cea.technologies.solar.solar_collector.calc_Tout_multi_segment_C`)
+shared by the solar collectors and the photovoltaic-thermal panels.
+"""
+
+import unittest
+
+import numpy as np
+
+from cea.constants import HOURS_IN_YEAR
+from cea.technologies.solar.solar_collector import calc_Tout_multi_segment_C, calc_optimal_mass_flow
+
+AREA_M2 = 1.8
+C_EFF_JPERM2K = 8000.0
+CP_FLUID_JPERKGK = 3680.0
+NSEG = 10
+
+
+class TestCollectorModel(unittest.TestCase):
+    def setUp(self):
+        hours = np.arange(HOURS_IN_YEAR)
+        sun = np.clip(np.sin((hours % 24 - 6) / 12.0 * np.pi), 0, None)
+        self.q_rad_Wperm2 = 700.0 * sun
+        self.Tamb_C = 10.0 + 10.0 * np.sin(hours / float(HOURS_IN_YEAR) * 2 * np.pi) + 5.0 * sun
+        self.c1 = np.full(HOURS_IN_YEAR, 3.91)
+        self.flows_kgpers = np.array([np.zeros(HOURS_IN_YEAR), np.full(HOURS_IN_YEAR, 58.0 * AREA_M2 / 3600),
+                                      np.where(sun > 0, 87.0 * AREA_M2 / 3600, 0.0)])
+
+    def calc_Tout_C(self, flows_kgpers, q_rad_Wperm2=None):
+        q_rad_Wperm2 = self.q_rad_Wperm2 if q_rad_Wperm2 is None else q_rad_Wperm2
+        return calc_Tout_multi_segment_C(flows_kgpers, q_rad_Wperm2, self.Tamb_C, self.c1, 0.017, 60.0, AREA_M2,
+                                         C_EFF_JPERM2K, CP_FLUID_JPERKGK, NSEG)
+
+    def test_flow_cases_are_independent(self):
+        Tout_C = self.calc_Tout_C(self.flows_kgpers)
+        self.assertEqual(Tout_C.shape, (3, HOURS_IN_YEAR))
+        for flow in range(3):
+            np.testing.assert_array_equal(Tout_C[flow], self.calc_Tout_C(self.flows_kgpers[flow:flow + 1])[0])
+
+    def test_outlet_temperatures(self):
+        Tout_C = self.calc_Tout_C(self.flows_kgpers)
+        # without radiation nor flow the collector is at the ambient temperature
+        stagnation_C = self.calc_Tout_C(self.flows_kgpers[:1], np.zeros(HOURS_IN_YEAR))[0]
+        np.testing.assert_allclose(stagnation_C, self.Tamb_C)
+        # with a constant flow the collector heats the fluid at noon
+        noon = np.arange(12, HOURS_IN_YEAR, 24)
+        self.assertTrue(np.all(Tout_C[1, noon] > 60.0))
+        self.assertTrue(np.all(np.isfinite(Tout_C)))
+
+    def test_optimal_mass_flow(self):
+        q = [np.array([1.0, 1.0, 0.0]), np.array([3.0, 2.0, -1.0]), np.array([3.0, 1.0, -1.0]),
+             np.array([0.0, 2.0, -2.0])]
+        E = [np.zeros(3)] * 4
+        mass_flow_kgpers, dP_Pa = calc_optimal_mass_flow(*(q + E + [0.0, 10.0, 20.0, 30.0, 0.0, 1.0, 2.0, 3.0, 3600.0]))
+        # the first flow with the highest heat production in each hour
+        np.testing.assert_array_equal(mass_flow_kgpers, [10.0, 10.0, 0.0])
+        np.testing.assert_array_equal(dP_Pa, [3600.0, 3600.0, 0.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
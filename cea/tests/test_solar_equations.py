@@ -0,0 +1,114 @@
+"""
+Test the vectorized sun position, the stored sun properties of the scenario and the grouping of the sensors
+(:py:mod:`cea.utilities.solar_equations`) shared by the solar technologies.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+from cea.utilities import solar_equations
+from cea.utilities.date import get_date_range_hours_from_year
+
+
+class SolarLocator(object):
+    def __init__(self, folder):
+        self.folder = folder
+
+    def solar_potential_folder(self):
+        return self.folder
+
+
+class TestSunProperties(unittest.TestCase):
+    def setUp(self):
+        self.latitude, self.longitude = 47.37, 8.54
+        self.datetime_local = get_date_range_hours_from_year(2009).tz_localize('Etc/GMT-1')
+        rng = np.random.default_rng(42)
+        self.weather_data = pd.DataFrame({'dayofyear': self.datetime_local.dayofyear,
+                                          'month': self.datetime_local.month, 'day': self.datetime_local.day,
+                                          'hour': self.datetime_local.hour,
+                                          'difhorrad_Whm2': rng.uniform(0, 300, len(self.datetime_local)),
+                                          'glohorrad_Whm2': rng.uniform(0, 800, len(self.datetime_local))})
+        self.config = SimpleNamespace(solar=SimpleNamespace(solar_window_solstice=4))
+
+    def test_sun_position_matches_pyephem(self):
+        datetime_local = self.datetime_local[::97]
+        expected = solar_equations.pyephem(datetime_local, self.latitude, self.longitude)
+        result = solar_equations.calc_sun_position(datetime_local, self.latitude, self.longitude)
+        np.testing.assert_allclose(result['zenith'], expected['zenith'], atol=0.02)
+        np.testing.assert_allclose(result['elevation'], expected['elevation'], atol=0.02)
+        azimuth_difference = (result['azimuth'] - expected['azimuth'] + 180) % 360 - 180
+        np.testing.assert_allclose(azimuth_difference, 0, atol=0.02)
+
+    def test_stored_sun_properties(self):
+        locator = SolarLocator(tempfile.mkdtemp())
+        try:
+            expected = solar_equations.calc_sun_properties(self.latitude, self.longitude, self.weather_data,
+                                                           self.datetime_local, self.config)
+            self.assertNotIn('diff', self.weather_data.columns)
+            result = solar_equations.get_sun_properties(locator, self.latitude, self.longitude, self.weather_data,
+                                                        self.datetime_local, self.config)
+            self.assertTrue(os.path.exists(solar_equations.get_sun_properties_file(locator)))
+            key = solar_equations.calc_sun_properties_key(self.latitude, self.longitude, self.weather_data,
+                                                          self.datetime_local, 4)
+            stored = solar_equations.read_sun_properties(solar_equations.get_sun_properties_file(locator), key)
+            for properties in [result, stored]:
+                for field in ['g', 'Sz', 'Az', 'ha']:
+                    pd.testing.assert_series_equal(getattr(properties, field), getattr(expected, field))
+                self.assertEqual((properties.trr_mean, properties.worst_sh, properties.worst_Az),
+                                 (expected.trr_mean, expected.worst_sh, expected.worst_Az))
+
+            # another location, solar window or weather file invalidates the stored sun properties
+            for other_key in [
+                    solar_equations.calc_sun_properties_key(self.latitude + 1, self.longitude, self.weather_data,
+                                                            self.datetime_local, 4),
+                    solar_equations.calc_sun_properties_key(self.latitude, self.longitude, self.weather_data,
+                                                            self.datetime_local, 6),
+                    solar_equations.calc_sun_properties_key(self.latitude, self.longitude, self.weather_data * 2,
+                                                            self.datetime_local, 4)]:
+                self.assertIsNone(
+                    solar_equations.read_sun_properties(solar_equations.get_sun_properties_file(locator), other_key))
+        finally:
+            shutil.rmtree(locator.folder)
+
+
+class TestSensorGroups(unittest.TestCase):
+    def test_groups_match_sensor_selection(self):
+        rng = np.random.default_rng(42)
+        n = 500
+        names = ['B1000_%d' % i for i in range(n)]
+        sensors_metadata_cat = pd.DataFrame({'TYPE': rng.choice(['roofs', 'walls'], n),
+                                             'orientation': rng.choice(['top', 'south', 'west'], n),
+                                             'CATB': rng.integers(1, 4, n), 'CATGB': rng.integers(1, 3, n),
+                                             'CATteta_z': rng.integers(1, 3, n), 'AREA_m2': rng.uniform(0.1, 2, n),
+                                             'area_installed_module_m2': rng.uniform(0, 2, n),
+                                             'B_deg': rng.uniform(0, 60, n)}, index=names)
+        # the radiation of other sensors (e.g. of filtered sensors) is ignored
+        radiation = pd.DataFrame(rng.uniform(0, 800, (24, n + 10)),
+                                 columns=names[::-1] + ['x%d' % i for i in range(10)])
+
+        panel_groups = solar_equations.calc_groups(radiation, sensors_metadata_cat)
+        prop_observers = panel_groups['prop_observers']
+        self.assertEqual(panel_groups['number_groups'], len(prop_observers))
+        self.assertEqual(sum(panel_groups['number_points'].values()), n)
+        self.assertEqual(panel_groups['hourlydata_groups'].shape, (24, len(prop_observers)))
+
+        for group, group_properties in prop_observers.iterrows():
+            sensors = sensors_metadata_cat[(sensors_metadata_cat.CATB == group_properties.CATB) &
+                                           (sensors_metadata_cat.CATGB == group_properties.CATGB) &
+                                           (sensors_metadata_cat.CATteta_z == group_properties.CATteta_z) &
+                                           (sensors_metadata_cat.type_orientation == group_properties.type_orientation)]
+            self.assertEqual(panel_groups['number_points'][group], len(sensors))
+            self.assertEqual(group_properties.srfs, ''.join(sensors.index))
+            self.assertAlmostEqual(group_properties.AREA_m2, sensors.AREA_m2.sum())
+            self.assertAlmostEqual(group_properties.B_deg, sensors.B_deg.mean())
+            np.testing.assert_allclose(panel_groups['hourlydata_groups'][group], radiation[sensors.index].mean(axis=1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+"""
+Test the store of the hourly results of the thermal networks (:py:mod:`cea.technologies.thermal_network.results_store`)
+written by the thermal network scripts and read by the plots and the optimization.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import cea.inputlocator
+import cea.plots.cache
+from cea.technologies.thermal_network import results_store
+
+
+def network_results(seed):
+    rng = np.random.default_rng(seed)
+    return {'edge_mass_flows': pd.DataFrame(rng.uniform(0, 10, (2000, 6)).astype(np.float32),
+                                            columns=['PIPE%i' % i for i in range(6)]),
+            'T_supply_nodes': pd.DataFrame(rng.uniform(300, 350, (2000, 4)).astype(np.float32),
+                                           columns=['NODE%i' % i for i in range(4)]),
+            'thermal_losses_system_kW': pd.DataFrame(rng.uniform(0, 5, (2000, 3)).astype(np.float32),
+                                                     columns=['thermal_loss_supply_kW', 'thermal_loss_return_kW',
+                                                              'thermal_loss_total_kW'])}
+
+
+class TestThermalNetworkResultsStore(unittest.TestCase):
+    def setUp(self):
+        self.locator = cea.inputlocator.InputLocator(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.locator.scenario)
+
+    def csv_file(self, quantity):
+        return results_store.get_results_csv_file(self.locator, quantity, 'DH', '')
+
+    def test_parquet_results(self):
+        results = network_results(seed=0)
+        results_store.write_thermal_network_results(self.locator, 'DH', '', results, 'csv')
+        results_store.write_thermal_network_results(self.locator, 'DH', '', results, 'parquet')
+        # only the totals of the network are written to csv files, those of the pipes of the csv run are removed
+        self.assertFalse(os.path.exists(self.csv_file('edge_mass_flows')))
+        self.assertTrue(os.path.exists(self.csv_file('thermal_losses_system_kW')))
+
+        # the input files of the plots are the files read
+        locator_method, args = results_store.resolve_results_file(
+            self.locator, self.locator.get_thermal_network_layout_massflow_edges_file, ['DH', ''])
+        self.assertEqual(locator_method(*args),
+                         self.locator.get_thermal_network_results_store_file('edge_mass_flows', 'DH', ''))
+        cache = cea.plots.cache.PlotCache(self.locator.scenario)
+        self.assertEqual(cache.newest_dependency([(locator_method, args)]), os.path.getmtime(locator_method(*args)))
+        self.assertEqual(results_store.resolve_results_file(self.locator, self.locator.get_zone_geometry, []),
+                         (self.locator.get_zone_geometry, []))
+
+        for quantity, expected in results.items():
+            result = results_store.read_thermal_network_results(self.locator, 'DH', '', quantity)
+            self.assertEqual(result.dtypes.unique().tolist(), [np.float64])
+            pd.testing.assert_frame_equal(result, expected.astype(np.float64))
+
+        # some pipes at some hours, across chunks of the store
+        hours = [5, 729, 730, 1999, 42]
+        result = results_store.read_thermal_network_results(self.locator, 'DH', '', 'edge_mass_flows',
+                                                            columns=['PIPE4', 'PIPE1'], hours=hours)
+        self.assertEqual(list(result.columns), ['PIPE4', 'PIPE1'])
+        self.assertEqual(list(result.index), hours)
+        np.testing.assert_array_equal(result.values, results['edge_mass_flows'].values[hours][:, [4, 1]])
+        self.assertRaises(ValueError, results_store.read_thermal_network_results, self.locator, 'DH', '',
+                          'edge_mass_flows', hours=[2000])
+
+    def test_most_recent_results(self):
+        results_store.write_thermal_network_results(self.locator, 'DH', '', network_results(seed=1), 'parquet')
+        results = network_results(seed=2)
+        results_store.write_thermal_network_results(self.locator, 'DH', '', results, 'csv', float_format='%.3f')
+        self.assertFalse(os.path.exists(self.locator.get_thermal_network_results_store_folder('DH', '')))
+
+        # the csv files of a more recent run are read, with the same columns and hours as the store
+        expected = pd.read_csv(self.csv_file('T_supply_nodes'))
+        np.testing.assert_allclose(expected.values, results['T_supply_nodes'].values, atol=1e-3)
+        result = results_store.read_thermal_network_results(self.locator, 'DH', '', 'T_supply_nodes',
+                                                            columns=['NODE3'], hours=range(10, 20))
+        pd.testing.assert_frame_equal(result, expected[['NODE3']].iloc[10:20])
+        locator_method, args = results_store.resolve_results_file(
+            self.locator, self.locator.get_network_temperature_supply_nodes_file, ['DH', ''])
+        self.assertEqual(locator_method(*args), self.csv_file('T_supply_nodes'))
+        self.assertRaises(ValueError, results_store.write_thermal_network_results, self.locator, 'DH', '', results,
+                          'feather')
+
+
+if __name__ == '__main__':
+    unittest.main()
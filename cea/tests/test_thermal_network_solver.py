@@ -0,0 +1,186 @@
+"""
+Test the sparse solver of the edge-node matrix of the thermal networks
+(:py:mod:`cea.technologies.thermal_network.sparse_solver`) against the dense solution of
+:py:func:`cea.technologies.thermal_network.thermal_network.calc_mass_flow_edges`, the solution of the mass flows of
+many hours at once and the loop corrections of looped networks.
+"""
+
+import types
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+import cea.technologies.thermal_network.thermal_network as thermal_network
+import cea.utilities.parallel
+from cea.technologies.constants import SPARSE_SOLVER_CACHE_SIZE
+from cea.technologies.thermal_network.sparse_solver import IncidenceMatrixSolver, to_csr
+
+
+def switch_to_constant_temperature(t, network):
+    """stands in for hourly_thermal_calculation: the plant can't meet the demand at hour 1, so the control switches
+    to constant temperature (as in solve_network_temperatures)"""
+    result = (t, network.temperature_control, sorted(network.delta_cap_mass_flow), sorted(network.cc_old['cs_ahu']))
+    network.delta_cap_mass_flow[t] = 0
+    network.cc_old['cs_ahu'][t] = 0
+    if t == 1:
+        network.temperature_control = 'CT'
+    return result
+
+
+def random_network(nodes, loops, seed):
+    """an edge-node matrix of a random tree of the nodes with the plant at node 0, plus some loops"""
+    rng = np.random.default_rng(seed)
+    connections = [(rng.integers(0, node), node) for node in range(1, nodes)]
+    while len(connections) < nodes - 1 + loops:
+        start, end = sorted(rng.choice(nodes, 2, replace=False))
+        if (start, end) not in connections:
+            connections.append((start, end))
+    edge_node = np.zeros((nodes, len(connections)))
+    for edge, (start, end) in enumerate(connections):
+        edge_node[start, edge] = -1
+        edge_node[end, edge] = 1
+    node_flows = rng.uniform(0.5, 2.0, nodes)
+    node_flows[0] = -node_flows[1:].sum()
+    return edge_node, node_flows
+
+
+class TestIncidenceMatrixSolver(unittest.TestCase):
+    def test_branched_network(self):
+        edge_node, node_flows = random_network(150, 0, seed=1)
+        edge_node_csr = to_csr(edge_node)
+        solver = IncidenceMatrixSolver(edge_node_csr, 0)
+        mass_flow = solver.solve_edge_flows(edge_node_csr, node_flows)
+        np.testing.assert_allclose(mass_flow, np.linalg.solve(edge_node[1:], node_flows[1:]), atol=1e-9)
+
+        pressure_loss = np.random.default_rng(2).uniform(10, 100, edge_node.shape[1])
+        expected = np.linalg.lstsq(edge_node.T, -pressure_loss, rcond=None)[0]
+        np.testing.assert_allclose(solver.solve_node_potentials(edge_node_csr, -pressure_loss), expected, atol=1e-7)
+
+    def test_looped_network(self):
+        edge_node, node_flows = random_network(120, 15, seed=3)
+        edge_node_csr = to_csr(edge_node)
+        mass_flow = IncidenceMatrixSolver(edge_node_csr, 0).solve_edge_flows(edge_node_csr, node_flows)
+        # the solution with the smallest norm, as the least squares of the dense matrix
+        expected = np.linalg.lstsq(edge_node[1:], node_flows[1:], rcond=None)[0]
+        np.testing.assert_allclose(mass_flow, expected, atol=1e-9)
+
+    def test_factorization_reused_for_flow_directions(self):
+        IncidenceMatrixSolver.cache.clear()
+        edge_node, node_flows = random_network(100, 5, seed=4)
+        solver = IncidenceMatrixSolver.get(to_csr(edge_node), 0)
+
+        flipped = edge_node.copy()
+        flipped[:, ::3] *= -1
+        flipped_csr = to_csr(flipped)
+        self.assertIs(IncidenceMatrixSolver.get(flipped_csr, 0), solver)
+        self.assertIsNot(IncidenceMatrixSolver.get(flipped_csr, 1), solver)
+        np.testing.assert_allclose(solver.solve_edge_flows(flipped_csr, node_flows),
+                                   np.linalg.lstsq(flipped[1:], node_flows[1:], rcond=None)[0], atol=1e-9)
+
+        # only the factorizations of the most recently used networks are kept
+        for removed_node in range(2, SPARSE_SOLVER_CACHE_SIZE):
+            IncidenceMatrixSolver.get(flipped_csr, removed_node)
+        self.assertIs(IncidenceMatrixSolver.get(flipped_csr, 0), solver)
+        IncidenceMatrixSolver.get(flipped_csr, SPARSE_SOLVER_CACHE_SIZE)
+        self.assertEqual(len(IncidenceMatrixSolver.cache), SPARSE_SOLVER_CACHE_SIZE)
+        self.assertIs(IncidenceMatrixSolver.get(flipped_csr, 0), solver)
+        for removed_node in range(SPARSE_SOLVER_CACHE_SIZE + 1, 2 * SPARSE_SOLVER_CACHE_SIZE + 1):
+            IncidenceMatrixSolver.get(flipped_csr, removed_node)
+        self.assertIsNot(IncidenceMatrixSolver.get(flipped_csr, 0), solver)
+
+    def test_calc_mass_flow_edges(self):
+        edge_node, node_flows = random_network(150, 0, seed=5)
+        edge_node_df = pd.DataFrame(edge_node, index=['NODE%i' % i for i in range(len(edge_node))],
+                                    columns=['PIPE%i' % i for i in range(edge_node.shape[1])])
+        all_nodes_df = pd.DataFrame({'Type': ['PLANT'] + ['CONSUMER'] * (len(edge_node) - 1)},
+                                    index=edge_node_df.index)
+        mass_flow_substation_df = pd.DataFrame([node_flows], columns=edge_node_df.index)
+
+        def calc_mass_flow_edges(min_edges):
+            with mock.patch.object(thermal_network, 'SPARSE_SOLVER_MIN_EDGES', min_edges):
+                return thermal_network.calc_mass_flow_edges(edge_node_df, mass_flow_substation_df, all_nodes_df,
+                                                            None, None, None, lambda df: ([], None))
+
+        np.testing.assert_allclose(calc_mass_flow_edges(1), calc_mass_flow_edges(edge_node.shape[1] + 1), atol=1e-5)
+
+    def test_calc_mass_flow_edges_branched(self):
+        edge_node, _ = random_network(120, 0, seed=6)
+        edge_node_df = pd.DataFrame(edge_node)
+        all_nodes_df = pd.DataFrame({'Type': ['NONE', 'PLANT'] + ['CONSUMER'] * (len(edge_node) - 2)})
+        mass_flow_nodes = np.random.default_rng(7).uniform(0, 2, (24, len(edge_node)))
+        mass_flow_nodes[:, 1] = -mass_flow_nodes.sum(axis=1) + mass_flow_nodes[:, 1]
+        mass_flow_nodes[5] = 0.0  # an hour without demand
+
+        expected = [thermal_network.calc_mass_flow_edges(edge_node_df, pd.DataFrame([flows]), all_nodes_df, None,
+                                                         None, None, lambda df: ([], None))
+                    for flows in mass_flow_nodes]
+        for min_edges in [1, edge_node.shape[1] + 1]:
+            with mock.patch.object(thermal_network, 'SPARSE_SOLVER_MIN_EDGES', min_edges):
+                mass_flow_edges = thermal_network.calc_mass_flow_edges_branched(edge_node_df, mass_flow_nodes,
+                                                                                all_nodes_df)
+            self.assertEqual(mass_flow_edges.shape, (24, edge_node.shape[1]))
+            np.testing.assert_allclose(mass_flow_edges, expected, atol=1e-5)
+            np.testing.assert_array_equal(mass_flow_edges[5], 0.0)
+
+    def test_looped_mass_flows(self):
+        # a plant (N0) supplying three consumers through a loop: N0 -> N1 -> N3 and N0 -> N2 -> N3
+        edge_node_df = pd.DataFrame([[-1, -1, 0, 0], [1, 0, -1, 0], [0, 1, 0, -1], [0, 0, 1, 1]],
+                                    index=['N0', 'N1', 'N2', 'N3'], columns=['P0', 'P1', 'P2', 'P3'], dtype=float)
+        all_nodes_df = pd.DataFrame({'Type': ['PLANT', 'CONSUMER', 'CONSUMER', 'CONSUMER']}, index=edge_node_df.index)
+        mass_flow_substation_df = pd.DataFrame([[-6.0, 1.0, 1.0, 4.0]], columns=edge_node_df.index)
+        pipe_diameter_m = np.full(4, 0.1)
+        pipe_length_m = np.array([100.0, 100.0, 100.0, 300.0])
+
+        def find_loops(df):
+            return thermal_network.ThermalNetwork.find_loops(None, df)
+
+        loops, graph = find_loops(edge_node_df)
+        self.assertEqual(len(loops), 1)
+        loop_matrix = thermal_network.calc_loop_matrix(loops, graph, edge_node_df.values).toarray()
+        self.assertEqual(sorted(abs(loop_matrix[0])), [1, 1, 1, 1])
+        # the edges of each path from the plant to N3 have the same direction in the loop
+        self.assertEqual(loop_matrix[0, 0], loop_matrix[0, 2])
+        self.assertEqual(loop_matrix[0, 1], loop_matrix[0, 3])
+        self.assertEqual(loop_matrix[0, 0], -loop_matrix[0, 1])
+
+        convergence_log = []
+        mass_flow_edges = thermal_network.calc_mass_flow_edges(edge_node_df, mass_flow_substation_df, all_nodes_df,
+                                                               pipe_diameter_m, pipe_length_m, np.full(4, 283.15),
+                                                               find_loops, convergence_log)
+        np.testing.assert_allclose(edge_node_df.values[1:] @ mass_flow_edges, [1.0, 1.0, 4.0], atol=1e-4)
+        # the longer path carries less flow to N3
+        self.assertGreater(mass_flow_edges[2], mass_flow_edges[3])
+        self.assertTrue(0 < len(convergence_log) < thermal_network.MAX_LOOP_ITERATIONS)
+        self.assertLess(convergence_log[-1]['max_mass_flow_change_kgs'], 0.01)
+
+    def test_calc_hour_blocks(self):
+        self.assertEqual(thermal_network.calc_hour_blocks(0, 10, processes=4), [(0, 3), (3, 6), (6, 9), (9, 10)])
+        blocks = thermal_network.calc_hour_blocks(0, 8760, processes=2)
+        self.assertEqual(blocks[0], (0, thermal_network.MAX_HOURS_IN_BLOCK))
+        self.assertEqual([t for start_t, stop_t in blocks for t in range(start_t, stop_t)], list(range(8760)))
+
+
+class TestThermalCalculationBlocks(unittest.TestCase):
+    def calc_thermal_results(self, processes):
+        network = types.SimpleNamespace(start_t=0, stop_t=4, temperature_control='VT', delta_cap_mass_flow={},
+                                        nodes={}, cc_old={'cs_ahu': {}}, ch_old={}, cc_value={}, ch_value={})
+        # the worker processes are forked with the patched module
+        cea.utilities.parallel.shutdown_pool()
+        with mock.patch.object(thermal_network, 'hourly_thermal_calculation', switch_to_constant_temperature):
+            results = thermal_network.calc_thermal_results(network, processes)
+        cea.utilities.parallel.shutdown_pool()
+        self.assertEqual(network.temperature_control, 'VT')
+        self.assertEqual(network.delta_cap_mass_flow, {})
+        self.assertEqual(network.cc_old, {'cs_ahu': {}})
+        return results
+
+    def test_same_results_for_any_processes(self):
+        expected = [(t, 'VT', [], []) for t in range(4)]
+        self.assertEqual(self.calc_thermal_results(processes=1), expected)
+        self.assertEqual(self.calc_thermal_results(processes=2), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
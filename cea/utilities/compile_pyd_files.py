@@ -15,12 +15,6 @@ import os
 
 
 def main():
-    delete_pyd('..', 'demand', 'rc_model_sia_cc.pyd')
-    delete_pyd('rc_model_sia_cc.pyd')
-    compile_rc_model_sia()
-    copy_pyd('rc_model_sia_cc.pyd', ['..', 'demand', 'rc_model_sia_cc.pyd'])
-    delete_pyd('rc_model_sia_cc.pyd')
-
     delete_pyd('..', 'technologies', 'calc_radiator.pyd')
     delete_pyd('calc_radiator.pyd')
     compile_radiators()
@@ -47,31 +41,6 @@ def copy_pyd(source, destination):
                 os.path.join(parent, *destination))
 
 
-def compile_rc_model_sia():
-    import cea.demand.rc_model_SIA
-    reload(cea.demand.rc_model_SIA)
-    cc = CC('rc_model_sia_cc')
-
-    # cc.export('calc_h_ec', "f8(f8)")(cea.demand.rc_model_SIA.calc_h_ec)
-    # cc.export('calc_h_ac', "f8(f8)")(cea.demand.rc_model_SIA.calc_h_ac)
-    # cc.export('calc_h_ea', "f8(f8, f8, f8)")(cea.demand.rc_model_SIA.calc_h_ea)
-    # cc.export('calc_f_sc', "f8(f8, f8, f8, f8)")(cea.demand.rc_model_SIA.calc_f_sc)
-    cc.export('calc_phi_m', "f8(f8, f8, f8, f8, f8, f8, f8)")(cea.demand.rc_model_SIA.calc_phi_m)
-    cc.export('calc_phi_c', "f8(f8, f8, f8, f8, f8, f8, f8)")(cea.demand.rc_model_SIA.calc_phi_c)
-    cc.export('calc_theta_c', "f8(f8, f8, f8, f8, f8, f8, f8, f8, f8)")(cea.demand.rc_model_SIA.calc_theta_c)
-    cc.export('calc_phi_m_tot', "f8(f8, f8, f8, f8, f8, f8, f8, f8, f8, f8, f8, f8)")(
-        cea.demand.rc_model_SIA.calc_phi_m_tot)
-    cc.export('calc_phi_a', "f8(f8, f8, f8, f8, f8)")(cea.demand.rc_model_SIA.calc_phi_a)
-    cc.export('calc_theta_m', "f8(f8, f8)")(cea.demand.rc_model_SIA.calc_theta_m)
-    cc.export('calc_h_ea', "f8(f8, f8, f8)")(cea.demand.rc_model_SIA.calc_h_ea)
-    cc.export('calc_theta_m_t', "f8(f8, f8, f8, f8, f8)")(cea.demand.rc_model_SIA.calc_theta_m_t)
-    cc.export('calc_theta_ea', "f8(f8, f8, f8, f8, f8)")(cea.demand.rc_model_SIA.calc_theta_ea)
-    cc.export('calc_h_em', "f8(f8, f8)")(cea.demand.rc_model_SIA.calc_h_em)
-    cc.export('calc_h_3', "f8(f8, f8)")(cea.demand.rc_model_SIA.calc_h_3)
-
-    cc.compile()
-
-
 def compile_radiators():
     import cea.technologies.radiators
     reload(cea.technologies.radiators)
@@ -13,10 +13,13 @@ This module exports the function `map` which is intended to replace both ``map_a
 (which was used when ``config.multiprocessing == False``). This simplifies multiprocessing.
 """
 
+import atexit
 import multiprocessing
+import os
+import pickle
 import sys
 import logging
-from itertools import repeat
+from multiprocessing import shared_memory
 from cea.utilities.workerstream import stream_from_queue, QueueWorkerStream
 
 __author__ = "Daren Thomas"
@@ -37,6 +40,9 @@ def vectorize(func, processes=1, on_complete=None):
     The main point of using ``vectorize`` is to unify single-processing with multi-processing - if processes > 1,
     then multiprocessing is used and the function will be run on a pool of processes. STDOUT and STDERR of these
     processes are fed through a ``cea.workerstream.QueueWorkerStream`` so it can be shown in the dashboard job output.
+    The pool of processes is kept alive and reused by later calls (see ``get_pool``) and the arguments that are the same
+    for every call (e.g. ``itertools.repeat(weather_data, n)``) are only sent to the workers once (see
+    ``SharedArguments``).
 
     The parameter ``on_complete`` is an optional callable that is called for each completed call of ``func``. It takes
     4 arguments:
@@ -46,7 +52,10 @@ def vectorize(func, processes=1, on_complete=None):
     - args: the arguments passed to this call to ``func``
     - result: the return value of this call to ``func``
 
-    .. note: due to the way multiprocessing works, ``func`` and ``on_complete`` need to be module-level functions
+    ``on_complete`` is called in the parent process as soon as a call is completed, so it can be used to accumulate the
+    results (e.g. the district totals of the demand) while the remaining calls are still running.
+
+    .. note: due to the way multiprocessing works, ``func`` needs to be a module-level function
 
     .. note: the if processes > 1, then the first argument to the vectorized ``func`` will be converted to a list before
         running. This should not have any side effects, but is necessary if the args are constructed with
@@ -62,41 +71,153 @@ def vectorize(func, processes=1, on_complete=None):
         return single_process_wrapper(func, on_complete)
 
 
-def __multiprocess_wrapper(func, processes, on_complete):
-    """Create a worker pool to map the function, taking care to set up STDOUT and STDERR"""
+# the worker pool (and the manager of the queue for STDOUT and STDERR) is created once and reused by all calls to the
+# vectorized functions, see ``get_pool``
+__pool = None
+__pool_processes = None
+__manager = None
+__queue = None
 
-    def wrapper(*args):
-        print("Using {processes} CPU's".format(processes=processes))
-        pool = multiprocessing.Pool(processes)
-        manager = multiprocessing.Manager()
+# the pickled shared arguments most recently loaded by a worker process, see ``load_shared_arguments``
+__worker_shared_arguments = {}
 
-        # a queue for STDOUT and STDERR output of sub-processes (see cea.utilities.workerstream.QueueWorkerStream)
-        queue = manager.Queue()
 
-        # make sure the first arg is a list (not a generator) since we need the length of the sequence
-        args = [list(a) for a in args]
-        n = len(args[0])  # the number of iterations to map
+def get_pool(processes):
+    """
+    Return the worker pool with ``processes`` processes (and the queue for STDOUT and STDERR of the workers). The pool
+    is kept alive for the lifetime of the process, so the scripts of a workflow don't pay for starting the workers
+    again. A pool with a different number of processes replaces the current pool.
+    """
+    global __pool, __pool_processes, __manager, __queue
+    if __pool is None or __pool_processes != processes:
+        shutdown_pool()
+        if os.name == 'posix':
+            # the workers need to share the resource tracker of this process to attach to the `SharedArguments`
+            from multiprocessing import resource_tracker
+            resource_tracker.ensure_running()
+        __pool = multiprocessing.Pool(processes)
+        __pool_processes = processes
+        if __manager is None:
+            __manager = multiprocessing.Manager()
+            # a queue for STDOUT and STDERR output of sub-processes (see cea.utilities.workerstream.QueueWorkerStream)
+            __queue = __manager.Queue()
+    return __pool, __queue
+
+
+def shutdown_pool():
+    """
+    Terminate the worker pool created by ``get_pool`` (if any) and the manager of its queue, this is done automatically
+    at exit
+    """
+    global __pool, __pool_processes, __manager, __queue
+    if __pool is not None:
+        __pool.terminate()
+        __pool.join()
+        __pool = None
+        __pool_processes = None
+    if __manager is not None:
+        __manager.shutdown()
+        __manager = None
+        __queue = None
 
-        # set up the list of i-values for on_complete
-        i_queue = manager.Queue()
-        for i in range(n):
-            i_queue.put(i)
 
-        args = [repeat(func, n),
-                repeat(queue, n),
-                repeat(on_complete, n),
-                repeat(i_queue, n),
-                repeat(n, n)] + args
-        args = zip(*args)
+atexit.register(shutdown_pool)
 
-        map_result = pool.map_async(__apply_func_with_worker_stream, args)
 
-        while not map_result.ready():
-            stream_from_queue(queue)
-        result = map_result.get()
+class SharedArguments(object):
+    """
+    Arguments that are the same for every call to a vectorized function (e.g. ``itertools.repeat(weather_data, n)``)
+    are pickled once to a block of shared memory instead of being pickled with every task. The tasks only contain the
+    name of the block and the workers read the pickled arguments once per block (see ``load_shared_arguments``). They
+    are unpickled for every call, so each call gets its own copy of the arguments, as if they were sent with the task:
+    a call changing its arguments does not change the arguments of the later calls of the worker.
+    """
+
+    def __init__(self, arguments):
+        data = pickle.dumps(arguments, protocol=pickle.HIGHEST_PROTOCOL)
+        self.size = len(data)
+        self.shared_memory = shared_memory.SharedMemory(create=True, size=max(self.size, 1))
+        self.shared_memory.buf[:self.size] = data
+        self.name = self.shared_memory.name
+
+    def reference(self):
+        """the (picklable) reference to the arguments passed to the workers"""
+        return self.name, self.size
+
+    def close(self):
+        self.shared_memory.close()
+        self.shared_memory.unlink()
 
-        pool.close()
-        pool.join()
+
+def load_shared_arguments(reference):
+    """
+    Load the pickled arguments published by ``SharedArguments`` - this function is called _inside_ the worker processes
+    and only keeps the arguments of the most recent block.
+
+    :return: the pickled arguments, to unpickle with ``pickle.loads`` for each call
+    :rtype: bytes
+    """
+    if reference not in __worker_shared_arguments:
+        name, size = reference
+        block = shared_memory.SharedMemory(name=name)
+        try:
+            data = bytes(block.buf[:size])
+        finally:
+            block.close()
+        __worker_shared_arguments.clear()
+        __worker_shared_arguments[reference] = data
+    return __worker_shared_arguments[reference]
+
+
+def __multiprocess_wrapper(func, processes, on_complete):
+    """Map the function on the worker pool, taking care to set up STDOUT and STDERR"""
+
+    def wrapper(*args):
+        print("Using {processes} CPU's".format(processes=processes))
+        pool, queue = get_pool(processes)
+
+        # make sure the first arg is a list (not a generator) since we need the length of the sequence
+        args = [list(a) for a in args]
+        n = len(args[0])  # the number of iterations to map
+        instance_args = list(zip(*args))
+
+        # arguments that are the same object in every call are only sent once
+        shared_positions = [p for p, a in enumerate(args) if n > 1 and all(x is a[0] for x in a)]
+        shared_arguments = SharedArguments({p: args[p][0] for p in shared_positions})
+        varying_positions = [p for p in range(len(args)) if p not in shared_positions]
+
+        # the index of each call is passed along, so the results can be put back in order. The calls are sent to the
+        # workers in chunks to keep the communication overhead low for many short calls.
+        chunksize = max(1, n // (processes * 4))
+        varying_args = [(index, tuple(a[p] for p in varying_positions)) for index, a in enumerate(instance_args)]
+        chunks = [(func, queue, shared_arguments.reference(), varying_positions, varying_args[i:i + chunksize])
+                  for i in range(0, n, chunksize)]
+        try:
+            completed_chunks = pool.imap_unordered(__apply_func_with_worker_stream, chunks)
+
+            result = [None] * n
+            i = 0
+            for _ in chunks:
+                while True:
+                    try:
+                        completed_calls = completed_chunks.next(timeout=0.01)
+                        break
+                    except multiprocessing.TimeoutError:
+                        stream_from_queue(queue)
+                # print the output of the calls before reporting them as completed
+                while not queue.empty():
+                    stream_from_queue(queue)
+                for index, result_index in completed_calls:
+                    result[index] = result_index
+                    if on_complete:
+                        on_complete(i, n, instance_args[index], result_index)
+                    i += 1
+        except BaseException:
+            # don't leave the remaining calls running on the pool
+            shutdown_pool()
+            raise
+        finally:
+            shared_arguments.close()
 
         # process the rest of the queue
         while not queue.empty():
@@ -108,10 +229,13 @@ def __multiprocess_wrapper(func, processes, on_complete):
 
 def __apply_func_with_worker_stream(args):
     """
-    Call func, using ``queue`` to redirect stdout and stderr, with a tuple of args because multiprocessing.Pool.map
-    only accepts one argument for the function.
+    Call func for a chunk of calls, using ``queue`` to redirect stdout and stderr, with a tuple of args because
+    multiprocessing.Pool.map only accepts one argument for the function. The arguments that are the same for all calls
+    are loaded from shared memory (see ``SharedArguments``).
 
     This function is called _inside_ a separate process.
+
+    :return: the index of each call (see ``__multiprocess_wrapper``) and the return value of ``func``
     """
 
     # set up logging
@@ -121,18 +245,20 @@ def __apply_func_with_worker_stream(args):
     suppress_3rd_party_debug_loggers()
 
     # unpack the arguments
-    func, queue, on_complete, i_queue, n, args = args[0], args[1], args[2], args[3], args[4], args[5:]
+    func, queue, shared_reference, varying_positions, calls = args
+    pickled_shared_args = load_shared_arguments(shared_reference)
 
     # set up printing to stderr and stdout to go through the queue
     sys.stdout = QueueWorkerStream('stdout', queue)
     sys.stderr = QueueWorkerStream('stderr', queue)
 
     # CALL
-    result = func(*args)
-
-    if on_complete:
-        on_complete(i_queue.get(), n, args, result)
-
+    result = []
+    for index, varying_args in calls:
+        # a copy of the shared arguments for each call
+        func_args = pickle.loads(pickled_shared_args)
+        func_args.update(zip(varying_positions, varying_args))
+        result.append((index, func(*[func_args[p] for p in range(len(func_args))])))
     return result
 
 
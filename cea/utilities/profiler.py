@@ -0,0 +1,115 @@
+"""
+Opt-in instrumentation of the stages of a calculation (e.g. the demand of a building, see ``demand:profile``).
+
+The stages are recorded with::
+
+    profiler.start(enabled)
+    with profiler.stage('calc_set_points', building_name):
+        ...
+    records = profiler.stop()
+
+Each record contains the wall time and the memory allocated (traced with ``tracemalloc``) during the stage, and the
+process that ran it, so the records of all worker processes can be collected into one report (see ``write_report``).
+When the profiler is not started, ``stage`` does nothing.
+"""
+
+import json
+import multiprocessing
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+MB = 1024.0 * 1024.0
+
+# the records of the current process (None if the profiler is not started)
+__records = None
+__started_tracemalloc = False
+
+
+def start(enabled=True):
+    """Start recording the stages of this process (if ``enabled``), tracing memory allocations with tracemalloc"""
+    global __records, __started_tracemalloc
+    if not enabled:
+        return
+    __records = []
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+        __started_tracemalloc = True
+
+
+def stop():
+    """
+    Stop recording the stages of this process.
+
+    :return: the records of the stages since ``start`` (an empty list if the profiler was not started)
+    :rtype: list[dict]
+    """
+    global __records, __started_tracemalloc
+    records = __records or []
+    __records = None
+    if __started_tracemalloc:
+        tracemalloc.stop()
+        __started_tracemalloc = False
+    return records
+
+
+def is_enabled():
+    return __records is not None
+
+
+@contextmanager
+def stage(name, building):
+    """
+    Record the wall time and the allocations of the code in the ``with`` block as the stage ``name`` of ``building``.
+    Stages should not be nested, as the tracing of the allocations is restarted at the start of each stage (to reset
+    the peak, ``tracemalloc.reset_peak`` needs python 3.9). The memory freed during the stage is only counted if it
+    was allocated in the stage. If tracemalloc was started by someone else, it is not restarted and the peak is the
+    peak since it was started.
+    """
+    if __records is None:
+        yield
+        return
+
+    if __started_tracemalloc:
+        tracemalloc.stop()
+        tracemalloc.start()
+    memory_start, _ = tracemalloc.get_traced_memory()
+    time_start = time.perf_counter()
+    try:
+        yield
+    finally:
+        wall_time = time.perf_counter() - time_start
+        memory_end, memory_peak = tracemalloc.get_traced_memory()
+        __records.append({'building': building,
+                          'stage': name,
+                          'worker': multiprocessing.current_process().name,
+                          'pid': os.getpid(),
+                          'wall_time_s': wall_time,
+                          'allocated_peak_MB': (memory_peak - memory_start) / MB,
+                          'allocated_net_MB': (memory_end - memory_start) / MB})
+
+
+def summarize(records, key):
+    """sum of the wall time and maximum of the allocation peak of the records grouped by ``key``"""
+    summary = {}
+    for record in records:
+        group = summary.setdefault(record[key], {'wall_time_s': 0.0, 'allocated_peak_MB': 0.0, 'count': 0})
+        group['wall_time_s'] += record['wall_time_s']
+        group['allocated_peak_MB'] = max(group['allocated_peak_MB'], record['allocated_peak_MB'])
+        group['count'] += 1
+    return summary
+
+
+def write_report(path, records, metadata):
+    """
+    Write the records of the stages to a json file, together with the ``metadata`` of the run (e.g. the CEA version)
+    and the totals per stage, per building and per worker.
+    """
+    report = dict(metadata)
+    report['stages'] = summarize(records, 'stage')
+    report['buildings'] = summarize(records, 'building')
+    report['workers'] = summarize(records, 'worker')
+    report['records'] = records
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
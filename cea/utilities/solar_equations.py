@@ -7,12 +7,15 @@ solar equations
 
 import numpy as np
 import pandas as pd
+import scipy.sparse
 import ephem
 import datetime
 import collections
+import hashlib
+import os
+import pickle
 from math import radians, degrees, asin, sin, acos, cos, tan, atan, pi
 
-from pyarrow import feather
 from timezonefinder import TimezoneFinder
 import pytz
 
@@ -25,6 +28,7 @@ __maintainer__ = "Daren Thomas"
 __email__ = "cea@arch.ethz.ch"
 __status__ = "Production"
 
+from cea.resources.radiation import sensor_store
 from cea.utilities.date import get_date_range_hours_from_year
 
 
@@ -90,8 +94,70 @@ def pyephem(datetime_local, latitude, longitude, altitude=0, pressure=101325,
     return sun_coords
 
 
+EARTH_MEAN_RADIUS_KM = 6371.01
+ASTRONOMICAL_UNIT_KM = 149597890.0
+
+
+def calc_sun_position(datetime_local, latitude, longitude):
+    """
+    Vectorized calculation of the position of the sun (without atmospheric refraction) with the PSA algorithm of
+    Blanco-Muriel et al. (2001), which is accurate to about 0.01 degrees - i.e. the same as ``pyephem`` with zero
+    pressure, but for all time steps at once.
+
+    :param datetime_local: time steps (localized)
+    :type datetime_local: pd.DatetimeIndex
+    :param float latitude: latitude of the site [degree]
+    :param float longitude: longitude of the site [degree]
+
+    :return: the elevation, azimuth (from north, clockwise) and zenith of the sun [degree] at each time step
+    :rtype: pd.DataFrame
+
+    .. [Blanco-Muriel, M., et al., 2001] Blanco-Muriel, M., et al. Computing the solar vector. Solar Energy, Vol. 70,
+        No. 5, 2001, pp 431-441.
+    """
+    datetime_utc = datetime_local.tz_convert('UTC')
+    hours_utc = datetime_utc.hour + datetime_utc.minute / 60.0 + datetime_utc.second / 3600.0
+    # days since 2000-01-01 12:00 UTC
+    elapsed_days = ((datetime_utc.tz_localize(None) - pd.Timestamp('2000-01-01 12:00:00')) /
+                    pd.Timedelta(days=1)).values
+
+    # ecliptic coordinates
+    omega = 2.1429 - 0.0010394594 * elapsed_days
+    mean_longitude = 4.8950630 + 0.017202791698 * elapsed_days
+    mean_anomaly = 6.2400600 + 0.0172019699 * elapsed_days
+    ecliptic_longitude = (mean_longitude + 0.03341607 * np.sin(mean_anomaly) +
+                          0.00034894 * np.sin(2 * mean_anomaly) - 0.0001134 - 0.0000203 * np.sin(omega))
+    ecliptic_obliquity = 0.4090928 - 6.2140e-9 * elapsed_days + 0.0000396 * np.cos(omega)
+
+    # celestial coordinates
+    right_ascension = np.arctan2(np.cos(ecliptic_obliquity) * np.sin(ecliptic_longitude),
+                                 np.cos(ecliptic_longitude)) % (2 * np.pi)
+    declination = np.arcsin(np.sin(ecliptic_obliquity) * np.sin(ecliptic_longitude))
+
+    # local coordinates
+    greenwich_mean_sidereal_time = 6.6974243242 + 0.0657098283 * elapsed_days + np.asarray(hours_utc)
+    local_mean_sidereal_time = np.radians(greenwich_mean_sidereal_time * 15 + longitude)
+    hour_angle = local_mean_sidereal_time - right_ascension
+    latitude_rad = np.radians(latitude)
+    zenith = np.arccos(np.clip(np.cos(latitude_rad) * np.cos(hour_angle) * np.cos(declination) +
+                               np.sin(declination) * np.sin(latitude_rad), -1, 1))
+    azimuth = np.arctan2(-np.sin(hour_angle),
+                         np.tan(declination) * np.cos(latitude_rad) - np.sin(latitude_rad) * np.cos(hour_angle))
+    azimuth = azimuth % (2 * np.pi)
+    # parallax correction
+    zenith = zenith + EARTH_MEAN_RADIUS_KM / ASTRONOMICAL_UNIT_KM * np.sin(zenith)
+
+    sun_coords = pd.DataFrame({'elevation': 90 - np.degrees(zenith), 'azimuth': np.degrees(azimuth),
+                               'zenith': np.degrees(zenith)}, index=datetime_local)
+    return sun_coords
+
+
 # solar properties
 SunProperties = collections.namedtuple('SunProperties', ['g', 'Sz', 'Az', 'ha', 'trr_mean', 'worst_sh', 'worst_Az'])
+SUN_PROPERTIES_FILE = 'sun_properties.pickle'
+SUN_PROPERTIES_VERSION = 1
+
+
 def calc_datetime_local_from_weather_file(weather_data, latitude, longitude):
     # read date from the weather file
     year = weather_data['year'][0]
@@ -138,16 +204,18 @@ def calc_sun_properties(latitude, longitude, weather_data, datetime_local, confi
     worst_hour = calc_worst_hour(latitude, weather_data, solar_window_solstice)
 
     # solar elevation, azimuth and values for the 9-3pm period of no shading on the solar solstice
-    sun_coords = pyephem(datetime_local, latitude, longitude)
-    sun_coords['declination'] = np.vectorize(declination_degree)(day_date, 365)
-    sun_coords['hour_angle'] = np.vectorize(get_hour_angle)(longitude, min_date, hour_date, day_date)
+    sun_coords = calc_sun_position(datetime_local, latitude, longitude)
+    sun_coords['declination'] = declination_degree(np.asarray(day_date), 365)
+    sun_coords['hour_angle'] = get_hour_angle(longitude, np.asarray(min_date), np.asarray(hour_date),
+                                              np.asarray(day_date))
     worst_sh = sun_coords['elevation'].loc[datetime_local[worst_hour]]
     worst_Az = sun_coords['azimuth'].loc[datetime_local[worst_hour]]
 
     # mean transmissivity
-    weather_data['diff'] = weather_data.difhorrad_Whm2 / weather_data.glohorrad_Whm2
-    T_G_hour = weather_data[np.isfinite(weather_data['diff'])]
-    T_G_day = np.round(T_G_hour.groupby(['dayofyear']).mean(numeric_only=True), 2)
+    diffuse_fraction = pd.DataFrame({'dayofyear': weather_data['dayofyear'],
+                                     'diff': weather_data.difhorrad_Whm2 / weather_data.glohorrad_Whm2})
+    T_G_hour = diffuse_fraction[np.isfinite(diffuse_fraction['diff'])]
+    T_G_day = np.round(T_G_hour.groupby(['dayofyear']).mean(), 2)
     T_G_day['diff'] = T_G_day['diff'].replace(1, 0.90)
     transmittivity = (1 - T_G_day['diff']).mean()
 
@@ -155,6 +223,67 @@ def calc_sun_properties(latitude, longitude, weather_data, datetime_local, confi
                          ha=sun_coords['hour_angle'], trr_mean=transmittivity, worst_sh=worst_sh, worst_Az=worst_Az)
 
 
+def get_sun_properties(locator, latitude, longitude, weather_data, datetime_local, config):
+    """
+    The sun properties of the scenario (see ``calc_sun_properties``). They only depend on the location, the weather
+    data and the solar window, so they are calculated once and stored in the solar potentials folder, where they are
+    shared by the photovoltaic, solar collector and photovoltaic-thermal scripts.
+
+    :rtype: SunProperties
+    """
+    path = get_sun_properties_file(locator)
+    key = calc_sun_properties_key(latitude, longitude, weather_data, datetime_local,
+                                  config.solar.solar_window_solstice)
+    sun_properties = read_sun_properties(path, key)
+    if sun_properties is None:
+        sun_properties = calc_sun_properties(latitude, longitude, weather_data, datetime_local, config)
+        write_sun_properties(path, key, sun_properties)
+    return sun_properties
+
+
+def get_sun_properties_file(locator):
+    return os.path.join(locator.solar_potential_folder(), SUN_PROPERTIES_FILE)
+
+
+def calc_sun_properties_key(latitude, longitude, weather_data, datetime_local, solar_window_solstice):
+    """The key of the stored sun properties: the location, the time steps, the solar window and the weather data"""
+    weather_hash = hashlib.sha256(pd.util.hash_pandas_object(
+        weather_data[['dayofyear', 'month', 'day', 'hour', 'difhorrad_Whm2', 'glohorrad_Whm2']],
+        index=True).values.tobytes()).hexdigest()
+    return {'version': SUN_PROPERTIES_VERSION,
+            'latitude': float(latitude),
+            'longitude': float(longitude),
+            'datetime_local': (str(datetime_local[0]), str(datetime_local.tz), len(datetime_local)),
+            'solar_window_solstice': solar_window_solstice,
+            'weather': weather_hash}
+
+
+def read_sun_properties(path, key):
+    """
+    Read the sun properties stored at ``path``.
+
+    :return: the sun properties or None if there are none or they were stored for another key
+    :rtype: SunProperties
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'rb') as f:
+            if pickle.load(f) != key:
+                return None
+            return SunProperties(*pickle.load(f))
+    except Exception:
+        # corrupt or incompatible sun properties are simply recalculated
+        return None
+
+
+def write_sun_properties(path, key, sun_properties):
+    """write the key and the sun properties to ``path``"""
+    with open(path, 'wb') as f:
+        pickle.dump(key, f, protocol=pickle.HIGHEST_PROTOCOL)
+        pickle.dump(tuple(sun_properties), f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
 def calc_sunrise(sunrise, Yearsimul, longitude, latitude):
     o, s = _ephem_setup(latitude, longitude, altitude=0, pressure=101325, temperature=12)
     for day in range(1, 366):  # Calculated according to NOAA website
@@ -176,7 +305,7 @@ def declination_degree(day_date, TY):
     .. [1] http://pysolar.org/
     """
 
-    return 23.45 * np.vectorize(sin)((2 * pi / (TY)) * (day_date - 81))
+    return 23.45 * np.sin((2 * pi / (TY)) * (day_date - 81))
 
 
 def get_hour_angle(longitude_deg, min_date, hour_date, day_date):
@@ -200,13 +329,14 @@ def get_solar_time(longitude_deg, min_date, hour_date, day_date):
 
 def get_equation_of_time(day_date):
     B = (day_date - 1) * 360 / 365
-    E = 229.2 * (0.000075 + 0.001868 * cos(B) - 0.032077 * sin(B) - 0.014615 * cos(2 * B) - 0.04089 * sin(2 * B))
+    E = 229.2 * (0.000075 + 0.001868 * np.cos(B) - 0.032077 * np.sin(B) - 0.014615 * np.cos(2 * B) -
+                 0.04089 * np.sin(2 * B))
     return E
 
 
 # filter sensor points with low solar potential
 
-def filter_low_potential(radiation_sensor_path, metadata_csv_path, config):
+def filter_low_potential(locator, building_name, config):
     """
     To filter the sensor points/hours with low radiation potential.
 
@@ -214,10 +344,11 @@ def filter_low_potential(radiation_sensor_path, metadata_csv_path, config):
     #. eliminate points when hourly production < 50 W/m2
     #. augment the solar radiation due to differences between panel reflectance and original reflectances used in daysim
 
-    :param radiation_sensor_path: solar insulation data on all surfaces of each building
-    :type radiation_csv: str
-    :param metadata_csv: solar insulation sensor data of each building
-    :type metadata_csv: str
+    :param locator: the locator of the scenario, with the radiation of the sensors of the building (see
+                    :py:mod:`cea.resources.radiation.sensor_store`) and their metadata
+    :type locator: cea.inputlocator.InputLocator
+    :param building_name: name of the building
+    :type building_name: str
     :return max_annual_radiation: yearly horizontal radiation [Wh/m2/year]
     :rtype max_annual_radiation: float
     :return annual_radiation_threshold: minimum yearly radiation threshold for sensor selection [Wh/m2/year]
@@ -235,18 +366,11 @@ def filter_low_potential(radiation_sensor_path, metadata_csv_path, config):
     #. No solar panels on windows.
     """
 
-    def f(x):
-        if x <= 50:
-            return 0
-        else:
-            return x
-
-    # read radiation file
-    sensors_rad = feather.read_feather(radiation_sensor_path)
-    sensors_metadata = pd.read_csv(metadata_csv_path)
+    # read the yearly radiation of the sensors, the hourly radiation is only read for the sensors kept
+    sensors_rad_sum = sensor_store.calc_sensor_totals(locator, building_name).to_frame('total_rad_Whm2')
+    sensors_metadata = pd.read_csv(locator.get_radiation_metadata(building_name))
 
     # join total radiation to sensor_metadata
-    sensors_rad_sum = sensors_rad.sum(0).to_frame('total_rad_Whm2')  # add new row with yearly radiation
     sensors_metadata.set_index('SURFACE', inplace=True)
     sensors_metadata = sensors_metadata.merge(sensors_rad_sum, left_index=True, right_index=True)  # [Wh/m2]
 
@@ -265,9 +389,10 @@ def filter_low_potential(radiation_sensor_path, metadata_csv_path, config):
     max_annual_radiation = sensors_rad_sum.max().values[0]
     annual_radiation_threshold_Whperm2 = float(config.solar.annual_radiation_threshold)*1000
     sensors_metadata_clean = sensors_metadata[sensors_metadata.total_rad_Whm2 >= annual_radiation_threshold_Whperm2]
-    sensors_rad_clean = sensors_rad[sensors_metadata_clean.index.tolist()]  # keep sensors above min radiation
+    sensors_rad_clean = sensor_store.read_sensor_radiation(
+        locator, building_name, sensors_metadata_clean.index.tolist())  # keep sensors above min radiation
 
-    sensors_rad_clean = sensors_rad_clean.applymap(lambda x: f(x))
+    sensors_rad_clean = sensors_rad_clean.mask(sensors_rad_clean <= 50, 0).astype(np.float64)
 
     return max_annual_radiation, annual_radiation_threshold_Whperm2, sensors_rad_clean, sensors_metadata_clean
 
@@ -713,31 +838,27 @@ def calc_groups(radiation_of_sensors_clean, sensors_metadata_cat):
     sensors_metadata_cat['surface'] = sensors_metadata_cat.index
     sensor_groups_ob = sensors_metadata_cat.groupby(
         ['CATB', 'CATGB', 'CATteta_z', 'type_orientation'])  # group the sensors by categories
-    number_groups = sensor_groups_ob.size().count() # TODO: check if redundant, it is actually equal to group_count
-    group_keys = sensor_groups_ob.groups.keys()
-
-    # empty dicts to store results
-    group_properties = {}
-    group_mean_radiations = {}
-    number_points = {}
-    group_count = 0
-    for key in group_keys:
-        # get surface names in group
-        surfaces_in_group = sensor_groups_ob['surface'].groups[key].values
-        number_points[group_count] = len(surfaces_in_group)
-        # write group properties
-        group_key = pd.Series({'CATB': key[0], 'CATGB': key[1], 'CATteta_z': key[2], 'type_orientation': key[3]})
-        group_info = pd.Series({'number_srfs': number_points, 'srfs': (''.join(surfaces_in_group))})
-        group_prop_sum = sensor_groups_ob.sum(numeric_only=True).loc[key][['AREA_m2', 'area_installed_module_m2']]
-        group_prop_mean = sensor_groups_ob.mean(numeric_only=True).loc[key].drop(['area_installed_module_m2', 'AREA_m2'])
-        group_properties[group_count] = pd.concat([group_key, group_prop_mean, group_prop_sum, group_info])
-        # calculate mean radiation among surfaces in group
-        group_mean_radiations[group_count] = radiation_of_sensors_clean[surfaces_in_group].mean(axis=1).values
-
-        group_count += 1
-
-    prop_observers = pd.DataFrame(group_properties).T
-    hourlydata_groups = pd.DataFrame(group_mean_radiations)
+    number_groups = sensor_groups_ob.ngroups
+    group_codes = sensor_groups_ob.ngroup().values  # number of the group of each sensor (in the order of the keys)
+    points_per_group = np.bincount(group_codes, minlength=number_groups)
+    number_points = dict(enumerate(points_per_group))
+
+    # write group properties, all groups are reduced at once
+    group_prop_sum = sensor_groups_ob[['AREA_m2', 'area_installed_module_m2']].sum()
+    group_prop_mean = sensor_groups_ob.mean(numeric_only=True).drop(columns=['area_installed_module_m2', 'AREA_m2'])
+    prop_observers = pd.concat([group_prop_mean, group_prop_sum], axis=1).reset_index()
+    prop_observers['number_srfs'] = points_per_group
+    prop_observers['srfs'] = sensor_groups_ob['surface'].agg(''.join).values
+
+    # calculate mean radiation among surfaces in group, with a sparse matrix summing the sensors of each group
+    sensor_columns = radiation_of_sensors_clean.columns.get_indexer(sensors_metadata_cat.index)
+    if (sensor_columns < 0).any():
+        raise ValueError('The radiation of some sensors is missing: %s' %
+                         list(sensors_metadata_cat.index[sensor_columns < 0]))
+    group_sums = scipy.sparse.csr_matrix((np.ones(len(group_codes)), (group_codes, sensor_columns)),
+                                         shape=(number_groups, radiation_of_sensors_clean.shape[1]))
+    group_mean_radiations = (group_sums @ radiation_of_sensors_clean.values.T) / points_per_group[:, np.newaxis]
+    hourlydata_groups = pd.DataFrame(group_mean_radiations.T)
 
     panel_groups = {'number_groups': number_groups, 'number_points': number_points,
                     'hourlydata_groups': hourlydata_groups, 'prop_observers': prop_observers}